@@ -16,6 +16,11 @@ class Config:
     # 注意：通义千问不需要配置API URL，因为DashScope SDK内置了端点
     # API端点已内置: https://dashscope.aliyuncs.com/api/v1
     QWEN_API_KEY = os.getenv('QWEN_API_KEY')
+    # 调用方式: generation使用DashScope SDK (Generation.call，默认)，
+    # openai使用DashScope的OpenAI兼容接口（messages格式、连接池、流式返回usage）
+    QWEN_API = os.getenv('AI_QWEN_API', 'generation')
+    QWEN_COMPATIBLE_BASE_URL = os.getenv('QWEN_COMPATIBLE_BASE_URL',
+                                         'https://dashscope.aliyuncs.com/compatible-mode/v1')
     
     # 智谱AI
     # 注意：智谱AI也不需要配置API URL，SDK内置了端点
@@ -26,6 +31,11 @@ class Config:
     # 需要API Key和Secret Key两个密钥
     BAIDU_API_KEY = os.getenv('BAIDU_API_KEY')
     BAIDU_SECRET_KEY = os.getenv('BAIDU_SECRET_KEY')
+    # access_token缓存文件，多个进程共享同一个token，为空时只在进程内缓存
+    BAIDU_TOKEN_CACHE = os.getenv(
+        'BAIDU_TOKEN_CACHE',
+        os.path.join(os.path.expanduser('~'), '.cache', 'ai-model-demo', 'baidu_token.json')
+    )
     
     # AIHubMix (第三方平台)
     # 注意：第三方平台需要配置API URL，因为端点不固定
@@ -41,6 +51,62 @@ class Config:
     AZURE_ENDPOINT = os.getenv('AZURE_ENDPOINT')
     AZURE_API_VERSION = os.getenv('AZURE_API_VERSION', '2024-08-01-preview')
     
+    # 模型目录缓存
+    # - 缓存文件: 各平台模型列表的磁盘缓存
+    # - TTL: 缓存有效期（秒），过期后使用条件请求重新验证
+    MODEL_CATALOG_CACHE = os.getenv(
+        'MODEL_CATALOG_CACHE',
+        os.path.join(os.path.expanduser('~'), '.cache', 'ai-model-demo', 'models.json')
+    )
+    MODEL_CATALOG_TTL = int(os.getenv('MODEL_CATALOG_TTL', '86400'))
+
+    # 模型能力覆盖 (OpenAI兼容平台)
+    # 键为 "platform:model" 或 "model"，值可包含:
+    # token_param, supports_temperature, stream_usage, context_window
+    # 例如Azure部署名称无法按模型系列识别时:
+    # 'azure:gpt-5-deployment': {'token_param': 'max_completion_tokens', 'supports_temperature': False}
+    MODEL_CAPABILITIES = {}
+    
+    # OpenAI兼容平台（OpenAI、AIHubMix、Azure，以及通义千问的OpenAI兼容模式）的传输方式
+    # - sdk: 使用OpenAI SDK（默认）
+    # - http: 直接发送HTTP请求并解析SSE，不构建SDK的pydantic对象，流式数据块的CPU开销更低
+    CHAT_TRANSPORT = os.getenv('AI_TRANSPORT', 'sdk')
+    
+    # 多进程执行模式: AIModelManager的工作进程数，0表示在当前进程中执行
+    # QPS较高、响应解析占满一个CPU核时开启，一般设置为CPU核数
+    WORKER_PROCESSES = int(os.getenv('AI_WORKER_PROCESSES', '0'))
+    
+    # 自适应并发控制: AIModelManager按平台和模型自动调整进行中请求数的上限
+    # 延迟平稳时增加上限，延迟上升或限流时降低，超过上限的请求排队等待
+    ADAPTIVE_CONCURRENCY = os.getenv('AI_ADAPTIVE_CONCURRENCY', '').lower() in ('1', 'true', 'yes')
+    ADAPTIVE_CONCURRENCY_INITIAL = int(os.getenv('AI_CONCURRENCY_INITIAL', '20'))
+    ADAPTIVE_CONCURRENCY_MAX = int(os.getenv('AI_CONCURRENCY_MAX', '200'))
+    
+    # 优先级与租户公平排队: 名额紧张时交互式请求优先于批量请求，各租户按权重分配名额
+    # 名额数: 开启自适应并发控制时跟随其上限，否则每个平台/模型 AI_SCHEDULER_CAPACITY 个
+    FAIR_SCHEDULING = os.getenv('AI_FAIR_SCHEDULING', '').lower() in ('1', 'true', 'yes')
+    SCHEDULER_CAPACITY = int(os.getenv('AI_SCHEDULER_CAPACITY', '32'))
+    # 租户权重，如 "web=4,internal=1"，未配置的租户权重为1
+    TENANT_WEIGHTS = os.getenv('AI_TENANT_WEIGHTS', '')
+    
+    # 准入控制: 限制每个平台/模型的排队长度和排队时间，超出或预计无法在截止时间内开始的请求
+    # 直接返回overloaded错误，避免上游变慢时排队请求无限堆积
+    ADMISSION_CONTROL = os.getenv('AI_ADMISSION_CONTROL', '').lower() in ('1', 'true', 'yes')
+    MAX_QUEUE = int(os.getenv('AI_MAX_QUEUE', '256'))
+    # 最长排队时间（秒），0表示只受请求的截止时间限制
+    MAX_QUEUE_TIME = float(os.getenv('AI_MAX_QUEUE_TIME', '30'))
+    
+    # 流量分配: 逻辑模型按权重分配到多个平台（AIModelManager.routed_chat）
+    # 格式 "逻辑模型=平台:模型:权重|平台:模型:权重;..."，如 "gpt-4o=openai:gpt-4o:90|azure:gpt-4o-deployment:10"
+    TRAFFIC_SPLITS = os.getenv('AI_TRAFFIC_SPLITS', '')
+    # 影子流量: 按比例把请求复制到候选平台，对比延迟和token数，不影响返回结果
+    # 格式 "逻辑模型=平台:模型:比例"，如 "gpt-4o=aihubmix:gpt-4o:0.05"
+    TRAFFIC_SHADOW = os.getenv('AI_TRAFFIC_SHADOW', '')
+    
+    # 调试模式: 在聊天结果中保留原始SDK响应 (raw_response)
+    # 原始响应会让完整的响应对象树一直驻留内存，只建议调试时开启
+    DEBUG_RAW_RESPONSE = os.getenv('AI_DEBUG_RAW_RESPONSE', '').lower() in ('1', 'true', 'yes')
+    
     # 默认模型配置
     DEFAULT_MODELS = {
         'openai': 'gpt-4o',  # 使用最新的GPT-4o模型
@@ -1,18 +1,125 @@
 """
 统一的平台客户端管理
 """
+import asyncio
+import inspect
+import time
+from functools import partial
+
+from config.config import Config
 from .qwen import QwenClient
 from .openai import OpenAIClient
 from .zhipu import ZhipuClient
 from .baidu import BaiduClient
 from .aihubmix import AIHubMixClient
 from .azure import AzureClient
+from .result import ChatResult, Usage
+from .stream import StreamAccumulator, collect_stream
+from .catalog import ModelCatalog, get_model_catalog
+from .capabilities import CapabilityIndex, ModelCapabilities, get_capability_index
+from .prompt_cache import PrefixCacheStats, build_messages
+from .singleflight import SingleFlight, StreamFlight, request_key, is_deterministic
+from .deadline import Deadline, DeadlineExceeded, guard_stream
+from .cancellation import CancelToken, StreamCancelled
+from .worker_pool import WorkerPool
+from .concurrency import AdaptiveLimit, ConcurrencyController
+from .scheduler import FairScheduler, INTERACTIVE, BATCH, parse_weights
+from .admission import AdmissionController
+from .traffic import TrafficRouter, TrafficPolicy, Route, Measurement, create_router
+from .fallback import FallbackChain, FallbackStats, FirstChunkTimer, attempt, LATENCY, TTFT
+from .stop import StopCondition, StopStats, apply_stop
+from .json_stream import JsonStreamParser, iter_json
+from .errors import (AIModelError, RateLimited, Timeout, AuthFailed, ContextTooLong, ContentFiltered,
+                     UpstreamUnavailable, Cancelled, Overloaded)
+
+# 平台名称 -> 客户端类
+_CLIENT_CLASSES = {
+    'qwen': QwenClient,
+    'openai': OpenAIClient,
+    'zhipu': ZhipuClient,
+    'baidu': BaiduClient,
+    'aihubmix': AIHubMixClient,
+    'azure': AzureClient,
+}
 
 class AIModelManager:
     """AI模型统一管理器"""
     
-    def __init__(self):
+    def __init__(self, processes: int = None, adaptive_concurrency=None, scheduler=None, admission=None,
+                 traffic=None, **pool_options):
+        """
+        初始化管理器
+        
+        Args:
+            processes: 工作进程数，大于0时请求在工作进程中执行（见WorkerPool），
+                       0表示在当前进程执行，默认使用配置中的值
+            adaptive_concurrency: 是否按平台和模型自适应限制并发（见ConcurrencyController），
+                                  也可以直接传入ConcurrencyController，默认使用配置中的值
+            scheduler: 是否按优先级和租户权重排队（见FairScheduler），也可以直接传入FairScheduler，
+                       默认使用配置中的值
+            admission: 是否限制排队长度和排队时间（见AdmissionController），也可以直接传入AdmissionController，
+                       默认使用配置中的值；开启时如果没有开启排队或自适应并发，按固定名额数排队
+            traffic: 逻辑模型的流量分配与影子流量（见TrafficRouter），默认按配置创建，False表示不使用
+            **pool_options: 传给WorkerPool的其他参数，如platforms、threads_per_process
+        """
         self.clients = {}
+        if processes is None:
+            processes = Config.WORKER_PROCESSES
+        # 多进程模式：请求合并和统计在当前进程完成，SDK调用和响应解析在工作进程中执行
+        self.pool = WorkerPool(processes, **pool_options) if processes > 0 else None
+        if adaptive_concurrency is None:
+            adaptive_concurrency = Config.ADAPTIVE_CONCURRENCY
+        if adaptive_concurrency is True:
+            adaptive_concurrency = ConcurrencyController(initial=Config.ADAPTIVE_CONCURRENCY_INITIAL,
+                                                         max_limit=Config.ADAPTIVE_CONCURRENCY_MAX)
+        # 自适应并发上限（多进程模式下同样在当前进程统一控制）
+        self.concurrency = adaptive_concurrency or None
+        if scheduler is None:
+            scheduler = Config.FAIR_SCHEDULING
+        if admission is None:
+            admission = Config.ADMISSION_CONTROL
+        if admission is True:
+            admission = AdmissionController(Config.MAX_QUEUE, Config.MAX_QUEUE_TIME or None)
+        if admission and not scheduler and self.concurrency is None:
+            scheduler = True
+        if scheduler is True:
+            capacity = Config.SCHEDULER_CAPACITY
+            if self.concurrency is not None:
+                # 名额数跟随自适应并发上限
+                controller = self.concurrency
+                capacity = lambda key: controller.get(*key).limit
+            scheduler = FairScheduler(capacity, parse_weights(Config.TENANT_WEIGHTS))
+        # 优先级与租户公平排队
+        self.scheduler = scheduler or None
+        # 排队长度与排队时间限制
+        self.admission = admission or None
+        # 降级链统计
+        self.fallback_stats = FallbackStats()
+        # 客户端停止条件统计
+        self.stop_stats = StopStats()
+        # 逻辑模型的加权流量分配与影子流量（routed_chat / routed_chat_stream）
+        if traffic is None:
+            traffic = create_router(Config.TRAFFIC_SPLITS, Config.TRAFFIC_SHADOW)
+        self.traffic = traffic or None
+        # 各平台提示词前缀缓存命中统计
+        self.prefix_cache_stats = PrefixCacheStats()
+        # 并发的相同确定性请求合并为一次上游调用
+        self._chat_flights = SingleFlight()
+        self._stream_flights = StreamFlight()
+    
+    @property
+    def catalog(self) -> ModelCatalog:
+        """进程内共享的模型目录"""
+        return get_model_catalog()
+    
+    def supports_model(self, platform: str, model: str):
+        """
+        查询平台是否提供某个模型（只查内存中的模型目录，不触发网络请求）
+        
+        Returns:
+            True/False；平台的模型列表尚未加载时返回None
+        """
+        return self.catalog.has_model(platform, model)
     
     def get_client(self, platform: str):
         """
@@ -25,52 +132,667 @@ class AIModelManager:
             对应平台的客户端实例
         """
         if platform not in self.clients:
-            if platform == 'qwen':
-                self.clients[platform] = QwenClient()
-            elif platform == 'openai':
-                self.clients[platform] = OpenAIClient()
-            elif platform == 'zhipu':
-                self.clients[platform] = ZhipuClient()
-            elif platform == 'baidu':
-                self.clients[platform] = BaiduClient()
-            elif platform == 'aihubmix':
-                self.clients[platform] = AIHubMixClient()
-            elif platform == 'azure':
-                self.clients[platform] = AzureClient()
-            else:
+            client_class = _CLIENT_CLASSES.get(platform)
+            if client_class is None:
                 raise ValueError(f"不支持的平台: {platform}")
+            self.clients[platform] = client_class()
         
         return self.clients[platform]
     
-    def chat(self, platform: str, message: str, **kwargs):
+    def chat(self, platform: str, message: str, coalesce: bool = None,
+             deadline=None, timeout: float = None, tenant: str = None, priority: str = None,
+             fallback=None, stop_when=None, **kwargs):
         """
         统一聊天接口
         
         Args:
             platform: 平台名称
             message: 用户消息
+            coalesce: 是否合并并发的相同请求，默认只合并temperature=0的请求
+            deadline: 截止时间（Deadline对象或time.time()时间戳），传递到SDK调用和重试；
+                      合并的请求只在等待共享结果时检查各自的截止时间
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            tenant: 租户（开启排队时按租户权重分配并发名额）
+            priority: 'interactive'（默认）或 'batch'，名额紧张时交互式请求优先
+            fallback: 降级链（FallbackChain或 [(platform, model), ...]），当前平台/模型过载、
+                      超时或超过延迟阈值时依次尝试
+            stop_when: 客户端停止条件（StopCondition、字符串、正则表达式或回调函数），
+                       指定时以流式方式请求，满足条件时停止生成，见chat_stream
             **kwargs: 其他参数
             
         Returns:
-            聊天响应
+            聊天响应；超过截止时间时返回code为'deadline_exceeded'的失败结果。
+            指定fallback时platform、model为实际提供结果的平台和模型，fallbacks为被跳过的步骤；
+            指定stop_when且提前停止时带stop_reason、generated_tokens和tokens_saved
         """
-        client = self.get_client(platform)
-        return client.chat(message, **kwargs)
+        deadline = Deadline.resolve(deadline, timeout)
+        if stop_when is not None:
+            return self._collect(self.chat_stream(platform, message, coalesce=coalesce, deadline=deadline,
+                                                  tenant=tenant, priority=priority, fallback=fallback,
+                                                  stop_when=stop_when, **kwargs))
+        if fallback:
+            return self._chat_fallback(platform, message, FallbackChain.of(fallback), coalesce=coalesce,
+                                       deadline=deadline, tenant=tenant, priority=priority, **kwargs)
+        if is_deterministic(kwargs, coalesce):
+            key = request_key(platform, message, kwargs)
+            # 合并的请求各自有截止时间：共享的上游调用不使用发起者的截止时间，
+            # 每个请求（包括发起者）只在等待结果时检查自己的截止时间
+            try:
+                response, shared = self._chat_flights.do(
+                    key,
+                    lambda: self._chat(platform, message, tenant=tenant, priority=priority, **kwargs),
+                    timeout=max(deadline.remaining(), 0) if deadline else None
+                )
+            except TimeoutError:
+                return ChatResult.from_exception(DeadlineExceeded())
+            # 共享的结果返回副本，避免调用方之间互相影响
+            return response.copy() if shared else response
+        return self._chat(platform, message, deadline=deadline, tenant=tenant, priority=priority, **kwargs)
+    
+    @staticmethod
+    def _collect(stream):
+        """读取整个流，生成与chat相同的结果，保留降级和停止条件的字段"""
+        accumulator = StreamAccumulator()
+        extra = {}
+        try:
+            for chunk in stream:
+                for key in ('platform', 'fallbacks', 'stop_reason', 'generated_tokens', 'tokens_saved'):
+                    if key in chunk:
+                        extra[key] = chunk[key]
+                accumulator.add(chunk)
+                if accumulator.error is not None:
+                    break
+        finally:
+            stream.close()
+        result = accumulator.result()
+        for key, value in extra.items():
+            result[key] = value
+        return result
+    
+    def _fallback_routes(self, platform: str, chain: FallbackChain, kwargs):
+        """降级链的全部步骤（第一步为调用本身的平台和模型），未指定模型时使用平台的默认模型"""
+        routes = [Route(platform, kwargs.pop('model', None))] + chain.steps
+        return [route if route.model else Route(route.platform, Config.DEFAULT_MODELS.get(route.platform))
+                for route in routes]
     
-    def chat_stream(self, platform: str, message: str, **kwargs):
+    def _chat_fallback(self, platform: str, message: str, chain: FallbackChain, deadline: Deadline = None,
+                       **kwargs):
+        routes = self._fallback_routes(platform, chain, kwargs)
+        attempts = []
+        served = None
+        for index, route in enumerate(routes):
+            last = index == len(routes) - 1
+            # 最后一步没有可降级的步骤，不再限制延迟
+            step_deadline = deadline
+            if chain.max_latency is not None and not last:
+                step_deadline = Deadline.resolve(deadline, chain.max_latency)
+            start = time.monotonic()
+            response = self.chat(route.platform, message, deadline=step_deadline, model=route.model, **kwargs)
+            if response.get('success'):
+                served = route
+                break
+            if last or (deadline is not None and deadline.expired):
+                break
+            if step_deadline is not deadline and step_deadline.expired:
+                reason = LATENCY
+            elif chain.should_fallback(response):
+                reason = response['error_type']
+            else:
+                break
+            attempts.append(attempt(route, reason, response, time.monotonic() - start))
+        
+        self.fallback_stats.record(served.name if served else None, attempts)
+        if served is not None or attempts:
+            # 合并的请求中leader的结果对象同时交给其他等待的请求，使用副本记录降级信息
+            response = response.copy()
+        if served is not None:
+            response['platform'] = served.platform
+            if response.get('model') is None:
+                response['model'] = served.model
+        if attempts:
+            response['fallbacks'] = attempts
+        return response
+    
+    def _chat(self, platform: str, message: str, tenant: str = None, priority: str = None, **kwargs):
+        permit = None
+        if self.concurrency is not None or self.scheduler is not None:
+            try:
+                permit = self._acquire(platform, kwargs, tenant, priority)
+            except AIModelError as e:
+                return ChatResult.from_exception(e)
+        response = None
+        try:
+            if self.pool is not None:
+                response = self.pool.chat(platform, message, **kwargs)
+            else:
+                response = self.get_client(platform).chat(message, **kwargs)
+        finally:
+            if permit is not None:
+                permit.release(response)
+        if response.get('success'):
+            self.prefix_cache_stats.record(platform, response.get('usage'))
+        return response
+    
+    def chat_stream(self, platform: str, message: str, coalesce: bool = None,
+                    deadline=None, timeout: float = None, cancel: CancelToken = None,
+                    tenant: str = None, priority: str = None, fallback=None, stop_when=None, **kwargs):
         """
         统一流式聊天接口
         
         Args:
             platform: 平台名称
             message: 用户消息
-            **kwargs: 其他参数
+            coalesce: 是否合并并发的相同请求，默认只合并temperature=0的请求。
+                      后加入的请求会先收到已经产生的数据块，再接收新的数据块
+            deadline: 截止时间（Deadline对象或time.time()时间戳），到期时关闭上游流
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
+            tenant: 租户（开启排队时按租户权重分配并发名额）
+            priority: 'interactive'（默认）或 'batch'，名额紧张时交互式请求优先
+            fallback: 降级链（FallbackChain或 [(platform, model), ...]），在收到首个数据块之前
+                      过载、超时或超过max_ttft时依次尝试
+            stop_when: 客户端停止条件（StopCondition、字符串、正则表达式或回调函数），
+                       满足时截断输出并关闭上游流
+            **kwargs: 其他参数，如idle_timeout（数据块之间的最长等待时间）
+            
+        Returns:
+            流式响应生成器，关闭生成器会同时关闭上游流；
+            超过截止时间或被取消时最后一个数据块为失败结果（code为'deadline_exceeded'或'cancelled'）。
+            指定fallback时首个数据块的platform为实际提供结果的平台，fallbacks为被跳过的步骤；
+            因stop_when停止时最后一个数据块的content为空，带stop_reason、generated_tokens（估算）
+            和tokens_saved（上限估计）
+        """
+        deadline = Deadline.resolve(deadline, timeout)
+        if stop_when is not None:
+            stream = self.chat_stream(platform, message, coalesce=coalesce, deadline=deadline, cancel=cancel,
+                                      tenant=tenant, priority=priority, fallback=fallback, **kwargs)
+            
+            def record(state, saved: int, served: str):
+                # 降级链时按实际提供结果的平台统计
+                self.stop_stats.record(served, state.reason, state.generated_tokens(), saved)
             
+            return apply_stop(stream, StopCondition.of(stop_when),
+                              lambda served: self._max_tokens(served, kwargs), record, platform)
+        if fallback:
+            return self._stream_fallback(platform, message, FallbackChain.of(fallback), coalesce=coalesce,
+                                         deadline=deadline, cancel=cancel, tenant=tenant, priority=priority,
+                                         **kwargs)
+        if is_deterministic(kwargs, coalesce):
+            key = request_key(platform, message, kwargs)
+            # 共享的上游流使用自己的取消句柄，所有请求都离开时取消，中断阻塞中的读取
+            upstream = CancelToken()
+            stream = self._stream_flights.stream(
+                key, lambda: self._chat_stream(platform, message, tenant=tenant, priority=priority,
+                                               cancel=upstream, **kwargs),
+                upstream
+            )
+            # 合并的请求各自有截止时间和取消句柄，到期或取消时只离开共享流；
+            # 共享的上游流不使用发起者的截止时间，所有请求都离开后关闭
+            if deadline is None and cancel is None:
+                return stream
+            return self._guard_stream(stream, deadline, cancel)
+        return self._chat_stream(platform, message, deadline=deadline, cancel=cancel, tenant=tenant,
+                                 priority=priority, **kwargs)
+    
+    def chat_stream_json(self, platform: str, message: str, path=None, multiple: bool = False, **kwargs):
+        """
+        流式JSON：数组元素（或path指定的值）一结束就返回，不等待完整响应
+    
+        Args:
+            platform: 平台名称
+            message: 用户消息（应要求模型以JSON格式回答）
+            path: 要返回的值的路径，如 'items.*'；默认为顶层数组的元素，顶层为对象时为其第一个数组字段的元素
+            multiple: 是否解析多个顶层JSON（如每行一个JSON对象）
+            **kwargs: 其他参数与chat_stream相同
+    
         Returns:
-            流式响应生成器
+            生成器：每个值结束时返回一个数据块（path为路径元组，value为值），
+            最后一个数据块的path为()，value为完整文档，带usage；
+            JSON无效或不完整时最后一个数据块为失败结果（code为'invalid_json'）。关闭生成器会同时关闭上游流
         """
+        # 通义千问关闭incremental_output时每个数据块是累计的完整文本
+        cumulative = platform == 'qwen' and kwargs.get('incremental_output') is False
+        return iter_json(self.chat_stream(platform, message, **kwargs), path, cumulative, multiple)
+    
+    def _max_tokens(self, platform: str, kwargs):
+        """按客户端的方式确定最大输出token数：max_completion_tokens优先，其次max_tokens，都未指定时为客户端的默认值"""
+        for key in ('max_completion_tokens', 'max_tokens'):
+            if kwargs.get(key) is not None:
+                return kwargs[key]
+        client = self.clients.get(platform) or _CLIENT_CLASSES.get(platform)
+        if client is None:
+            return None
+        parameter = inspect.signature(client.chat_stream).parameters.get('max_tokens')
+        if parameter is None or parameter.default is inspect.Parameter.empty:
+            return None
+        return parameter.default
+    
+    def _stream_fallback(self, platform: str, message: str, chain: FallbackChain, deadline: Deadline = None,
+                         cancel: CancelToken = None, **kwargs):
+        routes = self._fallback_routes(platform, chain, kwargs)
+        attempts = []
+        for index, route in enumerate(routes):
+            last = index == len(routes) - 1
+            step_cancel = cancel
+            timer = remove = None
+            if chain.max_ttft is not None and not last:
+                # 超过max_ttft仍未收到首个数据块时取消这一步；调用方的取消同样传递到这一步
+                step_cancel = CancelToken()
+                timer = FirstChunkTimer(chain.max_ttft, step_cancel)
+                if cancel is not None:
+                    remove = cancel.add_callback(step_cancel.cancel)
+            start = time.monotonic()
+            stream = self.chat_stream(route.platform, message, deadline=deadline, cancel=step_cancel,
+                                      model=route.model, **kwargs)
+            try:
+                first = next(stream, None)
+                in_time = timer.arrived() if timer is not None else True
+                reason = None
+                if first is not None and not last and not (deadline is not None and deadline.expired) \
+                        and not (cancel is not None and cancel.cancelled):
+                    if not in_time:
+                        reason = TTFT
+                    elif chain.should_fallback(first):
+                        reason = first['error_type']
+                if reason is not None:
+                    attempts.append(attempt(route, reason, first, time.monotonic() - start))
+                    continue
+                
+                served = route if first is not None and first.get('success') else None
+                self.fallback_stats.record(served.name if served else None, attempts)
+                if first is None:
+                    return
+                if served is not None or attempts:
+                    # 合并的流中数据块由多个调用方共享，使用副本记录降级信息
+                    first = first.copy()
+                if served is not None:
+                    first['platform'] = served.platform
+                if attempts:
+                    first['fallbacks'] = attempts
+                yield first
+                yield from stream
+                return
+            finally:
+                stream.close()
+                if remove is not None:
+                    remove()
+    
+    def _guard_stream(self, stream, deadline: Deadline, cancel: CancelToken):
+        try:
+            yield from guard_stream(stream, deadline, cancel)
+        except (DeadlineExceeded, StreamCancelled) as e:
+            yield ChatResult.from_exception(e)
+    
+    def _acquire(self, platform: str, kwargs, tenant: str = None, priority: str = None):
+        """
+        经过准入控制后按优先级和租户排队，再占用平台/模型的并发名额
+        
+        Returns:
+            名额（请求结束时调用release(result)）
+        
+        Raises:
+            Overloaded: 排队已满、排队超时或预计无法在截止时间内获得名额
+            DeadlineExceeded: 到达截止时间仍未获得名额
+        """
+        key = (platform, kwargs.get('model') or Config.DEFAULT_MODELS.get(platform))
+        deadline = kwargs.get('deadline')
+        if self.admission is None:
+            slot = self._take_slot(key, tenant, priority, deadline)
+            error = None
+        else:
+            queue_deadline = self.admission.enter(key, deadline)
+            slot = None
+            try:
+                slot = self._take_slot(key, tenant, priority, queue_deadline)
+            finally:
+                error = self.admission.leave(key, slot is not None, deadline)
+        if slot is None:
+            raise error or DeadlineExceeded()
+        return slot
+    
+    def _take_slot(self, key, tenant: str, priority: str, deadline: Deadline):
+        """排队并占用名额，到达deadline仍未获得时返回None"""
+        ticket = None
+        if self.scheduler is not None:
+            timeout = max(deadline.remaining(), 0) if deadline is not None else None
+            ticket = self.scheduler.acquire(key, tenant, priority, timeout)
+            if ticket is None or self.concurrency is None:
+                return ticket
+        permit = self.concurrency.acquire(*key, deadline)
+        if ticket is None:
+            return permit
+        if permit is None:
+            ticket.release()
+            return None
+        ticket.permit = permit
+        return ticket
+    
+    def _chat_stream(self, platform: str, message: str, tenant: str = None, priority: str = None, **kwargs):
+        if self.concurrency is not None or self.scheduler is not None:
+            return self._limited_stream(platform, message, tenant, priority, **kwargs)
+        return self._open_stream(platform, message, **kwargs)
+    
+    def _limited_stream(self, platform: str, message: str, tenant: str, priority: str, **kwargs):
+        """占用并发名额后打开流，流结束或被关闭时归还；首个数据块的等待时间作为延迟样本"""
+        try:
+            permit = self._acquire(platform, kwargs, tenant, priority)
+        except AIModelError as e:
+            yield ChatResult.from_exception(e)
+            return
+        last = None
+        stream = None
+        try:
+            stream = self._open_stream(platform, message, **kwargs)
+            for chunk in stream:
+                permit.mark_first_chunk()
+                last = chunk
+                yield chunk
+        finally:
+            if stream is not None:
+                stream.close()
+            permit.release(last)
+    
+    def _open_stream(self, platform: str, message: str, **kwargs):
+        if self.pool is not None:
+            cancel = kwargs.pop('cancel', None)
+            stream = self.pool.chat_stream(platform, message, **kwargs)
+            if cancel is not None:
+                # 取消时关闭远程流，由工作进程关闭上游流
+                stream = self._guard_stream(stream, None, cancel)
+            return self._record_stream_usage(platform, stream)
         client = self.get_client(platform)
-        return client.chat_stream(message, **kwargs)
+        return self._record_stream_usage(platform, client.chat_stream(message, **kwargs))
+    
+    def _record_stream_usage(self, platform: str, stream):
+        """透传流式数据块，并记录携带usage的数据块；调用方关闭生成器时关闭客户端的流"""
+        try:
+            for chunk in stream:
+                if chunk.get('usage'):
+                    self.prefix_cache_stats.record(platform, chunk['usage'])
+                yield chunk
+        finally:
+            stream.close()
+    
+    async def achat(self, platform: str, message: str, deadline=None, timeout: float = None,
+                    tenant: str = None, priority: str = None, **kwargs):
+        """
+        异步聊天接口
+        
+        客户端提供原生异步接口时（通义千问、百度千帆的achat）直接在事件循环中调用，不占用线程；
+        其他平台、多进程模式和指定降级链或停止条件的请求在线程池中调用chat。开启排队或自适应并发时，等待名额在线程池中进行，
+        获得名额后的请求仍使用原生异步接口。
+        
+        Args:
+            参数与chat相同（异步接口不合并并发的相同请求）
+            
+        Returns:
+            聊天响应
+        """
+        deadline = Deadline.resolve(deadline, timeout)
+        native = self.pool is None and not kwargs.get('fallback') and kwargs.get('stop_when') is None
+        client = self.get_client(platform) if native else None
+        if not hasattr(client, 'achat'):
+            return await asyncio.get_running_loop().run_in_executor(None, partial(
+                self.chat, platform, message, coalesce=False, deadline=deadline, tenant=tenant, priority=priority,
+                **kwargs))
+        
+        try:
+            permit = await self._aacquire(platform, kwargs, deadline, tenant, priority)
+        except AIModelError as e:
+            return ChatResult.from_exception(e)
+        response = None
+        try:
+            response = await client.achat(message, deadline=deadline, **kwargs)
+        finally:
+            if permit is not None:
+                permit.release(response)
+        if response.get('success'):
+            self.prefix_cache_stats.record(platform, response.get('usage'))
+        return response
+    
+    async def achat_stream(self, platform: str, message: str, deadline=None, timeout: float = None,
+                           cancel: CancelToken = None, tenant: str = None, priority: str = None, **kwargs):
+        """
+        异步流式聊天接口
+        
+        客户端提供原生异步接口时（achat_stream）在事件循环中读取流，不占用线程；
+        其他平台、多进程模式和指定降级链或停止条件的请求在线程池中逐块读取chat_stream。
+        
+        Args:
+            参数与chat_stream相同（异步接口不合并并发的相同请求）
+            
+        Yields:
+            流式响应数据；关闭生成器(aclose)会同时关闭上游流
+        """
+        deadline = Deadline.resolve(deadline, timeout)
+        native = self.pool is None and not kwargs.get('fallback') and kwargs.get('stop_when') is None
+        client = self.get_client(platform) if native else None
+        if not hasattr(client, 'achat_stream'):
+            stream = self.chat_stream(platform, message, coalesce=False, deadline=deadline, cancel=cancel,
+                                      tenant=tenant, priority=priority, **kwargs)
+            async for chunk in _iterate_in_executor(stream):
+                yield chunk
+            return
+        
+        try:
+            permit = await self._aacquire(platform, kwargs, deadline, tenant, priority)
+        except AIModelError as e:
+            yield ChatResult.from_exception(e)
+            return
+        last = None
+        stream = client.achat_stream(message, deadline=deadline, cancel=cancel, **kwargs)
+        try:
+            async for chunk in stream:
+                if permit is not None:
+                    permit.mark_first_chunk()
+                if chunk.get('usage'):
+                    self.prefix_cache_stats.record(platform, chunk['usage'])
+                last = chunk
+                yield chunk
+        finally:
+            await stream.aclose()
+            if permit is not None:
+                permit.release(last)
+    
+    async def _aacquire(self, platform: str, kwargs, deadline: Deadline, tenant: str, priority: str):
+        """在线程池中排队等待名额（未开启排队和自适应并发时返回None）"""
+        if self.concurrency is None and self.scheduler is None:
+            return None
+        return await asyncio.get_running_loop().run_in_executor(None, partial(
+            self._acquire, platform, dict(kwargs, deadline=deadline), tenant, priority))
+    
+    def routed_chat(self, model: str, message: str, route_key: str = None, **kwargs):
+        """
+        按逻辑模型的流量分配发送请求
+        
+        按权重选择一个 (平台, 模型) 路由；配置了影子流量时按比例把请求复制到候选平台，
+        影子请求在后台执行，不阻塞也不影响本次结果。
+        
+        Args:
+            model: 逻辑模型名称（见TrafficRouter）
+            message: 用户消息
+            route_key: 分配键（如用户ID），相同的key总是分配到同一个路由
+            **kwargs: 其他参数，同chat
+            
+        Returns:
+            聊天响应，platform字段为实际使用的平台
+            
+        Raises:
+            ValueError: 没有配置该逻辑模型的流量分配
+        """
+        route, pair = self._route(model, message, route_key, kwargs, stream=False)
+        start = time.perf_counter()
+        response = self.chat(route.platform, message, model=route.model, **kwargs)
+        self.traffic.record(model, Measurement(route.name, response, time.perf_counter() - start), pair)
+        if response.get('platform') is None:
+            response['platform'] = route.platform
+        return response
+    
+    def routed_chat_stream(self, model: str, message: str, route_key: str = None, **kwargs):
+        """
+        按逻辑模型的流量分配发送流式请求
+        
+        Args:
+            参数与routed_chat相同，其他参数同chat_stream
+            
+        Returns:
+            流式响应生成器；流结束时记录首个数据块延迟、完成延迟和token数，
+            调用方提前关闭时记为cancelled（不计入延迟和影子流量的差值）
+            
+        Raises:
+            ValueError: 没有配置该逻辑模型的流量分配
+        """
+        route, pair = self._route(model, message, route_key, kwargs, stream=True)
+        return self._measured_stream(model, route, pair, self.chat_stream(route.platform, message,
+                                                                         model=route.model, **kwargs))
+    
+    def _measured_stream(self, model: str, route: Route, pair, stream):
+        start = time.perf_counter()
+        ttft = None
+        last = usage = None
+        complete = False
+        try:
+            for chunk in stream:
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                if chunk.get('usage'):
+                    usage = chunk['usage']
+                last = chunk
+                yield chunk
+            complete = True
+        finally:
+            stream.close()
+            # 调用方提前关闭生成器时同样记录（标记为未完成），影子请求的配对随之完成
+            self.traffic.record(model, Measurement(route.name, last, time.perf_counter() - start, ttft, usage,
+                                                   complete), pair)
+    
+    def _route(self, model: str, message: str, route_key, kwargs, stream: bool):
+        """选择路由，抽中时在后台向候选平台发送影子请求"""
+        if self.traffic is None:
+            raise ValueError(f"未配置流量分配的模型: {model}")
+        route = self.traffic.pick(model, route_key)
+        # 影子请求不继承调用方的截止时间和取消句柄，以batch优先级执行
+        shadow_kwargs = {key: value for key, value in kwargs.items()
+                         if key not in ('deadline', 'timeout', 'cancel', 'priority', 'coalesce')}
+        
+        def run_shadow(candidate: Route) -> Measurement:
+            start = time.perf_counter()
+            options = dict(shadow_kwargs, model=candidate.model, coalesce=False, priority=BATCH,
+                           timeout=self.traffic.shadow_timeout)
+            if not stream:
+                response = self.chat(candidate.platform, message, **options)
+                return Measurement(candidate.name, response, time.perf_counter() - start)
+            ttft = None
+            last = usage = None
+            for chunk in self.chat_stream(candidate.platform, message, **options):
+                if ttft is None:
+                    ttft = time.perf_counter() - start
+                if chunk.get('usage'):
+                    usage = chunk['usage']
+                last = chunk
+            return Measurement(candidate.name, last, time.perf_counter() - start, ttft, usage)
+        
+        return route, self.traffic.mirror(model, run_shadow)
+    
+    def stop_report(self):
+        """
+        各平台因客户端停止条件提前结束的流和节省的token数
+        
+        Returns:
+            {platform: {'stopped', 'generated_tokens', 'tokens_saved', 'reasons': {原因: 次数}}}
+        """
+        return self.stop_stats.report()
+    
+    def fallback_report(self):
+        """
+        降级链统计
+        
+        Returns:
+            {"platform:model": {'served': 实际提供结果的次数, 'fell_back': {原因: 次数}}}，
+            原因为错误分类或'latency'/'ttft'
+        """
+        return self.fallback_stats.report()
+    
+    def traffic_report(self):
+        """
+        各逻辑模型的路由统计和影子流量对比（未配置时为空字典）
+        
+        Returns:
+            见TrafficRouter.report
+        """
+        return self.traffic.report() if self.traffic is not None else {}
+    
+    def prefix_cache_report(self):
+        """
+        各平台提示词前缀缓存命中情况
+        
+        Returns:
+            {platform: {'requests', 'hit_requests', 'prompt_tokens', 'cached_tokens',
+                        'hit_ratio', 'request_hit_ratio'}}
+        """
+        return self.prefix_cache_stats.report()
+    
+    def concurrency_report(self):
+        """
+        各平台/模型的自适应并发上限（未开启时为空字典）
+        
+        Returns:
+            {"platform:model": {'limit', 'inflight', 'waiting', 'rtt', 'baseline_rtt', 'samples', 'drops'}}
+        """
+        return self.concurrency.report() if self.concurrency is not None else {}
+    
+    def scheduler_report(self):
+        """
+        各平台/模型的排队情况（未开启时为空字典）
+        
+        Returns:
+            {"platform:model": {'capacity', 'inflight', 'waiting': {优先级: 排队数}, 'granted': {租户: 分配次数}}}
+        """
+        return self.scheduler.report() if self.scheduler is not None else {}
+    
+    def admission_report(self):
+        """
+        各平台/模型的排队深度与拒绝次数（未开启时为空字典）
+        
+        Returns:
+            {"platform:model": {'queue_depth', 'admitted', 'shed': {'queue_full', 'queue_time', 'deadline'},
+                                'estimated_wait'}}
+        """
+        return self.admission.report() if self.admission is not None else {}
+    
+    def close(self):
+        """关闭工作进程（多进程模式），等待进行中的影子请求结束"""
+        if self.traffic is not None:
+            self.traffic.close()
+        if self.pool is not None:
+            self.pool.close()
+    
+    def coalescing_stats(self):
+        """
+        请求合并统计
+        
+        Returns:
+            leaders为实际发起的上游调用数，coalesced为合并到进行中调用的请求数
+        """
+        return {
+            'chat_leaders': self._chat_flights.leaders,
+            'chat_coalesced': self._chat_flights.coalesced,
+            'stream_leaders': self._stream_flights.leaders,
+            'stream_coalesced': self._stream_flights.coalesced,
+        }
+
+async def _iterate_in_executor(stream):
+    """在线程池中逐块读取同步生成器，调用方关闭异步生成器时关闭原生成器"""
+    loop = asyncio.get_running_loop()
+    done = object()
+    try:
+        while True:
+            chunk = await loop.run_in_executor(None, next, stream, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        await loop.run_in_executor(None, stream.close)
 
 __all__ = [
     'QwenClient', 
@@ -79,5 +801,42 @@ __all__ = [
     'BaiduClient', 
     'AIHubMixClient',
     'AzureClient',
-    'AIModelManager'
+    'AIModelManager',
+    'WorkerPool',
+    'AdaptiveLimit',
+    'ConcurrencyController',
+    'FairScheduler',
+    'AdmissionController',
+    'TrafficRouter',
+    'FallbackChain',
+    'StopCondition',
+    'JsonStreamParser',
+    'TrafficPolicy',
+    'Route',
+    'INTERACTIVE',
+    'BATCH',
+    'ChatResult',
+    'Usage',
+    'StreamAccumulator',
+    'collect_stream',
+    'Deadline',
+    'DeadlineExceeded',
+    'CancelToken',
+    'StreamCancelled',
+    'AIModelError',
+    'RateLimited',
+    'Timeout',
+    'AuthFailed',
+    'ContextTooLong',
+    'ContentFiltered',
+    'UpstreamUnavailable',
+    'Cancelled',
+    'Overloaded',
+    'PrefixCacheStats',
+    'build_messages',
+    'ModelCatalog',
+    'get_model_catalog',
+    'CapabilityIndex',
+    'ModelCapabilities',
+    'get_capability_index'
 ]
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+准入控制与过载保护
+
+上游变慢时，等待并发名额的请求会不断堆积，每个排队的请求都占用线程和内存。
+AdmissionController为每个平台/模型的排队设置边界：
+
+- 排队数上限：排队已满时新请求立即被拒绝
+- 最长排队时间：超过后放弃排队并拒绝
+- 截止时间预估：按最近名额的分配间隔估算排队等待时间（排在前面的请求数 x 分配间隔），
+  预计等待时间已超过请求的剩余时间时立即拒绝，不再排队等待
+
+被拒绝的请求返回Overloaded错误（error_type为'overloaded'，带retry_after），不会发送到上游。
+排队本身由FairScheduler或自适应并发控制完成，这里只负责准入和统计。
+"""
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from .deadline import Deadline
+from .errors import Overloaded
+
+QUEUE_FULL = 'queue_full'
+QUEUE_TIME = 'queue_time'
+DEADLINE = 'deadline'
+
+
+class _QueueStats:
+    __slots__ = ('waiting', 'admitted', 'shed', 'grant_interval', 'last_grant')
+
+    def __init__(self):
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = {QUEUE_FULL: 0, QUEUE_TIME: 0, DEADLINE: 0}
+        # 排队时相邻两次分配名额的间隔（指数移动平均），用于估算排队等待时间
+        self.grant_interval: Optional[float] = None
+        self.last_grant: Optional[float] = None
+
+
+class AdmissionController:
+    """按平台/模型限制排队长度和排队时间"""
+
+    def __init__(self, max_queue: int = 256, max_queue_time: Optional[float] = 30.0):
+        """
+        Args:
+            max_queue: 每个平台/模型最多排队的请求数
+            max_queue_time: 最长排队时间（秒），None表示只受请求的截止时间限制
+        """
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self._stats: Dict[Hashable, _QueueStats] = {}
+        self._lock = threading.Lock()
+
+    def enter(self, key: Hashable, deadline: Optional[Deadline] = None) -> Optional[Deadline]:
+        """
+        请求开始排队
+
+        Args:
+            key: 平台/模型
+            deadline: 请求的截止时间
+
+        Returns:
+            排队的截止时间（请求截止时间与最长排队时间中较早者），None表示不限制
+
+        Raises:
+            Overloaded: 排队已满，或预计排队等待时间超过请求的剩余时间
+        """
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = _QueueStats()
+            if stats.waiting >= self.max_queue:
+                stats.shed[QUEUE_FULL] += 1
+                raise Overloaded(f"排队已满（{stats.waiting}个请求排队中），已拒绝",
+                                 retry_after=self._estimate(stats), reason=QUEUE_FULL)
+            estimate = self._estimate(stats)
+            if deadline is not None and estimate is not None and estimate > deadline.remaining():
+                stats.shed[DEADLINE] += 1
+                raise Overloaded(f"预计排队{estimate:.2f}秒，超过剩余时间，已拒绝",
+                                 retry_after=estimate, reason=DEADLINE)
+            stats.waiting += 1
+
+        if self.max_queue_time is None:
+            return deadline
+        limit = Deadline.after(self.max_queue_time)
+        if deadline is not None and deadline.expires_at <= limit.expires_at:
+            return deadline
+        return limit
+
+    def leave(self, key: Hashable, granted: bool, deadline: Optional[Deadline] = None) -> Optional[Overloaded]:
+        """
+        请求结束排队
+
+        Args:
+            granted: 是否获得了名额
+            deadline: 请求的截止时间，用于区分排队超时与请求到期
+
+        Returns:
+            未获得名额且请求本身尚未到期（超过最长排队时间）时返回Overloaded错误，否则返回None
+        """
+        now = time.monotonic()
+        with self._lock:
+            stats = self._stats[key]
+            stats.waiting -= 1
+            if granted:
+                stats.admitted += 1
+                if stats.last_grant is not None and stats.waiting > 0:
+                    interval = now - stats.last_grant
+                    if stats.grant_interval is None:
+                        stats.grant_interval = interval
+                    else:
+                        stats.grant_interval += (interval - stats.grant_interval) * 0.1
+                stats.last_grant = now
+                return None
+            if deadline is not None and deadline.expired:
+                return None
+            stats.shed[QUEUE_TIME] += 1
+        return Overloaded(f"排队超过{self.max_queue_time}秒，已拒绝",
+                          retry_after=self.max_queue_time, reason=QUEUE_TIME)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各平台/模型的排队与拒绝统计
+
+        Returns:
+            {"platform:model": {'queue_depth', 'admitted', 'shed': {原因: 次数}, 'estimated_wait'}}
+        """
+        with self._lock:
+            return {
+                ':'.join(str(part) for part in key if part) if isinstance(key, tuple) else str(key): {
+                    'queue_depth': stats.waiting,
+                    'admitted': stats.admitted,
+                    'shed': dict(stats.shed),
+                    'estimated_wait': self._estimate(stats),
+                }
+                for key, stats in self._stats.items()
+            }
+
+    @staticmethod
+    def _estimate(stats: _QueueStats) -> Optional[float]:
+        """新请求的预计排队时间；没有排队或尚无分配间隔数据时返回None"""
+        if stats.waiting == 0 or stats.grant_interval is None:
+            return None
+        return stats.waiting * stats.grant_interval
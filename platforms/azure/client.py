@@ -2,14 +2,23 @@
 Azure OpenAI API客户端
 """
 from openai import AzureOpenAI
-from typing import Optional, Dict, Any, Generator
+from typing import Optional, Dict, Any, Generator, Tuple
 from config.config import Config
+from ..result import ChatResult, Usage
+from ..prompt_cache import build_messages
+from ..openai.batch import OpenAIBatch
+from ..capabilities import get_capability_index
+from ..deadline import Deadline, call_with_deadline, guard_stream, timeout_kwargs
+from ..cancellation import CancelToken
+from ..transport import ChatTransport, HTTP, completion_result, stream_chunks
 
 class AzureClient:
     def __init__(self, 
                  api_key: Optional[str] = None, 
                  endpoint: Optional[str] = None,
-                 api_version: Optional[str] = None):
+                 api_version: Optional[str] = None,
+                 debug: Optional[bool] = None,
+                 transport: Optional[str] = None):
         """
         初始化Azure OpenAI客户端
         
@@ -22,10 +31,13 @@ class AzureClient:
             api_key: Azure OpenAI API密钥，如果不提供则从配置中获取
             endpoint: Azure OpenAI端点URL，如果不提供则从配置中获取
             api_version: API版本，如果不提供则从配置中获取
+            debug: 是否在结果中保留原始响应(raw_response)，默认使用配置中的值
+            transport: 传输方式，'sdk'使用OpenAI SDK，'http'直接发送HTTP请求（不构建SDK对象），默认使用配置中的值
         """
         self.api_key = api_key or Config.AZURE_API_KEY
         self.endpoint = endpoint or Config.AZURE_ENDPOINT
         self.api_version = api_version or Config.AZURE_API_VERSION
+        self.debug = Config.DEBUG_RAW_RESPONSE if debug is None else debug
         
         if not self.api_key:
             raise ValueError("Azure OpenAI API Key未设置")
@@ -39,13 +51,25 @@ class AzureClient:
             azure_endpoint=self.endpoint,
             api_version=self.api_version
         )
+        # 设置了截止时间的请求不使用SDK内置重试，由call_with_deadline在剩余时间内重试
+        self.deadline_client = self.client.with_options(max_retries=0)
+        self.capabilities = get_capability_index()
+        # 轻量HTTP传输：直接使用/chat/completions的线路格式，返回与SDK路径相同的结果
+        self.transport = transport or Config.CHAT_TRANSPORT
+        self.http = None
+        if self.transport == HTTP:
+            self.http = ChatTransport.azure(self.api_key, self.endpoint, self.api_version)
+        self.batch = OpenAIBatch(self.client, 'azure', endpoint='/chat/completions')
     
     def chat(self, 
              message: str, 
              model: str = None, 
              temperature: float = 0.7,
              max_tokens: int = 1000,
+             max_completion_tokens: int = None,
              system_prompt: str = None,
+             deadline: Optional[Deadline] = None,
+             timeout: float = None,
              **kwargs) -> Dict[str, Any]:
         """
         发送聊天请求
@@ -57,8 +81,11 @@ class AzureClient:
             message: 用户消息
             model: 部署名称（deployment name），默认使用配置中的部署
             temperature: 温度参数
-            max_tokens: 最大token数量
+            max_tokens: 最大token数量 (兼容旧模型)
+            max_completion_tokens: 最大完成token数量 (新模型如GPT-5)
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
             **kwargs: 其他参数
             
         Returns:
@@ -67,43 +94,55 @@ class AzureClient:
         # Azure中使用部署名称，不是模型名称
         deployment_name = model or Config.DEFAULT_MODELS['azure']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        
+        caps = self.capabilities.lookup('azure', deployment_name)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            response = self.client.chat.completions.create(
+            params = dict(
                 model=deployment_name,  # 在Azure中这是部署名称
                 messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+                **caps.sampling_kwargs(temperature),
+                **caps.token_kwargs(max_tokens, max_completion_tokens),
                 **kwargs
             )
+            if self.http is not None:
+                data = call_with_deadline(lambda: self.http.create(params, **timeout_kwargs(deadline)), deadline)
+                result = completion_result(data, deployment_name, deployment_name=deployment_name)
+                if self.debug:
+                    result.raw_response = data
+                return result
+            
+            response = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline)
+            ), deadline)
             
-            return {
-                'success': True,
-                'content': response.choices[0].message.content,
-                'model': deployment_name,
-                'deployment_name': deployment_name,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                } if response.usage else None
-            }
+            result = ChatResult.ok(
+                response.choices[0].message.content,
+                deployment_name,
+                Usage.from_openai(response.usage),
+                deployment_name=deployment_name
+            )
+            if self.debug:
+                result.raw_response = response
+            return result
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return ChatResult.from_exception(e)
     
     def chat_stream(self, 
                    message: str, 
                    model: str = None, 
                    temperature: float = 0.7,
                    max_tokens: int = 1000,
+                   max_completion_tokens: int = None,
                    system_prompt: str = None,
+                   deadline: Optional[Deadline] = None,
+                   timeout: float = None,
+                   idle_timeout: float = None,
+                   cancel: Optional[CancelToken] = None,
                    **kwargs) -> Generator[Dict[str, Any], None, None]:
         """
         流式聊天请求
@@ -112,40 +151,92 @@ class AzureClient:
             message: 用户消息
             model: 部署名称（deployment name）
             temperature: 温度参数
-            max_tokens: 最大token数量
+            max_tokens: 最大token数量 (兼容旧模型)
+            max_completion_tokens: 最大完成token数量 (新模型如GPT-5)
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
             **kwargs: 其他参数
             
         Yields:
-            流式响应数据
+            流式响应数据；关闭生成器会同时关闭SDK的流和HTTP响应
         """
         deployment_name = model or Config.DEFAULT_MODELS['azure']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        
+        caps = self.capabilities.lookup('azure', deployment_name)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            stream = self.client.chat.completions.create(
+            params = dict(
                 model=deployment_name,
                 messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
                 stream=True,
+                **({} if 'stream_options' in kwargs else caps.stream_kwargs()),
+                **caps.sampling_kwargs(temperature),
+                **caps.token_kwargs(max_tokens, max_completion_tokens),
                 **kwargs
             )
+            if self.http is not None:
+                events = call_with_deadline(
+                    lambda: self.http.stream(params, **timeout_kwargs(deadline, idle_timeout)), deadline
+                )
+                yield from stream_chunks(guard_stream(events, deadline, cancel), deployment_name,
+                                         deployment_name=deployment_name)
+                return
             
-            for chunk in stream:
+            stream = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline, idle_timeout)
+            ), deadline)
+            
+            for chunk in guard_stream(stream, deadline, cancel):
                 if chunk.choices and len(chunk.choices) > 0 and chunk.choices[0].delta.content:
-                    yield {
-                        'success': True,
-                        'content': chunk.choices[0].delta.content,
-                        'model': deployment_name,
-                        'deployment_name': deployment_name
-                    }
+                    yield ChatResult.chunk(
+                        chunk.choices[0].delta.content,
+                        deployment_name,
+                        deployment_name=deployment_name
+                    )
+                if getattr(chunk, 'usage', None):
+                    # 流结束时的usage（include_usage时最后一个数据块没有choices）
+                    yield ChatResult.chunk('', deployment_name, Usage.from_openai(chunk.usage),
+                                           deployment_name=deployment_name)
         except Exception as e:
-            yield {
-                'success': False,
-                'error': str(e)
-            }
\ No newline at end of file
+            yield ChatResult.from_exception(e)
+    
+    def chat_batch(self, 
+                   prompts, 
+                   model: str = None, 
+                   poll_interval: float = 5,
+                   max_interval: float = 60,
+                   timeout: float = None,
+                   **kwargs) -> Generator[Tuple[str, ChatResult], None, None]:
+        """
+        通过Batch API批量聊天
+        
+        适合大批量离线任务：提交异步批处理任务，按指数退避轮询，完成后流式返回结果。
+        
+        Args:
+            prompts: 提示词迭代器，元素可以是字符串、(custom_id, message) 或 {'id': ..., 'message': ...}
+            model: 部署名称（deployment name），需要是Global Batch类型的部署
+            poll_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            timeout: 最长等待时间（秒）
+            **kwargs: 其他参数，同chat接口 (temperature, max_tokens, system_prompt等)
+            
+        Yields:
+            (custom_id, 结果)
+        """
+        model = model or Config.DEFAULT_MODELS['azure']
+        yield from self.batch.run(
+            prompts,
+            model,
+            poll_interval=poll_interval,
+            max_interval=max_interval,
+            timeout=timeout,
+            **kwargs
+        )
@@ -1,3 +1,4 @@
 from .client import BaiduClient
+from .token import AccessTokenProvider, get_token_provider
 
-__all__ = ['BaiduClient']
\ No newline at end of file
+__all__ = ['BaiduClient', 'AccessTokenProvider', 'get_token_provider']
\ No newline at end of file
@@ -1,21 +1,37 @@
 """
 百度千帆API客户端
+
+achat / achat_stream 使用SDK的异步接口 (ChatCompletion.ado)，在事件循环中完成网络IO，不占用线程
 """
 import qianfan
-from typing import Optional, Dict, Any, Generator
+from typing import Optional, Dict, Any, Generator, AsyncGenerator, List
 from config.config import Config
+from ..result import ChatResult, Usage
+from ..prompt_cache import build_messages, normalize_prompt
+from ..deadline import (Deadline, call_with_deadline, call_with_deadline_async, guard_async_stream,
+                        guard_stream, timeout_kwargs)
+from ..cancellation import CancelToken
+from .token import AccessTokenProvider, get_token_provider
+
+# access_token无效或过期的错误码
+TOKEN_ERROR_CODES = (110, 111)
 
 class BaiduClient:
-    def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, secret_key: Optional[str] = None,
+                 debug: Optional[bool] = None,
+                 token_provider: Optional[AccessTokenProvider] = None):
         """
         初始化百度千帆客户端
         
         Args:
             api_key: API密钥，如果不提供则从配置中获取
             secret_key: Secret密钥，如果不提供则从配置中获取
+            debug: 是否在结果中保留原始响应(raw_response)，默认使用配置中的值
+            token_provider: access_token提供者，默认使用进程内按API Key共享的提供者
         """
         self.api_key = api_key or Config.BAIDU_API_KEY
         self.secret_key = secret_key or Config.BAIDU_SECRET_KEY
+        self.debug = Config.DEBUG_RAW_RESPONSE if debug is None else debug
         
         if not self.api_key or not self.secret_key:
             raise ValueError("百度API Key或Secret Key未设置")
@@ -25,6 +41,27 @@ class BaiduClient:
         qianfan.sk = self.secret_key
         
         self.chat_comp = qianfan.ChatCompletion()
+        
+        # access_token由后台线程获取和刷新（多进程通过文件缓存共享），请求不等待token获取；
+        # 还没有token时使用上面的AK/SK认证
+        self.token_provider = token_provider or get_token_provider(self.api_key, self.secret_key)
+        self.token_provider.start()
+        self._token_comp = None
+        self._token_comp_token = None
+    
+    def _completion(self):
+        """返回当前使用的ChatCompletion对象和access_token（没有可用token时为None）"""
+        token = self.token_provider.peek()
+        if token is None:
+            return self.chat_comp, None
+        if token != self._token_comp_token:
+            self._token_comp = qianfan.ChatCompletion(access_token=token)
+            self._token_comp_token = token
+        return self._token_comp, token
+    
+    def _check_token_error(self, error_code: Any, token: Optional[str]) -> None:
+        if token is not None and error_code in TOKEN_ERROR_CODES:
+            self.token_provider.invalidate(token)
     
     def chat(self, 
              message: str, 
@@ -32,6 +69,8 @@ class BaiduClient:
              temperature: float = 0.7,
              max_tokens: int = 1000,
              system_prompt: str = None,
+             deadline: Optional[Deadline] = None,
+             timeout: float = None,
              **kwargs) -> Dict[str, Any]:
         """
         发送聊天请求
@@ -42,6 +81,8 @@ class BaiduClient:
             temperature: 温度参数
             max_tokens: 最大token数量
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
             **kwargs: 其他参数
             
         Returns:
@@ -49,38 +90,29 @@ class BaiduClient:
         """
         model = model or Config.DEFAULT_MODELS['baidu']
         
-        messages = []
+        # 系统提示词通过system参数传递（千帆要求messages中user/assistant交替出现），
+        # 固定的system前缀也便于命中服务端缓存
+        messages = build_messages(message)
         if system_prompt:
-            messages.append({"role": "user", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+            kwargs['system'] = normalize_prompt(system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        
+        chat_comp, token = self._completion()
         
         try:
-            response = self.chat_comp.do(
+            response = call_with_deadline(lambda: chat_comp.do(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_output_tokens=max_tokens,
+                **timeout_kwargs(deadline, name='request_timeout'),
                 **kwargs
-            )
+            ), deadline)
             
-            if response.get('error_code'):
-                return {
-                    'success': False,
-                    'error': response.get('error_msg'),
-                    'code': response.get('error_code')
-                }
-            
-            return {
-                'success': True,
-                'content': response['result'],
-                'model': model,
-                'usage': response.get('usage')
-            }
+            return self._result(response, model, token)
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            self._check_token_error(getattr(e, 'error_code', None), token)
+            return ChatResult.from_exception(e)
     
     def chat_stream(self, 
                    message: str, 
@@ -88,6 +120,10 @@ class BaiduClient:
                    temperature: float = 0.7,
                    max_tokens: int = 1000,
                    system_prompt: str = None,
+                   deadline: Optional[Deadline] = None,
+                   timeout: float = None,
+                   idle_timeout: float = None,
+                   cancel: Optional[CancelToken] = None,
                    **kwargs) -> Generator[Dict[str, Any], None, None]:
         """
         流式聊天请求
@@ -98,45 +134,152 @@ class BaiduClient:
             temperature: 温度参数
             max_tokens: 最大token数量
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
             **kwargs: 其他参数
             
         Yields:
-            流式响应数据
+            流式响应数据；关闭生成器会同时关闭SDK的流和HTTP响应
         """
         model = model or Config.DEFAULT_MODELS['baidu']
         
-        messages = []
+        # 系统提示词通过system参数传递（千帆要求messages中user/assistant交替出现），
+        # 固定的system前缀也便于命中服务端缓存
+        messages = build_messages(message)
         if system_prompt:
-            messages.append({"role": "user", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+            kwargs['system'] = normalize_prompt(system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        
+        chat_comp, token = self._completion()
         
         try:
-            response = self.chat_comp.do(
+            response = call_with_deadline(lambda: chat_comp.do(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_output_tokens=max_tokens,
                 stream=True,
+                **timeout_kwargs(deadline, idle_timeout, name='request_timeout'),
                 **kwargs
-            )
+            ), deadline)
             
-            for chunk in response:
-                if chunk.get('error_code'):
-                    yield {
-                        'success': False,
-                        'error': chunk.get('error_msg'),
-                        'code': chunk.get('error_code')
-                    }
+            for chunk in guard_stream(response, deadline, cancel):
+                results = self._chunks(chunk, model, token)
+                yield from results
+                if results and not results[-1]['success']:
                     break
-                
-                if chunk.get('result'):
-                    yield {
-                        'success': True,
-                        'content': chunk['result'],
-                        'model': model
-                    }
         except Exception as e:
-            yield {
-                'success': False,
-                'error': str(e)
-            }
\ No newline at end of file
+            self._check_token_error(getattr(e, 'error_code', None), token)
+            yield ChatResult.from_exception(e)
+    
+    async def achat(self, 
+                    message: str, 
+                    model: str = None, 
+                    temperature: float = 0.7,
+                    max_tokens: int = 1000,
+                    system_prompt: str = None,
+                    deadline: Optional[Deadline] = None,
+                    timeout: float = None,
+                    **kwargs) -> Dict[str, Any]:
+        """
+        异步聊天请求（ChatCompletion.ado），参数和返回值与chat相同
+        """
+        model = model or Config.DEFAULT_MODELS['baidu']
+        messages = build_messages(message)
+        if system_prompt:
+            kwargs['system'] = normalize_prompt(system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        
+        chat_comp, token = self._completion()
+        
+        try:
+            response = await call_with_deadline_async(lambda: chat_comp.ado(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                **timeout_kwargs(deadline, name='request_timeout'),
+                **kwargs
+            ), deadline)
+            return self._result(response, model, token)
+        except Exception as e:
+            self._check_token_error(getattr(e, 'error_code', None), token)
+            return ChatResult.from_exception(e)
+    
+    async def achat_stream(self, 
+                           message: str, 
+                           model: str = None, 
+                           temperature: float = 0.7,
+                           max_tokens: int = 1000,
+                           system_prompt: str = None,
+                           deadline: Optional[Deadline] = None,
+                           timeout: float = None,
+                           idle_timeout: float = None,
+                           cancel: Optional[CancelToken] = None,
+                           **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        异步流式聊天请求（ChatCompletion.ado），参数与chat_stream相同
+        
+        Yields:
+            流式响应数据；关闭生成器(aclose)会同时关闭SDK的流
+        """
+        model = model or Config.DEFAULT_MODELS['baidu']
+        messages = build_messages(message)
+        if system_prompt:
+            kwargs['system'] = normalize_prompt(system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        
+        chat_comp, token = self._completion()
+        
+        try:
+            response = await call_with_deadline_async(lambda: chat_comp.ado(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_output_tokens=max_tokens,
+                stream=True,
+                **timeout_kwargs(deadline, idle_timeout, name='request_timeout'),
+                **kwargs
+            ), deadline)
+            
+            # 调用方关闭生成器时立即关闭上游流（异步生成器不会随外层生成器同步关闭）
+            stream = guard_async_stream(response, deadline, cancel, idle_timeout)
+            try:
+                async for chunk in stream:
+                    results = self._chunks(chunk, model, token)
+                    for result in results:
+                        yield result
+                    if results and not results[-1]['success']:
+                        break
+            finally:
+                await stream.aclose()
+        except Exception as e:
+            self._check_token_error(getattr(e, 'error_code', None), token)
+            yield ChatResult.from_exception(e)
+    
+    def _result(self, response, model: str, token: Optional[str]) -> ChatResult:
+        """把千帆的响应转换为ChatResult"""
+        if response.get('error_code'):
+            self._check_token_error(response.get('error_code'), token)
+            return ChatResult.fail(response.get('error_msg'), response.get('error_code'))
+        
+        result = ChatResult.ok(response['result'], model, Usage.from_dict(response.get('usage')))
+        if self.debug:
+            result.raw_response = response
+        return result
+    
+    def _chunks(self, chunk, model: str, token: Optional[str]) -> List[ChatResult]:
+        """把流式响应的数据块转换为ChatResult列表（出错时最后一个为失败结果）"""
+        if chunk.get('error_code'):
+            self._check_token_error(chunk.get('error_code'), token)
+            return [ChatResult.fail(chunk.get('error_msg'), chunk.get('error_code'))]
+        
+        results = []
+        if chunk.get('result'):
+            results.append(ChatResult.chunk(chunk['result'], model))
+        if chunk.get('is_end') and chunk.get('usage'):
+            # 最后一个数据块携带usage
+            results.append(ChatResult.chunk('', model, Usage.from_dict(chunk['usage'])))
+        return results
\ No newline at end of file
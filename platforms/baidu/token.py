@@ -0,0 +1,275 @@
+"""
+百度千帆 access_token 缓存
+
+千帆SDK使用API Key/Secret Key时会自己获取OAuth access_token，每个进程各自获取一次，
+获取期间请求需要等待。这里统一管理access_token：
+- 在内存中缓存到接近过期，请求路径上只读取内存
+- 后台线程在过期前主动刷新，刷新期间继续使用旧的（仍然有效的）token
+- 通过文件缓存在多个进程间共享，文件锁保证同一时刻只有一个进程去获取
+  （不支持fcntl的平台只做原子写入，不加锁）
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+import requests
+
+from config.config import Config
+from ..errors import AuthFailed, UpstreamUnavailable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+TOKEN_URL = 'https://aip.baidubce.com/oauth/2.0/token'
+
+
+class AccessTokenProvider:
+    """千帆access_token提供者"""
+
+    def __init__(self,
+                 api_key: str,
+                 secret_key: str,
+                 cache_path: Optional[str] = None,
+                 refresh_before: Optional[float] = None,
+                 token_url: str = TOKEN_URL,
+                 request_timeout: float = 10):
+        """
+        初始化access_token提供者
+
+        Args:
+            api_key: 千帆API Key
+            secret_key: 千帆Secret Key
+            cache_path: 跨进程共享的缓存文件，默认使用配置中的路径，为空字符串时不使用文件缓存
+            refresh_before: 提前多少秒刷新，默认为有效期的10%
+            token_url: OAuth接口地址
+            request_timeout: 获取token的超时时间（秒）
+        """
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.cache_path = Config.BAIDU_TOKEN_CACHE if cache_path is None else cache_path
+        self.refresh_before = refresh_before
+        self.token_url = token_url
+        self.request_timeout = request_timeout
+        # 缓存文件中按API Key的摘要区分不同账号，不写入密钥本身
+        self._cache_key = hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]
+
+        self._token: Optional[str] = None
+        self._expires_at = 0.0
+        self._refresh_at = 0.0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # 服务端判定失效的token，缓存文件中的同一token也不再使用
+        self._invalid: Optional[str] = None
+        # 本进程实际调用OAuth接口的次数
+        self.fetch_count = 0
+
+    # ------------------------------------------------------------------
+    # 查询
+    # ------------------------------------------------------------------
+
+    def peek(self) -> Optional[str]:
+        """
+        返回当前有效的token，不会等待网络请求
+
+        内存中没有有效token时读取文件缓存；仍然没有时唤醒后台刷新并返回None
+        """
+        if self._token is not None and time.time() < self._expires_at:
+            return self._token
+        if self._adopt(self._read_cache()):
+            return self._token
+        self._ensure_refresher()
+        self._wakeup.set()
+        return None
+
+    def get_token(self) -> str:
+        """返回有效的token，没有时同步获取（只有冷启动时会等待）"""
+        token = self.peek()
+        if token is not None:
+            return token
+        return self.refresh()
+
+    async def get_token_async(self) -> str:
+        """get_token的异步版本，需要获取时在线程池中执行，不阻塞事件循环"""
+        token = self.peek()
+        if token is not None:
+            return token
+        return await asyncio.get_running_loop().run_in_executor(None, self.refresh)
+
+    @property
+    def expires_at(self) -> float:
+        return self._expires_at
+
+    # ------------------------------------------------------------------
+    # 刷新
+    # ------------------------------------------------------------------
+
+    def refresh(self, force: bool = False) -> str:
+        """
+        刷新token
+
+        持有文件锁后先检查缓存文件：其他进程已经刷新过时直接使用，不重复获取
+
+        Args:
+            force: 忽略缓存，强制重新获取（如token被服务端判定失效）
+        """
+        with self._lock:
+            if not force and self._token is not None and time.time() < self._refresh_at:
+                return self._token
+            with self._file_lock():
+                # 其他进程已经刷新过时，文件中是更新的token
+                if not force and self._adopt(self._read_cache()) and time.time() < self._refresh_at:
+                    return self._token
+                token, expires_at = self._fetch()
+                self._adopt((token, expires_at))
+                self._write_cache(token, expires_at)
+            return token
+
+    def invalidate(self, token: str) -> None:
+        """标记token失效（如千帆返回110/111错误码），由后台线程重新获取"""
+        with self._lock:
+            if token != self._token:
+                return
+            self._invalid = token
+            self._token = None
+            self._expires_at = self._refresh_at = 0.0
+        self._ensure_refresher()
+        self._wakeup.set()
+
+    def start(self) -> 'AccessTokenProvider':
+        """启动后台刷新线程（已启动时无操作）"""
+        self._ensure_refresher()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wakeup.set()
+
+    def _ensure_refresher(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='qianfan-token', daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        """后台刷新：在刷新时间点（或被唤醒时）刷新，失败后退避重试"""
+        backoff = 1.0
+        while not self._stop.is_set():
+            self._adopt(self._read_cache())
+            wait = self._refresh_at - time.time()
+            if wait > 0 and self._token is not None:
+                self._wakeup.wait(wait)
+                self._wakeup.clear()
+                if self._stop.is_set():
+                    break
+                self._adopt(self._read_cache())
+                if self._token is not None and time.time() < self._refresh_at:
+                    continue
+            try:
+                self.refresh()
+                backoff = 1.0
+            except Exception:
+                self._wakeup.wait(backoff)
+                self._wakeup.clear()
+                backoff = min(backoff * 2, 60)
+
+    def _fetch(self) -> Tuple[str, float]:
+        """调用OAuth接口获取token"""
+        self.fetch_count += 1
+        try:
+            response = requests.post(self.token_url, params={
+                'grant_type': 'client_credentials',
+                'client_id': self.api_key,
+                'client_secret': self.secret_key,
+            }, timeout=self.request_timeout)
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            raise UpstreamUnavailable(f"获取千帆access_token失败: {e}")
+        if 'access_token' not in data:
+            raise AuthFailed(data.get('error_description') or str(data), data.get('error'))
+        return data['access_token'], time.time() + float(data.get('expires_in', 2592000))
+
+    def _adopt(self, cached: Optional[Tuple[str, float]]) -> bool:
+        """采用更新的token，返回是否有有效的token"""
+        if cached and cached[1] > self._expires_at:
+            token, expires_at = cached
+            self._token = token
+            self._expires_at = expires_at
+            margin = self.refresh_before
+            if margin is None:
+                margin = max(expires_at - time.time(), 0) * 0.1
+            self._refresh_at = expires_at - margin
+        return self._token is not None and time.time() < self._expires_at
+
+    # ------------------------------------------------------------------
+    # 文件缓存
+    # ------------------------------------------------------------------
+
+    def _read_cache(self) -> Optional[Tuple[str, float]]:
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f).get(self._cache_key)
+            if entry and time.time() < entry['expires_at'] and entry['access_token'] != self._invalid:
+                return entry['access_token'], float(entry['expires_at'])
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        return None
+
+    def _write_cache(self, token: str, expires_at: float) -> None:
+        if not self.cache_path:
+            return
+        data: Dict[str, dict] = {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            pass
+        data[self._cache_key] = {'access_token': token, 'expires_at': expires_at}
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.cache_path)
+
+    @contextmanager
+    def _file_lock(self):
+        """跨进程互斥锁（同一时刻只有一个进程获取token）"""
+        if not self.cache_path or fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        with open(f"{self.cache_path}.lock", 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+
+_providers: Dict[Tuple[str, str], AccessTokenProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_token_provider(api_key: str, secret_key: str) -> AccessTokenProvider:
+    """进程内按API Key共享的access_token提供者（同一账号只有一个后台刷新线程）"""
+    key = (api_key, secret_key)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = _providers[key] = AccessTokenProvider(api_key, secret_key)
+    return provider
@@ -0,0 +1,339 @@
+"""
+离线批量任务执行器
+
+逐行读取JSONL格式的提示词，通过AIModelManager并发调用，结果逐行写入JSONL：
+- 输入按行流式读取，不会一次性加载到内存
+- 在途请求数有上限，读取速度受处理速度约束
+- 定期写入检查点，任务中断后再次运行会从中断处继续，已完成的行不会重复调用
+- 运行中输出进度、吞吐量和预计剩余时间
+
+输入每行一个JSON对象，支持的字段：
+    message / prompt: 用户消息（必填，字段名可通过message_field指定）
+    platform: 平台名称（未指定时使用默认平台）
+    id: 自定义ID，原样写入结果
+    model, system_prompt, temperature, max_tokens: 透传给聊天接口
+    params: 其他透传参数（字典）
+
+用法:
+    python -m platforms.batch_runner prompts.jsonl -o results.jsonl -p qwen -c 8
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, Set
+
+from .scheduler import BATCH
+
+CHAT_FIELDS = ('model', 'system_prompt', 'temperature', 'max_tokens')
+
+
+def count_lines(path: str, block_size: int = 1 << 20) -> int:
+    """按块统计文件行数（不解析内容）"""
+    count = 0
+    last = b'\n'
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            count += block.count(b'\n')
+            last = block[-1:]
+    if last != b'\n':
+        count += 1
+    return count
+
+
+class BatchRunner:
+    """离线批量任务执行器"""
+
+    def __init__(self,
+                 manager=None,
+                 platform: Optional[str] = None,
+                 concurrency: int = 8,
+                 checkpoint_path: Optional[str] = None,
+                 checkpoint_interval: float = 5.0,
+                 progress_interval: float = 5.0,
+                 message_field: str = 'message',
+                 **defaults):
+        """
+        初始化批量任务执行器
+
+        Args:
+            manager: AIModelManager实例，默认新建一个
+            platform: 默认平台，输入行中未指定platform时使用
+            concurrency: 最大并发请求数
+            checkpoint_path: 检查点文件路径，默认为 "<输出文件>.ckpt"
+            checkpoint_interval: 写入检查点的间隔（秒）
+            progress_interval: 输出进度的间隔（秒），0表示不输出
+            message_field: 输入行中用户消息的字段名（也会尝试prompt字段）
+            **defaults: 所有请求共用的聊天参数，如max_tokens；
+                        默认以priority='batch'发送，名额紧张时让出给交互式请求
+        """
+        if manager is None:
+            from . import AIModelManager
+            manager = AIModelManager()
+        self.manager = manager
+        self.platform = platform
+        self.concurrency = concurrency
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_interval = progress_interval
+        self.message_field = message_field
+        self.defaults = defaults
+        self.defaults.setdefault('priority', BATCH)
+
+        self._lock = threading.Lock()
+        self._watermark = 0
+        self._done_above: Set[int] = set()
+        self._counts = {'succeeded': 0, 'failed': 0}
+
+    # ------------------------------------------------------------------
+    # 执行
+    # ------------------------------------------------------------------
+
+    def run(self, input_path: str, output_path: str, total: Optional[int] = None) -> Dict[str, Any]:
+        """
+        执行批量任务
+
+        Args:
+            input_path: 输入JSONL文件
+            output_path: 输出JSONL文件（追加写入）
+            total: 输入总行数，用于计算预计剩余时间；为None时自动统计
+
+        Returns:
+            统计信息: total, skipped, succeeded, failed, elapsed
+
+        Raises:
+            ValueError: 检查点属于另一个输入文件
+        """
+        checkpoint_path = self.checkpoint_path or f"{output_path}.ckpt"
+        if total is None:
+            total = count_lines(input_path)
+
+        self._load_checkpoint(checkpoint_path, input_path, output_path)
+        skipped = self._watermark + len(self._done_above)
+
+        slots = threading.BoundedSemaphore(self.concurrency * 2)
+        out = open(output_path, 'a', encoding='utf-8')
+        start_time = time.time()
+        last_checkpoint = last_progress = start_time
+        processed = 0
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                with open(input_path, 'r', encoding='utf-8') as f:
+                    for index, line in enumerate(f):
+                        if index < self._watermark or index in self._done_above:
+                            continue
+                        line = line.strip()
+                        if not line:
+                            self._mark_done(index)
+                            continue
+
+                        # 在途请求达到上限时阻塞，避免读取速度超过处理速度
+                        slots.acquire()
+                        future = executor.submit(self._process, index, line)
+                        future.add_done_callback(
+                            lambda fut, index=index: self._write(out, index, fut, slots)
+                        )
+                        processed += 1
+
+                        now = time.time()
+                        if now - last_checkpoint >= self.checkpoint_interval:
+                            self._save_checkpoint(checkpoint_path, input_path, out)
+                            last_checkpoint = now
+                        if self.progress_interval and now - last_progress >= self.progress_interval:
+                            self._report(start_time, skipped, total)
+                            last_progress = now
+        finally:
+            self._save_checkpoint(checkpoint_path, input_path, out)
+            out.close()
+
+        elapsed = time.time() - start_time
+        if self.progress_interval:
+            self._report(start_time, skipped, total)
+        return {
+            'total': total,
+            'skipped': skipped,
+            'succeeded': self._counts['succeeded'],
+            'failed': self._counts['failed'],
+            'elapsed': elapsed,
+        }
+
+    def _process(self, index: int, line: str) -> Dict[str, Any]:
+        """处理一行输入，返回结果记录"""
+        record: Dict[str, Any] = {'line': index}
+        try:
+            item = json.loads(line)
+            if 'id' in item:
+                record['id'] = item['id']
+            message = item.get(self.message_field) or item.get('prompt')
+            platform = item.get('platform') or self.platform
+            if not message or not platform:
+                raise ValueError("缺少message或platform字段")
+
+            params = dict(self.defaults)
+            params.update({k: item[k] for k in CHAT_FIELDS if k in item})
+            params.update(item.get('params') or {})
+
+            response = self.manager.chat(platform, message, **params)
+            record['platform'] = platform
+            record.update(response.to_dict() if hasattr(response, 'to_dict') else response)
+            record.pop('raw_response', None)
+        except Exception as e:
+            record['success'] = False
+            record['error'] = str(e)
+        return record
+
+    def _write(self, out, index: int, future, slots) -> None:
+        """写入结果并更新完成状态（在工作线程中调用）；写入失败时该行不标记为完成，重新运行时再处理"""
+        try:
+            try:
+                record = future.result()
+            except Exception as e:
+                record = {'line': index, 'success': False, 'error': str(e)}
+            data = json.dumps(record, ensure_ascii=False, default=str)
+            with self._lock:
+                out.write(data + '\n')
+                self._counts['succeeded' if record.get('success') else 'failed'] += 1
+                self._mark_done_locked(index)
+        finally:
+            # 无论写入是否成功都归还名额，否则读取输入的循环会永远阻塞
+            slots.release()
+
+    # ------------------------------------------------------------------
+    # 检查点
+    # ------------------------------------------------------------------
+
+    def _mark_done(self, index: int) -> None:
+        with self._lock:
+            self._mark_done_locked(index)
+
+    def _mark_done_locked(self, index: int) -> None:
+        """记录已完成的行；水位线以下的行全部已完成，水位线以上的已完成行单独记录"""
+        if index == self._watermark:
+            self._watermark += 1
+            while self._watermark in self._done_above:
+                self._done_above.remove(self._watermark)
+                self._watermark += 1
+        else:
+            self._done_above.add(index)
+
+    def _save_checkpoint(self, checkpoint_path: str, input_path: str, out) -> None:
+        """先落盘输出文件，再原子地写入检查点"""
+        with self._lock:
+            out.flush()
+            os.fsync(out.fileno())
+            state = {
+                'input': os.path.abspath(input_path),
+                'watermark': self._watermark,
+                'done_above': sorted(self._done_above),
+                'output_offset': out.tell(),
+            }
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, checkpoint_path)
+
+    def _load_checkpoint(self, checkpoint_path: str, input_path: str, output_path: str) -> None:
+        """
+        加载检查点
+
+        检查点之后写入输出文件的结果也视为已完成（只扫描检查点之后的部分），
+        中断时写了一半的行会被截掉
+
+        Raises:
+            ValueError: 检查点属于另一个输入文件（输出文件中是另一个任务的结果，不能继续）
+        """
+        self._watermark = 0
+        self._done_above = set()
+        offset = 0
+        try:
+            with open(checkpoint_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = None
+        if isinstance(state, dict):
+            if state.get('input') != os.path.abspath(input_path):
+                raise ValueError(f"检查点 {checkpoint_path} 属于另一个输入文件 ({state.get('input')})，"
+                                 f"请使用其他输出文件，或删除输出文件和检查点后重新运行")
+            try:
+                self._watermark = state['watermark']
+                self._done_above = set(state['done_above'])
+                offset = state.get('output_offset', 0)
+            except (KeyError, TypeError):
+                self._watermark, self._done_above, offset = 0, set(), 0
+
+        if not os.path.exists(output_path):
+            return
+        with open(output_path, 'rb+') as f:
+            f.seek(offset)
+            good_end = offset
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break
+                try:
+                    index = json.loads(raw)['line']
+                except (ValueError, KeyError, TypeError):
+                    break
+                good_end += len(raw)
+                if index >= self._watermark:
+                    self._mark_done_locked(index)
+            f.truncate(good_end)
+
+    def _report(self, start_time: float, skipped: int, total: int) -> None:
+        """输出进度、吞吐量和预计剩余时间"""
+        elapsed = max(time.time() - start_time, 1e-6)
+        with self._lock:
+            done = self._counts['succeeded'] + self._counts['failed']
+            failed = self._counts['failed']
+        rate = done / elapsed
+        remaining = max(total - skipped - done, 0)
+        eta = remaining / rate if rate > 0 else float('inf')
+        eta_text = time.strftime('%H:%M:%S', time.gmtime(eta)) if eta != float('inf') else '--:--:--'
+        print(f"📊 进度: {skipped + done}/{total} (失败 {failed}) | "
+              f"吞吐量: {rate:.2f} 请求/s | 预计剩余: {eta_text}",
+              file=sys.stderr, flush=True)
+
+
+def main():
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description='离线批量任务执行器')
+    parser.add_argument('input', help='输入JSONL文件')
+    parser.add_argument('-o', '--output', required=True, help='输出JSONL文件（追加写入）')
+    parser.add_argument('-p', '--platform', help='默认平台')
+    parser.add_argument('-m', '--model', help='默认模型')
+    parser.add_argument('-c', '--concurrency', type=int, default=8, help='最大并发请求数')
+    parser.add_argument('--max-tokens', type=int, help='最大token数量')
+    parser.add_argument('--message-field', default='message', help='输入行中用户消息的字段名')
+    parser.add_argument('--checkpoint', help='检查点文件路径（默认: <输出文件>.ckpt）')
+
+    args = parser.parse_args()
+
+    defaults = {}
+    if args.model:
+        defaults['model'] = args.model
+    if args.max_tokens:
+        defaults['max_tokens'] = args.max_tokens
+
+    runner = BatchRunner(
+        platform=args.platform,
+        concurrency=args.concurrency,
+        checkpoint_path=args.checkpoint,
+        message_field=args.message_field,
+        **defaults
+    )
+    stats = runner.run(args.input, args.output)
+
+    print(f"\n✅ 完成: 成功 {stats['succeeded']}, 失败 {stats['failed']}, "
+          f"跳过(已完成) {stats['skipped']}, 用时 {stats['elapsed']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
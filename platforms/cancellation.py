@@ -0,0 +1,88 @@
+"""
+流式请求取消
+
+调用方不再需要后续内容时（如前端断开连接），应立即关闭上游流，避免继续消耗token和占用连接：
+- 关闭 chat_stream 返回的生成器 (generator.close()) 会关闭SDK的流和HTTP响应
+- 也可以传入 CancelToken，在其他线程调用 cancel() 取消进行中的流式请求
+"""
+import threading
+from typing import Any, Callable, List, Optional
+
+from .errors import Cancelled
+
+# 已取消的结果使用的错误码
+CANCELLED = 'cancelled'
+
+
+class StreamCancelled(Cancelled):
+    """流式请求已被取消"""
+
+    def __init__(self, message: str = "请求已取消"):
+        super().__init__(message, CANCELLED)
+
+
+class CancelToken:
+    """取消句柄，可以在任意线程调用cancel()"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """取消请求，关闭已注册的上游流（重复调用无影响）"""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception:
+                pass
+
+    def add_callback(self, callback: Callable[[], None]) -> Callable[[], None]:
+        """
+        注册取消时执行的回调，已取消时立即执行
+
+        Returns:
+            注销回调的函数
+        """
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove(callback)
+        callback()
+        return lambda: None
+
+    def _remove(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            try:
+                self._callbacks.remove(callback)
+            except ValueError:
+                pass
+
+    def check(self) -> None:
+        """已取消时抛出StreamCancelled"""
+        if self._event.is_set():
+            raise StreamCancelled()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+
+def stream_closer(stream: Any) -> Callable[[], None]:
+    """
+    返回关闭SDK流的函数
+
+    OpenAI SDK的Stream和生成器有close()，智谱SDK的流通过其HTTP响应(response)关闭
+    """
+    close = getattr(stream, 'close', None)
+    if close is None:
+        close = getattr(getattr(stream, 'response', None), 'close', None)
+    return close or (lambda: None)
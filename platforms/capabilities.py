@@ -0,0 +1,156 @@
+"""
+模型能力表
+
+OpenAI兼容客户端（OpenAI、AIHubMix、Azure，以及通义千问的OpenAI兼容模式）共用的模型能力索引：
+- token_param: token上限参数名 ('max_tokens' 或 'max_completion_tokens')
+- supports_temperature: 是否支持temperature参数（GPT-5、o系列推理模型只支持默认值）
+- stream_usage: 流式输出是否支持 stream_options={'include_usage': True}
+- context_window: 上下文窗口大小
+
+能力来源（优先级从低到高）：平台默认值 -> 模型系列规则 -> 模型目录 -> 配置覆盖。
+每个 (平台, 模型) 只在第一次查询时解析，之后是一次字典查找。
+"""
+import re
+import threading
+from typing import NamedTuple, Optional, Dict, Any, Tuple
+
+from config.config import Config
+from .catalog import ModelCatalog, get_model_catalog
+
+
+class ModelCapabilities(NamedTuple):
+    """单个模型的能力"""
+    token_param: str = 'max_tokens'
+    supports_temperature: bool = True
+    stream_usage: bool = False
+    context_window: Optional[int] = None
+
+    def token_kwargs(self, max_tokens: int, max_completion_tokens: Optional[int] = None) -> Dict[str, int]:
+        """
+        生成token上限参数
+
+        显式指定的max_completion_tokens优先，否则按模型的token参数名传递max_tokens的值
+        """
+        if max_completion_tokens is not None:
+            return {'max_completion_tokens': max_completion_tokens}
+        return {self.token_param: max_tokens}
+
+    def stream_kwargs(self) -> Dict[str, Any]:
+        """生成流式参数，支持时让平台在流结束时返回usage"""
+        if not self.stream_usage:
+            return {}
+        return {'stream_options': {'include_usage': True}}
+
+    def sampling_kwargs(self, temperature: Optional[float]) -> Dict[str, float]:
+        """生成采样参数，不支持temperature的模型不传递该参数"""
+        if temperature is None or not self.supports_temperature:
+            return {}
+        return {'temperature': temperature}
+
+
+# 平台默认能力
+PLATFORM_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    'openai': {'stream_usage': True},
+    'aihubmix': {},
+    'azure': {},
+    # 通义千问的OpenAI兼容模式
+    'qwen': {'stream_usage': True},
+}
+
+# 模型系列规则: (模型名正则, 能力)，按顺序全部应用，后面的规则覆盖前面的
+# 模型名会先转为小写并去掉 "vendor/" 前缀，正则需要匹配完整的模型名
+FAMILY_RULES: Tuple[Tuple[str, Dict[str, Any]], ...] = (
+    (r'gpt-3\.5-turbo.*', {'context_window': 16385}),
+    (r'gpt-4(-\d{4}.*)?', {'context_window': 8192}),
+    (r'gpt-4-32k.*', {'context_window': 32768}),
+    (r'gpt-4-turbo.*|gpt-4o.*', {'context_window': 128000}),
+    (r'gpt-4\.1.*', {'context_window': 1047576}),
+    (r'gpt-5(\.\d+)?(-.*)?', {'token_param': 'max_completion_tokens',
+                              'supports_temperature': False,
+                              'context_window': 400000}),
+    (r'o[134](-.*)?', {'token_param': 'max_completion_tokens',
+                       'supports_temperature': False,
+                       'context_window': 200000}),
+)
+
+_COMPILED_RULES = tuple((re.compile(pattern), caps) for pattern, caps in FAMILY_RULES)
+
+
+class CapabilityIndex:
+    """模型能力索引"""
+
+    def __init__(self,
+                 catalog: Optional[ModelCatalog] = None,
+                 overrides: Optional[Dict[str, Dict[str, Any]]] = None):
+        """
+        初始化模型能力索引
+
+        Args:
+            catalog: 模型目录，用于补充上下文窗口和token参数名，默认使用共享的模型目录
+            overrides: 配置覆盖，键为 "platform:model" 或 "model"，默认使用配置中的值
+        """
+        self._catalog = catalog
+        # 复制一份，register() 只影响当前索引，不修改传入的字典和全局配置
+        overrides = overrides if overrides is not None else Config.MODEL_CAPABILITIES
+        self.overrides: Dict[str, Dict[str, Any]] = {key: dict(caps) for key, caps in overrides.items()}
+        self._index: Dict[Tuple[str, str], ModelCapabilities] = {}
+        self._catalog_version = None
+        self._lock = threading.Lock()
+
+    @property
+    def catalog(self) -> ModelCatalog:
+        if self._catalog is None:
+            self._catalog = get_model_catalog()
+        return self._catalog
+
+    def lookup(self, platform: str, model: str) -> ModelCapabilities:
+        """查询模型能力"""
+        # 模型目录刷新后重新解析
+        if self._catalog_version != self.catalog.version:
+            with self._lock:
+                self._index = {}
+                self._catalog_version = self.catalog.version
+
+        key = (platform, model)
+        caps = self._index.get(key)
+        if caps is None:
+            caps = self._resolve(platform, model)
+            self._index[key] = caps
+        return caps
+
+    def register(self, platform: str, model: str, **capabilities) -> None:
+        """注册或覆盖模型能力（只对当前索引生效）"""
+        self.overrides[f"{platform}:{model}"] = dict(
+            self.overrides.get(f"{platform}:{model}", {}), **capabilities
+        )
+        self._index.pop((platform, model), None)
+
+    def _resolve(self, platform: str, model: str) -> ModelCapabilities:
+        """按优先级合并各来源的能力"""
+        caps: Dict[str, Any] = dict(PLATFORM_DEFAULTS.get(platform, {}))
+
+        name = model.lower().rsplit('/', 1)[-1]
+        for pattern, rule in _COMPILED_RULES:
+            if pattern.fullmatch(name):
+                caps.update(rule)
+
+        info = self.catalog.model_info(platform, model)
+        for field in ('token_param', 'context_window'):
+            if info.get(field):
+                caps[field] = info[field]
+
+        caps.update(self.overrides.get(model, {}))
+        caps.update(self.overrides.get(f"{platform}:{model}", {}))
+
+        return ModelCapabilities(**{k: v for k, v in caps.items() if k in ModelCapabilities._fields})
+
+
+_shared_index: Optional[CapabilityIndex] = None
+
+
+def get_capability_index() -> CapabilityIndex:
+    """获取进程内共享的模型能力索引"""
+    global _shared_index
+    if _shared_index is None:
+        _shared_index = CapabilityIndex()
+    return _shared_index
@@ -0,0 +1,379 @@
+"""
+模型目录
+
+统一查询各平台支持的模型列表：
+- 并发拉取所有平台的模型列表（替代原来逐个平台串行查询的脚本）
+- 结果缓存到磁盘，按TTL过期，过期后使用ETag/Last-Modified做条件请求，未变化时服务端返回304
+- 支持后台定时刷新，缓存过期时查询接口不会阻塞，仍返回旧数据并在后台刷新
+- 内存中的快速查询：平台是否提供某模型、上下文窗口、token参数名
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Iterable
+
+import requests
+
+from config.config import Config
+
+PLATFORMS = ('qwen', 'openai', 'zhipu', 'baidu', 'aihubmix', 'azure')
+
+# 没有模型列表API，或API查询失败且没有缓存时使用的官方常用模型
+STATIC_MODELS = {
+    'baidu': [
+        "ernie-4.0-8k", "ernie-4.0-turbo-8k", "ernie-3.5-8k", "ernie-3.5-4k",
+        "ernie-turbo-8k", "ernie-bot-turbo", "ernie-bot", "ernie-bot-4",
+        "ernie-speed-128k", "ernie-speed-8k", "ernie-lite-8k", "ernie-tiny-8k",
+        "llama2-7b-chat", "llama2-13b-chat", "llama2-70b-chat",
+        "llama3-8b-instruct", "llama3-70b-instruct", "bloomz-7b1",
+        "qianfan-bloomz-7b-compressed", "qianfan-chinese-llama2-7b",
+        "qianfan-chinese-llama2-13b", "chatglm2-6b-32k", "aquilachat-7b",
+        "xuanyuan-70b-chat",
+        "embedding-v1", "bge-large-zh", "bge-large-en", "tao-8k",
+    ],
+    'zhipu': [
+        "glm-4", "glm-4v", "glm-4-air", "glm-4-airx", "glm-4-long",
+        "glm-4-flashx", "glm-4-plus", "glm-3-turbo",
+        "chatglm_pro", "chatglm_std", "chatglm_lite", "chatglm_turbo",
+        "cogview-3", "cogvlm2-llama3-chat-19b", "embedding-2",
+    ],
+    'aihubmix': [
+        "gpt-3.5-turbo", "gpt-3.5-turbo-16k", "gpt-4", "gpt-4-turbo", "gpt-4-32k",
+        "claude-3-sonnet", "claude-3-opus", "claude-3-haiku", "claude-2.1",
+        "claude-2", "claude-instant-1.2",
+        "gemini-pro", "gemini-pro-vision", "palm-2",
+        "llama-2-7b-chat", "llama-2-13b-chat", "llama-2-70b-chat",
+        "vicuna-7b", "vicuna-13b",
+    ],
+}
+
+# 智谱AI的模型列表端点不固定，依次探测，成功的端点会记录在缓存中
+ZHIPU_MODEL_ENDPOINTS = (
+    "https://open.bigmodel.cn/api/paas/v4/models",
+    "https://open.bigmodel.cn/api/v1/models",
+)
+
+# 模型元数据中可能表示上下文窗口的字段
+_CONTEXT_WINDOW_KEYS = ('context_window', 'context_length', 'max_context_length', 'max_model_len')
+
+def _parse_models(data: Any) -> Dict[str, Dict[str, Any]]:
+    """
+    解析各平台模型列表响应
+
+    兼容OpenAI格式 {'data': [...]}、DashScope格式 {'output': {'models': [...]}}
+    以及 {'models': [...]}，列表元素可以是字符串或包含id/model/name的字典
+    """
+    items = None
+    if isinstance(data, dict):
+        if isinstance(data.get('data'), list):
+            items = data['data']
+        elif isinstance(data.get('output'), dict) and isinstance(data['output'].get('models'), list):
+            items = data['output']['models']
+        elif isinstance(data.get('models'), list):
+            items = data['models']
+    elif isinstance(data, list):
+        items = data
+
+    models = {}
+    for item in items or []:
+        if isinstance(item, str):
+            models[item] = {}
+            continue
+        if not isinstance(item, dict):
+            continue
+        model_id = item.get('id') or item.get('model') or item.get('name')
+        if not model_id:
+            continue
+        info = {}
+        for key in _CONTEXT_WINDOW_KEYS:
+            if isinstance(item.get(key), int):
+                info['context_window'] = item[key]
+                break
+        models[model_id] = info
+    return models
+
+
+class ModelCatalog:
+    """模型目录，缓存各平台的模型列表"""
+
+    def __init__(self,
+                 cache_path: Optional[str] = None,
+                 ttl: Optional[float] = None,
+                 platforms: Optional[Iterable[str]] = None,
+                 request_timeout: float = 10):
+        """
+        初始化模型目录
+
+        Args:
+            cache_path: 磁盘缓存文件路径，默认使用配置中的路径
+            ttl: 缓存有效期（秒），默认使用配置中的值
+            platforms: 需要查询的平台，默认全部平台
+            request_timeout: 单个平台查询的超时时间（秒）
+        """
+        self.cache_path = cache_path or Config.MODEL_CATALOG_CACHE
+        self.ttl = ttl if ttl is not None else Config.MODEL_CATALOG_TTL
+        self.platforms = tuple(platforms or PLATFORMS)
+        self.request_timeout = request_timeout
+
+        # 每个平台的缓存条目: models, fetched_at, etag, last_modified, endpoint, source
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._stop_event = threading.Event()
+        self._refresh_thread: Optional[threading.Thread] = None
+        self._session = requests.Session()
+        self._capabilities = None
+
+        # 模型数据每次变化时递增，供依赖模型目录的索引判断是否需要重建
+        self.version = 0
+
+        self.load()
+
+    # ------------------------------------------------------------------
+    # 快速查询（只读内存，不触发网络请求）
+    # ------------------------------------------------------------------
+
+    def list_models(self, platform: str) -> List[str]:
+        """返回平台的模型列表（按名称排序）"""
+        entry = self._entries.get(platform)
+        return sorted(entry['models']) if entry else []
+
+    def has_model(self, platform: str, model: str) -> Optional[bool]:
+        """
+        平台是否提供某个模型
+
+        Returns:
+            True/False；平台的模型列表尚未加载时返回None
+        """
+        entry = self._entries.get(platform)
+        if not entry:
+            return None
+        return model in entry['models']
+
+    def model_info(self, platform: str, model: str) -> Dict[str, Any]:
+        """返回模型的元数据（可能为空字典）"""
+        entry = self._entries.get(platform)
+        if not entry:
+            return {}
+        return entry['models'].get(model) or {}
+
+    def context_window(self, platform: str, model: str) -> Optional[int]:
+        """返回模型的上下文窗口大小，未知时返回None"""
+        return self.model_info(platform, model).get('context_window')
+
+    def token_param(self, platform: str, model: str) -> str:
+        """返回模型使用的token参数名: 'max_tokens' 或 'max_completion_tokens'"""
+        if self._capabilities is None:
+            from .capabilities import CapabilityIndex
+            self._capabilities = CapabilityIndex(catalog=self)
+        return self._capabilities.lookup(platform, model).token_param
+
+    def source(self, platform: str) -> Optional[str]:
+        """模型列表来源: 'api' 或 'static'（官方常用模型），未加载时返回None"""
+        entry = self._entries.get(platform)
+        return entry.get('source') if entry else None
+
+    def is_stale(self, platform: str) -> bool:
+        """平台的缓存是否已过期"""
+        entry = self._entries.get(platform)
+        return not entry or time.time() - entry.get('fetched_at', 0) >= self.ttl
+
+    # ------------------------------------------------------------------
+    # 磁盘缓存
+    # ------------------------------------------------------------------
+
+    def load(self) -> None:
+        """从磁盘缓存加载模型目录（不触发网络请求）"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict):
+            with self._lock:
+                for platform, entry in data.items():
+                    if isinstance(entry, dict) and isinstance(entry.get('models'), dict):
+                        self._entries[platform] = entry
+                self.version += 1
+
+    def save(self) -> None:
+        """原子地写入磁盘缓存"""
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = dict(self._entries)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.cache_path)
+
+    # ------------------------------------------------------------------
+    # 刷新
+    # ------------------------------------------------------------------
+
+    def refresh(self, platforms: Optional[Iterable[str]] = None, force: bool = False) -> Dict[str, bool]:
+        """
+        并发刷新模型列表
+
+        Args:
+            platforms: 需要刷新的平台，默认全部平台
+            force: 是否忽略TTL强制刷新（仍会使用条件请求）
+
+        Returns:
+            每个平台是否刷新成功
+        """
+        targets = [p for p in (platforms or self.platforms) if force or self.is_stale(p)]
+        if not targets:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+            results = dict(zip(targets, executor.map(self._refresh_platform, targets)))
+        self.version += 1
+
+        try:
+            self.save()
+        except OSError:
+            pass
+        return results
+
+    def refresh_in_background(self) -> None:
+        """如果有平台缓存过期，在后台线程中刷新，不阻塞调用方"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                self._refreshing = False
+
+        threading.Thread(target=run, name='model-catalog-refresh', daemon=True).start()
+
+    def start_background_refresh(self, interval: Optional[float] = None) -> None:
+        """
+        启动后台定时刷新线程
+
+        Args:
+            interval: 刷新间隔（秒），默认等于TTL
+        """
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        interval = interval or self.ttl
+        self._stop_event.clear()
+
+        def run():
+            while not self._stop_event.is_set():
+                self.refresh()
+                self._stop_event.wait(interval)
+
+        self._refresh_thread = threading.Thread(target=run, name='model-catalog-refresh', daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self) -> None:
+        """停止后台刷新线程，等待正在进行的刷新结束，之后可以重新启动"""
+        self._stop_event.set()
+        thread = self._refresh_thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+        self._refresh_thread = None
+
+    def _refresh_platform(self, platform: str) -> bool:
+        """刷新单个平台的模型列表"""
+        entry = self._entries.get(platform)
+        endpoints = self._endpoints(platform)
+
+        # 上次成功的端点排在最前面，避免每次都依次探测
+        if entry and entry.get('endpoint') in [url for url, _ in endpoints]:
+            endpoints.sort(key=lambda item: item[0] != entry['endpoint'])
+
+        for url, headers in endpoints:
+            if entry and entry.get('endpoint') == url:
+                if entry.get('etag'):
+                    headers['If-None-Match'] = entry['etag']
+                if entry.get('last_modified'):
+                    headers['If-Modified-Since'] = entry['last_modified']
+            try:
+                response = self._session.get(url, headers=headers, timeout=self.request_timeout)
+            except requests.RequestException:
+                continue
+
+            if response.status_code == 304 and entry:
+                with self._lock:
+                    self._entries[platform] = dict(entry, fetched_at=time.time())
+                return True
+            if response.status_code != 200:
+                continue
+            try:
+                models = _parse_models(response.json())
+            except ValueError:
+                continue
+            if not models:
+                continue
+
+            with self._lock:
+                self._entries[platform] = {
+                    'models': models,
+                    'fetched_at': time.time(),
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'endpoint': url,
+                    'source': 'api',
+                }
+            return True
+
+        # 没有模型列表API或查询失败：没有缓存时使用静态列表兜底
+        if platform in STATIC_MODELS and (not entry or entry.get('source') == 'static'):
+            with self._lock:
+                self._entries[platform] = {
+                    'models': {model: {} for model in STATIC_MODELS[platform]},
+                    'fetched_at': time.time(),
+                    'source': 'static',
+                }
+            return True
+        return False
+
+    @staticmethod
+    def _endpoints(platform: str) -> List[tuple]:
+        """返回平台模型列表API的候选端点 [(url, headers)]，未配置密钥时返回空列表"""
+        if platform == 'openai' and Config.OPENAI_API_KEY:
+            return [(f"{Config.OPENAI_BASE_URL.rstrip('/')}/models",
+                     {"Authorization": f"Bearer {Config.OPENAI_API_KEY}"})]
+        if platform == 'aihubmix' and Config.AIHUBMIX_API_KEY:
+            return [(f"{Config.AIHUBMIX_BASE_URL.rstrip('/')}/models",
+                     {"Authorization": f"Bearer {Config.AIHUBMIX_API_KEY}"})]
+        if platform == 'zhipu' and Config.ZHIPU_API_KEY:
+            return [(url, {"Authorization": f"Bearer {Config.ZHIPU_API_KEY}"})
+                    for url in ZHIPU_MODEL_ENDPOINTS]
+        if platform == 'qwen' and Config.QWEN_API_KEY:
+            base_url = os.getenv('DASHSCOPE_HTTP_BASE_URL', 'https://dashscope.aliyuncs.com/api/v1')
+            return [(f"{base_url.rstrip('/')}/models",
+                     {"Authorization": f"Bearer {Config.QWEN_API_KEY}"})]
+        if platform == 'azure' and Config.AZURE_API_KEY and Config.AZURE_ENDPOINT:
+            base_endpoint = Config.AZURE_ENDPOINT.split('/openai/deployments')[0].rstrip('/')
+            return [(f"{base_endpoint}/openai/models?api-version={Config.AZURE_API_VERSION}",
+                     {"api-key": Config.AZURE_API_KEY})]
+        return []
+
+
+_shared_catalog: Optional[ModelCatalog] = None
+_shared_lock = threading.Lock()
+
+
+def get_model_catalog() -> ModelCatalog:
+    """
+    获取进程内共享的模型目录
+
+    首次调用时只从磁盘缓存加载，缓存过期的平台在后台刷新，不会阻塞调用方
+    """
+    global _shared_catalog
+    if _shared_catalog is None:
+        with _shared_lock:
+            if _shared_catalog is None:
+                _shared_catalog = ModelCatalog()
+                _shared_catalog.refresh_in_background()
+    return _shared_catalog
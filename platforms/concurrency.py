@@ -0,0 +1,225 @@
+"""
+自适应并发控制
+
+固定的并发上限总是不合适：太低浪费平台的处理能力，太高则在DashScope、千帆等平台触发限流(429)
+并在平台侧排队。AdaptiveLimit按平台和模型分别调整进行中请求数的上限：
+
+- 延迟梯度：比较短期延迟与长期基线延迟，延迟平稳时上限增加（每个延迟周期约增加sqrt(上限)），
+  延迟上升超过容忍度时按比例降低
+- AIMD：限流、超时、上游不可用时上限乘以backoff，每个延迟周期内最多降低一次
+- 长期基线缓慢跟随实际延迟，平台处理能力变化后收敛到新的上限
+
+普通请求的延迟为整个请求的耗时，流式请求使用首个数据块的等待时间（与输出长度无关）。
+超过上限的请求在当前进程排队等待，直到有请求完成或到达截止时间。
+"""
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from .deadline import DEADLINE_EXCEEDED, Deadline
+
+# 表示上游过载的错误分类
+OVERLOAD_ERRORS = frozenset({'rate_limited', 'timeout', 'upstream_unavailable'})
+
+
+class AdaptiveLimit:
+    """单个平台/模型的自适应并发上限"""
+
+    def __init__(self, initial: int = 20, min_limit: int = 1, max_limit: int = 200,
+                 backoff: float = 0.75, tolerance: float = 1.25, smoothing: float = 0.2):
+        """
+        Args:
+            initial: 初始上限
+            min_limit: 最小上限
+            max_limit: 最大上限
+            backoff: 限流等过载错误时上限乘以的系数
+            tolerance: 短期延迟超过长期基线的倍数在此以内时视为平稳
+            smoothing: 延迟上升时上限向目标值调整的比例
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self.inflight = 0
+        self.waiting = 0
+        self.drops = 0
+        self.samples = 0
+        self._short_rtt: Optional[float] = None
+        self._long_rtt: Optional[float] = None
+        self._last_drop = 0.0
+        self._cond = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """当前上限"""
+        return int(self._limit)
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """
+        占用一个并发名额，超过上限时等待
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            是否获得名额（等待超时返回False）
+        """
+        with self._cond:
+            if self.inflight >= self.limit:
+                self.waiting += 1
+                try:
+                    if not self._cond.wait_for(lambda: self.inflight < self.limit, timeout):
+                        return False
+                finally:
+                    self.waiting -= 1
+            self.inflight += 1
+            return True
+
+    def release(self, latency: Optional[float] = None, overloaded: bool = False) -> None:
+        """
+        归还名额并根据结果调整上限
+
+        Args:
+            latency: 成功请求的延迟（秒），None表示不作为延迟样本（如调用方取消、认证失败）
+            overloaded: 上游过载（限流、超时、不可用）
+        """
+        with self._cond:
+            inflight = self.inflight
+            self.inflight -= 1
+            if overloaded:
+                self._on_overload()
+            elif latency is not None:
+                self._on_sample(latency, inflight)
+            self._cond.notify_all()
+
+    def _on_sample(self, rtt: float, inflight: int) -> None:
+        self.samples += 1
+        if self._short_rtt is None:
+            self._short_rtt = self._long_rtt = rtt
+        else:
+            self._short_rtt += (rtt - self._short_rtt) * 0.1
+            self._long_rtt += (rtt - self._long_rtt) * 0.01
+            # 延迟明显下降时（如平台扩容）基线较快回落
+            if self._long_rtt > self._short_rtt * 2:
+                self._long_rtt *= 0.95
+
+        gradient = max(0.5, min(1.0, self.tolerance * self._long_rtt / self._short_rtt))
+        limit = self._limit
+        if gradient < 1.0:
+            limit += (limit * gradient - limit) * self.smoothing
+        elif inflight * 2 >= limit:
+            # 只有名额被充分使用时才增加，避免低负载时上限无限增长
+            limit += math.sqrt(limit) / limit
+        self._limit = min(max(limit, self.min_limit), self.max_limit)
+
+    def _on_overload(self) -> None:
+        self.drops += 1
+        now = time.monotonic()
+        # 同一批并发请求的错误只降低一次
+        if now - self._last_drop < (self._short_rtt or 0.1):
+            return
+        self._last_drop = now
+        self._limit = max(self._limit * self.backoff, self.min_limit)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                'limit': self.limit,
+                'inflight': self.inflight,
+                'waiting': self.waiting,
+                'rtt': self._short_rtt,
+                'baseline_rtt': self._long_rtt,
+                'samples': self.samples,
+                'drops': self.drops,
+            }
+
+
+class Permit:
+    """已占用的并发名额，请求结束时调用release()"""
+
+    __slots__ = ('_limit', 'started', 'first_chunk', '_released')
+
+    def __init__(self, limit: AdaptiveLimit):
+        self._limit = limit
+        self.started = time.monotonic()
+        # 流式请求首个数据块的到达时间
+        self.first_chunk: Optional[float] = None
+        self._released = False
+
+    def mark_first_chunk(self) -> None:
+        if self.first_chunk is None:
+            self.first_chunk = time.monotonic()
+
+    def release(self, result: Any = None) -> None:
+        """
+        根据请求结果归还名额（重复调用无影响）
+
+        Args:
+            result: 请求结果（流式请求为最后一个数据块），None表示请求没有完成
+        """
+        if self._released:
+            return
+        self._released = True
+        latency = None
+        overloaded = False
+        if result is not None:
+            if result.get('success'):
+                end = self.first_chunk if self.first_chunk is not None else time.monotonic()
+                latency = end - self.started
+            else:
+                # 调用方的截止时间到期不代表上游过载
+                overloaded = (result.get('error_type') in OVERLOAD_ERRORS
+                              and result.get('code') != DEADLINE_EXCEEDED)
+        self._limit.release(latency, overloaded)
+
+
+class ConcurrencyController:
+    """按 (平台, 模型) 管理自适应并发上限"""
+
+    def __init__(self, **limit_options: Any):
+        """
+        Args:
+            **limit_options: 传给AdaptiveLimit的参数，如initial、min_limit、max_limit
+        """
+        self.limit_options = limit_options
+        self._limits: Dict[Tuple[str, Optional[str]], AdaptiveLimit] = {}
+        self._lock = threading.Lock()
+
+    def get(self, platform: str, model: Optional[str] = None) -> AdaptiveLimit:
+        key = (platform, model)
+        limit = self._limits.get(key)
+        if limit is None:
+            with self._lock:
+                limit = self._limits.get(key)
+                if limit is None:
+                    limit = self._limits[key] = AdaptiveLimit(**self.limit_options)
+        return limit
+
+    def acquire(self, platform: str, model: Optional[str] = None,
+                deadline: Optional[Deadline] = None) -> Optional[Permit]:
+        """
+        占用平台/模型的并发名额
+
+        Returns:
+            Permit；到达截止时间仍未获得名额时返回None
+        """
+        limit = self.get(platform, model)
+        timeout = max(deadline.remaining(), 0) if deadline is not None else None
+        if not limit.acquire(timeout):
+            return None
+        return Permit(limit)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各平台/模型的当前并发上限
+
+        Returns:
+            {"platform:model": {'limit', 'inflight', 'waiting', 'rtt', 'baseline_rtt', 'samples', 'drops'}}
+        """
+        with self._lock:
+            limits = list(self._limits.items())
+        return {f"{platform}:{model}" if model else platform: limit.stats()
+                for (platform, model), limit in limits}
@@ -0,0 +1,339 @@
+"""
+请求截止时间 (deadline) 与超时
+
+调用方通过 deadline/timeout 给出请求的时间预算，预算会传递到：
+- SDK调用：每次尝试的超时参数只使用剩余时间
+- 重试：设置了截止时间的请求关闭SDK内置重试，由 call_with_deadline 在剩余时间内重试
+- 流式读取：idle_timeout 限制首个数据块及数据块之间的最长等待时间；
+  到达截止时间时关闭上游流，释放工作线程和连接
+- 异步调用：call_with_deadline_async / guard_async_stream 是对应的asyncio版本，
+  到期时取消等待中的协程，不占用线程
+"""
+import asyncio
+import inspect
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from .cancellation import CancelToken, StreamCancelled, stream_closer
+from .errors import Timeout, from_exception
+
+# 超过截止时间的结果使用的错误码
+DEADLINE_EXCEEDED = 'deadline_exceeded'
+
+
+class DeadlineExceeded(Timeout):
+    """请求超过截止时间（剩余时间已用完，不再重试）"""
+
+    retryable = False
+
+    def __init__(self, message: str = "请求已超过截止时间"):
+        super().__init__(message, DEADLINE_EXCEEDED)
+
+
+class Deadline:
+    """请求截止时间（基于 time.monotonic）"""
+
+    __slots__ = ('expires_at',)
+
+    def __init__(self, expires_at: float):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, timeout: float) -> 'Deadline':
+        """timeout秒之后到期"""
+        return cls(time.monotonic() + timeout)
+
+    @classmethod
+    def resolve(cls, deadline: Union['Deadline', float, None] = None,
+                timeout: Optional[float] = None) -> Optional['Deadline']:
+        """
+        根据调用参数确定截止时间
+
+        Args:
+            deadline: Deadline对象，或绝对时间戳 (time.time())
+            timeout: 相对超时（秒）
+
+        Returns:
+            两者都给出时取较早者；都未给出时返回None
+        """
+        if deadline is not None and not isinstance(deadline, Deadline):
+            deadline = cls(time.monotonic() + (deadline - time.time()))
+        if timeout is not None:
+            after = cls.after(timeout)
+            if deadline is None or after.expires_at < deadline.expires_at:
+                deadline = after
+        return deadline
+
+    def remaining(self) -> float:
+        """剩余时间（秒），已到期时小于等于0"""
+        return self.expires_at - time.monotonic()
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def check(self) -> None:
+        """已到期时抛出DeadlineExceeded"""
+        if self.remaining() <= 0:
+            raise DeadlineExceeded()
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        """
+        本次调用可用的超时时间
+
+        Args:
+            cap: 上限（如idle_timeout）
+
+        Raises:
+            DeadlineExceeded: 已到期
+        """
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded()
+        return min(remaining, cap) if cap else remaining
+
+    def __repr__(self) -> str:
+        return f"Deadline(remaining={self.remaining():.3f}s)"
+
+
+def timeout_kwargs(deadline: Optional[Deadline], idle_timeout: Optional[float] = None,
+                   name: str = 'timeout') -> Dict[str, float]:
+    """
+    SDK调用的超时参数
+
+    HTTP客户端的读取超时作用于每次socket读取，流式请求中即为数据块之间的最长等待时间。
+
+    Args:
+        deadline: 截止时间
+        idle_timeout: 流式读取的空闲超时
+        name: SDK的超时参数名（OpenAI/智谱为timeout，DashScope/千帆为request_timeout）
+
+    Returns:
+        没有截止时间和idle_timeout时返回空字典，使用SDK默认值
+    """
+    if deadline is None:
+        return {name: idle_timeout} if idle_timeout else {}
+    return {name: deadline.timeout(idle_timeout)}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """是否为可重试的错误（超时、限流和上游不可用，见errors模块）"""
+    return from_exception(error).retryable
+
+
+def call_with_deadline(fn: Callable[[], Any], deadline: Optional[Deadline], retries: int = 2,
+                       backoff: float = 0.5,
+                       retryable: Callable[[BaseException], bool] = is_retryable) -> Any:
+    """
+    在截止时间内调用，可重试的错误在剩余时间足够时按指数退避重试
+
+    没有截止时间时只调用一次，重试交给SDK。
+
+    Args:
+        fn: 发起调用的函数，每次尝试前重新计算超时参数
+        deadline: 截止时间
+        retries: 最多重试次数
+        backoff: 初始退避时间（秒）
+        retryable: 判断错误是否可重试
+
+    Raises:
+        DeadlineExceeded: 调用前已到期，或因到期而失败
+    """
+    if deadline is None:
+        return fn()
+
+    attempt = 0
+    while True:
+        deadline.check()
+        try:
+            return fn()
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline.expired:
+                raise DeadlineExceeded() from e
+            delay = backoff * (2 ** attempt)
+            if attempt >= retries or not retryable(e) or deadline.remaining() <= delay:
+                raise
+            time.sleep(delay)
+            attempt += 1
+
+
+def guard_stream(stream: Iterable[Any], deadline: Optional[Deadline],
+                 cancel: Optional[CancelToken] = None,
+                 close: Optional[Callable[[], None]] = None) -> Iterator[Any]:
+    """
+    流式读取保护
+
+    - 到达截止时间时由定时器关闭上游流（阻塞中的读取也会被中断），并抛出DeadlineExceeded
+    - 取消句柄被取消时关闭上游流，并抛出StreamCancelled
+    - 流结束或调用方关闭生成器时同样关闭上游流，及时释放连接
+
+    Args:
+        stream: SDK返回的流
+        deadline: 截止时间
+        cancel: 取消句柄
+        close: 关闭上游流的函数，默认使用stream_closer(stream)
+    """
+    close = close or stream_closer(stream)
+    expired = threading.Event()
+
+    def interrupt():
+        try:
+            close()
+        except Exception:
+            # 部分SDK的流是生成器，正在读取时无法从其他线程关闭，在下一个数据块时结束
+            pass
+
+    def on_expire():
+        expired.set()
+        interrupt()
+
+    def check_stopped():
+        if cancel is not None and cancel.cancelled:
+            raise StreamCancelled()
+        if expired.is_set():
+            raise DeadlineExceeded()
+
+    timer = None
+    if deadline is not None:
+        timer = threading.Timer(max(deadline.remaining(), 0), on_expire)
+        timer.daemon = True
+        timer.start()
+    remove_callback = cancel.add_callback(interrupt) if cancel is not None else None
+
+    try:
+        for chunk in stream:
+            check_stopped()
+            if deadline is not None and deadline.expired:
+                raise DeadlineExceeded()
+            yield chunk
+        check_stopped()
+    except (DeadlineExceeded, StreamCancelled):
+        raise
+    except Exception as e:
+        # 上游流被关闭导致的读取错误
+        try:
+            check_stopped()
+        except (DeadlineExceeded, StreamCancelled) as stop:
+            raise stop from e
+        raise
+    finally:
+        if timer is not None:
+            timer.cancel()
+        if remove_callback is not None:
+            remove_callback()
+        interrupt()
+
+
+async def call_with_deadline_async(fn: Callable[[], Awaitable[Any]], deadline: Optional[Deadline],
+                                   retries: int = 2, backoff: float = 0.5,
+                                   retryable: Callable[[BaseException], bool] = is_retryable) -> Any:
+    """
+    call_with_deadline的异步版本，到达截止时间时取消进行中的调用
+
+    Args:
+        fn: 返回协程的函数，每次尝试前重新调用
+
+    Raises:
+        DeadlineExceeded: 调用前已到期，或因到期而失败
+    """
+    if deadline is None:
+        return await fn()
+
+    attempt = 0
+    while True:
+        timeout = deadline.timeout()
+        try:
+            return await asyncio.wait_for(fn(), timeout)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            if deadline.expired:
+                raise DeadlineExceeded() from e
+            delay = backoff * (2 ** attempt)
+            if attempt >= retries or not retryable(e) or deadline.remaining() <= delay:
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
+
+
+async def guard_async_stream(stream: AsyncIterable[Any], deadline: Optional[Deadline],
+                             cancel: Optional[CancelToken] = None,
+                             idle_timeout: Optional[float] = None) -> AsyncIterator[Any]:
+    """
+    异步流式读取保护
+
+    - 等待数据块的时间受截止时间和idle_timeout限制，到期时取消读取并抛出DeadlineExceeded（或Timeout）
+    - 取消句柄被取消时（可以在其他线程调用cancel()）中断读取并抛出StreamCancelled
+    - 流结束或调用方关闭生成器时关闭上游流（aclose）
+
+    Args:
+        stream: SDK返回的异步流
+        deadline: 截止时间
+        cancel: 取消句柄
+        idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+    """
+    iterator = stream.__aiter__()
+    stopped = None
+    remove_callback = None
+    if cancel is not None:
+        loop = asyncio.get_running_loop()
+        stopped = loop.create_future()
+
+        def on_cancel():
+            loop.call_soon_threadsafe(lambda: stopped.done() or stopped.set_result(None))
+
+        remove_callback = cancel.add_callback(on_cancel)
+
+    try:
+        while True:
+            timeout = deadline.timeout(idle_timeout) if deadline is not None else idle_timeout
+            # 只有截止时间时直接等待；有取消句柄时同时等待取消
+            pending = iterator.__anext__()
+            try:
+                if stopped is None:
+                    chunk = await asyncio.wait_for(pending, timeout)
+                else:
+                    chunk = await _wait_unless_cancelled(pending, stopped, timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                if deadline is not None and deadline.expired:
+                    raise DeadlineExceeded() from None
+                raise Timeout(f"超过{idle_timeout}秒未收到数据") from None
+            yield chunk
+    finally:
+        if remove_callback is not None:
+            remove_callback()
+        # 迭代器与流不是同一个对象时（如OpenAI SDK的AsyncStream）两者都要关闭，流关闭时释放HTTP响应
+        for target in (iterator,) if iterator is stream else (iterator, stream):
+            close = getattr(target, 'aclose', None) or getattr(target, 'close', None)
+            if close is None:
+                continue
+            try:
+                closing = close()
+                if inspect.isawaitable(closing):
+                    await closing
+            except Exception:
+                pass
+
+
+async def _wait_unless_cancelled(pending: Awaitable[Any], stopped: 'asyncio.Future',
+                                 timeout: Optional[float]) -> Any:
+    """等待pending完成；stopped先完成时取消pending并抛出StreamCancelled，超时抛出asyncio.TimeoutError"""
+    if stopped.done():
+        raise StreamCancelled()
+    task = asyncio.ensure_future(pending)
+    done, _ = await asyncio.wait((task, stopped), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    if task in done:
+        return task.result()
+    task.cancel()
+    try:
+        await task
+    except (asyncio.CancelledError, Exception):
+        pass
+    if stopped.done():
+        raise StreamCancelled()
+    raise asyncio.TimeoutError()
@@ -0,0 +1,234 @@
+"""
+错误分类
+
+各平台SDK的异常类型和错误码各不相同，这里统一映射为几类错误，调用方可以据此决定重试、
+降级或直接返回：
+
+    RateLimited          限流/配额（可重试）
+    Timeout              超时（可重试）
+    AuthFailed           认证失败
+    ContextTooLong       输入超过上下文长度
+    ContentFiltered      内容安全拦截
+    UpstreamUnavailable  上游服务不可用/连接失败（可重试）
+    Cancelled            调用方取消
+    Overloaded           本地排队已满或无法在截止时间内获得名额，请求被直接拒绝（可稍后重试）
+
+失败的 ChatResult 中 error_type 为分类名（如 'rate_limited'），code 保留平台原始错误码；
+result.raise_for_error() 会抛出对应类型的异常。
+"""
+import re
+from typing import Any, Dict, Optional, Type
+
+
+class AIModelError(Exception):
+    """平台调用错误（未能归类的错误也使用该类型）"""
+
+    kind = 'error'
+    retryable = False
+
+    def __init__(self, message: str = '', code: Any = None, status: Optional[int] = None,
+                 retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.status = status
+        self.retry_after = retry_after
+
+
+class RateLimited(AIModelError):
+    """限流或配额超限"""
+    kind = 'rate_limited'
+    retryable = True
+
+
+class Timeout(AIModelError, TimeoutError):
+    """请求超时"""
+    kind = 'timeout'
+    retryable = True
+
+
+class AuthFailed(AIModelError):
+    """认证失败（API Key无效、过期或无权限）"""
+    kind = 'auth_failed'
+
+
+class ContextTooLong(AIModelError):
+    """输入超过模型上下文长度"""
+    kind = 'context_too_long'
+
+
+class ContentFiltered(AIModelError):
+    """输入或输出被内容安全策略拦截"""
+    kind = 'content_filtered'
+
+
+class UpstreamUnavailable(AIModelError):
+    """上游服务不可用、过载或连接失败"""
+    kind = 'upstream_unavailable'
+    retryable = True
+
+
+class Cancelled(AIModelError):
+    """请求被调用方取消"""
+    kind = 'cancelled'
+
+
+class Overloaded(AIModelError):
+    """本地过载保护拒绝了请求（排队已满、排队超时或预计无法在截止时间内开始），未发送到上游"""
+    kind = 'overloaded'
+    retryable = True
+
+    def __init__(self, message: str = "请求排队已满，已被拒绝", code: Any = 'overloaded',
+                 status: Optional[int] = None, retry_after: Optional[float] = None, reason: str = 'queue_full'):
+        super().__init__(message, code, status, retry_after)
+        # 拒绝原因：queue_full（排队已满）、queue_time（排队超时）、deadline（预计无法在截止时间内开始）
+        self.reason = reason
+
+
+ERROR_TYPES: Dict[str, Type[AIModelError]] = {
+    cls.kind: cls for cls in (AIModelError, RateLimited, Timeout, AuthFailed, ContextTooLong,
+                              ContentFiltered, UpstreamUnavailable, Cancelled, Overloaded)
+}
+
+# 平台错误码（统一转为小写字符串）
+CODE_TYPES: Dict[str, Type[AIModelError]] = {
+    # OpenAI / Azure OpenAI / AIHubMix
+    'rate_limit_exceeded': RateLimited,
+    'context_length_exceeded': ContextTooLong,
+    'string_above_max_length': ContextTooLong,
+    'content_filter': ContentFiltered,
+    'content_policy_violation': ContentFiltered,
+    'invalid_api_key': AuthFailed,
+    # 通义千问 (DashScope)，Throttling.* 按前缀匹配
+    'invalidapikey': AuthFailed,
+    'datainspectionfailed': ContentFiltered,
+    'requesttimeout': Timeout,
+    'serviceunavailable': UpstreamUnavailable,
+    # 智谱AI
+    '1000': AuthFailed, '1001': AuthFailed, '1002': AuthFailed, '1003': AuthFailed, '1004': AuthFailed,
+    '1261': ContextTooLong,
+    '1301': ContentFiltered,
+    '1302': RateLimited, '1303': RateLimited, '1305': RateLimited,
+    # 百度千帆
+    '4': RateLimited, '17': RateLimited, '18': RateLimited, '336501': RateLimited, '336502': RateLimited,
+    '6': AuthFailed, '13': AuthFailed, '14': AuthFailed, '15': AuthFailed, '110': AuthFailed, '111': AuthFailed,
+    '336007': ContextTooLong, '336103': ContextTooLong,
+    '1': UpstreamUnavailable, '2': UpstreamUnavailable, '336000': UpstreamUnavailable, '336100': UpstreamUnavailable,
+    # 本项目
+    'deadline_exceeded': Timeout,
+    'cancelled': Cancelled,
+    'overloaded': Overloaded,
+}
+
+CODE_PREFIX_TYPES = (
+    ('throttling', RateLimited),
+    ('internalerror', UpstreamUnavailable),
+)
+
+# SDK异常类名
+EXCEPTION_TYPES: Dict[str, Type[AIModelError]] = {
+    'RateLimitError': RateLimited,
+    'APITimeoutError': Timeout,
+    'Timeout': Timeout,
+    'ReadTimeout': Timeout,
+    'ConnectTimeout': Timeout,
+    'AuthenticationError': AuthFailed,
+    'PermissionDeniedError': AuthFailed,
+    'APIConnectionError': UpstreamUnavailable,
+    'ConnectionError': UpstreamUnavailable,
+    'InternalServerError': UpstreamUnavailable,
+}
+
+# 错误信息关键字，平台错误码无法识别时使用
+MESSAGE_PATTERNS = (
+    (re.compile(r'context.length|maximum context|too long|input length|超长|超过.*长度'), ContextTooLong),
+    (re.compile(r'content.filter|content management policy|sensitive|inappropriate|敏感|不安全'),
+     ContentFiltered),
+    (re.compile(r'rate.limit|too many requests|qps|请求过多|频率|并发数'), RateLimited),
+    (re.compile(r'timed? ?out|超时'), Timeout),
+    (re.compile(r'api.?key|unauthori[sz]ed|authentication|认证失败|鉴权'), AuthFailed),
+    (re.compile(r'service unavailable|overloaded|bad gateway|connection (error|reset|refused)|服务繁忙'),
+     UpstreamUnavailable),
+)
+
+
+def classify(status: Optional[int] = None, code: Any = None, message: Optional[str] = None,
+             exception_name: Optional[str] = None) -> Type[AIModelError]:
+    """
+    根据HTTP状态码、平台错误码、错误信息和异常类名确定错误类型
+
+    优先级：错误码 -> 异常类名 -> HTTP状态码 -> 错误信息关键字
+    """
+    if code is not None:
+        code_text = str(code).lower()
+        error_type = CODE_TYPES.get(code_text)
+        if error_type is not None:
+            return error_type
+        for prefix, error_type in CODE_PREFIX_TYPES:
+            if code_text.startswith(prefix):
+                return error_type
+
+    if exception_name in EXCEPTION_TYPES:
+        return EXCEPTION_TYPES[exception_name]
+
+    if status is not None:
+        if status in (401, 403):
+            return AuthFailed
+        if status == 429:
+            return RateLimited
+        if status in (408, 504):
+            return Timeout
+        if status == 413:
+            return ContextTooLong
+        if status >= 500:
+            return UpstreamUnavailable
+
+    if message:
+        text = message.lower()
+        for pattern, error_type in MESSAGE_PATTERNS:
+            if pattern.search(text):
+                return error_type
+    return AIModelError
+
+
+def from_exception(error: BaseException) -> AIModelError:
+    """将SDK异常转换为分类后的错误（已分类的错误原样返回）"""
+    if isinstance(error, AIModelError):
+        return error
+
+    response = getattr(error, 'response', None)
+    status = getattr(error, 'status_code', None)
+    if not isinstance(status, int):
+        status = getattr(response, 'status_code', None)
+        if not isinstance(status, int):
+            status = None
+
+    # OpenAI SDK异常有code属性；智谱等SDK的错误码在响应体的error.code中
+    code = getattr(error, 'code', None)
+    body = getattr(error, 'body', None)
+    if code is None and isinstance(body, dict):
+        detail = body.get('error', body)
+        if isinstance(detail, dict):
+            code = detail.get('code')
+
+    retry_after = None
+    headers = getattr(response, 'headers', None)
+    if headers is not None:
+        try:
+            retry_after = float(headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+
+    exception_name = type(error).__name__
+    if exception_name not in EXCEPTION_TYPES:
+        if isinstance(error, TimeoutError):
+            exception_name = 'Timeout'
+        elif isinstance(error, ConnectionError):
+            exception_name = 'ConnectionError'
+    error_type = classify(status, code, str(error), exception_name)
+    return error_type(str(error), code, status, retry_after)
+
+
+def error_class(kind: Optional[str]) -> Type[AIModelError]:
+    """按分类名返回错误类型"""
+    return ERROR_TYPES.get(kind or 'error', AIModelError)
@@ -0,0 +1,138 @@
+"""
+降级链 (fallback)
+
+上游过载或变慢时，与其直接失败，不如改用较小的模型或其他平台，例如：
+aihubmix:gpt-4o -> aihubmix:gpt-4o-mini -> openai:gpt-4o-mini
+
+AIModelManager.chat / chat_stream 的 fallback 参数指定降级链，调用本身的 (平台, 模型) 为第一步：
+- 错误触发：失败结果的 error_type 属于 on（默认为限流、超时、上游不可用、本地过载）时尝试下一步
+- 延迟触发：max_latency（普通请求的完成时间）或 max_ttft（流式请求的首个数据块时间）超过阈值时
+  放弃当前一步并尝试下一步
+- 请求自身的截止时间到期或被调用方取消时不再降级
+- 流式请求只在收到首个数据块之前降级，已经返回内容后不会切换模型
+
+实际提供结果的平台和模型记录在结果中（platform、model），被跳过的步骤记录在 fallbacks 中，
+下游的缓存和统计可以按实际使用的模型区分。
+"""
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from .traffic import Route, RouteSpec
+
+# 默认触发降级的错误分类
+DEFAULT_TRIGGERS = ('rate_limited', 'timeout', 'upstream_unavailable', 'overloaded')
+
+# 延迟触发的原因
+LATENCY = 'latency'
+TTFT = 'ttft'
+
+
+class FallbackChain:
+    """降级链：调用本身的 (平台, 模型) 之后依次尝试的步骤和触发条件"""
+
+    def __init__(self, steps: Iterable[RouteSpec], on: Iterable[str] = DEFAULT_TRIGGERS,
+                 max_latency: Optional[float] = None, max_ttft: Optional[float] = None):
+        """
+        Args:
+            steps: 降级步骤，Route或 (platform, model)
+            on: 触发降级的错误分类 (error_type)
+            max_latency: 普通请求每一步的最长完成时间（秒），超过时尝试下一步
+            max_ttft: 流式请求每一步等待首个数据块的最长时间（秒），超过时尝试下一步
+        """
+        self.steps = [Route.of(step) for step in steps]
+        self.on = frozenset(on)
+        self.max_latency = max_latency
+        self.max_ttft = max_ttft
+
+    @classmethod
+    def of(cls, spec: Union['FallbackChain', Iterable[RouteSpec]]) -> 'FallbackChain':
+        """由FallbackChain或步骤列表构建"""
+        if isinstance(spec, FallbackChain):
+            return spec
+        return cls(spec)
+
+    def should_fallback(self, result: Any) -> bool:
+        """失败结果是否触发降级"""
+        return not result.get('success') and result.get('error_type') in self.on
+
+
+class FallbackStats:
+    """降级统计：各 (平台, 模型) 按原因被跳过的次数，以及实际提供结果的次数"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, served: Optional[str], attempts: List[Dict[str, Any]]) -> None:
+        """
+        记录一次请求
+
+        Args:
+            served: 实际提供结果的路由名称（所有步骤都失败时为None）
+            attempts: 被跳过的步骤，见attempt
+        """
+        with self._lock:
+            for item in attempts:
+                stats = self._get(item['route'])
+                stats['fell_back'][item['reason']] = stats['fell_back'].get(item['reason'], 0) + 1
+            if served is not None:
+                self._get(served)['served'] += 1
+
+    def _get(self, route: str) -> Dict[str, Any]:
+        stats = self._stats.get(route)
+        if stats is None:
+            stats = self._stats[route] = {'served': 0, 'fell_back': {}}
+        return stats
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {"platform:model": {'served': 实际提供结果的次数, 'fell_back': {原因: 次数}}}
+        """
+        with self._lock:
+            return {route: {'served': stats['served'], 'fell_back': dict(stats['fell_back'])}
+                    for route, stats in self._stats.items()}
+
+
+def attempt(route: Route, reason: str, result: Any, elapsed: float) -> Dict[str, Any]:
+    """被跳过的一步：路由、原因（错误分类或'latency'/'ttft'）、错误信息和耗时"""
+    return {
+        'route': route.name,
+        'platform': route.platform,
+        'model': route.model,
+        'reason': reason,
+        'error': result.get('error') if result is not None else None,
+        'elapsed': elapsed,
+    }
+
+
+class FirstChunkTimer:
+    """首个数据块计时：超过timeout仍未收到时取消token（关闭当前一步的上游流）"""
+
+    def __init__(self, timeout: float, token):
+        self._token = token
+        self._arrived = False
+        self._expired = False
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(timeout, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _expire(self) -> None:
+        with self._lock:
+            if self._arrived:
+                return
+            self._expired = True
+        self._token.cancel()
+
+    def arrived(self) -> bool:
+        """
+        收到首个数据块（或流结束）时调用
+
+        Returns:
+            是否在时限内收到
+        """
+        self._timer.cancel()
+        with self._lock:
+            self._arrived = True
+            return not self._expired
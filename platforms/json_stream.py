@@ -0,0 +1,372 @@
+"""
+流式JSON解析
+
+JSON模式的响应通常要等完整返回后才能解析。JsonStreamParser按数据块增量解析，
+数组元素（或对象成员）一结束就返回，调用方可以在模型生成后续内容的同时开始处理第一个元素：
+
+    [{"name": "a"}, {"name": "b"}, ...]          # 默认返回顶层数组的每个元素
+    {"items": [{"name": "a"}, ...], "total": 9}  # 顶层为对象时返回第一个数组字段的每个元素
+
+- 数据块可以在任意位置切分（字符串、转义字符、数字中间），不完整的部分等待下一个数据块
+- JSON之前和之后的文字（如"以下是结果："、```json 代码块标记）会被跳过；输出第一个值之前遇到语法错误时，
+  认为之前的 { 或 [ 属于文字（如"结果 [注意] 如下: [1,2]"），从下一个 { 或 [ 重新查找
+- 通义千问关闭incremental_output时每个数据块是累计的完整文本，cumulative=True时只解析新增的部分
+- path指定要返回的值，如 'items.*'、'data.users.*'（*匹配任意数组下标或对象键），'' 表示只返回完整文档
+"""
+import json
+import re
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from .result import ChatResult
+
+# JSON无效或不完整时失败结果的错误码
+INVALID_JSON = 'invalid_json'
+
+Path = Tuple[Union[str, int], ...]
+
+_WHITESPACE = re.compile(r'[ \t\r\n]*')
+_STRING_BODY = re.compile(r'[^"\\]*')
+_NUMBER = re.compile(r'[-+0-9.eE]*')
+_START = re.compile(r'[{\[]')
+_LITERALS = {'t': ('true', True), 'f': ('false', False), 'n': ('null', None)}
+
+# 解析状态
+_SCAN = 0            # 在JSON之外，查找 { 或 [
+_VALUE = 1           # 等待一个值
+_VALUE_OR_END = 2    # 数组刚开始：等待值或 ]
+_KEY = 3             # 等待对象的键
+_KEY_OR_END = 4      # 对象刚开始：等待键或 }
+_COLON = 5           # 等待 :
+_NEXT = 6            # 等待 , 或结束符
+_DONE = 7            # 已解析完第一个文档（multiple=False）
+
+
+class _Frame:
+    __slots__ = ('container', 'key')
+
+    def __init__(self, container):
+        self.container = container
+        # 对象中当前值的键
+        self.key: Optional[str] = None
+
+
+class JsonStreamParser:
+    """增量JSON解析器"""
+
+    def __init__(self, path: Union[str, Sequence, None] = None, cumulative: bool = False, multiple: bool = False):
+        """
+        Args:
+            path: 要返回的值的路径，如 'items.*' 或 ('items', '*')；None表示顶层数组的元素，
+                  顶层为对象时为其第一个数组字段的元素
+            cumulative: 数据块是否为累计的完整文本（通义千问 incremental_output=False）
+            multiple: 是否继续解析第一个文档之后的JSON（如每行一个JSON对象）
+        """
+        self.pattern: Optional[Path] = _parse_path(path) if path is not None else None
+        self.cumulative = cumulative
+        self.multiple = multiple
+        # 已解析完成的顶层文档
+        self.documents: List[Any] = []
+        # 输出第一个值之前遇到、被当作文字跳过的最后一个语法错误
+        self.false_start: Optional[ValueError] = None
+        self._auto_pattern = path is None
+        self._buffer = ''
+        self._pos = 0
+        # 跨数据块的字符串或数字：已扫描到的位置
+        self._resume = 0
+        self._stack: List[_Frame] = []
+        self._state = _SCAN
+        self._received = ''
+        # 尚未输出任何值时当前文档的起始位置，遇到语法错误时从其后重新查找；输出值之后为None
+        self._start: Optional[int] = None
+        self._committed = False
+
+    @property
+    def done(self) -> bool:
+        """是否已解析完第一个文档（multiple=False时之后的内容会被忽略）"""
+        return self._state == _DONE
+
+    @property
+    def in_document(self) -> bool:
+        """是否正在解析一个文档"""
+        return bool(self._stack)
+
+    def feed(self, text: str) -> List[Tuple[Path, Any]]:
+        """
+        解析一个数据块
+
+        Returns:
+            已结束的匹配path的值 [(路径, 值)]
+
+        Raises:
+            ValueError: JSON语法错误
+        """
+        if self.cumulative:
+            if text.startswith(self._received):
+                text, self._received = text[len(self._received):], text
+            else:
+                self._received += text
+        if not text or self._state == _DONE:
+            return []
+        # 可能重新查找时保留当前文档起始位置之后的内容
+        keep = self._pos if self._start is None else self._start
+        self._buffer = self._buffer[keep:] + text if keep else self._buffer + text
+        self._resume -= keep
+        self._pos -= keep
+        if self._start is not None:
+            self._start = 0
+        events: List[Tuple[Path, Any]] = []
+        while True:
+            try:
+                self._parse(events)
+                return events
+            except ValueError as e:
+                if self._start is None:
+                    raise
+                self.false_start = e
+                self._restart()
+
+    def _restart(self) -> None:
+        """从当前文档起始位置的下一个字符重新查找 { 或 ["""
+        self._pos = self._start + 1
+        self._start = None
+        self._resume = 0
+        self._stack = []
+        self._state = _SCAN
+        if self._auto_pattern:
+            self.pattern = None
+
+    def _parse(self, events: List[Tuple[Path, Any]]) -> None:
+        buffer = self._buffer
+        end = len(buffer)
+        while True:
+            state = self._state
+            if state == _DONE:
+                self._pos = end
+                return
+            if state == _SCAN:
+                match = _START.search(buffer, self._pos)
+                if match is None:
+                    self._pos = end
+                    return
+                self._pos = match.start()
+                if not self._committed:
+                    self._start = self._pos
+                state = self._state = _VALUE
+
+            pos = _WHITESPACE.match(buffer, self._pos).end()
+            self._pos = pos
+            if pos >= end:
+                return
+            char = buffer[pos]
+
+            if state == _NEXT:
+                frame = self._stack[-1]
+                closing = '}' if isinstance(frame.container, dict) else ']'
+                if char == ',':
+                    self._state = _KEY if closing == '}' else _VALUE
+                    self._pos = pos + 1
+                elif char == closing:
+                    self._pos = pos + 1
+                    self._close_container(events)
+                else:
+                    raise ValueError(f"位置{pos}应为','或'{closing}'，实际为{char!r}")
+                continue
+
+            if state == _COLON:
+                if char != ':':
+                    raise ValueError(f"位置{pos}应为':'，实际为{char!r}")
+                self._pos = pos + 1
+                self._state = _VALUE
+                continue
+
+            if state in (_KEY, _KEY_OR_END):
+                if char == '}' and state == _KEY_OR_END:
+                    self._pos = pos + 1
+                    self._close_container(events)
+                    continue
+                if char != '"':
+                    raise ValueError(f"位置{pos}应为对象的键，实际为{char!r}")
+                key = self._string()
+                if key is _INCOMPLETE:
+                    return
+                self._stack[-1].key = key
+                self._state = _COLON
+                continue
+
+            # _VALUE / _VALUE_OR_END
+            if char == ']' and state == _VALUE_OR_END:
+                self._pos = pos + 1
+                self._close_container(events)
+                continue
+            if char == '{' or char == '[':
+                self._pos = pos + 1
+                self._open_container({} if char == '{' else [])
+                continue
+            if char == '"':
+                value = self._string()
+            elif char == '-' or char.isdigit():
+                value = self._number()
+            elif char in _LITERALS:
+                value = self._literal(char)
+            else:
+                raise ValueError(f"位置{pos}应为JSON值，实际为{char!r}")
+            if value is _INCOMPLETE:
+                return
+            self._complete(value, events)
+
+    def _string(self) -> Any:
+        """解析从当前位置开始的字符串，不完整时返回_INCOMPLETE（下次从已扫描的位置继续）"""
+        buffer = self._buffer
+        start = self._pos
+        index = max(self._resume, start + 1)
+        end = len(buffer)
+        while True:
+            index = _STRING_BODY.match(buffer, index).end()
+            if index >= end:
+                self._resume = index
+                return _INCOMPLETE
+            if buffer[index] == '"':
+                break
+            # 反斜杠：跳过被转义的字符
+            if index + 1 >= end:
+                self._resume = index
+                return _INCOMPLETE
+            index += 2
+        self._pos = index + 1
+        self._resume = 0
+        return json.loads(buffer[start:index + 1])
+
+    def _number(self) -> Any:
+        buffer = self._buffer
+        start = self._pos
+        index = _NUMBER.match(buffer, start).end()
+        if index >= len(buffer):
+            return _INCOMPLETE
+        self._pos = index
+        try:
+            return json.loads(buffer[start:index])
+        except json.JSONDecodeError:
+            raise ValueError(f"位置{start}的数字无效: {buffer[start:index]!r}") from None
+
+    def _literal(self, char: str) -> Any:
+        word, value = _LITERALS[char]
+        start = self._pos
+        text = self._buffer[start:start + len(word)]
+        if len(text) < len(word):
+            if not word.startswith(text):
+                raise ValueError(f"位置{start}的值无效: {text!r}")
+            return _INCOMPLETE
+        if text != word:
+            raise ValueError(f"位置{start}的值无效: {text!r}")
+        self._pos = start + len(word)
+        return value
+
+    def _path(self) -> Path:
+        """当前值的路径"""
+        return tuple(frame.key if isinstance(frame.container, dict) else len(frame.container)
+                     for frame in self._stack)
+
+    def _open_container(self, container) -> None:
+        if self.pattern is None and isinstance(container, list):
+            # 自动选择：顶层数组的元素，或顶层对象中第一个数组字段的元素
+            path = self._path()
+            if len(path) == 0 or (len(path) == 1 and isinstance(path[0], str)):
+                self.pattern = path + ('*',)
+        self._stack.append(_Frame(container))
+        self._state = _KEY_OR_END if isinstance(container, dict) else _VALUE_OR_END
+
+    def _close_container(self, events: List[Tuple[Path, Any]]) -> None:
+        frame = self._stack.pop()
+        if self._stack:
+            self._complete(frame.container, events)
+            return
+        self.documents.append(frame.container)
+        self._commit()
+        if self.pattern == ():
+            events.append(((), frame.container))
+        self._state = _SCAN if self.multiple else _DONE
+
+    def _complete(self, value: Any, events: List[Tuple[Path, Any]]) -> None:
+        """一个值结束：匹配path时返回，并加入所在的对象或数组"""
+        if self.pattern is not None and len(self.pattern) == len(self._stack):
+            path = self._path()
+            if _matches(self.pattern, path):
+                self._commit()
+                events.append((path, value))
+        frame = self._stack[-1]
+        if isinstance(frame.container, dict):
+            frame.container[frame.key] = value
+        else:
+            frame.container.append(value)
+        self._state = _NEXT
+
+    def _commit(self) -> None:
+        """已输出值或完整文档，之后的语法错误不再当作误判"""
+        self._committed = True
+        self._start = None
+
+
+_INCOMPLETE = object()
+
+
+def _parse_path(path: Union[str, Sequence]) -> Path:
+    if isinstance(path, str):
+        path = [part for part in path.split('.') if part]
+    return tuple(int(part) if isinstance(part, str) and part.isdigit() else part for part in path)
+
+
+def _matches(pattern: Path, path: Path) -> bool:
+    return all(expected == '*' or expected == actual for expected, actual in zip(pattern, path))
+
+
+def iter_json(stream: Iterable[ChatResult], path: Union[str, Sequence, None] = None, cumulative: bool = False,
+              multiple: bool = False) -> Iterator[ChatResult]:
+    """
+    在chat_stream上增量解析JSON
+
+    Args:
+        stream: chat_stream 返回的生成器
+        path: 要返回的值的路径，见JsonStreamParser
+        cumulative: 数据块是否为累计的完整文本
+        multiple: 是否解析多个顶层JSON
+
+    Yields:
+        每个匹配path的值结束时返回一个数据块（path为路径元组，value为值）；
+        流结束时最后一个数据块的path为()，value为完整文档（multiple=True时为文档列表），带usage。
+        JSON无效或不完整时最后一个数据块为失败结果（code为'invalid_json'），上游失败时原样返回
+    """
+    parser = JsonStreamParser(path, cumulative, multiple)
+    model = usage = None
+    try:
+        for chunk in stream:
+            if not chunk.get('success'):
+                yield chunk
+                return
+            model = chunk.get('model') or model
+            if chunk.get('usage'):
+                usage = chunk['usage']
+            content = chunk.get('content')
+            if not content:
+                continue
+            try:
+                events = parser.feed(content)
+            except ValueError as e:
+                yield ChatResult.fail(f"无效的JSON: {e}", INVALID_JSON)
+                return
+            for value_path, value in events:
+                yield ChatResult.chunk('', model, path=value_path, value=value)
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+    if parser.in_document or not parser.documents:
+        if parser.in_document:
+            error = "JSON不完整"
+        elif parser.false_start is not None:
+            error = f"无效的JSON: {parser.false_start}"
+        else:
+            error = "响应中没有JSON"
+        yield ChatResult.fail(error, INVALID_JSON)
+        return
+    document = parser.documents if multiple else parser.documents[0]
+    yield ChatResult.chunk('', model, usage, path=(), value=document)
@@ -1,3 +1,4 @@
 from .client import OpenAIClient
+from .batch import OpenAIBatch
 
-__all__ = ['OpenAIClient']
\ No newline at end of file
+__all__ = ['OpenAIClient', 'OpenAIBatch']
\ No newline at end of file
@@ -0,0 +1,199 @@
+"""
+OpenAI Batch API (OpenAI / Azure OpenAI 共用)
+
+大批量离线任务使用平台的异步批处理接口，费用更低、不占用同步接口的速率限制：
+1. 从提示词迭代器逐行生成上传文件 (JSONL)，不会一次性加载到内存
+2. 上传文件并创建批处理任务
+3. 按指数退避轮询任务状态
+4. 流式读取结果文件，按输入的custom_id返回结果
+"""
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from ..capabilities import get_capability_index
+from ..prompt_cache import build_messages
+from ..result import ChatResult, Usage
+
+# 批处理任务的终止状态
+TERMINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+PromptItem = Union[str, Tuple[str, str], Dict[str, Any]]
+
+
+class OpenAIBatch:
+    """OpenAI兼容平台的批处理任务"""
+
+    def __init__(self, client, platform: str = 'openai', endpoint: str = '/v1/chat/completions',
+                 completion_window: str = '24h'):
+        """
+        初始化批处理任务
+
+        Args:
+            client: OpenAI或AzureOpenAI SDK客户端
+            platform: 平台名称，用于查询模型能力
+            endpoint: 批处理请求的接口路径（Azure为 '/chat/completions'）
+            completion_window: 任务完成时限
+        """
+        self.client = client
+        self.platform = platform
+        self.endpoint = endpoint
+        self.completion_window = completion_window
+        self.capabilities = get_capability_index()
+
+    def build_input_file(self,
+                         prompts: Iterable[PromptItem],
+                         model: str,
+                         temperature: float = 0.7,
+                         max_tokens: int = 1000,
+                         max_completion_tokens: int = None,
+                         system_prompt: str = None,
+                         **kwargs) -> Tuple[str, int]:
+        """
+        从提示词迭代器生成批处理上传文件
+
+        Args:
+            prompts: 提示词迭代器，元素可以是字符串、(custom_id, message) 或
+                     {'id': ..., 'message': ...}；未指定ID时使用序号
+            其余参数同chat接口
+
+        Returns:
+            (文件路径, 请求数量)
+        """
+        caps = self.capabilities.lookup(self.platform, model)
+        params = dict(caps.sampling_kwargs(temperature))
+        params.update(caps.token_kwargs(max_tokens, max_completion_tokens))
+        params.update(kwargs)
+
+        fd, path = tempfile.mkstemp(prefix='batch-', suffix='.jsonl')
+        count = 0
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for index, item in enumerate(prompts):
+                if isinstance(item, str):
+                    custom_id, message = str(index), item
+                elif isinstance(item, dict):
+                    custom_id, message = str(item.get('id', index)), item['message']
+                else:
+                    custom_id, message = str(item[0]), item[1]
+
+                body = {'model': model, 'messages': build_messages(message, system_prompt)}
+                body.update(params)
+                f.write(json.dumps({
+                    'custom_id': custom_id,
+                    'method': 'POST',
+                    'url': self.endpoint,
+                    'body': body,
+                }, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        return path, count
+
+    def submit(self, prompts: Iterable[PromptItem], model: str, metadata: Optional[Dict[str, str]] = None,
+               **kwargs) -> str:
+        """
+        生成上传文件、上传并创建批处理任务
+
+        Returns:
+            批处理任务ID
+        """
+        path, count = self.build_input_file(prompts, model, **kwargs)
+        try:
+            if count == 0:
+                raise ValueError("批处理任务没有请求")
+            with open(path, 'rb') as f:
+                input_file = self.client.files.create(file=f, purpose='batch')
+        finally:
+            os.remove(path)
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.endpoint,
+            completion_window=self.completion_window,
+            metadata=metadata,
+        )
+        return batch.id
+
+    def wait(self, batch_id: str, poll_interval: float = 5, max_interval: float = 60,
+             timeout: Optional[float] = None):
+        """
+        按指数退避轮询，直到任务进入终止状态
+
+        Args:
+            batch_id: 批处理任务ID
+            poll_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            timeout: 最长等待时间（秒），超时抛出TimeoutError
+
+        Returns:
+            批处理任务对象
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        interval = poll_interval
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in TERMINAL_STATUSES:
+                return batch
+            if deadline is not None and time.monotonic() + interval > deadline:
+                raise TimeoutError(f"批处理任务 {batch_id} 等待超时，当前状态: {batch.status}")
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_interval)
+
+    def iter_results(self, batch) -> Iterator[Tuple[str, ChatResult]]:
+        """
+        流式读取批处理结果
+
+        先返回结果文件中的结果，再返回错误文件中的失败请求
+
+        Yields:
+            (custom_id, ChatResult)
+        """
+        for file_id in (batch.output_file_id, getattr(batch, 'error_file_id', None)):
+            if not file_id:
+                continue
+            with self.client.files.with_streaming_response.content(file_id) as response:
+                for line in response.iter_lines():
+                    if line:
+                        yield self._parse_line(line)
+
+    def run(self, prompts: Iterable[PromptItem], model: str, poll_interval: float = 5,
+            max_interval: float = 60, timeout: Optional[float] = None,
+            **kwargs) -> Iterator[Tuple[str, ChatResult]]:
+        """
+        提交批处理任务，等待完成后流式返回结果
+
+        任务未完成（过期、取消）时返回已有的结果；所有请求都失败时只有错误文件，返回其中的失败结果
+
+        Raises:
+            RuntimeError: 任务没有结果文件和错误文件（如输入文件校验失败）
+        """
+        batch_id = self.submit(prompts, model, **kwargs)
+        batch = self.wait(batch_id, poll_interval, max_interval, timeout)
+        if not batch.output_file_id and not getattr(batch, 'error_file_id', None):
+            errors = getattr(batch, 'errors', None)
+            details = [error.message for error in getattr(errors, 'data', None) or []]
+            raise RuntimeError(f"批处理任务 {batch_id} 没有结果，状态: {batch.status}"
+                               + (f"，错误: {'; '.join(details)}" if details else ''))
+        yield from self.iter_results(batch)
+
+    @staticmethod
+    def _parse_line(line: Union[str, bytes]) -> Tuple[str, ChatResult]:
+        """解析结果文件中的一行"""
+        record = json.loads(line)
+        custom_id = record.get('custom_id')
+        response = record.get('response') or {}
+        body = response.get('body') or {}
+
+        if record.get('error') or response.get('status_code') != 200:
+            error = record.get('error') or body.get('error') or {}
+            return custom_id, ChatResult.fail(
+                error.get('message') or str(error), error.get('code') or response.get('status_code')
+            )
+
+        choices = body.get('choices') or [{}]
+        return custom_id, ChatResult.ok(
+            (choices[0].get('message') or {}).get('content'),
+            body.get('model'),
+            Usage.from_dict(body.get('usage'))
+        )
@@ -2,20 +2,32 @@
 OpenAI API客户端
 """
 from openai import OpenAI
-from typing import Optional, Dict, Any, Generator
+from typing import Optional, Dict, Any, Generator, Tuple
 from config.config import Config
+from ..result import ChatResult, Usage
+from ..prompt_cache import build_messages
+from .batch import OpenAIBatch
+from ..capabilities import get_capability_index
+from ..deadline import Deadline, call_with_deadline, guard_stream, timeout_kwargs
+from ..cancellation import CancelToken
+from ..transport import ChatTransport, HTTP, completion_result, stream_chunks
 
 class OpenAIClient:
-    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 debug: Optional[bool] = None,
+                 transport: Optional[str] = None):
         """
         初始化OpenAI客户端
         
         Args:
             api_key: API密钥，如果不提供则从配置中获取
             base_url: API基础URL，如果不提供则从配置中获取
+            debug: 是否在结果中保留原始响应(raw_response)，默认使用配置中的值
+            transport: 传输方式，'sdk'使用OpenAI SDK，'http'直接发送HTTP请求（不构建SDK对象），默认使用配置中的值
         """
         self.api_key = api_key or Config.OPENAI_API_KEY
         self.base_url = base_url or Config.OPENAI_BASE_URL
+        self.debug = Config.DEBUG_RAW_RESPONSE if debug is None else debug
         
         if not self.api_key:
             raise ValueError("OpenAI API Key未设置")
@@ -24,13 +36,23 @@ class OpenAIClient:
             api_key=self.api_key,
             base_url=self.base_url
         )
+        # 设置了截止时间的请求不使用SDK内置重试，由call_with_deadline在剩余时间内重试
+        self.deadline_client = self.client.with_options(max_retries=0)
+        self.capabilities = get_capability_index()
+        # 轻量HTTP传输：直接使用/chat/completions的线路格式，返回与SDK路径相同的结果
+        self.transport = transport or Config.CHAT_TRANSPORT
+        self.http = ChatTransport.openai(self.api_key, self.base_url) if self.transport == HTTP else None
+        self.batch = OpenAIBatch(self.client, 'openai')
     
     def chat(self, 
              message: str, 
              model: str = None, 
              temperature: float = 0.7,
              max_tokens: int = 1000,
+             max_completion_tokens: int = None,
              system_prompt: str = None,
+             deadline: Optional[Deadline] = None,
+             timeout: float = None,
              **kwargs) -> Dict[str, Any]:
         """
         发送聊天请求
@@ -39,8 +61,11 @@ class OpenAIClient:
             message: 用户消息
             model: 模型名称，默认使用配置中的模型
             temperature: 温度参数
-            max_tokens: 最大token数量
+            max_tokens: 最大token数量 (兼容旧模型)
+            max_completion_tokens: 最大完成token数量 (新模型如GPT-5)
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
             **kwargs: 其他参数
             
         Returns:
@@ -48,42 +73,54 @@ class OpenAIClient:
         """
         model = model or Config.DEFAULT_MODELS['openai']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        
+        caps = self.capabilities.lookup('openai', model)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            response = self.client.chat.completions.create(
+            params = dict(
                 model=model,
                 messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
+                **caps.sampling_kwargs(temperature),
+                **caps.token_kwargs(max_tokens, max_completion_tokens),
                 **kwargs
             )
+            if self.http is not None:
+                data = call_with_deadline(lambda: self.http.create(params, **timeout_kwargs(deadline)), deadline)
+                result = completion_result(data, model)
+                if self.debug:
+                    result.raw_response = data
+                return result
+            
+            response = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline)
+            ), deadline)
             
-            return {
-                'success': True,
-                'content': response.choices[0].message.content,
-                'model': model,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                } if response.usage else None
-            }
+            result = ChatResult.ok(
+                response.choices[0].message.content,
+                model,
+                Usage.from_openai(response.usage)
+            )
+            if self.debug:
+                result.raw_response = response
+            return result
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return ChatResult.from_exception(e)
     
     def chat_stream(self, 
                    message: str, 
                    model: str = None, 
                    temperature: float = 0.7,
                    max_tokens: int = 1000,
+                   max_completion_tokens: int = None,
                    system_prompt: str = None,
+                   deadline: Optional[Deadline] = None,
+                   timeout: float = None,
+                   idle_timeout: float = None,
+                   cancel: Optional[CancelToken] = None,
                    **kwargs) -> Generator[Dict[str, Any], None, None]:
         """
         流式聊天请求
@@ -92,39 +129,86 @@ class OpenAIClient:
             message: 用户消息
             model: 模型名称
             temperature: 温度参数
-            max_tokens: 最大token数量
+            max_tokens: 最大token数量 (兼容旧模型)
+            max_completion_tokens: 最大完成token数量 (新模型如GPT-5)
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
             **kwargs: 其他参数
             
         Yields:
-            流式响应数据
+            流式响应数据；关闭生成器会同时关闭SDK的流和HTTP响应
         """
         model = model or Config.DEFAULT_MODELS['openai']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        
+        caps = self.capabilities.lookup('openai', model)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            stream = self.client.chat.completions.create(
+            params = dict(
                 model=model,
                 messages=messages,
-                temperature=temperature,
-                max_tokens=max_tokens,
                 stream=True,
+                **({} if 'stream_options' in kwargs else caps.stream_kwargs()),
+                **caps.sampling_kwargs(temperature),
+                **caps.token_kwargs(max_tokens, max_completion_tokens),
                 **kwargs
             )
+            if self.http is not None:
+                events = call_with_deadline(
+                    lambda: self.http.stream(params, **timeout_kwargs(deadline, idle_timeout)), deadline
+                )
+                yield from stream_chunks(guard_stream(events, deadline, cancel), model)
+                return
+            
+            stream = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline, idle_timeout)
+            ), deadline)
             
-            for chunk in stream:
-                if chunk.choices[0].delta.content:
-                    yield {
-                        'success': True,
-                        'content': chunk.choices[0].delta.content,
-                        'model': model
-                    }
+            for chunk in guard_stream(stream, deadline, cancel):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield ChatResult.chunk(chunk.choices[0].delta.content, model)
+                if getattr(chunk, 'usage', None):
+                    # 流结束时的usage（include_usage时最后一个数据块没有choices）
+                    yield ChatResult.chunk('', model, Usage.from_openai(chunk.usage))
         except Exception as e:
-            yield {
-                'success': False,
-                'error': str(e)
-            }
\ No newline at end of file
+            yield ChatResult.from_exception(e)
+    
+    def chat_batch(self, 
+                   prompts, 
+                   model: str = None, 
+                   poll_interval: float = 5,
+                   max_interval: float = 60,
+                   timeout: float = None,
+                   **kwargs) -> Generator[Tuple[str, ChatResult], None, None]:
+        """
+        通过Batch API批量聊天
+        
+        适合大批量离线任务：提交异步批处理任务，按指数退避轮询，完成后流式返回结果。
+        
+        Args:
+            prompts: 提示词迭代器，元素可以是字符串、(custom_id, message) 或 {'id': ..., 'message': ...}
+            model: 模型名称
+            poll_interval: 初始轮询间隔（秒）
+            max_interval: 最大轮询间隔（秒）
+            timeout: 最长等待时间（秒）
+            **kwargs: 其他参数，同chat接口 (temperature, max_tokens, system_prompt等)
+            
+        Yields:
+            (custom_id, 结果)
+        """
+        model = model or Config.DEFAULT_MODELS['openai']
+        yield from self.batch.run(
+            prompts,
+            model,
+            poll_interval=poll_interval,
+            max_interval=max_interval,
+            timeout=timeout,
+            **kwargs
+        )
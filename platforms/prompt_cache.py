@@ -0,0 +1,99 @@
+"""
+提示词前缀缓存支持
+
+OpenAI、Azure、AIHubMix、智谱AI、通义千问等平台会对请求的公共前缀做服务端缓存，
+命中缓存的部分计费更低、首字延迟更短。要稳定命中，需要每次请求的前缀逐字节相同：
+- 消息顺序固定：system -> 历史消息 -> 当前用户消息
+- 系统提示词的换行符统一为\\n（内容本身不做其他修改，行尾空白等可能有意义）
+
+本模块同时按平台统计缓存命中情况（usage中的cached_tokens）。
+"""
+import threading
+from typing import Optional, Dict, Any, List
+
+
+def normalize_prompt(prompt: str) -> str:
+    """统一换行符（\\r\\n、\\r -> \\n），使不同来源的相同提示词序列化后逐字节相同"""
+    if '\r' not in prompt:
+        return prompt
+    return prompt.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def system_message(system_prompt: str, role: str = 'system') -> Dict[str, str]:
+    """返回系统消息（每次返回新的字典，调用方可以修改）"""
+    return {"role": role, "content": normalize_prompt(system_prompt)}
+
+
+def build_messages(message: str,
+                   system_prompt: Optional[str] = None,
+                   history: Optional[List[Dict[str, str]]] = None) -> List[Dict[str, str]]:
+    """
+    按固定顺序构建消息列表: system -> 历史消息 -> 当前用户消息
+
+    Args:
+        message: 用户消息
+        system_prompt: 系统提示词
+        history: 历史消息列表
+
+    Returns:
+        消息列表
+    """
+    messages = []
+    if system_prompt:
+        messages.append(system_message(system_prompt))
+    if history:
+        messages.extend(history)
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
+class PrefixCacheStats:
+    """按平台统计提示词前缀缓存命中情况"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform: str, usage: Any) -> None:
+        """
+        记录一次请求的token使用情况
+
+        Args:
+            platform: 平台名称
+            usage: 结果中的usage (Usage对象或字典)，为空时忽略
+        """
+        if not usage:
+            return
+        prompt_tokens = usage.get('prompt_tokens') or 0
+        cached_tokens = usage.get('cached_tokens') or 0
+        with self._lock:
+            stats = self._stats.get(platform)
+            if stats is None:
+                stats = self._stats[platform] = {
+                    'requests': 0, 'hit_requests': 0, 'prompt_tokens': 0, 'cached_tokens': 0
+                }
+            stats['requests'] += 1
+            stats['prompt_tokens'] += prompt_tokens
+            stats['cached_tokens'] += cached_tokens
+            if cached_tokens:
+                stats['hit_requests'] += 1
+
+    def hit_ratio(self, platform: str) -> float:
+        """缓存命中率（命中缓存的提示词token占全部提示词token的比例）"""
+        stats = self._stats.get(platform)
+        if not stats or not stats['prompt_tokens']:
+            return 0.0
+        return stats['cached_tokens'] / stats['prompt_tokens']
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """返回各平台的统计数据及命中率"""
+        with self._lock:
+            report = {platform: dict(stats) for platform, stats in self._stats.items()}
+        for platform, stats in report.items():
+            stats['hit_ratio'] = self.hit_ratio(platform)
+            stats['request_hit_ratio'] = stats['hit_requests'] / stats['requests'] if stats['requests'] else 0.0
+        return report
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
@@ -14,14 +14,36 @@
 - DASHSCOPE_WEBSOCKET_BASE_URL: 自定义WebSocket API端点
 - DASHSCOPE_API_REGION: API区域 (默认: cn-beijing)
 - DASHSCOPE_API_VERSION: API版本 (默认: v1)
+
+achat / achat_stream 使用SDK的异步接口 (AioGeneration)，在事件循环中完成网络IO，不占用线程
+
+OpenAI兼容模式 (api='openai')：
+通过DashScope的OpenAI兼容接口 (https://dashscope.aliyuncs.com/compatible-mode/v1) 调用，
+使用messages格式（支持系统提示词），与OpenAI客户端共用同一套实现：SDK/HTTP传输的连接池、
+AsyncOpenAI异步接口、流式输出结束时返回usage (stream_options)。
+可以在初始化时指定（或设置 AI_QWEN_API=openai），也可以在每次调用时通过 api 参数选择。
 """
 import dashscope
 from dashscope import Generation
-from typing import Optional, Dict, Any
+from openai import AsyncOpenAI, OpenAI
+from typing import Optional, Dict, Any, AsyncGenerator, List
 from config.config import Config
+from ..result import ChatResult, Usage
+from ..prompt_cache import build_messages
+from ..capabilities import get_capability_index
+from ..deadline import (Deadline, call_with_deadline, call_with_deadline_async, guard_async_stream,
+                        guard_stream, timeout_kwargs)
+from ..cancellation import CancelToken
+from ..transport import ChatTransport, HTTP, completion_result, stream_chunks
+
+# 调用方式
+GENERATION = 'generation'
+OPENAI_COMPATIBLE = 'openai'
 
 class QwenClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, debug: Optional[bool] = None,
+                 api: Optional[str] = None, base_url: Optional[str] = None,
+                 transport: Optional[str] = None):
         """
         初始化通义千问客户端
         
@@ -31,16 +53,37 @@ class QwenClient:
         Args:
             api_key: API密钥，如果不提供则从配置中获取
                     可从阿里云DashScope控制台获取：https://dashscope.console.aliyun.com/
+            debug: 是否在结果中保留原始响应(raw_response)，默认使用配置中的值
+            api: 默认调用方式，'generation'使用DashScope SDK，'openai'使用OpenAI兼容接口，默认使用配置中的值
+            base_url: OpenAI兼容接口的地址，默认使用配置中的值
+            transport: OpenAI兼容模式的传输方式，'sdk'使用OpenAI SDK，'http'直接发送HTTP请求，默认使用配置中的值
         """
         self.api_key = api_key or Config.QWEN_API_KEY
+        self.debug = Config.DEBUG_RAW_RESPONSE if debug is None else debug
         # 设置全局API密钥，DashScope SDK会自动使用内置的API端点
         dashscope.api_key = self.api_key
+        
+        self.api = api or Config.QWEN_API
+        if self.api not in (GENERATION, OPENAI_COMPATIBLE):
+            raise ValueError(f"不支持的调用方式: {self.api}")
+        self.base_url = base_url or Config.QWEN_COMPATIBLE_BASE_URL
+        self.transport = transport or Config.CHAT_TRANSPORT
+        self.capabilities = get_capability_index()
+        # OpenAI兼容模式的客户端在第一次使用时创建，之后复用其连接池
+        self._client = None
+        self._deadline_client = None
+        self._async_client = None
+        self._http = None
     
     def chat(self, 
              message: str, 
              model: str = None, 
              temperature: float = 0.7,
              max_tokens: int = 1000,
+             system_prompt: str = None,
+             deadline: Optional[Deadline] = None,
+             timeout: float = None,
+             api: str = None,
              **kwargs) -> Dict[str, Any]:
         """
         发送聊天请求
@@ -50,6 +93,10 @@ class QwenClient:
             model: 模型名称，默认使用配置中的模型
             temperature: 温度参数
             max_tokens: 最大token数量
+            system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            api: 本次请求的调用方式（'generation'或'openai'），默认使用初始化时的设置
             **kwargs: 其他参数
             
         Returns:
@@ -59,42 +106,37 @@ class QwenClient:
             raise ValueError("API Key未设置")
         
         model = model or Config.DEFAULT_MODELS['qwen']
+        deadline = Deadline.resolve(deadline, timeout)
+        if self._compatible(api):
+            return self._compatible_chat(message, model, temperature, max_tokens, system_prompt, deadline, **kwargs)
+        kwargs.update(self._generation_input(message, system_prompt))
         
         try:
             # 调用DashScope Generation API
             # 内部会自动发送请求到: https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation
-            response = Generation.call(
+            response = call_with_deadline(lambda: Generation.call(
                 model=model,
-                prompt=message,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                **timeout_kwargs(deadline, name='request_timeout'),
                 **kwargs
-            )
+            ), deadline)
             
-            if response.status_code == 200:
-                return {
-                    'success': True,
-                    'content': response.output.text,
-                    'model': model,
-                    'usage': response.usage if hasattr(response, 'usage') else None
-                }
-            else:
-                return {
-                    'success': False,
-                    'error': response.message,
-                    'code': response.code
-                }
+            return self._result(response, model)
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return ChatResult.from_exception(e)
     
     def chat_stream(self, 
                    message: str, 
                    model: str = None, 
                    temperature: float = 0.7,
                    max_tokens: int = 1000,
+                   system_prompt: str = None,
+                   deadline: Optional[Deadline] = None,
+                   timeout: float = None,
+                   idle_timeout: float = None,
+                   cancel: Optional[CancelToken] = None,
+                   api: str = None,
                    **kwargs):
         """
         流式聊天请求
@@ -104,44 +146,299 @@ class QwenClient:
             model: 模型名称
             temperature: 温度参数
             max_tokens: 最大token数量
+            system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
+            api: 本次请求的调用方式（'generation'或'openai'），默认使用初始化时的设置
             **kwargs: 其他参数
             
         Yields:
-            流式响应数据
+            流式响应数据；关闭生成器会同时关闭SDK的流和HTTP响应
         """
         if not self.api_key:
             raise ValueError("API Key未设置")
         
         model = model or Config.DEFAULT_MODELS['qwen']
+        deadline = Deadline.resolve(deadline, timeout)
+        if self._compatible(api):
+            yield from self._compatible_stream(message, model, temperature, max_tokens, system_prompt,
+                                               deadline, idle_timeout, cancel, **kwargs)
+            return
+        kwargs.update(self._generation_input(message, system_prompt))
+        # 增量输出：每个数据块只包含新生成的内容（默认每次返回完整的累计内容）
+        kwargs.setdefault('incremental_output', True)
         
         try:
             # 流式调用DashScope Generation API
             # 内部会自动连接到WebSocket端点: wss://dashscope.aliyuncs.com/api-ws/v1/inference
-            responses = Generation.call(
+            responses = call_with_deadline(lambda: Generation.call(
                 model=model,
-                prompt=message,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 stream=True,  # 启用流式输出
+                **timeout_kwargs(deadline, idle_timeout, name='request_timeout'),
                 **kwargs
-            )
+            ), deadline)
             
-            for response in responses:
-                if response.status_code == 200:
-                    yield {
-                        'success': True,
-                        'content': response.output.text,
-                        'model': model
-                    }
-                else:
-                    yield {
-                        'success': False,
-                        'error': response.message,
-                        'code': response.code
-                    }
+            for response in guard_stream(responses, deadline, cancel):
+                chunk = self._chunk(response, model)
+                yield chunk
+                if not chunk['success']:
                     break
         except Exception as e:
-            yield {
-                'success': False,
-                'error': str(e)
-            }
\ No newline at end of file
+            yield ChatResult.from_exception(e)
+    
+    async def achat(self, 
+                    message: str, 
+                    model: str = None, 
+                    temperature: float = 0.7,
+                    max_tokens: int = 1000,
+                    system_prompt: str = None,
+                    deadline: Optional[Deadline] = None,
+                    timeout: float = None,
+                    api: str = None,
+                    **kwargs) -> Dict[str, Any]:
+        """
+        异步聊天请求（AioGeneration，OpenAI兼容模式使用AsyncOpenAI），参数和返回值与chat相同
+        """
+        if not self.api_key:
+            raise ValueError("API Key未设置")
+        
+        model = model or Config.DEFAULT_MODELS['qwen']
+        deadline = Deadline.resolve(deadline, timeout)
+        if self._compatible(api):
+            return await self._compatible_achat(message, model, temperature, max_tokens, system_prompt,
+                                                deadline, **kwargs)
+        kwargs.update(self._generation_input(message, system_prompt))
+        
+        try:
+            response = await call_with_deadline_async(lambda: dashscope.AioGeneration.call(
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **timeout_kwargs(deadline, name='request_timeout'),
+                **kwargs
+            ), deadline)
+            return self._result(response, model)
+        except Exception as e:
+            return ChatResult.from_exception(e)
+    
+    async def achat_stream(self, 
+                           message: str, 
+                           model: str = None, 
+                           temperature: float = 0.7,
+                           max_tokens: int = 1000,
+                           system_prompt: str = None,
+                           deadline: Optional[Deadline] = None,
+                           timeout: float = None,
+                           idle_timeout: float = None,
+                           cancel: Optional[CancelToken] = None,
+                           api: str = None,
+                           **kwargs) -> AsyncGenerator[Dict[str, Any], None]:
+        """
+        异步流式聊天请求（AioGeneration，OpenAI兼容模式使用AsyncOpenAI），参数与chat_stream相同
+        
+        Yields:
+            流式响应数据；关闭生成器(aclose)会同时关闭SDK的流
+        """
+        if not self.api_key:
+            raise ValueError("API Key未设置")
+        
+        model = model or Config.DEFAULT_MODELS['qwen']
+        deadline = Deadline.resolve(deadline, timeout)
+        compatible = self._compatible(api)
+        if not compatible:
+            kwargs.update(self._generation_input(message, system_prompt))
+            kwargs.setdefault('incremental_output', True)
+        
+        try:
+            if compatible:
+                responses = await call_with_deadline_async(lambda: self.async_client.chat.completions.create(
+                    **self._compatible_params(message, model, temperature, max_tokens, system_prompt,
+                                              stream=True, **kwargs),
+                    **timeout_kwargs(deadline, idle_timeout)
+                ), deadline)
+                to_chunks = self._compatible_chunks
+            else:
+                responses = await call_with_deadline_async(lambda: dashscope.AioGeneration.call(
+                    model=model,
+                    temperature=temperature,
+                    max_tokens=max_tokens,
+                    stream=True,
+                    **timeout_kwargs(deadline, idle_timeout, name='request_timeout'),
+                    **kwargs
+                ), deadline)
+                to_chunks = self._chunks
+            
+            # 调用方关闭生成器时立即关闭上游流（异步生成器不会随外层生成器同步关闭）
+            stream = guard_async_stream(responses, deadline, cancel, idle_timeout)
+            try:
+                async for response in stream:
+                    chunks = to_chunks(response, model)
+                    for chunk in chunks:
+                        yield chunk
+                    if chunks and not chunks[-1]['success']:
+                        break
+            finally:
+                await stream.aclose()
+        except Exception as e:
+            yield ChatResult.from_exception(e)
+    
+    def _result(self, response, model: str) -> ChatResult:
+        """把Generation的响应转换为ChatResult"""
+        if response.status_code != 200:
+            return ChatResult.fail(response.message, response.code)
+        result = ChatResult.ok(
+            response.output.text,
+            model,
+            Usage.from_dict(getattr(response, 'usage', None))
+        )
+        if self.debug:
+            result.raw_response = response
+        return result
+    
+    @classmethod
+    def _chunks(cls, response, model: str) -> List[ChatResult]:
+        return [cls._chunk(response, model)]
+    
+    @staticmethod
+    def _chunk(response, model: str) -> ChatResult:
+        """把流式响应的数据块转换为ChatResult"""
+        if response.status_code != 200:
+            return ChatResult.fail(response.message, response.code)
+        finish_reason = getattr(response.output, 'finish_reason', None)
+        if finish_reason and finish_reason != 'null':
+            # 每个数据块都带有累计的usage，只在最后一个数据块中返回
+            return ChatResult.chunk(response.output.text, model,
+                                    Usage.from_dict(getattr(response, 'usage', None)))
+        return ChatResult.chunk(response.output.text, model)
+    
+    # ------------------------------------------------------------------
+    # OpenAI兼容模式
+    # ------------------------------------------------------------------
+    
+    def _compatible(self, api: Optional[str]) -> bool:
+        api = api or self.api
+        if api not in (GENERATION, OPENAI_COMPATIBLE):
+            raise ValueError(f"不支持的调用方式: {api}")
+        return api == OPENAI_COMPATIBLE
+    
+    @staticmethod
+    def _generation_input(message: str, system_prompt: Optional[str]) -> Dict[str, Any]:
+        """Generation.call的输入：有系统提示词时使用messages，否则使用prompt"""
+        if system_prompt:
+            return {'messages': build_messages(message, system_prompt)}
+        return {'prompt': message}
+    
+    @property
+    def client(self) -> OpenAI:
+        """OpenAI兼容接口的SDK客户端（复用连接池）"""
+        if self._client is None:
+            self._client = OpenAI(api_key=self.api_key, base_url=self.base_url)
+            # 设置了截止时间的请求不使用SDK内置重试，由call_with_deadline在剩余时间内重试
+            self._deadline_client = self._client.with_options(max_retries=0)
+        return self._client
+    
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """OpenAI兼容接口的异步SDK客户端"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        return self._async_client
+    
+    @property
+    def http(self) -> Optional[ChatTransport]:
+        """轻量HTTP传输（transport='http'时使用）"""
+        if self._http is None and self.transport == HTTP:
+            self._http = ChatTransport.openai(self.api_key, self.base_url)
+        return self._http
+    
+    def _compatible_params(self, message: str, model: str, temperature: float, max_tokens: int,
+                           system_prompt: Optional[str], stream: bool = False, **kwargs) -> Dict[str, Any]:
+        caps = self.capabilities.lookup('qwen', model)
+        params = dict(
+            model=model,
+            messages=build_messages(message, system_prompt),
+            **caps.sampling_kwargs(temperature),
+            **caps.token_kwargs(max_tokens),
+        )
+        if stream:
+            params['stream'] = True
+            if 'stream_options' not in kwargs:
+                params.update(caps.stream_kwargs())
+        params.update(kwargs)
+        return params
+    
+    def _compatible_chat(self, message: str, model: str, temperature: float, max_tokens: int,
+                         system_prompt: Optional[str], deadline: Optional[Deadline], **kwargs) -> ChatResult:
+        params = self._compatible_params(message, model, temperature, max_tokens, system_prompt, **kwargs)
+        try:
+            if self.http is not None:
+                data = call_with_deadline(lambda: self.http.create(params, **timeout_kwargs(deadline)), deadline)
+                result = completion_result(data, model)
+                if self.debug:
+                    result.raw_response = data
+                return result
+            
+            client = self.client if deadline is None else self._deadline_client
+            response = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline)
+            ), deadline)
+            return self._compatible_result(response, model)
+        except Exception as e:
+            return ChatResult.from_exception(e)
+    
+    def _compatible_stream(self, message: str, model: str, temperature: float, max_tokens: int,
+                           system_prompt: Optional[str], deadline: Optional[Deadline],
+                           idle_timeout: Optional[float], cancel: Optional[CancelToken], **kwargs):
+        params = self._compatible_params(message, model, temperature, max_tokens, system_prompt,
+                                         stream=True, **kwargs)
+        try:
+            if self.http is not None:
+                events = call_with_deadline(
+                    lambda: self.http.stream(params, **timeout_kwargs(deadline, idle_timeout)), deadline
+                )
+                yield from stream_chunks(guard_stream(events, deadline, cancel), model)
+                return
+            
+            client = self.client if deadline is None else self._deadline_client
+            stream = call_with_deadline(lambda: client.chat.completions.create(
+                **params, **timeout_kwargs(deadline, idle_timeout)
+            ), deadline)
+            for chunk in guard_stream(stream, deadline, cancel):
+                yield from self._compatible_chunks(chunk, model)
+        except Exception as e:
+            yield ChatResult.from_exception(e)
+    
+    async def _compatible_achat(self, message: str, model: str, temperature: float, max_tokens: int,
+                                system_prompt: Optional[str], deadline: Optional[Deadline],
+                                **kwargs) -> ChatResult:
+        params = self._compatible_params(message, model, temperature, max_tokens, system_prompt, **kwargs)
+        try:
+            response = await call_with_deadline_async(lambda: self.async_client.chat.completions.create(
+                **params, **timeout_kwargs(deadline)
+            ), deadline)
+            return self._compatible_result(response, model)
+        except Exception as e:
+            return ChatResult.from_exception(e)
+    
+    def _compatible_result(self, response, model: str) -> ChatResult:
+        """OpenAI SDK的响应 -> ChatResult"""
+        result = ChatResult.ok(response.choices[0].message.content or "", model,
+                               Usage.from_openai(response.usage))
+        if self.debug:
+            result.raw_response = response
+        return result
+    
+    @staticmethod
+    def _compatible_chunks(chunk, model: str) -> List[ChatResult]:
+        """OpenAI SDK的流式数据块 -> ChatResult列表"""
+        chunks = []
+        if chunk.choices and chunk.choices[0].delta.content:
+            chunks.append(ChatResult.chunk(chunk.choices[0].delta.content, model))
+        if getattr(chunk, 'usage', None):
+            # 流结束时的usage（include_usage时最后一个数据块没有choices）
+            chunks.append(ChatResult.chunk('', model, Usage.from_openai(chunk.usage)))
+        return chunks
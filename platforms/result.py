@@ -0,0 +1,250 @@
+"""
+聊天结果对象
+
+各客户端返回的结果和流式数据块都使用 ChatResult：
+- 使用 __slots__，没有每个对象的 __dict__，也不再为每次调用构建嵌套字典
+- 保留字典式访问 (result['content']、result.get('usage')、'error' in result)，兼容已有调用方
+- 原始SDK响应只在调试模式下保留，避免结果缓存中持有完整的响应对象树
+- 失败结果的 error_type 为错误分类名（见 errors 模块）
+"""
+from typing import Any, Dict, Iterator, Optional
+
+from .errors import classify, error_class, from_exception
+
+_MISSING = object()
+
+
+class Usage:
+    """token使用情况"""
+
+    # cached_tokens: 命中服务端提示词前缀缓存的token数（平台未返回时为None）
+    __slots__ = ('prompt_tokens', 'completion_tokens', 'total_tokens', 'cached_tokens')
+
+    _FIELDS = __slots__
+
+    def __init__(self, prompt_tokens: Optional[int] = None,
+                 completion_tokens: Optional[int] = None,
+                 total_tokens: Optional[int] = None,
+                 cached_tokens: Optional[int] = None):
+        self.prompt_tokens = prompt_tokens
+        self.completion_tokens = completion_tokens
+        if total_tokens is None and prompt_tokens is not None and completion_tokens is not None:
+            total_tokens = prompt_tokens + completion_tokens
+        self.total_tokens = total_tokens
+        self.cached_tokens = cached_tokens
+
+    @classmethod
+    def from_openai(cls, usage: Any) -> Optional['Usage']:
+        """从OpenAI兼容SDK的usage对象构建"""
+        if usage is None:
+            return None
+        details = getattr(usage, 'prompt_tokens_details', None)
+        return cls(usage.prompt_tokens, usage.completion_tokens, usage.total_tokens,
+                   getattr(details, 'cached_tokens', None))
+
+    @classmethod
+    def from_dict(cls, usage: Any) -> Optional['Usage']:
+        """
+        从字典构建
+
+        兼容 prompt_tokens/completion_tokens (百度千帆) 和
+        input_tokens/output_tokens (DashScope) 两种字段名
+        """
+        if not usage:
+            return None
+        get = usage.get
+        prompt_tokens = get('prompt_tokens')
+        if prompt_tokens is None:
+            prompt_tokens = get('input_tokens')
+        completion_tokens = get('completion_tokens')
+        if completion_tokens is None:
+            completion_tokens = get('output_tokens')
+        cached_tokens = get('cached_tokens')
+        details = get('prompt_tokens_details')
+        if cached_tokens is None and details:
+            cached_tokens = details.get('cached_tokens')
+        return cls(prompt_tokens, completion_tokens, get('total_tokens'), cached_tokens)
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in self._FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = getattr(self, key, None) if key in self._FIELDS else None
+        return default if value is None else value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._FIELDS
+
+    def keys(self):
+        return self._FIELDS
+
+    def items(self):
+        return [(key, getattr(self, key)) for key in self._FIELDS]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(self.items())
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Usage):
+            return self.items() == other.items()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_dict())
+
+
+class ChatResult:
+    """聊天结果（也用于流式数据块）"""
+
+    # 常用字段使用固定槽位，其余字段（如Azure的deployment_name）放在按需创建的 _extra 中
+    __slots__ = ('success', 'content', 'model', 'usage', 'error', 'code', 'error_type', 'raw_response',
+                 '_extra')
+
+    _FIELDS = __slots__[:-1]
+
+    def __init__(self, success: bool, **fields: Any):
+        self.success = success
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def ok(cls, content: Optional[str], model: Optional[str], usage: Optional[Usage] = None,
+           **extra: Any) -> 'ChatResult':
+        """成功结果"""
+        result = cls(True)
+        result.content = content
+        result.model = model
+        result.usage = usage
+        if extra:
+            result._extra = extra
+        return result
+
+    @classmethod
+    def chunk(cls, content: str, model: Optional[str], usage: Optional[Usage] = None,
+              **extra: Any) -> 'ChatResult':
+        """流式数据块（usage只出现在流结束时的数据块中）"""
+        result = cls(True)
+        result.content = content
+        result.model = model
+        if usage is not None:
+            result.usage = usage
+        if extra:
+            result._extra = extra
+        return result
+
+    @classmethod
+    def fail(cls, error: str, code: Any = None, error_type: Optional[str] = None,
+             **extra: Any) -> 'ChatResult':
+        """
+        失败结果
+
+        Args:
+            error: 错误信息
+            code: 平台原始错误码
+            error_type: 错误分类名，未指定时根据错误码和错误信息确定
+        """
+        result = cls(False)
+        result.error = error
+        if code is not None:
+            result.code = code
+        result.error_type = error_type or classify(code=code, message=error).kind
+        if extra:
+            result._extra = extra
+        return result
+
+    @classmethod
+    def from_exception(cls, error: BaseException, **extra: Any) -> 'ChatResult':
+        """由SDK异常生成失败结果，错误码为平台原始错误码（没有时为HTTP状态码）"""
+        typed = from_exception(error)
+        code = typed.code if typed.code is not None else typed.status
+        if typed.retry_after is not None:
+            extra['retry_after'] = typed.retry_after
+        return cls.fail(str(error), code, typed.kind, **extra)
+
+    def raise_for_error(self) -> 'ChatResult':
+        """
+        失败时抛出对应分类的异常（如RateLimited），成功时返回自身
+
+        Raises:
+            AIModelError: 错误分类对应的子类
+        """
+        if self.success:
+            return self
+        raise error_class(self.get('error_type'))(self.get('error') or '', self.get('code'),
+                                                  retry_after=self.get('retry_after'))
+
+    # ------------------------------------------------------------------
+    # 字典兼容接口
+    # ------------------------------------------------------------------
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._lookup(key)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in self._FIELDS:
+            setattr(self, key, value)
+        else:
+            try:
+                self._extra[key] = value
+            except AttributeError:
+                self._extra = {key: value}
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not _MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is _MISSING else value
+
+    def keys(self) -> Iterator[str]:
+        for key in self._FIELDS:
+            if hasattr(self, key):
+                yield key
+        yield from getattr(self, '_extra', ())
+
+    def __iter__(self) -> Iterator[str]:
+        return self.keys()
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为普通字典（usage也转换为字典）"""
+        data = dict(self.items())
+        if isinstance(data.get('usage'), Usage):
+            data['usage'] = data['usage'].to_dict()
+        return data
+
+    def copy(self) -> 'ChatResult':
+        """浅拷贝"""
+        result = ChatResult(self.success)
+        for key in self._FIELDS[1:]:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                setattr(result, key, value)
+        if hasattr(self, '_extra'):
+            result._extra = dict(self._extra)
+        return result
+
+    def _lookup(self, key: str) -> Any:
+        if key in self._FIELDS:
+            return getattr(self, key, _MISSING)
+        extra = getattr(self, '_extra', None)
+        if extra is None:
+            return _MISSING
+        return extra.get(key, _MISSING)
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, (ChatResult, dict)):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"ChatResult({dict(self.items())!r})"
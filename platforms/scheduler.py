@@ -0,0 +1,208 @@
+"""
+优先级与租户间公平排队
+
+交互式对话和离线批量任务共用同一个AIModelManager和平台配额时，批量任务会占满并发名额，
+用户侧请求只能排在后面。FairScheduler在调用客户端之前按平台/模型分配并发名额：
+
+- 优先级：interactive（默认）高于 batch，有交互式请求在排队时，空出的名额先分给交互式请求
+- 同一优先级内按租户加权公平排队（start-time fair queueing）：每个请求的开始标签为
+  max(虚拟时间, 该租户上一个请求的结束标签)，结束标签 = 开始标签 + 1/权重，
+  名额空出时分给开始标签最小的请求。名额紧张时各租户获得的名额与权重成正比，
+  空闲租户不会积累额度，重新开始发送请求时也不会挤占其他租户
+- 名额数量为固定值，或按平台/模型返回上限的函数（如自适应并发控制的当前上限）
+"""
+import heapq
+import itertools
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Union
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+# 优先级从高到低
+PRIORITIES = (INTERACTIVE, BATCH)
+
+DEFAULT_TENANT = 'default'
+
+
+class _Waiter:
+    __slots__ = ('tenant', 'event', 'granted', 'cancelled')
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+
+
+class _Queue:
+    """单个平台/模型的排队状态"""
+
+    def __init__(self, capacity: Callable[[], int]):
+        self.capacity = capacity
+        self.inflight = 0
+        self.virtual_time = 0.0
+        # 各租户上一个请求的结束标签
+        self.finish: Dict[str, float] = {}
+        # 每个优先级一个堆：(开始标签, 序号, 等待者)
+        self.heaps: List[List] = [[] for _ in PRIORITIES]
+        self.waiting = [0] * len(PRIORITIES)
+        self.granted: Dict[str, int] = {}
+
+    def tag(self, tenant: str, weight: float) -> float:
+        """计算请求的开始标签，并更新租户的结束标签"""
+        start = max(self.virtual_time, self.finish.get(tenant, 0.0))
+        self.finish[tenant] = start + 1.0 / weight
+        return start
+
+    def grant(self, tenant: str, start: float) -> None:
+        self.inflight += 1
+        self.virtual_time = max(self.virtual_time, start)
+        self.granted[tenant] = self.granted.get(tenant, 0) + 1
+
+    def dispatch(self) -> None:
+        """把空出的名额按优先级和开始标签分给排队的请求"""
+        while self.inflight < max(self.capacity(), 1):
+            for level, heap in enumerate(self.heaps):
+                while heap and heap[0][2].cancelled:
+                    heapq.heappop(heap)
+                if heap:
+                    start, _, waiter = heapq.heappop(heap)
+                    self.waiting[level] -= 1
+                    self.grant(waiter.tenant, start)
+                    waiter.granted = True
+                    waiter.event.set()
+                    break
+            else:
+                return
+
+
+class Ticket:
+    """已分配的名额，请求结束时调用release()"""
+
+    __slots__ = ('_scheduler', '_queue', 'permit', '_released')
+
+    def __init__(self, scheduler: 'FairScheduler', queue: _Queue, permit: Any = None):
+        self._scheduler = scheduler
+        self._queue = queue
+        # 同时开启自适应并发控制时的并发名额（concurrency.Permit）
+        self.permit = permit
+        self._released = False
+
+    def mark_first_chunk(self) -> None:
+        if self.permit is not None:
+            self.permit.mark_first_chunk()
+
+    def release(self, result: Any = None) -> None:
+        """归还名额（重复调用无影响），result传给并发名额用于调整上限"""
+        if self._released:
+            return
+        self._released = True
+        if self.permit is not None:
+            self.permit.release(result)
+        self._scheduler._release(self._queue)
+
+
+class FairScheduler:
+    """按优先级和租户权重分配各平台/模型的并发名额"""
+
+    def __init__(self, capacity: Union[int, Callable[[Hashable], int]] = 32,
+                 weights: Optional[Dict[str, float]] = None, default_weight: float = 1.0):
+        """
+        Args:
+            capacity: 每个平台/模型的并发名额数，或 key -> 名额数 的函数（每次分配时调用）
+            weights: 租户权重，名额紧张时各租户获得的名额与权重成正比
+            default_weight: 未配置权重的租户使用的权重
+        """
+        self.capacity = capacity
+        self.weights = dict(weights or {})
+        self.default_weight = default_weight
+        self._queues: Dict[Hashable, _Queue] = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def weight(self, tenant: str) -> float:
+        return self.weights.get(tenant, self.default_weight)
+
+    def acquire(self, key: Hashable, tenant: Optional[str] = None, priority: Optional[str] = None,
+                timeout: Optional[float] = None) -> Optional[Ticket]:
+        """
+        获取平台/模型的并发名额，没有空闲名额时排队
+
+        Args:
+            key: 平台/模型，如 ('qwen', 'qwen-turbo')
+            tenant: 租户（或API Key等调用方标识），默认为'default'
+            priority: 'interactive'（默认）或 'batch'
+            timeout: 最长排队时间（秒），None表示一直等待
+
+        Returns:
+            Ticket；排队超时返回None
+
+        Raises:
+            ValueError: 未知的优先级
+        """
+        tenant = tenant or DEFAULT_TENANT
+        priority = priority or INTERACTIVE
+        if priority not in PRIORITIES:
+            raise ValueError(f"未知的优先级: {priority}，可选: {', '.join(PRIORITIES)}")
+        level = PRIORITIES.index(priority)
+
+        with self._lock:
+            queue = self._queue(key)
+            start = queue.tag(tenant, self.weight(tenant))
+            # 没有排队的请求且有空闲名额时直接分配
+            if not any(queue.waiting) and queue.inflight < max(queue.capacity(), 1):
+                queue.grant(tenant, start)
+                return Ticket(self, queue)
+            waiter = _Waiter(tenant)
+            heapq.heappush(queue.heaps[level], (start, next(self._sequence), waiter))
+            queue.waiting[level] += 1
+
+        if waiter.event.wait(timeout):
+            return Ticket(self, queue)
+        with self._lock:
+            if waiter.granted:
+                return Ticket(self, queue)
+            waiter.cancelled = True
+            queue.waiting[level] -= 1
+        return None
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各平台/模型的排队情况
+
+        Returns:
+            {"platform:model": {'capacity', 'inflight', 'waiting': {优先级: 排队数}, 'granted': {租户: 分配次数}}}
+        """
+        with self._lock:
+            return {
+                ':'.join(str(part) for part in key if part) if isinstance(key, tuple) else str(key): {
+                    'capacity': queue.capacity(),
+                    'inflight': queue.inflight,
+                    'waiting': dict(zip(PRIORITIES, queue.waiting)),
+                    'granted': dict(queue.granted),
+                }
+                for key, queue in self._queues.items()
+            }
+
+    def _queue(self, key: Hashable) -> _Queue:
+        queue = self._queues.get(key)
+        if queue is None:
+            capacity = self.capacity
+            size = (lambda: capacity(key)) if callable(capacity) else (lambda: capacity)
+            queue = self._queues[key] = _Queue(size)
+        return queue
+
+    def _release(self, queue: _Queue) -> None:
+        with self._lock:
+            queue.inflight -= 1
+            queue.dispatch()
+
+
+def parse_weights(text: str) -> Dict[str, float]:
+    """解析 "web=4,batch=1" 格式的租户权重"""
+    weights = {}
+    for item in (text or '').split(','):
+        if '=' in item:
+            tenant, weight = item.split('=', 1)
+            weights[tenant.strip()] = float(weight)
+    return weights
@@ -0,0 +1,249 @@
+"""
+请求合并 (single-flight)
+
+并发的相同请求只向上游发起一次调用：
+- SingleFlight: 普通请求，第一个请求(leader)调用上游，其余请求(follower)等待并共享结果
+- StreamFlight: 流式请求，上游数据块由后台线程读取到共享缓冲区，
+  后加入的请求先收到已经产生的数据块，再继续接收新的数据块
+
+只合并"正在进行中"的请求，请求完成后立即移除，不做结果缓存。
+"""
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+from .cancellation import CancelToken, stream_closer
+
+
+def request_key(platform: str, message: str, params: Dict[str, Any]) -> Hashable:
+    """生成请求的合并键，参数顺序不影响结果"""
+    return (platform, message, json.dumps(params, sort_keys=True, ensure_ascii=False, default=repr))
+
+
+def is_deterministic(params: Dict[str, Any], coalesce: Optional[bool] = None) -> bool:
+    """
+    请求是否可以合并
+
+    显式指定coalesce时以其为准，否则只合并temperature为0的确定性请求
+    """
+    if coalesce is not None:
+        return coalesce
+    return params.get('temperature') == 0
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """普通请求合并"""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Tuple[Any, bool]:
+        """
+        执行或加入进行中的调用
+
+        Args:
+            key: 合并键
+            fn: 发起调用的函数，只有leader会调用
+            timeout: 等待调用完成的最长时间（秒）。leader指定timeout时调用在后台线程中执行，
+                     leader超时后调用继续进行，结果交给其他等待的请求
+
+        Returns:
+            (结果, 是否为共享的结果)
+
+        Raises:
+            TimeoutError: 等待超时
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.leaders += 1
+                leader = True
+
+        if leader:
+            if timeout is None:
+                self._run(key, call, fn)
+            else:
+                threading.Thread(target=self._run, args=(key, call, fn), name='single-flight', daemon=True).start()
+        if not call.event.wait(timeout):
+            raise TimeoutError("等待进行中的相同请求超时")
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+    def _run(self, key: Hashable, call: _Call, fn: Callable[[], Any]) -> None:
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+
+class _SharedStream:
+    """由后台线程读取的共享流"""
+
+    def __init__(self, source: Iterator[Any], on_done: Callable[[], None], cancel: Optional[CancelToken] = None):
+        self._source = source
+        self._on_done = on_done
+        self._cancel = cancel
+        self._chunks = []
+        self._done = False
+        # 所有订阅者都已离开，上游流正在关闭，不再接受新的订阅者
+        self._abandoned = False
+        self._error: Optional[BaseException] = None
+        self._subscribers = 0
+        self._cond = threading.Condition()
+
+    def start(self) -> None:
+        threading.Thread(target=self._pump, name='stream-flight', daemon=True).start()
+
+    def _pump(self):
+        try:
+            for chunk in self._source:
+                with self._cond:
+                    self._chunks.append(chunk)
+                    self._cond.notify_all()
+                    # 所有订阅者都已离开，停止读取上游
+                    if self._subscribers == 0:
+                        break
+        except BaseException as e:
+            self._error = e
+        finally:
+            try:
+                stream_closer(self._source)()
+            except Exception:
+                # 上游流可能正在被最后离开的订阅者关闭
+                pass
+            self._on_done()
+            with self._cond:
+                self._done = True
+                self._cond.notify_all()
+
+    def attach(self) -> Optional['_Subscription']:
+        """增加一个订阅者，流已结束时返回None"""
+        with self._cond:
+            if self._done or self._abandoned:
+                return None
+            self._subscribers += 1
+        return _Subscription(self)
+
+    def detach(self) -> None:
+        with self._cond:
+            self._subscribers -= 1
+            # 唤醒等待中的订阅者，已关闭的订阅会结束等待
+            self._cond.notify_all()
+            if self._subscribers > 0 or self._done or self._abandoned:
+                return
+            self._abandoned = True
+        self._interrupt()
+
+    def _interrupt(self) -> None:
+        """最后一个订阅者离开时立即关闭上游流，不等待下一个数据块到达"""
+        if self._cancel is not None:
+            self._cancel.cancel()
+        try:
+            stream_closer(self._source)()
+        except Exception:
+            # 生成器正在后台线程中读取时无法从其他线程关闭，由取消句柄中断读取，或在下一个数据块时结束
+            pass
+
+    def get(self, index: int, subscription: Optional['_Subscription'] = None) -> Any:
+        """返回第index个数据块，必要时等待；流结束或订阅已关闭时抛出StopIteration"""
+        with self._cond:
+            while index >= len(self._chunks) and not self._done:
+                if subscription is not None and subscription._closed:
+                    raise StopIteration
+                self._cond.wait()
+            if index < len(self._chunks):
+                return self._chunks[index]
+            if self._error is not None:
+                raise self._error
+            raise StopIteration
+
+
+class _Subscription:
+    """共享流的一个订阅：先返回已产生的数据块，再等待新的数据块"""
+
+    def __init__(self, shared: _SharedStream):
+        self._shared = shared
+        self._index = 0
+        self._closed = False
+
+    def __iter__(self) -> '_Subscription':
+        return self
+
+    def __next__(self) -> Any:
+        if self._closed:
+            raise StopIteration
+        try:
+            chunk = self._shared.get(self._index, self)
+        except BaseException:
+            self.close()
+            raise
+        self._index += 1
+        return chunk
+
+    def close(self) -> None:
+        """离开共享流，所有订阅者都离开后上游流会被关闭"""
+        if not self._closed:
+            self._closed = True
+            self._shared.detach()
+
+    def __del__(self):
+        self.close()
+
+
+class StreamFlight:
+    """流式请求合并"""
+
+    def __init__(self):
+        self._streams: Dict[Hashable, _SharedStream] = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.coalesced = 0
+
+    def stream(self, key: Hashable, factory: Callable[[], Iterator[Any]],
+               cancel: Optional[CancelToken] = None) -> Iterator[Any]:
+        """
+        返回共享流的订阅
+
+        Args:
+            key: 合并键
+            factory: 创建上游流的函数，只有leader会调用
+            cancel: 传给上游流的取消句柄，所有订阅者都离开时取消，中断阻塞中的读取
+        """
+        with self._lock:
+            shared = self._streams.get(key)
+            subscription = shared.attach() if shared is not None else None
+            if subscription is not None:
+                self.coalesced += 1
+                return subscription
+            shared = _SharedStream(factory(), lambda: self._remove(key, shared), cancel)
+            self._streams[key] = shared
+            self.leaders += 1
+            subscription = shared.attach()
+        shared.start()
+        return subscription
+
+    def _remove(self, key: Hashable, shared: _SharedStream) -> None:
+        with self._lock:
+            if self._streams.get(key) is shared:
+                del self._streams[key]
@@ -0,0 +1,142 @@
+"""
+增量SSE解码
+
+流式请求数量大时，按行切分和逐块json.loads是客户端的主要CPU开销。SSEDecoder：
+- 每次只处理已完整到达的事件（到最后一个空行为止），剩余数据留在缓冲区等待后续数据
+- 事件切分和换行查找都在bytes的C实现中完成，不逐行执行Python代码、不解码为字符串
+- 只有一行data的事件（绝大多数）直接切片得到data；注释（以冒号开头，如keep-alive和
+  DashScope的 :HTTP_STATUS/200）只判断首字节即跳过
+- 安装了orjson时使用orjson解析JSON（可选依赖，没有时使用标准库json）
+
+支持OpenAI/Azure/智谱（data: {...}，以 data: [DONE] 结束）、DashScope（id/event/data字段）
+和千帆（data: {...}，以is_end标记结束）的流格式。
+"""
+import json
+from typing import Any, Callable, Iterator, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_raw_decode = json.JSONDecoder().raw_decode
+
+
+def _json_loads(data: Any) -> Any:
+    """
+    标准库json解析
+
+    json.loads(bytes)每次都在Python中检测编码，先用C实现解码为字符串再用raw_decode解析，
+    前后有空白等少见情况交给json.loads处理
+    """
+    if not isinstance(data, str):
+        data = data.decode('utf-8')
+    try:
+        value, end = _raw_decode(data)
+    except ValueError:
+        return json.loads(data)
+    return value if end == len(data) else json.loads(data)
+
+
+# 解析JSON的函数：orjson.loads接受bytes，比标准库json快数倍
+loads: Callable[[Any], Any] = orjson.loads if orjson is not None else _json_loads
+
+DONE = b'[DONE]'
+
+
+class SSEDecoder:
+    """
+    增量SSE解码器
+
+    feed()传入任意切分的字节数据，返回已完整接收的事件列表，每个事件为 (event, data)：
+    event为event字段（没有时为None），data为data字段的字节（多个data行以换行连接）。
+    """
+
+    __slots__ = ('_buffer',)
+
+    def __init__(self):
+        # 尚未完整到达的事件
+        self._buffer = b''
+
+    def feed(self, chunk: bytes) -> List[Tuple[Optional[str], bytes]]:
+        """
+        传入新收到的数据
+
+        Returns:
+            本次数据中完整接收的事件列表
+        """
+        buffer = self._buffer + chunk if self._buffer else chunk
+        if b'\r' in buffer:
+            buffer = _normalize(buffer)
+        cut = buffer.rfind(b'\n\n')
+        if cut < 0:
+            self._buffer = buffer
+            return []
+        self._buffer = buffer[cut + 2:]
+
+        events = []
+        for block in buffer[:cut].split(b'\n\n'):
+            if block[:6] == b'data: ' and b'\n' not in block:
+                events.append((None, block[6:]))
+            elif block and block[0] != 58:  # 58: b':'，单行注释
+                event = _parse_block(block)
+                if event is not None:
+                    events.append(event)
+        return events
+
+    def flush(self) -> List[Tuple[Optional[str], bytes]]:
+        """连接关闭时分发最后一个未以空行结束的事件"""
+        if not self._buffer:
+            return []
+        return self.feed(b'\n\n')
+
+    @property
+    def pending(self) -> int:
+        """缓冲区中尚未处理的字节数"""
+        return len(self._buffer)
+
+
+def _normalize(buffer: bytes) -> bytes:
+    """CRLF和单独的CR统一为LF（结尾的CR可能与下一段数据的LF组成CRLF，保留到下次处理）"""
+    tail = b'\r' if buffer[-1:] == b'\r' else b''
+    if tail:
+        buffer = buffer[:-1]
+    return buffer.replace(b'\r\n', b'\n').replace(b'\r', b'\n') + tail
+
+
+def _parse_block(block: bytes) -> Optional[Tuple[Optional[str], bytes]]:
+    """逐行解析一个事件（多行data、带event/id字段或注释的事件），没有data时返回None"""
+    event = None
+    data = None
+    for line in block.split(b'\n'):
+        if line[:5] == b'data:':
+            value = line[6:] if line[5:6] == b' ' else line[5:]
+            data = value if data is None else data + b'\n' + value
+        elif line[:6] == b'event:':
+            event = line[6:].strip().decode('utf-8')
+        # 空行、注释、id、retry等字段不需要
+    return None if data is None else (event, data)
+
+
+def iter_events(read: Callable[[], bytes]) -> Iterator[Tuple[Optional[str], bytes]]:
+    """
+    从读取函数中逐个返回事件
+
+    Args:
+        read: 每次返回新收到的数据，连接结束时返回b''
+    """
+    decoder = SSEDecoder()
+    while True:
+        chunk = read()
+        if not chunk:
+            break
+        yield from decoder.feed(chunk)
+    yield from decoder.flush()
+
+
+def iter_json(read: Callable[[], bytes]) -> Iterator[Any]:
+    """从读取函数中逐个返回data字段解析后的JSON，遇到 [DONE] 结束"""
+    for _, data in iter_events(read):
+        if data == DONE:
+            return
+        yield loads(data)
@@ -0,0 +1,266 @@
+"""
+客户端停止条件
+
+有的调用方只需要第一个代码块或第一个JSON对象，但平台会一直生成到max_tokens。
+StopCondition在流式数据块到达时增量检查停止条件，满足时截断当前数据块并关闭上游流：
+- 字符串或正则表达式：输出在匹配结束处截断（包含匹配的文本）
+- 回调函数：predicate(目前的完整文本) 返回True时在当前数据块末尾停止
+- 字节数/行数上限：超过max_bytes（UTF-8）或收到max_lines个换行符时截断
+
+字符串只在新数据块及其前面最多(长度-1)个字符中查找，不重复扫描已检查过的文本；
+正则表达式可以用lookback限制查找范围（匹配可能跨越很长的文本时不要设置）。
+
+停止后不再读取上游，平台在连接关闭后停止生成，未生成的token不计费。
+节省的token数按max_tokens减去已生成的token数（按字符数估算）计算，是上限估计：
+模型本身也可能在max_tokens之前结束。
+"""
+import re
+import threading
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Union
+
+from .result import ChatResult
+
+# 停止原因
+PATTERN = 'pattern'
+PREDICATE = 'predicate'
+MAX_BYTES = 'max_bytes'
+MAX_LINES = 'max_lines'
+
+StopSpec = Union['StopCondition', str, Pattern, Callable[[str], bool], Iterable[Union[str, Pattern]]]
+
+
+class StopCondition:
+    """流式输出的停止条件（每个流使用独立的状态，见start）"""
+
+    def __init__(self, patterns: Iterable[Union[str, Pattern]] = (), predicate: Callable[[str], bool] = None,
+                 max_bytes: Optional[int] = None, max_lines: Optional[int] = None, lookback: Optional[int] = None):
+        """
+        Args:
+            patterns: 字符串或编译后的正则表达式，任意一个匹配时停止
+            predicate: 回调函数，参数为目前收到的完整文本，返回True时停止
+            max_bytes: 输出的最大字节数（UTF-8）
+            max_lines: 输出的最大行数（按换行符计，包含最后一个换行符）
+            lookback: 正则表达式只在最后lookback个字符中查找，None表示在完整文本中查找
+        """
+        if isinstance(patterns, (str, re.Pattern)):
+            patterns = [patterns]
+        self.literals = [pattern for pattern in patterns if isinstance(pattern, str) and pattern]
+        self.regexes = [pattern for pattern in patterns if not isinstance(pattern, str)]
+        self.predicate = predicate
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.lookback = lookback
+
+    @classmethod
+    def of(cls, spec: StopSpec) -> 'StopCondition':
+        """由StopCondition、字符串、正则表达式、回调函数或它们的列表构建"""
+        if isinstance(spec, StopCondition):
+            return spec
+        if callable(spec) and not isinstance(spec, re.Pattern):
+            return cls(predicate=spec)
+        return cls(patterns=spec)
+
+    def start(self) -> 'StopState':
+        """开始检查一个新的流"""
+        return StopState(self)
+
+
+class StopState:
+    """一个流的停止条件检查状态"""
+
+    def __init__(self, condition: StopCondition):
+        self.condition = condition
+        self.stopped = False
+        self.reason: Optional[str] = None
+        # 上游返回的全部文本（包括被截断的部分），用于估算已生成的token数
+        self.received_chars = 0
+        self.received_non_ascii = 0
+        self._parts: List[str] = []
+        self._text: Optional[str] = None
+        self._length = 0
+        self._bytes = 0
+        self._lines = 0
+        # 字符串匹配需要保留的末尾文本
+        self._keep = max((len(literal) - 1 for literal in condition.literals), default=0)
+        self._tail = ''
+
+    @property
+    def text(self) -> str:
+        """目前输出的完整文本"""
+        if self._text is None:
+            self._text = ''.join(self._parts)
+            self._parts = [self._text] if self._text else []
+        return self._text
+
+    def feed(self, content: str) -> str:
+        """
+        检查一个数据块
+
+        Returns:
+            应输出的文本：未停止时为content本身，停止时为截断后的部分
+        """
+        if self.stopped or not content:
+            return '' if self.stopped else content
+        self.received_chars += len(content)
+        self.received_non_ascii += len(content) - len(content.encode('ascii', 'ignore'))
+        condition = self.condition
+        start = self._length
+        cut = None
+
+        if condition.literals:
+            window = self._tail + content
+            offset = start - len(self._tail)
+            for literal in condition.literals:
+                index = window.find(literal)
+                if index >= 0:
+                    cut = _earlier(cut, offset + index + len(literal) - start)
+            self._tail = window[-self._keep:] if self._keep else ''
+            if cut is not None:
+                self.reason = PATTERN
+
+        if condition.max_lines is not None:
+            remaining = condition.max_lines - self._lines
+            index = -1
+            for _ in range(remaining):
+                index = content.find('\n', index + 1)
+                if index < 0:
+                    break
+            if index >= 0 and remaining > 0:
+                if cut is None or index + 1 < cut:
+                    cut, self.reason = index + 1, MAX_LINES
+
+        if condition.max_bytes is not None:
+            encoded = content.encode('utf-8')
+            if self._bytes + len(encoded) >= condition.max_bytes:
+                allowed = len(encoded[:condition.max_bytes - self._bytes].decode('utf-8', 'ignore'))
+                if cut is None or allowed < cut:
+                    cut, self.reason = allowed, MAX_BYTES
+
+        piece = content if cut is None else content[:cut]
+        self._append(piece)
+
+        if cut is None and condition.regexes:
+            text = self.text
+            begin = 0 if condition.lookback is None else max(0, start - condition.lookback)
+            for regex in condition.regexes:
+                match = regex.search(text, begin)
+                if match is not None:
+                    cut = _earlier(cut, match.end() - start)
+            if cut is not None:
+                self.reason = PATTERN
+                piece = piece[:max(cut, 0)]
+                self._truncate(start + len(piece))
+
+        if cut is None and condition.predicate is not None and condition.predicate(self.text):
+            cut, self.reason = len(piece), PREDICATE
+
+        if cut is not None:
+            self.stopped = True
+        return piece
+
+    def _append(self, piece: str) -> None:
+        if not piece:
+            return
+        self._parts.append(piece)
+        self._text = None
+        self._length += len(piece)
+        self._bytes += len(piece.encode('utf-8'))
+        self._lines += piece.count('\n')
+
+    def _truncate(self, length: int) -> None:
+        self._text = self.text[:length]
+        self._parts = [self._text] if self._text else []
+        self._length = length
+
+    def generated_tokens(self) -> int:
+        """按上游返回的字符数估算已生成的token数（非ASCII字符约1个token，其他约4个字符1个token）"""
+        ascii_chars = self.received_chars - self.received_non_ascii
+        return self.received_non_ascii + (ascii_chars + 3) // 4
+
+
+def _earlier(cut: Optional[int], position: int) -> int:
+    return position if cut is None else min(cut, position)
+
+
+class StopStats:
+    """按平台统计客户端停止的流和节省的token数"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, platform: str, reason: str, generated_tokens: int, tokens_saved: int) -> None:
+        with self._lock:
+            stats = self._stats.get(platform)
+            if stats is None:
+                stats = self._stats[platform] = {'stopped': 0, 'generated_tokens': 0, 'tokens_saved': 0,
+                                                 'reasons': {}}
+            stats['stopped'] += 1
+            stats['generated_tokens'] += generated_tokens
+            stats['tokens_saved'] += tokens_saved
+            stats['reasons'][reason] = stats['reasons'].get(reason, 0) + 1
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            {platform: {'stopped': 停止的流数, 'generated_tokens': 停止前已生成的token数（估算）,
+                        'tokens_saved': 节省的token数（上限估计）, 'reasons': {原因: 次数}}}
+        """
+        with self._lock:
+            return {platform: dict(stats, reasons=dict(stats['reasons'])) for platform, stats in self._stats.items()}
+
+
+def apply_stop(stream: Iterable[ChatResult], condition: StopCondition,
+               max_tokens: Union[int, Callable[[Optional[str]], Optional[int]], None] = None,
+               on_stop: Callable[[StopState, int, Optional[str]], None] = None,
+               platform: Optional[str] = None) -> Iterator[ChatResult]:
+    """
+    在流式数据块上检查停止条件
+
+    Args:
+        stream: chat_stream 返回的生成器
+        condition: 停止条件
+        max_tokens: 请求的最大输出token数，用于计算节省的token数；
+                    也可以是函数，参数为实际提供结果的平台，返回该平台的最大输出token数
+        on_stop: 停止时的回调 (状态, 节省的token数, 实际提供结果的平台)
+        platform: 请求的平台；数据块带platform时（降级链）以数据块中的为准
+
+    Yields:
+        数据块；停止时截断当前数据块、关闭上游流，最后一个数据块的content为空，
+        带stop_reason、generated_tokens（估算）和tokens_saved（上限估计）
+    """
+    state = condition.start()
+    model = None
+    try:
+        for chunk in stream:
+            if not chunk.get('success'):
+                yield chunk
+                return
+            model = chunk.get('model') or model
+            platform = chunk.get('platform') or platform
+            content = chunk.get('content')
+            if content:
+                piece = state.feed(content)
+                if piece != content:
+                    # 合并的流中数据块由多个调用方共享，截断时使用副本
+                    chunk = chunk.copy()
+                    chunk['content'] = piece
+            if not state.stopped:
+                yield chunk
+                continue
+            if chunk.get('content'):
+                yield chunk
+            break
+    finally:
+        close = getattr(stream, 'close', None)
+        if close is not None:
+            close()
+    if not state.stopped:
+        return
+    generated = state.generated_tokens()
+    if callable(max_tokens):
+        max_tokens = max_tokens(platform)
+    saved = max(max_tokens - generated, 0) if max_tokens else 0
+    if on_stop is not None:
+        on_stop(state, saved, platform)
+    yield ChatResult.chunk('', model, stop_reason=state.reason, generated_tokens=generated, tokens_saved=saved)
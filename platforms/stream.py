@@ -0,0 +1,123 @@
+"""
+流式结果累加
+
+收集 chat_stream 的数据块并生成最终结果：
+- 内容片段追加到列表，结束时一次性拼接，避免 full_content += content 的平方级复制
+- 统计数据块数量、首个数据块时间 (TTFT) 和总耗时
+- 记录流结束时平台返回的usage
+"""
+import time
+from typing import Any, Callable, Iterable, List, Optional
+
+from .result import ChatResult, Usage
+
+
+class StreamAccumulator:
+    """流式结果累加器"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._content: Optional[str] = None
+        self.chunk_count = 0
+        self.model: Optional[str] = None
+        self.usage: Optional[Usage] = None
+        self.error: Optional[str] = None
+        self.code: Any = None
+        self.error_type: Optional[str] = None
+        self.start_time = time.monotonic()
+        self.first_chunk_time: Optional[float] = None
+        self.end_time: Optional[float] = None
+
+    def add(self, chunk: ChatResult) -> Optional[str]:
+        """
+        添加一个数据块
+
+        Returns:
+            数据块的文本内容；失败数据块返回None
+        """
+        if not chunk.get('success'):
+            self.error = chunk.get('error')
+            self.code = chunk.get('code')
+            self.error_type = chunk.get('error_type')
+            self.end_time = time.monotonic()
+            return None
+
+        content = chunk.get('content')
+        if content:
+            if self.first_chunk_time is None:
+                self.first_chunk_time = time.monotonic()
+            self._parts.append(content)
+            self._content = None
+            self.chunk_count += 1
+        usage = chunk.get('usage')
+        if usage:
+            self.usage = usage
+        if self.model is None:
+            self.model = chunk.get('model')
+        return content
+
+    def consume(self, stream: Iterable[ChatResult],
+                on_content: Optional[Callable[[str], Any]] = None) -> ChatResult:
+        """
+        读取整个流并返回最终结果
+
+        Args:
+            stream: chat_stream 返回的生成器
+            on_content: 每个文本片段的回调（如实时打印）
+
+        Returns:
+            最终结果，遇到失败数据块时停止读取并返回失败结果
+        """
+        try:
+            for chunk in stream:
+                content = self.add(chunk)
+                if content is None and self.error is not None:
+                    break
+                if content and on_content is not None:
+                    on_content(content)
+        finally:
+            close = getattr(stream, 'close', None)
+            if close is not None:
+                close()
+        return self.result()
+
+    @property
+    def content(self) -> str:
+        """目前收到的完整内容"""
+        if self._content is None:
+            self._content = ''.join(self._parts)
+            self._parts = [self._content] if self._content else []
+        return self._content
+
+    @property
+    def elapsed(self) -> float:
+        """总耗时（秒）"""
+        return (self.end_time or time.monotonic()) - self.start_time
+
+    @property
+    def ttft(self) -> Optional[float]:
+        """首个数据块时间（秒）"""
+        if self.first_chunk_time is None:
+            return None
+        return self.first_chunk_time - self.start_time
+
+    def result(self) -> ChatResult:
+        """
+        生成最终结果
+
+        成功时与 chat 的返回值相同（content/model/usage），另外包含
+        chunk_count、elapsed、ttft；失败时包含已收到的部分内容 partial_content
+        """
+        if self.end_time is None:
+            self.end_time = time.monotonic()
+        stats = {'chunk_count': self.chunk_count, 'elapsed': self.elapsed, 'ttft': self.ttft}
+        if self.error is not None:
+            return ChatResult.fail(self.error, self.code, self.error_type,
+                                   partial_content=self.content, **stats)
+        return ChatResult.ok(self.content, self.model, self.usage, **stats)
+
+
+def collect_stream(stream: Iterable[ChatResult],
+                   on_content: Optional[Callable[[str], Any]] = None) -> ChatResult:
+    """读取整个流并返回最终结果，见 StreamAccumulator.consume"""
+    return StreamAccumulator().consume(stream, on_content)
@@ -0,0 +1,411 @@
+"""
+流量分配与影子流量
+
+把平台迁移到新的提供方之前（如openai -> azure/aihubmix），先用一部分真实请求评估新平台：
+- 加权分配：一个逻辑模型对应多个 (平台, 模型) 路由，请求按权重分配到其中一个；
+  指定route_key（如用户ID）时同一个key总是分配到同一个路由
+- 影子流量：按比例把请求同时复制一份发送到候选平台，在后台线程中执行，不阻塞主请求，
+  影子请求的结果不返回给调用方；主请求和影子请求的延迟、首个数据块延迟 (TTFT)、
+  token数成对记录，统计两者的差值
+- 调用方提前关闭的流式请求同样计数（cancelled），但不计入延迟分位数和影子流量的差值
+
+影子请求使用batch优先级、不合并，同时进行的影子请求数有上限，超过时丢弃（只计数）。
+"""
+import random
+import threading
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+RouteSpec = Union['Route', Tuple[str, str, float], Tuple[str, str]]
+
+
+class Route:
+    """逻辑模型的一个路由：平台、平台上的模型名和权重"""
+
+    __slots__ = ('platform', 'model', 'weight')
+
+    def __init__(self, platform: str, model: Optional[str] = None, weight: float = 1.0):
+        self.platform = platform
+        self.model = model
+        self.weight = weight
+
+    @classmethod
+    def of(cls, spec: RouteSpec) -> 'Route':
+        """由Route或 (platform, model[, weight]) 构建"""
+        if isinstance(spec, Route):
+            return spec
+        return cls(*spec)
+
+    @property
+    def name(self) -> str:
+        return f"{self.platform}:{self.model}" if self.model else self.platform
+
+    def __repr__(self) -> str:
+        return f"Route({self.name}, weight={self.weight})"
+
+
+class Measurement:
+    """一次请求的测量结果"""
+
+    __slots__ = ('route', 'success', 'latency', 'ttft', 'prompt_tokens', 'completion_tokens', 'error_type',
+                 'complete')
+
+    def __init__(self, route: str, result: Any, latency: float, ttft: Optional[float] = None, usage: Any = None,
+                 complete: bool = True):
+        """
+        Args:
+            route: 路由名称 "platform:model"
+            result: 聊天结果（流式请求为最后一个数据块）
+            latency: 完成延迟（秒）
+            ttft: 首个数据块延迟（秒），普通请求为None
+            usage: token使用情况，默认取结果中的usage
+            complete: 流式请求是否读取到结束；调用方提前关闭时为False，latency只是关闭前的时长
+        """
+        self.route = route
+        self.complete = complete
+        self.success = bool(result is not None and result.get('success'))
+        self.latency = latency
+        self.ttft = ttft
+        if usage is None and result is not None:
+            usage = result.get('usage')
+        self.prompt_tokens = usage.get('prompt_tokens') if usage else None
+        self.completion_tokens = usage.get('completion_tokens') if usage else None
+        self.error_type = None if self.success or result is None else result.get('error_type')
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.__slots__}
+
+
+class _RouteStats:
+    __slots__ = ('requests', 'errors', 'cancelled', 'latencies', 'ttfts')
+
+    def __init__(self, history: int):
+        self.requests = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.latencies: Deque[float] = deque(maxlen=history)
+        self.ttfts: Deque[float] = deque(maxlen=history)
+
+    def record(self, measurement: Measurement) -> None:
+        self.requests += 1
+        if not measurement.complete:
+            # 调用方提前关闭的流不算错误，只有首个数据块延迟有意义
+            self.cancelled += 1
+            if measurement.ttft is not None:
+                self.ttfts.append(measurement.ttft)
+            return
+        if not measurement.success:
+            self.errors += 1
+            return
+        self.latencies.append(measurement.latency)
+        if measurement.ttft is not None:
+            self.ttfts.append(measurement.ttft)
+
+
+class _Pair:
+    """一次主请求和对应的影子请求"""
+
+    __slots__ = ('primary', 'shadow')
+
+    def __init__(self):
+        self.primary: Optional[Measurement] = None
+        self.shadow: Optional[Measurement] = None
+
+
+class TrafficPolicy:
+    """一个逻辑模型的路由、影子流量配置和统计"""
+
+    def __init__(self, routes: Iterable[RouteSpec], shadow: Optional[RouteSpec] = None,
+                 shadow_rate: float = 0.0, history: int = 1000):
+        """
+        Args:
+            routes: 路由列表，Route或 (platform, model, weight)
+            shadow: 影子流量的候选平台 (platform, model)
+            shadow_rate: 复制到候选平台的请求比例 (0~1)
+            history: 用于计算分位数的最近样本数
+        """
+        self.routes = [Route.of(route) for route in routes]
+        if not self.routes:
+            raise ValueError("至少需要一个路由")
+        self.total_weight = sum(route.weight for route in self.routes)
+        if self.total_weight <= 0:
+            raise ValueError("路由权重之和必须大于0")
+        self.shadow = Route.of(shadow) if shadow is not None else None
+        self.shadow_rate = shadow_rate if self.shadow is not None else 0.0
+        self.history = history
+        self.stats = {route.name: _RouteStats(history) for route in self.routes}
+        if self.shadow is not None:
+            self.stats.setdefault(self.shadow.name, _RouteStats(history))
+        self.mirrored = 0
+        self.dropped = 0
+        self.pairs: Deque[Tuple[Measurement, Measurement]] = deque(maxlen=history)
+
+    def pick(self, point: float) -> Route:
+        """按权重选择路由，point为 [0, 1) 之间的位置"""
+        target = point * self.total_weight
+        for route in self.routes:
+            target -= route.weight
+            if target < 0:
+                return route
+        return self.routes[-1]
+
+
+class TrafficRouter:
+    """逻辑模型的加权流量分配与影子流量"""
+
+    def __init__(self, policies: Optional[Dict[str, TrafficPolicy]] = None, shadow_workers: int = 4,
+                 max_shadow_inflight: int = 16, shadow_timeout: Optional[float] = 60.0, seed: Optional[int] = None):
+        """
+        Args:
+            policies: {逻辑模型: TrafficPolicy}
+            shadow_workers: 执行影子请求的线程数
+            max_shadow_inflight: 最多同时进行（含等待线程）的影子请求数，超过时丢弃
+            shadow_timeout: 影子请求的超时时间（秒）
+            seed: 随机数种子（测试用）
+        """
+        self.policies: Dict[str, TrafficPolicy] = dict(policies or {})
+        self.shadow_workers = shadow_workers
+        self.max_shadow_inflight = max_shadow_inflight
+        self.shadow_timeout = shadow_timeout
+        self._random = random.Random(seed)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight = 0
+        self._lock = threading.Lock()
+
+    def add(self, model: str, routes: Iterable[RouteSpec], shadow: Optional[RouteSpec] = None,
+            shadow_rate: float = 0.0) -> TrafficPolicy:
+        """
+        添加逻辑模型
+
+        Args:
+            model: 逻辑模型名称（调用时使用的名称）
+            routes: 路由列表，Route或 (platform, model, weight)
+            shadow: 影子流量的候选平台 (platform, model)
+            shadow_rate: 复制到候选平台的请求比例 (0~1)
+
+        Returns:
+            TrafficPolicy
+        """
+        policy = self.policies[model] = TrafficPolicy(routes, shadow, shadow_rate)
+        return policy
+
+    def policy(self, model: str) -> TrafficPolicy:
+        """
+        Raises:
+            ValueError: 未配置的逻辑模型
+        """
+        try:
+            return self.policies[model]
+        except KeyError:
+            raise ValueError(f"未配置流量分配的模型: {model}") from None
+
+    def pick(self, model: str, route_key: Optional[str] = None) -> Route:
+        """
+        为一次请求选择路由
+
+        Args:
+            model: 逻辑模型
+            route_key: 分配键（如用户ID），相同的key总是分配到同一个路由；为None时随机分配
+        """
+        policy = self.policy(model)
+        if route_key is not None:
+            point = (zlib.crc32(str(route_key).encode('utf-8')) & 0xffffffff) / 2 ** 32
+        else:
+            with self._lock:
+                point = self._random.random()
+        return policy.pick(point)
+
+    def mirror(self, model: str, run: Callable[[Route], Measurement]) -> Optional[_Pair]:
+        """
+        按比例在后台执行影子请求
+
+        Args:
+            model: 逻辑模型
+            run: 向候选路由发送请求并返回测量结果的函数（在后台线程中执行）
+
+        Returns:
+            未抽中或被丢弃时返回None；否则返回配对记录，主请求完成后调用record_primary
+        """
+        policy = self.policy(model)
+        if policy.shadow is None:
+            return None
+        with self._lock:
+            if self._random.random() >= policy.shadow_rate:
+                return None
+            if self._inflight >= self.max_shadow_inflight:
+                policy.dropped += 1
+                return None
+            self._inflight += 1
+            policy.mirrored += 1
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.shadow_workers,
+                                                    thread_name_prefix='shadow')
+        pair = _Pair()
+        self._executor.submit(self._run_shadow, policy, pair, run)
+        return pair
+
+    def _run_shadow(self, policy: TrafficPolicy, pair: _Pair, run: Callable[[Route], Measurement]) -> None:
+        try:
+            measurement = run(policy.shadow)
+        except Exception as e:
+            measurement = Measurement(policy.shadow.name, {'success': False, 'error_type': type(e).__name__}, 0.0)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+        self._complete(policy, pair, shadow=measurement)
+
+    def record(self, model: str, measurement: Measurement, pair: Optional[_Pair] = None) -> None:
+        """记录主请求的测量结果；有影子请求时与其配对"""
+        policy = self.policy(model)
+        with self._lock:
+            policy.stats[measurement.route].record(measurement)
+        if pair is not None:
+            self._complete(policy, pair, primary=measurement)
+
+    def _complete(self, policy: TrafficPolicy, pair: _Pair, primary: Measurement = None,
+                  shadow: Measurement = None) -> None:
+        with self._lock:
+            if shadow is not None:
+                pair.shadow = shadow
+                policy.stats[shadow.route].record(shadow)
+            if primary is not None:
+                pair.primary = primary
+            if pair.primary is not None and pair.shadow is not None:
+                policy.pairs.append((pair.primary, pair.shadow))
+
+    def samples(self, model: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        最近的主请求/影子请求对比记录
+
+        Returns:
+            [{'primary': {...}, 'shadow': {...}}]，字段见Measurement
+        """
+        policy = self.policy(model)
+        with self._lock:
+            pairs = list(policy.pairs)
+        if limit is not None:
+            pairs = pairs[-limit:]
+        return [{'primary': primary.to_dict(), 'shadow': shadow.to_dict()} for primary, shadow in pairs]
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各逻辑模型的路由统计和影子流量对比
+
+        Returns:
+            {逻辑模型: {
+                'routes': {"platform:model": {'weight', 'requests', 'errors', 'cancelled', 'latency_p50',
+                                              'latency_p95', 'ttft_p50', 'ttft_p95'}},
+                'shadow': {'candidate', 'rate', 'mirrored', 'dropped', 'pairs', 'latency_delta_p50',
+                           'latency_delta_p95', 'ttft_delta_p50', 'prompt_tokens_delta', 'completion_tokens_delta'}
+            }}
+            差值为影子请求减去主请求（只统计两者都成功且读取到结束的配对），token差值为平均值；
+            没有影子流量时'shadow'为None
+        """
+        report = {}
+        with self._lock:
+            for model, policy in self.policies.items():
+                weights = {route.name: route.weight / policy.total_weight for route in policy.routes}
+                routes = {}
+                for name, stats in policy.stats.items():
+                    routes[name] = {
+                        'weight': weights.get(name, 0.0),
+                        'requests': stats.requests,
+                        'errors': stats.errors,
+                        'cancelled': stats.cancelled,
+                        'latency_p50': _percentile(stats.latencies, 0.5),
+                        'latency_p95': _percentile(stats.latencies, 0.95),
+                        'ttft_p50': _percentile(stats.ttfts, 0.5),
+                        'ttft_p95': _percentile(stats.ttfts, 0.95),
+                    }
+                report[model] = {'routes': routes, 'shadow': self._shadow_report(policy)}
+        return report
+
+    @staticmethod
+    def _shadow_report(policy: TrafficPolicy) -> Optional[Dict[str, Any]]:
+        if policy.shadow is None:
+            return None
+        ok = [(primary, shadow) for primary, shadow in policy.pairs
+              if primary.success and shadow.success and primary.complete and shadow.complete]
+        ttft = [shadow.ttft - primary.ttft for primary, shadow in ok
+                if primary.ttft is not None and shadow.ttft is not None]
+        latency = [shadow.latency - primary.latency for primary, shadow in ok]
+        return {
+            'candidate': policy.shadow.name,
+            'rate': policy.shadow_rate,
+            'mirrored': policy.mirrored,
+            'dropped': policy.dropped,
+            'pairs': len(policy.pairs),
+            'latency_delta_p50': _percentile(latency, 0.5),
+            'latency_delta_p95': _percentile(latency, 0.95),
+            'ttft_delta_p50': _percentile(ttft, 0.5),
+            'prompt_tokens_delta': _mean_delta(ok, 'prompt_tokens'),
+            'completion_tokens_delta': _mean_delta(ok, 'completion_tokens'),
+        }
+
+    def close(self) -> None:
+        """等待进行中的影子请求结束并关闭线程池"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+def _percentile(values, p: float) -> Optional[float]:
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def _mean_delta(pairs, field: str) -> Optional[float]:
+    deltas = [getattr(shadow, field) - getattr(primary, field) for primary, shadow in pairs
+              if getattr(primary, field) is not None and getattr(shadow, field) is not None]
+    return sum(deltas) / len(deltas) if deltas else None
+
+
+def parse_routes(text: str) -> Dict[str, List[Route]]:
+    """
+    解析 "gpt-4o=openai:gpt-4o:90|azure:gpt-4o-deployment:10;..." 格式的路由配置
+
+    逻辑模型之间用分号分隔，路由之间用竖线分隔，每个路由为 platform:model[:weight]
+    """
+    routes = {}
+    for item in (text or '').split(';'):
+        if '=' not in item:
+            continue
+        model, specs = item.split('=', 1)
+        routes[model.strip()] = [_parse_route(spec) for spec in specs.split('|') if spec.strip()]
+    return routes
+
+
+def _parse_route(spec: str) -> Route:
+    parts = [part.strip() for part in spec.split(':')]
+    weight = float(parts[2]) if len(parts) > 2 else 1.0
+    return Route(parts[0], parts[1] if len(parts) > 1 and parts[1] else None, weight)
+
+
+def create_router(splits: str, shadows: str = '') -> Optional[TrafficRouter]:
+    """
+    由配置字符串创建TrafficRouter
+
+    Args:
+        splits: 路由配置，见parse_routes
+        shadows: 影子流量配置，如 "gpt-4o=aihubmix:gpt-4o:0.05"，最后一项为复制比例
+
+    Returns:
+        没有配置路由时返回None
+    """
+    routes = parse_routes(splits)
+    if not routes:
+        return None
+    router = TrafficRouter()
+    shadow_routes = parse_routes(shadows)
+    for model, model_routes in routes.items():
+        shadow = shadow_routes.get(model)
+        if shadow:
+            router.add(model, model_routes, (shadow[0].platform, shadow[0].model), shadow[0].weight)
+        else:
+            router.add(model, model_routes)
+    return router
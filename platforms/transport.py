@@ -0,0 +1,257 @@
+"""
+OpenAI兼容接口的轻量HTTP传输
+
+OpenAI SDK为每个响应和每个流式数据块构建pydantic对象，高QPS的流式场景下这部分CPU开销很明显。
+ChatTransport直接使用 /chat/completions 的线路格式：
+- 直接使用urllib3的连接池（requests的Session每次请求还要合并配置、处理cookie、读取环境变量，CPU开销约为其两倍），
+  请求体直接序列化为JSON
+- 普通响应解析为字典；流式响应用增量SSE解码器（sse模块）逐个返回事件字典，不构建SDK对象
+- HTTP错误直接转换为分类后的错误（RateLimited、AuthFailed等），与SDK路径的错误分类一致
+
+OpenAIClient、AIHubMixClient、AzureClient 传入 transport='http'（或设置 AI_TRANSPORT=http）时使用，
+返回的结果与SDK路径相同。
+"""
+import json
+import socket
+import threading
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import urllib3
+
+from .errors import AIModelError, Timeout, UpstreamUnavailable, classify
+from .result import ChatResult, Usage
+from .sse import DONE, SSEDecoder, loads
+
+SDK = 'sdk'
+HTTP = 'http'
+
+
+class SSEStream:
+    """
+    流式响应的事件迭代器
+
+    用SSEDecoder增量解析，每个data事件解析为字典；遇到 data: [DONE] 结束。
+    close() 可以在其他线程调用，会立即关闭底层连接。
+    """
+
+    def __init__(self, response: urllib3.HTTPResponse, read_size: int = 16384):
+        self.response = response
+        # 读取已到达的数据（read1），不等待凑满read_size；流式请求不压缩，
+        # urllib3 1.x没有read1时直接读取底层的http.client响应
+        read1 = getattr(response, 'read1', None) or getattr(response._fp, 'read1')
+        self._read = lambda: read1(read_size)
+        self._decoder = SSEDecoder()
+        self._events: List[Tuple[Optional[str], bytes]] = []
+        self._index = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return self
+
+    def __next__(self) -> Dict[str, Any]:
+        while self._index >= len(self._events):
+            if self._closed:
+                raise StopIteration
+            try:
+                chunk = self._read()
+            except (urllib3.exceptions.HTTPError, OSError, ValueError, AttributeError) as e:
+                if self._closed:
+                    raise StopIteration
+                raise _network_error(e)
+            if not chunk:
+                self._finish()
+                self._events, self._index = self._decoder.flush(), 0
+                if not self._events:
+                    raise StopIteration
+                break
+            self._events, self._index = self._decoder.feed(chunk), 0
+
+        _, data = self._events[self._index]
+        self._index += 1
+        if data == DONE:
+            self._finish()
+            self._events = []
+            raise StopIteration
+        event = loads(data)
+        if 'error' in event and not event.get('choices'):
+            raise _api_error(None, event)
+        return event
+
+    def close(self) -> None:
+        """提前关闭流：立即关闭连接（重复调用无影响）"""
+        if self._mark_closed():
+            _shutdown(self.response)
+            self.response.close()
+
+    def _finish(self) -> None:
+        """流正常结束：读完剩余数据后把连接放回连接池"""
+        if not self._mark_closed():
+            return
+        try:
+            while self._read():
+                pass
+        except (urllib3.exceptions.HTTPError, OSError, ValueError):
+            self.response.close()
+            return
+        self.response.release_conn()
+
+    def _mark_closed(self) -> bool:
+        with self._lock:
+            if self._closed:
+                return False
+            self._closed = True
+            return True
+
+
+class ChatTransport:
+    """OpenAI兼容 /chat/completions 接口的HTTP传输"""
+
+    def __init__(self, url: str, headers: Dict[str, str], params: Optional[Dict[str, str]] = None,
+                 pool_size: int = 64):
+        """
+        初始化HTTP传输
+
+        Args:
+            url: 接口地址，可以包含 {model} 占位符（Azure按部署名称区分地址）
+            headers: 认证等请求头
+            params: 查询参数（如Azure的api-version）
+            pool_size: 连接池大小，应不小于并发请求数
+        """
+        if params:
+            url += ('&' if '?' in url else '?') + urllib.parse.urlencode(params)
+        self.url = url
+        headers = dict(headers, **{'Content-Type': 'application/json'})
+        # 代理配置只在初始化时从环境变量读取一次
+        parsed = urlparse(url.split('{', 1)[0])
+        proxy = urllib.request.getproxies().get(parsed.scheme)
+        if proxy and not urllib.request.proxy_bypass(parsed.hostname or ''):
+            self.pool = urllib3.ProxyManager(proxy, num_pools=4, maxsize=pool_size, headers=headers)
+        else:
+            self.pool = urllib3.PoolManager(num_pools=4, maxsize=pool_size, headers=headers)
+
+    @classmethod
+    def openai(cls, api_key: str, base_url: str, **kwargs) -> 'ChatTransport':
+        """OpenAI及兼容平台（AIHubMix等）"""
+        return cls(base_url.rstrip('/') + '/chat/completions',
+                   {'Authorization': f'Bearer {api_key}'}, **kwargs)
+
+    @classmethod
+    def azure(cls, api_key: str, endpoint: str, api_version: str, **kwargs) -> 'ChatTransport':
+        """Azure OpenAI（按部署名称区分地址）"""
+        return cls(endpoint.rstrip('/') + '/openai/deployments/{model}/chat/completions',
+                   {'api-key': api_key}, {'api-version': api_version}, **kwargs)
+
+    def create(self, params: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        普通请求
+
+        Returns:
+            响应的JSON字典
+        """
+        response = self._post(params, False, timeout)
+        return loads(response.data)
+
+    def stream(self, params: Dict[str, Any], timeout: Optional[float] = None) -> SSEStream:
+        """
+        流式请求
+
+        Args:
+            timeout: 连接及每次读取的超时时间（秒），即数据块之间的最长等待时间
+
+        Returns:
+            事件迭代器，关闭时关闭连接
+        """
+        response = self._post(dict(params, stream=True), True, timeout, {'Accept-Encoding': 'identity'})
+        return SSEStream(response)
+
+    def _post(self, params: Dict[str, Any], stream: bool, timeout: Optional[float],
+              headers: Optional[Dict[str, str]] = None) -> urllib3.HTTPResponse:
+        url = self.url.format(model=params.get('model')) if '{model}' in self.url else self.url
+        body = json.dumps(params, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        if headers:
+            headers = dict(self.pool.headers, **headers)
+        try:
+            response = self.pool.request('POST', url, body=body, headers=headers, timeout=timeout,
+                                         retries=False, preload_content=not stream)
+        except (urllib3.exceptions.HTTPError, OSError) as e:
+            raise _network_error(e)
+        if response.status >= 400:
+            try:
+                data = json.loads(response.data)
+            except ValueError:
+                data = {'error': {'message': response.data[:500].decode('utf-8', 'replace')}}
+            finally:
+                response.release_conn()
+            raise _api_error(response, data)
+        return response
+
+    def close(self) -> None:
+        self.pool.clear()
+
+
+def completion_result(data: Dict[str, Any], model: str, **extra: Any) -> ChatResult:
+    """普通响应字典 -> 与SDK路径相同的结果"""
+    content = data['choices'][0]['message'].get('content') or ''
+    return ChatResult.ok(content, model, Usage.from_dict(data.get('usage')), **extra)
+
+
+def stream_chunks(events: Iterable[Dict[str, Any]], model: str, **extra: Any) -> Iterator[ChatResult]:
+    """流式事件字典 -> 与SDK路径相同的数据块"""
+    for event in events:
+        choices = event.get('choices')
+        if choices:
+            content = (choices[0].get('delta') or {}).get('content')
+            if content:
+                yield ChatResult.chunk(content, model, **extra)
+        usage = event.get('usage')
+        if usage:
+            # 流结束时的usage（include_usage时最后一个事件没有choices）
+            yield ChatResult.chunk('', model, Usage.from_dict(usage), **extra)
+
+
+def _api_error(response: Optional[urllib3.HTTPResponse], data: Dict[str, Any]) -> AIModelError:
+    """HTTP错误响应或流中的错误事件 -> 分类后的错误"""
+    detail = data.get('error', data) if isinstance(data, dict) else {}
+    if not isinstance(detail, dict):
+        detail = {'message': str(detail)}
+    message = detail.get('message') or str(data)
+    code = detail.get('code') or detail.get('type')
+    status = response.status if response is not None else None
+    retry_after = None
+    if response is not None:
+        try:
+            retry_after = float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+    error_type = classify(status, code, message)
+    if status is not None:
+        message = f"Error code: {status} - {message}"
+    return error_type(message, code, status, retry_after)
+
+
+def _network_error(error: Exception) -> AIModelError:
+    if isinstance(error, (urllib3.exceptions.TimeoutError, socket.timeout)):
+        return Timeout(f"Request timed out: {error}")
+    return UpstreamUnavailable(f"Connection error: {error}")
+
+
+def _shutdown(response: urllib3.HTTPResponse) -> None:
+    """
+    关闭流式响应的socket
+
+    response.close() 只关闭文件对象，另一个线程阻塞在读取中时不会返回；
+    shutdown会立即唤醒读取并通知服务端连接已关闭
+    """
+    sock = getattr(getattr(response, '_connection', None), 'sock', None)
+    if sock is None:
+        fp = getattr(getattr(response, '_fp', None), 'fp', None)
+        sock = getattr(getattr(fp, 'raw', None), '_sock', None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
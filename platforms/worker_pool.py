@@ -0,0 +1,340 @@
+"""
+多进程执行模式
+
+QPS较高时瓶颈从网络转移到Python侧的CPU工作：SDK响应的JSON解析、OpenAI SDK的pydantic
+模型构建以及结果处理，这些都受GIL限制只能使用一个CPU核。WorkerPool把请求分发到多个
+工作进程执行：
+- 每个工作进程有自己的AIModelManager和已预热的客户端，进程内用线程池并发执行请求
+- 请求按在途请求数分配给最空闲的工作进程
+- 结果以紧凑的元组通过管道返回（不传递SDK响应对象），父进程还原为ChatResult
+- 流式请求逐块返回，关闭流或取消时通知工作进程关闭上游流
+
+一般通过 AIModelManager(processes=4) 使用，请求合并、统计等仍在父进程完成。
+"""
+import itertools
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from .result import ChatResult, Usage
+
+# 父进程 -> 工作进程
+_CHAT, _STREAM, _CANCEL = 0, 1, 2
+# 工作进程 -> 父进程
+_RESULT, _CHUNK, _END = 0, 1, 2
+
+
+def pack_result(result: ChatResult) -> tuple:
+    """ChatResult -> 可通过管道传递的紧凑元组（不包含raw_response）"""
+    usage = result.get('usage')
+    if usage:
+        if not isinstance(usage, Usage):
+            usage = Usage.from_dict(usage)
+        usage = (usage.prompt_tokens, usage.completion_tokens, usage.total_tokens, usage.cached_tokens)
+    else:
+        usage = None
+    return (result.success, result.get('content'), result.get('model'), usage, result.get('error'),
+            result.get('code'), result.get('error_type'), getattr(result, '_extra', None))
+
+
+def unpack_result(data: tuple, chunk: bool = False) -> ChatResult:
+    """pack_result的逆操作，chunk为True时还原为流式数据块"""
+    success, content, model, usage, error, code, error_type, extra = data
+    if usage is not None:
+        usage = Usage(*usage)
+    if not success:
+        return ChatResult.fail(error, code, error_type, **(extra or {}))
+    if chunk:
+        return ChatResult.chunk(content, model, usage, **(extra or {}))
+    return ChatResult.ok(content, model, usage, **(extra or {}))
+
+
+def _wall_deadline(kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    """Deadline基于本进程的单调时钟，传给工作进程前转换为time.time()时间戳"""
+    deadline = kwargs.get('deadline')
+    if deadline is not None and hasattr(deadline, 'remaining'):
+        kwargs = dict(kwargs, deadline=time.time() + deadline.remaining())
+    return kwargs
+
+
+# ----------------------------------------------------------------------
+# 工作进程
+# ----------------------------------------------------------------------
+
+def _worker_main(conn, platforms: Tuple[str, ...], manager_factory: Optional[Callable], threads: int) -> None:
+    from . import AIModelManager
+    from .cancellation import CancelToken
+
+    # 并发上限、排队、准入控制和流量分配由父进程的AIModelManager统一控制，工作进程不读取这些配置
+    manager = manager_factory() if manager_factory else AIModelManager(
+        processes=0, adaptive_concurrency=False, scheduler=False, admission=False, traffic=False)
+    # 预热客户端（创建SDK客户端和连接池），未配置的平台在首次请求时报错
+    for platform in platforms:
+        try:
+            manager.get_client(platform)
+        except Exception:
+            pass
+
+    send_lock = threading.Lock()
+    cancels: Dict[int, CancelToken] = {}
+
+    def send(message: tuple) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def run_chat(request_id: int, platform: str, message: str, kwargs: dict) -> None:
+        try:
+            result = manager.chat(platform, message, coalesce=False, **kwargs)
+        except Exception as e:
+            result = ChatResult.from_exception(e)
+        send((_RESULT, request_id, pack_result(result)))
+
+    def run_stream(request_id: int, platform: str, message: str, kwargs: dict) -> None:
+        cancel = cancels[request_id]
+        try:
+            if not cancel.cancelled:
+                stream = manager.chat_stream(platform, message, coalesce=False, cancel=cancel, **kwargs)
+                try:
+                    for chunk in stream:
+                        if cancel.cancelled:
+                            break
+                        send((_CHUNK, request_id, pack_result(chunk)))
+                finally:
+                    stream.close()
+        except Exception as e:
+            send((_CHUNK, request_id, pack_result(ChatResult.from_exception(e))))
+        finally:
+            cancels.pop(request_id, None)
+            send((_END, request_id, None))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                message = None
+            if message is None:
+                for cancel in list(cancels.values()):
+                    cancel.cancel()
+                break
+            op, request_id, payload = message
+            if op == _CHAT:
+                executor.submit(run_chat, request_id, *payload)
+            elif op == _STREAM:
+                cancels[request_id] = CancelToken()
+                executor.submit(run_stream, request_id, *payload)
+            elif op == _CANCEL:
+                cancel = cancels.get(request_id)
+                if cancel is not None:
+                    cancel.cancel()
+    conn.close()
+
+
+# ----------------------------------------------------------------------
+# 父进程
+# ----------------------------------------------------------------------
+
+class _Worker:
+    """父进程中的工作进程句柄"""
+
+    def __init__(self, ctx, index: int, platforms, manager_factory, threads: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, name=f'ai-worker-{index}', daemon=True,
+                                   args=(child_conn, tuple(platforms), manager_factory, threads))
+        self.process.start()
+        child_conn.close()
+        self.send_lock = threading.Lock()
+        self.inflight = 0
+        self.alive = True
+
+    def send(self, message: Optional[tuple]) -> None:
+        with self.send_lock:
+            self.conn.send(message)
+
+
+class RemoteStream:
+    """工作进程中执行的流式请求，可以在任意线程调用close()"""
+
+    def __init__(self, pool: 'WorkerPool', worker: _Worker, request_id: int):
+        self._pool = pool
+        self._worker = worker
+        self._request_id = request_id
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._done = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> ChatResult:
+        if self._done:
+            raise StopIteration
+        item = self._queue.get()
+        if item is None:
+            self._done = True
+            raise StopIteration
+        return item
+
+    def close(self) -> None:
+        """通知工作进程关闭上游流（重复调用无影响）"""
+        if self._done:
+            return
+        self._done = True
+        self._pool._cancel(self._worker, self._request_id)
+        self._queue.put(None)
+
+
+class WorkerPool:
+    """多进程执行池"""
+
+    def __init__(self,
+                 processes: Optional[int] = None,
+                 platforms: Iterable[str] = (),
+                 threads_per_process: int = 16,
+                 manager_factory: Optional[Callable] = None,
+                 start_method: str = 'spawn'):
+        """
+        初始化并启动工作进程
+
+        Args:
+            processes: 工作进程数，默认为CPU核数
+            platforms: 工作进程启动时预热的平台客户端
+            threads_per_process: 每个工作进程的最大并发请求数
+            manager_factory: 在工作进程中创建AIModelManager的函数（需可pickle，即模块级函数），
+                             默认使用配置创建
+            start_method: 进程启动方式，默认spawn（fork会复制父进程中的线程锁和SDK连接）
+        """
+        ctx = multiprocessing.get_context(start_method)
+        self.processes = processes or os.cpu_count() or 1
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, Any] = {}
+        self._closed = False
+        self._workers = [_Worker(ctx, i, platforms, manager_factory, threads_per_process)
+                         for i in range(self.processes)]
+        for worker in self._workers:
+            threading.Thread(target=self._read, args=(worker,), name='ai-worker-reader', daemon=True).start()
+
+    def _choose(self) -> _Worker:
+        """选择在途请求最少的工作进程"""
+        workers = [worker for worker in self._workers if worker.alive]
+        if not workers:
+            raise RuntimeError("工作进程均已退出")
+        return min(workers, key=lambda worker: worker.inflight)
+
+    def _dispatch(self, op: int, platform: str, message: str, kwargs: dict,
+                  make_target: Callable[[_Worker, int], Any]) -> Any:
+        if self._closed:
+            raise RuntimeError("WorkerPool已关闭")
+        with self._lock:
+            worker = self._choose()
+            worker.inflight += 1
+            request_id = next(self._ids)
+            target = make_target(worker, request_id)
+            self._pending[request_id] = (worker, target)
+        worker.send((op, request_id, (platform, message, _wall_deadline(kwargs))))
+        return target
+
+    def submit(self, platform: str, message: str, **kwargs) -> Future:
+        """
+        提交聊天请求
+
+        Returns:
+            Future，结果为ChatResult
+        """
+        try:
+            return self._dispatch(_CHAT, platform, message, kwargs, lambda worker, request_id: Future())
+        except Exception as e:
+            future: Future = Future()
+            future.set_result(ChatResult.from_exception(e))
+            return future
+
+    def chat(self, platform: str, message: str, **kwargs) -> ChatResult:
+        """在工作进程中执行聊天请求并等待结果，参数同 AIModelManager.chat"""
+        return self.submit(platform, message, **kwargs).result()
+
+    def chat_stream(self, platform: str, message: str, **kwargs) -> 'RemoteStream':
+        """
+        在工作进程中执行流式聊天请求，参数同 AIModelManager.chat_stream
+
+        cancel参数不会传到工作进程：取消时由调用方关闭返回的流（如使用guard_stream）
+        """
+        kwargs.pop('cancel', None)
+        return self._dispatch(_STREAM, platform, message, kwargs,
+                              lambda worker, request_id: RemoteStream(self, worker, request_id))
+
+    def _cancel(self, worker: _Worker, request_id: int) -> None:
+        with self._lock:
+            if request_id not in self._pending:
+                return
+        try:
+            worker.send((_CANCEL, request_id, None))
+        except (OSError, ValueError):
+            pass
+
+    def _read(self, worker: _Worker) -> None:
+        """读取工作进程的返回，分发到对应的Future或流"""
+        while True:
+            try:
+                op, request_id, data = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            with self._lock:
+                entry = self._pending.get(request_id)
+                if entry is None:
+                    continue
+                if op != _CHUNK:
+                    del self._pending[request_id]
+                    worker.inflight -= 1
+            target = entry[1]
+            if op == _RESULT:
+                target.set_result(unpack_result(data))
+            elif op == _CHUNK:
+                target._queue.put(unpack_result(data, chunk=True))
+            else:
+                target._queue.put(None)
+        self._worker_exited(worker)
+
+    def _worker_exited(self, worker: _Worker) -> None:
+        """工作进程退出时，未完成的请求返回失败结果"""
+        worker.alive = False
+        with self._lock:
+            lost = [(request_id, target) for request_id, (owner, target) in self._pending.items()
+                    if owner is worker]
+            for request_id, _ in lost:
+                del self._pending[request_id]
+        if self._closed:
+            error = ChatResult.fail("WorkerPool已关闭", error_type='cancelled')
+        else:
+            error = ChatResult.fail("工作进程异常退出", error_type='upstream_unavailable')
+        for _, target in lost:
+            if isinstance(target, Future):
+                target.set_result(error.copy())
+            else:
+                target._queue.put(error.copy())
+                target._queue.put(None)
+
+    def close(self, timeout: float = 5) -> None:
+        """关闭工作进程（进行中的请求会被取消）"""
+        if self._closed:
+            return
+        self._closed = True
+        for worker in self._workers:
+            try:
+                worker.send(None)
+            except (OSError, ValueError):
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout)
+            if worker.process.is_alive():
+                worker.process.terminate()
+            worker.conn.close()
+
+    def __enter__(self) -> 'WorkerPool':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
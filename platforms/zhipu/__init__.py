@@ -1,3 +1,4 @@
 from .client import ZhipuClient
+from .async_tasks import ZhipuAsyncTasks
 
-__all__ = ['ZhipuClient']
\ No newline at end of file
+__all__ = ['ZhipuClient', 'ZhipuAsyncTasks']
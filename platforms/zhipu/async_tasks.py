@@ -0,0 +1,214 @@
+"""
+智谱AI异步任务 (async-task completion API)
+
+离线批量任务使用异步接口：提交后立即返回任务ID，结果稍后查询，提交时不需要等待生成完成。
+ZhipuAsyncTasks负责提交和收集：
+1. 用线程池并发提交提示词迭代器中的请求，进行中的任务数不超过max_pending（按需读取迭代器，不一次性加载）
+2. 所有进行中的任务放在一个按下次查询时间排序的堆中，每轮把已到（或即将到）查询时间的任务
+   合并为一批并发查询；仍在处理的任务按指数退避推迟下次查询
+3. 新任务的首次查询时间参考最近完成任务的耗时，避免在生成完成前反复查询
+4. 结果按完成顺序返回，失败的提交和任务也作为失败结果返回
+"""
+import heapq
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from ..deadline import Deadline, DeadlineExceeded
+from ..errors import from_exception
+from ..prompt_cache import build_messages
+from ..result import ChatResult, Usage
+
+# 任务状态
+PROCESSING = 'PROCESSING'
+SUCCESS = 'SUCCESS'
+FAIL = 'FAIL'
+
+PromptItem = Union[str, Tuple[str, str], Dict[str, Any]]
+
+
+class _Task:
+    __slots__ = ('custom_id', 'task_id', 'submitted', 'interval', 'polls')
+
+    def __init__(self, custom_id: str, task_id: str, interval: float):
+        self.custom_id = custom_id
+        self.task_id = task_id
+        self.submitted = time.monotonic()
+        self.interval = interval
+        self.polls = 0
+
+
+class ZhipuAsyncTasks:
+    """智谱AI异步任务的批量提交与结果收集"""
+
+    def __init__(self, client, concurrency: int = 8, max_pending: int = 1000,
+                 poll_interval: float = 2.0, max_interval: float = 30.0, backoff: float = 1.5):
+        """
+        Args:
+            client: ZhipuAI SDK客户端
+            concurrency: 提交和查询使用的线程数
+            max_pending: 最多同时进行中（已提交、未完成）的任务数
+            poll_interval: 初始查询间隔（秒），有已完成的任务后参考其耗时
+            max_interval: 最大查询间隔（秒）
+            backoff: 任务仍在处理时查询间隔乘以的系数
+        """
+        self.client = client
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self.poll_interval = poll_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        # 最近完成任务的耗时（指数移动平均）
+        self._completion_time: Optional[float] = None
+        # 查询次数统计
+        self.polls = 0
+
+    def submit(self, message: str, model: str, temperature: float = 0.7, max_tokens: int = 1000,
+               system_prompt: str = None, **kwargs) -> str:
+        """
+        提交单个异步任务
+
+        Returns:
+            任务ID
+        """
+        response = self.client.chat.asyncCompletions.create(
+            model=model,
+            messages=build_messages(message, system_prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **kwargs
+        )
+        return response.id
+
+    def retrieve(self, task_id: str) -> Tuple[str, Optional[ChatResult]]:
+        """
+        查询单个任务
+
+        Returns:
+            (任务状态, 结果)；仍在处理时结果为None
+        """
+        response = self.client.chat.asyncCompletions.retrieve_completion_result(id=task_id)
+        status = response.task_status
+        if status == SUCCESS:
+            content = response.choices[0].message.content if response.choices else ''
+            return status, ChatResult.ok(content or '', response.model, Usage.from_openai(response.usage),
+                                         task_id=task_id)
+        if status == FAIL:
+            return status, ChatResult.fail(f"异步任务 {task_id} 执行失败", FAIL, task_id=task_id)
+        return status, None
+
+    def run(self, prompts: Iterable[PromptItem], model: str, timeout: Optional[float] = None,
+            **kwargs) -> Iterator[Tuple[str, ChatResult]]:
+        """
+        提交所有请求并按完成顺序返回结果
+
+        Args:
+            prompts: 提示词迭代器，元素可以是字符串、(custom_id, message) 或
+                     {'id': ..., 'message': ...}；未指定ID时使用序号
+            model: 模型名称
+            timeout: 最长等待时间（秒），到期时未完成的任务返回code为'deadline_exceeded'的失败结果
+                     （结果中的task_id可以稍后再查询）
+            **kwargs: 其他参数，同chat接口 (temperature, max_tokens, system_prompt等)
+
+        Yields:
+            (custom_id, 结果)，结果中的task_id为任务ID
+        """
+        deadline = Deadline.after(timeout) if timeout is not None else None
+        items = _iter_items(prompts)
+        exhausted = False
+        heap: List[Tuple[float, int, _Task]] = []
+        sequence = itertools.count()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            while True:
+                # 补充提交，进行中的任务数不超过max_pending
+                if not exhausted and len(heap) < self.max_pending:
+                    batch = list(itertools.islice(items, min(self.max_pending - len(heap), self.concurrency * 4)))
+                    exhausted = not batch
+                    submitted = executor.map(lambda item: self._submit_item(item, model, kwargs), batch)
+                    for custom_id, task_id, error in submitted:
+                        if error is not None:
+                            yield custom_id, error
+                            continue
+                        task = _Task(custom_id, task_id, self._first_interval())
+                        heapq.heappush(heap, (task.submitted + task.interval, next(sequence), task))
+                    # 还没有任务到查询时间时继续提交
+                    if not exhausted and len(heap) < self.max_pending and (
+                            not heap or heap[0][0] > time.monotonic()):
+                        continue
+
+                if not heap:
+                    if exhausted:
+                        return
+                    continue
+
+                if deadline is not None and deadline.expired:
+                    while heap:
+                        task = heapq.heappop(heap)[2]
+                        yield task.custom_id, ChatResult.from_exception(DeadlineExceeded(), task_id=task.task_id)
+                    return
+
+                # 等到最早的任务到查询时间，再把所有已到时间（及poll_interval/4内将到时间）的任务合并为一批查询
+                wait = heap[0][0] - time.monotonic()
+                if deadline is not None:
+                    wait = min(wait, deadline.remaining())
+                if wait > 0:
+                    time.sleep(wait)
+                horizon = time.monotonic() + self.poll_interval / 4
+                due = []
+                while heap and heap[0][0] <= horizon:
+                    due.append(heapq.heappop(heap)[2])
+                if not due:
+                    continue
+
+                self.polls += len(due)
+                for task, result in zip(due, executor.map(self._poll, due)):
+                    if result is not None:
+                        if result['success']:
+                            self._record_completion(time.monotonic() - task.submitted)
+                        yield task.custom_id, result
+                        continue
+                    task.interval = min(task.interval * self.backoff, self.max_interval)
+                    heapq.heappush(heap, (time.monotonic() + task.interval, next(sequence), task))
+
+    def _submit_item(self, item: PromptItem, model: str, kwargs: Dict[str, Any]):
+        """提交一个请求，返回(custom_id, 任务ID, 失败结果)"""
+        custom_id, message = item
+        try:
+            return custom_id, self.submit(message, model, **kwargs), None
+        except Exception as e:
+            return custom_id, None, ChatResult.from_exception(e)
+
+    def _poll(self, task: _Task) -> Optional[ChatResult]:
+        """查询一个任务，仍在处理时返回None；查询出错时可重试的错误视为仍在处理"""
+        task.polls += 1
+        try:
+            return self.retrieve(task.task_id)[1]
+        except Exception as e:
+            if from_exception(e).retryable:
+                return None
+            return ChatResult.from_exception(e, task_id=task.task_id)
+
+    def _first_interval(self) -> float:
+        """新任务的首次查询间隔：参考最近完成任务的耗时"""
+        if self._completion_time is None:
+            return self.poll_interval
+        return min(max(self._completion_time, self.poll_interval), self.max_interval)
+
+    def _record_completion(self, elapsed: float) -> None:
+        if self._completion_time is None:
+            self._completion_time = elapsed
+        else:
+            self._completion_time += (elapsed - self._completion_time) * 0.2
+
+
+def _iter_items(prompts: Iterable[PromptItem]) -> Iterator[Tuple[str, str]]:
+    """提示词迭代器 -> (custom_id, message)"""
+    for index, item in enumerate(prompts):
+        if isinstance(item, str):
+            yield str(index), item
+        elif isinstance(item, dict):
+            yield str(item.get('id', index)), item['message']
+        else:
+            yield str(item[0]), item[1]
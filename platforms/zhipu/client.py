@@ -2,23 +2,34 @@
 智谱AI API客户端
 """
 from zhipuai import ZhipuAI
-from typing import Optional, Dict, Any, Generator
+from typing import Optional, Dict, Any, Generator, Tuple
 from config.config import Config
+from ..result import ChatResult, Usage
+from ..prompt_cache import build_messages
+from ..deadline import Deadline, call_with_deadline, guard_stream, timeout_kwargs
+from ..cancellation import CancelToken
+from .async_tasks import ZhipuAsyncTasks
 
 class ZhipuClient:
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, debug: Optional[bool] = None):
         """
         初始化智谱AI客户端
         
         Args:
             api_key: API密钥，如果不提供则从配置中获取
+            debug: 是否在结果中保留原始响应(raw_response)，默认使用配置中的值
         """
         self.api_key = api_key or Config.ZHIPU_API_KEY
+        self.debug = Config.DEBUG_RAW_RESPONSE if debug is None else debug
         
         if not self.api_key:
             raise ValueError("智谱AI API Key未设置")
         
         self.client = ZhipuAI(api_key=self.api_key)
+        # 设置了截止时间的请求不使用SDK内置重试，由call_with_deadline在剩余时间内重试
+        self.deadline_client = ZhipuAI(api_key=self.api_key, max_retries=0)
+        # 异步任务接口（离线批量任务）
+        self.async_tasks = ZhipuAsyncTasks(self.client)
     
     def chat(self, 
              message: str, 
@@ -26,6 +37,8 @@ class ZhipuClient:
              temperature: float = 0.7,
              max_tokens: int = 1000,
              system_prompt: str = None,
+             deadline: Optional[Deadline] = None,
+             timeout: float = None,
              **kwargs) -> Dict[str, Any]:
         """
         发送聊天请求
@@ -36,6 +49,8 @@ class ZhipuClient:
             temperature: 温度参数
             max_tokens: 最大token数量
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
             **kwargs: 其他参数
             
         Returns:
@@ -43,35 +58,31 @@ class ZhipuClient:
         """
         model = model or Config.DEFAULT_MODELS['zhipu']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            response = self.client.chat.completions.create(
+            response = call_with_deadline(lambda: client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
+                **timeout_kwargs(deadline),
                 **kwargs
-            )
+            ), deadline)
             
-            return {
-                'success': True,
-                'content': response.choices[0].message.content,
-                'model': model,
-                'usage': {
-                    'prompt_tokens': response.usage.prompt_tokens,
-                    'completion_tokens': response.usage.completion_tokens,
-                    'total_tokens': response.usage.total_tokens
-                } if response.usage else None
-            }
+            result = ChatResult.ok(
+                response.choices[0].message.content,
+                model,
+                Usage.from_openai(response.usage)
+            )
+            if self.debug:
+                result.raw_response = response
+            return result
         except Exception as e:
-            return {
-                'success': False,
-                'error': str(e)
-            }
+            return ChatResult.from_exception(e)
     
     def chat_stream(self, 
                    message: str, 
@@ -79,6 +90,10 @@ class ZhipuClient:
                    temperature: float = 0.7,
                    max_tokens: int = 1000,
                    system_prompt: str = None,
+                   deadline: Optional[Deadline] = None,
+                   timeout: float = None,
+                   idle_timeout: float = None,
+                   cancel: Optional[CancelToken] = None,
                    **kwargs) -> Generator[Dict[str, Any], None, None]:
         """
         流式聊天请求
@@ -89,37 +104,60 @@ class ZhipuClient:
             temperature: 温度参数
             max_tokens: 最大token数量
             system_prompt: 系统提示词
+            deadline: 截止时间（Deadline对象或time.time()时间戳）
+            timeout: 超时时间（秒），与deadline同时给出时取较早者
+            idle_timeout: 首个数据块及数据块之间的最长等待时间（秒）
+            cancel: 取消句柄，在其他线程调用cancel()会关闭上游流
             **kwargs: 其他参数
             
         Yields:
-            流式响应数据
+            流式响应数据；关闭生成器会同时关闭SDK的流和HTTP响应
         """
         model = model or Config.DEFAULT_MODELS['zhipu']
         
-        messages = []
-        if system_prompt:
-            messages.append({"role": "system", "content": system_prompt})
-        messages.append({"role": "user", "content": message})
+        # 按固定顺序构建消息并统一系统提示词的换行符，便于命中服务端提示词前缀缓存
+        messages = build_messages(message, system_prompt)
+        deadline = Deadline.resolve(deadline, timeout)
+        client = self.client if deadline is None else self.deadline_client
         
         try:
-            response = self.client.chat.completions.create(
+            response = call_with_deadline(lambda: client.chat.completions.create(
                 model=model,
                 messages=messages,
                 temperature=temperature,
                 max_tokens=max_tokens,
                 stream=True,
+                **timeout_kwargs(deadline, idle_timeout),
                 **kwargs
-            )
+            ), deadline)
             
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield {
-                        'success': True,
-                        'content': chunk.choices[0].delta.content,
-                        'model': model
-                    }
+            for chunk in guard_stream(response, deadline, cancel):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield ChatResult.chunk(chunk.choices[0].delta.content, model)
+                if getattr(chunk, 'usage', None):
+                    # 最后一个数据块携带usage
+                    yield ChatResult.chunk('', model, Usage.from_openai(chunk.usage))
         except Exception as e:
-            yield {
-                'success': False,
-                'error': str(e)
-            }
\ No newline at end of file
+            yield ChatResult.from_exception(e)
+    
+    def chat_async_tasks(self, 
+                         prompts, 
+                         model: str = None, 
+                         timeout: float = None,
+                         **kwargs) -> Generator[Tuple[str, ChatResult], None, None]:
+        """
+        通过异步任务接口批量聊天
+        
+        适合大批量离线任务：并发提交异步任务，合并查询并按退避间隔轮询，结果按完成顺序返回。
+        
+        Args:
+            prompts: 提示词迭代器，元素可以是字符串、(custom_id, message) 或 {'id': ..., 'message': ...}
+            model: 模型名称
+            timeout: 最长等待时间（秒），到期时未完成的任务返回code为'deadline_exceeded'的失败结果
+            **kwargs: 其他参数，同chat接口 (temperature, max_tokens, system_prompt等)
+            
+        Yields:
+            (custom_id, 结果)，结果中的task_id为异步任务ID
+        """
+        model = model or Config.DEFAULT_MODELS['zhipu']
+        yield from self.async_tasks.run(prompts, model, timeout=timeout, **kwargs)
@@ -0,0 +1,136 @@
+"""
+自适应并发控制基准测试
+
+模拟处理能力随时间变化的上游（不需要API密钥）：
+- 进行中的请求数超过处理能力时，延迟按比例上升（平台侧排队）
+- 超过处理能力的1.5倍时直接返回限流错误(429)
+- 处理能力分阶段变化（默认 20 -> 60 -> 10）
+
+大量线程持续发送请求，对比不限制并发与自适应并发控制下每个阶段的吞吐量、限流比例和延迟，
+并输出自适应上限随时间的变化，观察上限是否收敛到各阶段的处理能力附近。
+
+用法:
+    python tests/benchmark_adaptive_concurrency.py --threads 150 --phase-seconds 6
+"""
+import os
+import sys
+import time
+import argparse
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, ConcurrencyController
+
+class SimulatedUpstream:
+    """处理能力可变的模拟平台客户端"""
+
+    def __init__(self, capacity: int, base_latency: float):
+        self.capacity = capacity
+        self.base_latency = base_latency
+        self.inflight = 0
+        self._lock = threading.Lock()
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        with self._lock:
+            self.inflight += 1
+            load = self.inflight / self.capacity
+        try:
+            if load > 1.5:
+                time.sleep(self.base_latency / 10)
+                return ChatResult.fail('Too many requests', '429', 'rate_limited')
+            time.sleep(self.base_latency * max(1.0, load))
+            return ChatResult.ok(message, model)
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+class PhaseStats:
+    def __init__(self):
+        self.ok = 0
+        self.rate_limited = 0
+        self.latency = 0.0
+        self.limits = []
+        self._lock = threading.Lock()
+
+    def record(self, result, latency: float) -> None:
+        with self._lock:
+            if result['success']:
+                self.ok += 1
+                self.latency += latency
+            elif result.get('error_type') == 'rate_limited':
+                self.rate_limited += 1
+
+def run(adaptive: bool, threads: int, phases, phase_seconds: float, base_latency: float, verbose: bool):
+    upstream = SimulatedUpstream(phases[0], base_latency)
+    controller = ConcurrencyController(initial=10) if adaptive else False
+    manager = AIModelManager(processes=0, adaptive_concurrency=controller)
+    manager.clients['mock'] = upstream
+    stats = [PhaseStats() for _ in phases]
+    current = [stats[0]]
+    stop = threading.Event()
+
+    def worker():
+        while not stop.is_set():
+            start = time.monotonic()
+            result = manager.chat('mock', '你好', model='mock-model')
+            current[0].record(result, time.monotonic() - start)
+
+    workers = [threading.Thread(target=worker, daemon=True) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+
+    start = time.monotonic()
+    for index, capacity in enumerate(phases):
+        upstream.capacity = capacity
+        current[0] = stats[index]
+        phase_end = start + (index + 1) * phase_seconds
+        while time.monotonic() < phase_end:
+            time.sleep(min(0.5, max(phase_end - time.monotonic(), 0)))
+            if adaptive:
+                report = manager.concurrency_report()['mock:mock-model']
+                stats[index].limits.append(report['limit'])
+                if verbose:
+                    print(f"  t={time.monotonic() - start:5.1f}s  处理能力 {capacity:>3}  "
+                          f"上限 {report['limit']:>3}  进行中 {report['inflight']:>3}  "
+                          f"排队 {report['waiting']:>3}")
+    stop.set()
+    for thread in workers:
+        thread.join()
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='自适应并发控制基准测试')
+    parser.add_argument('--threads', type=int, default=150, help='发送请求的线程数')
+    parser.add_argument('--phases', type=int, nargs='+', default=[20, 60, 10], help='各阶段的上游处理能力')
+    parser.add_argument('--phase-seconds', type=float, default=6, help='每个阶段的时长（秒）')
+    parser.add_argument('--latency', type=float, default=0.05, help='上游未过载时的延迟（秒）')
+    parser.add_argument('--quiet', action='store_true', help='不输出上限随时间的变化')
+    args = parser.parse_args()
+
+    print("🚀 自适应并发控制基准测试")
+    print(f"线程数: {args.threads}  处理能力: {' -> '.join(map(str, args.phases))}  "
+          f"每阶段: {args.phase_seconds}s  基础延迟: {args.latency * 1000:.0f}ms")
+    print("-" * 60)
+
+    results = {}
+    for adaptive in (False, True):
+        label = '自适应并发' if adaptive else '不限制并发'
+        print(f"{label}:")
+        results[label] = run(adaptive, args.threads, args.phases, args.phase_seconds, args.latency,
+                             adaptive and not args.quiet)
+
+    print("-" * 60)
+    for label, stats in results.items():
+        for capacity, phase in zip(args.phases, stats):
+            total = phase.ok + phase.rate_limited
+            latency = phase.latency / phase.ok * 1000 if phase.ok else 0
+            # 阶段后半段的平均上限（收敛后）
+            tail = phase.limits[len(phase.limits) // 2:]
+            limit = f"  平均上限 {sum(tail) / len(tail):5.1f}" if tail else ''
+            print(f"{label}  处理能力 {capacity:>3}: 成功 {phase.ok / args.phase_seconds:7.1f}/s  "
+                  f"限流 {phase.rate_limited / total if total else 0:6.1%}  平均延迟 {latency:6.1f}ms{limit}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+原生异步接口基准测试
+
+对比asyncio程序中500个并发流式请求的两种调用方式：
+- 原生异步：QwenClient/BaiduClient 的 achat_stream（DashScope AioGeneration / 千帆 ado）
+- 线程池：在线程池中读取同步的 chat_stream（每个请求占用一个线程直到流结束），
+  使用与并发数相同的线程数；加 --default-executor 时再对比asyncio默认线程池大小
+  （流按线程数分批完成，耗时很长）
+
+上游为与SDK结构相同的模拟异步/同步流（见test_async_clients），首个数据块等待ttft秒，
+之后每interval秒一个数据块。每种方式在单独的进程中运行，统计线程数峰值、RSS增量峰值、
+首个数据块延迟和完成延迟。不需要API密钥。
+
+用法:
+    python tests/benchmark_async_clients.py --streams 500 --platform baidu
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+NATIVE = '原生异步'
+EXECUTOR = '线程池（每个流一个线程）'
+DEFAULT_EXECUTOR = '线程池（默认大小）'
+
+def rss() -> int:
+    """当前进程的常驻内存（字节）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+def create_client(platform: str, upstream):
+    from test_async_clients import create_baidu, install_fake_dashscope
+    from platforms import QwenClient
+
+    if platform == 'baidu':
+        return create_baidu(upstream)
+    install_fake_dashscope(upstream)
+    return QwenClient(api_key='test')
+
+async def native_stream(client):
+    """原生异步：返回(首个数据块延迟, 完成延迟)"""
+    start = time.perf_counter()
+    first = None
+    async for chunk in client.achat_stream('你好'):
+        if first is None:
+            first = time.perf_counter() - start
+        assert chunk['success'], chunk
+    return first, time.perf_counter() - start
+
+async def executor_stream(client, executor):
+    """线程池：在线程中读取同步流，返回(首个数据块延迟, 完成延迟)"""
+    start = time.perf_counter()
+
+    def consume():
+        first = None
+        for chunk in client.chat_stream('你好'):
+            if first is None:
+                first = time.perf_counter() - start
+            assert chunk['success'], chunk
+        return first
+
+    first = await asyncio.get_running_loop().run_in_executor(executor, consume)
+    return first, time.perf_counter() - start
+
+async def run_streams(mode: str, client, streams: int):
+    executor = None
+    if mode == EXECUTOR:
+        executor = ThreadPoolExecutor(max_workers=streams)
+    elif mode == DEFAULT_EXECUTOR:
+        executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4))
+    base_rss = rss()
+    peak = {'threads': threading.active_count(), 'rss': 0}
+    done = False
+
+    async def sample():
+        while not done:
+            peak['threads'] = max(peak['threads'], threading.active_count())
+            peak['rss'] = max(peak['rss'], rss() - base_rss)
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.ensure_future(sample())
+    start = time.perf_counter()
+    if executor is None:
+        latencies = await asyncio.gather(*[native_stream(client) for _ in range(streams)])
+    else:
+        latencies = await asyncio.gather(*[executor_stream(client, executor) for _ in range(streams)])
+    elapsed = time.perf_counter() - start
+    done = True
+    await sampler
+    if executor is not None:
+        executor.shutdown()
+    return {
+        'elapsed': elapsed,
+        'threads': peak['threads'],
+        'rss': peak['rss'],
+        'ttft_p50': percentile([first for first, _ in latencies], 0.5),
+        'ttft_p99': percentile([first for first, _ in latencies], 0.99),
+        'total_p50': percentile([total for _, total in latencies], 0.5),
+        'total_p99': percentile([total for _, total in latencies], 0.99),
+    }
+
+def run(mode: str, platform: str, streams: int, chunks: int, ttft: float, interval: float, results) -> None:
+    """在单独的进程中运行一种方式（避免线程栈和内存统计互相影响）"""
+    from test_async_clients import FakeUpstream
+
+    upstream = FakeUpstream(chunks=chunks, interval=interval, first_chunk=ttft)
+    client = create_client(platform, upstream)
+    # 预热（导入、事件循环初始化）
+    asyncio.run(run_streams(mode, client, 1))
+    results.put(asyncio.run(run_streams(mode, client, streams)))
+
+def main():
+    parser = argparse.ArgumentParser(description='原生异步接口基准测试')
+    parser.add_argument('--streams', type=int, default=500, help='并发流式请求数')
+    parser.add_argument('--platform', choices=['qwen', 'baidu'], default='qwen', help='客户端')
+    parser.add_argument('--chunks', type=int, default=20, help='每个流的数据块数')
+    parser.add_argument('--ttft', type=float, default=0.3, help='首个数据块等待时间（秒）')
+    parser.add_argument('--interval', type=float, default=0.05, help='数据块间隔（秒）')
+    parser.add_argument('--default-executor', action='store_true', help='同时测试默认大小的线程池')
+    args = parser.parse_args()
+
+    ideal = args.ttft + args.interval * (args.chunks - 1)
+    print("🚀 原生异步接口基准测试")
+    print(f"客户端: {args.platform}  并发流: {args.streams}  数据块: {args.chunks}  "
+          f"首块等待: {args.ttft * 1000:.0f}ms  间隔: {args.interval * 1000:.0f}ms  理想耗时: {ideal:.2f}s")
+    print("-" * 96)
+    print(f"{'方式':<16} {'线程峰值':>8} {'RSS增量':>10} {'首块p50':>9} {'首块p99':>9} "
+          f"{'完成p50':>9} {'完成p99':>9} {'总耗时':>8}")
+
+    ctx = multiprocessing.get_context('spawn')
+    modes = [NATIVE, EXECUTOR] + ([DEFAULT_EXECUTOR] if args.default_executor else [])
+    for mode in modes:
+        results = ctx.Queue()
+        process = ctx.Process(target=run, args=(mode, args.platform, args.streams, args.chunks,
+                                                args.ttft, args.interval, results))
+        process.start()
+        stats = results.get()
+        process.join()
+        print(f"{mode:<16} {stats['threads']:>8} {stats['rss'] / 1024 / 1024:>8.1f}MB "
+              f"{stats['ttft_p50'] * 1000:>7.0f}ms {stats['ttft_p99'] * 1000:>7.0f}ms "
+              f"{stats['total_p50']:>8.2f}s {stats['total_p99']:>8.2f}s {stats['elapsed']:>7.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+通义千问调用方式延迟对比
+
+对同一个模型分别使用三种方式发送相同的流式和普通请求，对比延迟：
+- generation：DashScope SDK (Generation.call)
+- openai (sdk)：DashScope OpenAI兼容接口 + OpenAI SDK
+- openai (http)：DashScope OpenAI兼容接口 + 轻量HTTP传输（urllib3连接池）
+
+各方式轮流发送请求（避免上游负载变化只影响某一种方式），统计首个数据块延迟 (TTFT)、
+流式完成延迟和普通请求延迟的p50/p95；第一个请求包含建立连接的开销，单独列出。
+需要配置 QWEN_API_KEY，会产生少量token消耗。
+
+用法:
+    python tests/benchmark_qwen_api.py --requests 20 --model qwen-turbo
+"""
+import os
+import sys
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from platforms import QwenClient
+
+PROMPT = '用一句话介绍杭州'
+
+def percentile(values, p: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+def measure_stream(client: QwenClient, api: str, model: str, max_tokens: int):
+    """返回(首个数据块延迟, 完成延迟)，失败时返回None"""
+    start = time.perf_counter()
+    first = None
+    for chunk in client.chat_stream(PROMPT, model=model, max_tokens=max_tokens, api=api):
+        if not chunk['success']:
+            print(f"   ❌ {api}: {chunk.get('error')}")
+            return None
+        if first is None and chunk['content']:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+def measure_chat(client: QwenClient, api: str, model: str, max_tokens: int):
+    start = time.perf_counter()
+    result = client.chat(PROMPT, model=model, max_tokens=max_tokens, api=api)
+    if not result['success']:
+        print(f"   ❌ {api}: {result.get('error')}")
+        return None
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description='通义千问调用方式延迟对比')
+    parser.add_argument('--requests', type=int, default=20, help='每种方式的请求数')
+    parser.add_argument('--model', default=Config.DEFAULT_MODELS['qwen'], help='模型名称')
+    parser.add_argument('--max-tokens', type=int, default=64, help='最大输出token数')
+    args = parser.parse_args()
+
+    if not Config.QWEN_API_KEY:
+        print("❌ 未配置 QWEN_API_KEY，无法测试")
+        return
+
+    variants = {
+        'generation': (QwenClient(api='generation'), 'generation'),
+        'openai (sdk)': (QwenClient(api='openai', transport='sdk'), 'openai'),
+        'openai (http)': (QwenClient(api='openai', transport='http'), 'openai'),
+    }
+    stats = {name: {'cold': None, 'ttft': [], 'stream': [], 'chat': []} for name in variants}
+
+    print("🚀 通义千问调用方式延迟对比")
+    print(f"模型: {args.model}  每种方式请求数: {args.requests}  最大输出: {args.max_tokens} tokens")
+    print("-" * 80)
+
+    for index in range(args.requests + 1):
+        for name, (client, api) in variants.items():
+            stream = measure_stream(client, api, args.model, args.max_tokens)
+            chat = measure_chat(client, api, args.model, args.max_tokens)
+            if index == 0:
+                # 第一个请求包含建立连接（TLS握手）的开销
+                stats[name]['cold'] = stream
+                continue
+            if stream is not None and stream[0] is not None:
+                stats[name]['ttft'].append(stream[0])
+                stats[name]['stream'].append(stream[1])
+            if chat is not None:
+                stats[name]['chat'].append(chat)
+
+    print(f"{'方式':<14} {'首个请求':>9} {'TTFT p50':>9} {'TTFT p95':>9} {'流式p50':>9} {'流式p95':>9} "
+          f"{'普通p50':>9} {'普通p95':>9}")
+    for name, data in stats.items():
+        if not data['ttft'] or not data['chat']:
+            print(f"{name:<14} 没有成功的请求")
+            continue
+        cold = data['cold'][1] * 1000 if data['cold'] else float('nan')
+        print(f"{name:<14} {cold:>7.0f}ms "
+              f"{percentile(data['ttft'], 0.5) * 1000:>7.0f}ms {percentile(data['ttft'], 0.95) * 1000:>7.0f}ms "
+              f"{percentile(data['stream'], 0.5) * 1000:>7.0f}ms {percentile(data['stream'], 0.95) * 1000:>7.0f}ms "
+              f"{percentile(data['chat'], 0.5) * 1000:>7.0f}ms {percentile(data['chat'], 0.95) * 1000:>7.0f}ms")
+
+if __name__ == "__main__":
+    main()
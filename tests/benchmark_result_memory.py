@@ -0,0 +1,96 @@
+"""
+聊天结果内存占用基准测试
+
+对比10000个结果驻留内存时的字节数：
+- 旧格式: 每个结果一个字典 + 嵌套usage字典 + raw_response (完整的SDK响应对象)
+- 新格式: ChatResult (__slots__) + Usage (__slots__)，默认不保留raw_response
+
+不需要API密钥，SDK响应对象由本地构造的响应数据生成。
+"""
+import os
+import sys
+import gc
+import tracemalloc
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai.types.chat import ChatCompletion
+from platforms.result import ChatResult, Usage
+
+RESULT_COUNT = 10000
+
+def make_response(i: int) -> ChatCompletion:
+    """构造一个与真实接口返回结构一致的SDK响应对象"""
+    return ChatCompletion.model_validate({
+        'id': f'chatcmpl-{i:08d}',
+        'object': 'chat.completion',
+        'created': 1700000000 + i,
+        'model': 'gpt-4o-2024-08-06',
+        'system_fingerprint': 'fp_0000000000',
+        'choices': [{
+            'index': 0,
+            'message': {'role': 'assistant', 'content': f'这是第{i}条回复，内容长度与普通问答相近。', 'refusal': None},
+            'logprobs': None,
+            'finish_reason': 'stop',
+        }],
+        'usage': {
+            'prompt_tokens': 20,
+            'completion_tokens': 30,
+            'total_tokens': 50,
+            'prompt_tokens_details': {'cached_tokens': 0, 'audio_tokens': 0},
+            'completion_tokens_details': {'reasoning_tokens': 0, 'audio_tokens': 0},
+        },
+    })
+
+def build_old(response: ChatCompletion) -> dict:
+    """旧格式结果 (与改造前的AIHubMixClient.chat一致)"""
+    return {
+        'success': True,
+        'content': response.choices[0].message.content or "",
+        'model': 'gpt-4o',
+        'usage': {
+            'prompt_tokens': response.usage.prompt_tokens,
+            'completion_tokens': response.usage.completion_tokens,
+            'total_tokens': response.usage.total_tokens
+        } if response.usage else None,
+        'raw_response': response
+    }
+
+def build_new(response: ChatCompletion) -> ChatResult:
+    """新格式结果 (默认不保留raw_response)"""
+    return ChatResult.ok(
+        response.choices[0].message.content or "",
+        'gpt-4o',
+        Usage.from_openai(response.usage)
+    )
+
+def measure(builder) -> int:
+    """返回RESULT_COUNT个结果驻留内存的字节数（不含已释放的临时对象）"""
+    gc.collect()
+    tracemalloc.start()
+    results = []
+    for i in range(RESULT_COUNT):
+        results.append(builder(make_response(i)))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del results
+    return current
+
+def main():
+    print("🧪 聊天结果内存占用基准测试")
+    print(f"📊 结果数量: {RESULT_COUNT}")
+    print("-" * 50)
+
+    old_bytes = measure(build_old)
+    new_bytes = measure(build_new)
+
+    print(f"旧格式 (dict + raw_response): {old_bytes / 1024 / 1024:8.2f} MB, "
+          f"每个结果 {old_bytes / RESULT_COUNT:7.0f} 字节")
+    print(f"新格式 (ChatResult):          {new_bytes / 1024 / 1024:8.2f} MB, "
+          f"每个结果 {new_bytes / RESULT_COUNT:7.0f} 字节")
+    print(f"\n📉 节省内存: {(1 - new_bytes / old_bytes) * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
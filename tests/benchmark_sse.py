@@ -0,0 +1,98 @@
+"""
+增量SSE解码基准测试
+
+用各平台流格式的录制样例（tests/test_sse.py）重复拼接成长流，按网络读取大小切分后，
+对比每个事件的CPU时间：
+- 只切分事件（不解析JSON）：逐行解析 与 SSEDecoder
+- 切分并解析JSON：逐行解析+json.loads（常见的简单实现）、SSEDecoder+json、
+  SSEDecoder+orjson（已安装orjson时）
+
+不需要API密钥。
+
+用法:
+    python tests/benchmark_sse.py --events 20000 --read-size 1024
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms.sse import DONE, SSEDecoder, orjson, _json_loads
+from test_sse import STREAMS
+
+def naive_parse(parts, loads):
+    """逐行解析：每次读取解码为字符串，按行切分，data行切片后解析"""
+    buffer = ''
+    events = 0
+    for part in parts:
+        buffer += part.decode('utf-8', 'ignore')
+        lines = buffer.split('\n')
+        buffer = lines.pop()
+        for line in lines:
+            line = line.rstrip('\r')
+            if line.startswith('data:'):
+                data = line[5:].strip()
+                if data != '[DONE]':
+                    if loads is not None:
+                        loads(data)
+                    events += 1
+    return events
+
+def decoder_parse(parts, loads):
+    decoder = SSEDecoder()
+    events = 0
+    for part in parts:
+        for _, data in decoder.feed(part):
+            if data != DONE:
+                if loads is not None:
+                    loads(data)
+                events += 1
+    return events
+
+def build_stream(body: bytes, events: int) -> bytes:
+    """把样例中的事件重复到约events个（去掉结尾的 [DONE]）"""
+    body = body.replace(b'data: [DONE]\r\n\r\n', b'').replace(b'data: [DONE]\n\n', b'')
+    per_body = max(body.count(b'data:'), 1)
+    return body * max(events // per_body, 1)
+
+def measure(parse, parts, loads, repeat: int):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        count = parse(parts, loads)
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / count
+
+def main():
+    parser = argparse.ArgumentParser(description='增量SSE解码基准测试')
+    parser.add_argument('--events', type=int, default=20000, help='每个平台的事件数')
+    parser.add_argument('--read-size', type=int, default=1024, help='每次读取的字节数')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最快）')
+    args = parser.parse_args()
+
+    parsers = [('逐行切分', naive_parse, None), ('SSEDecoder切分', decoder_parse, None),
+               ('逐行解析+json', naive_parse, json.loads), ('SSEDecoder+json', decoder_parse, _json_loads)]
+    if orjson is not None:
+        parsers.append(('SSEDecoder+orjson', decoder_parse, orjson.loads))
+
+    print("🚀 增量SSE解码基准测试")
+    print(f"每个平台事件数: ~{args.events}  每次读取: {args.read_size}字节"
+          f"{'' if orjson is not None else '  （未安装orjson）'}")
+    print("-" * 60)
+    print("单位: μs/事件")
+    print(f"{'平台':<10}" + ''.join(f"{name:>18}" for name, _, _ in parsers))
+
+    for platform, body in STREAMS.items():
+        stream = build_stream(body, args.events)
+        parts = [stream[i:i + args.read_size] for i in range(0, len(stream), args.read_size)]
+        costs = [measure(parse, parts, loads, args.repeat) for _, parse, loads in parsers]
+        row = ''.join(f"{cost * 1e6:>18.2f}" for cost in costs)
+        print(f"{platform:<10}{row}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+轻量HTTP传输基准测试
+
+对比OpenAI SDK与 transport='http' 的客户端CPU开销：
+- 流式请求：每个数据块的CPU时间（SDK为每个数据块构建pydantic对象）
+- 普通请求：每个请求的CPU时间
+
+上游为本地模拟的OpenAI兼容接口，运行在单独的进程中，统计的CPU时间只包含客户端。
+不需要API密钥。
+
+用法:
+    python tests/benchmark_transport.py --streams 50 --chunks 2000 --requests 500
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import OpenAIClient
+
+def serve(chunks: int, queue) -> None:
+    """模拟服务进程"""
+    server = MockOpenAIServer(chunks=chunks, chunk_interval=0).start()
+    queue.put(server.base_url)
+    server._thread.join()
+
+def measure(fn, count: int):
+    """执行count次，返回(每次的CPU时间, 每次的耗时)"""
+    fn()  # 预热
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.process_time() - cpu_start) / count, (time.perf_counter() - start) / count
+
+def main():
+    parser = argparse.ArgumentParser(description='轻量HTTP传输基准测试')
+    parser.add_argument('--streams', type=int, default=50, help='流式请求次数')
+    parser.add_argument('--chunks', type=int, default=2000, help='每个流式响应的数据块数')
+    parser.add_argument('--requests', type=int, default=500, help='普通请求次数')
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    server = ctx.Process(target=serve, args=(args.chunks, queue), daemon=True)
+    server.start()
+    base_url = queue.get(timeout=30)
+
+    print("🚀 轻量HTTP传输基准测试")
+    print(f"流式请求: {args.streams}次 x {args.chunks}个数据块  普通请求: {args.requests}次")
+    print("-" * 60)
+
+    try:
+        results = {}
+        for transport in ('sdk', 'http'):
+            client = OpenAIClient(api_key='test', base_url=base_url, transport=transport)
+
+            def stream_once():
+                for chunk in client.chat_stream('你好', model='mock-model'):
+                    if not chunk['success']:
+                        raise RuntimeError(chunk['error'])
+
+            def chat_once():
+                result = client.chat('你好', model='mock-model')
+                if not result['success']:
+                    raise RuntimeError(result['error'])
+
+            stream_cpu, stream_time = measure(stream_once, args.streams)
+            chat_cpu, chat_time = measure(chat_once, args.requests)
+            results[transport] = (stream_cpu / args.chunks, chat_cpu)
+            print(f"{transport:<5} 每个数据块CPU {stream_cpu / args.chunks * 1e6:7.2f}μs  "
+                  f"(每个流 {stream_time * 1000:.1f}ms)  "
+                  f"每个普通请求CPU {chat_cpu * 1000:6.3f}ms")
+
+        sdk, http = results['sdk'], results['http']
+        print("-" * 60)
+        print(f"HTTP传输: 每个数据块CPU时间为SDK的 {http[0] / sdk[0]:.0%}，"
+              f"每个普通请求CPU时间为SDK的 {http[1] / sdk[1]:.0%}")
+    finally:
+        server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+多进程执行模式基准测试
+
+对比相同并发下，请求在当前进程执行与分发到1/2/4/...个工作进程执行的吞吐量：
+- 上游为本地模拟的OpenAI兼容接口（多个服务进程监听同一端口，避免服务端成为瓶颈）
+- 响应较大（默认约2000个token），SDK的JSON解析和pydantic模型构建是主要的CPU开销
+- 当前进程执行时受GIL限制只能使用一个CPU核，工作进程数增加时吞吐量应随CPU核数增长
+
+不需要API密钥。
+
+用法:
+    python tests/benchmark_worker_pool.py --requests 2000 --concurrency 64
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+
+def serve(port: int, chunks: int, latency: float, ready) -> None:
+    """模拟服务进程"""
+    server = MockOpenAIServer(chunks=chunks, latency=latency, port=port, reuse_port=True).start()
+    ready.set()
+    server._thread.join()
+
+def start_servers(count: int, chunks: int, latency: float):
+    """启动count个监听同一端口的模拟服务进程，返回(base_url, 进程列表)"""
+    # 选择一个空闲端口（探测服务不接受连接，服务进程启动前关闭，避免连接分配到探测服务）
+    probe = MockOpenAIServer()
+    base_url = probe.base_url
+    port = int(base_url.rsplit(':', 1)[1].split('/')[0])
+    probe._httpd.server_close()
+    ctx = multiprocessing.get_context('spawn')
+    processes = []
+    for _ in range(count):
+        ready = ctx.Event()
+        process = ctx.Process(target=serve, args=(port, chunks, latency, ready), daemon=True)
+        process.start()
+        ready.wait(30)
+        processes.append(process)
+    return base_url, processes
+
+def run(processes: int, requests: int, concurrency: int) -> dict:
+    from platforms import AIModelManager
+
+    manager = AIModelManager(processes=processes, platforms=['openai'],
+                             threads_per_process=max(concurrency // max(processes, 1), 1))
+    try:
+        # 预热（建立连接、工作进程导入SDK）
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(lambda i: manager.chat('openai', f'warmup {i}', model='mock-model'),
+                              range(concurrency)))
+
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(lambda i: manager.chat('openai', f'请求{i}', model='mock-model'),
+                                        range(requests)))
+        elapsed = time.perf_counter() - start
+        parent_cpu = time.process_time() - cpu_start
+    finally:
+        manager.close()
+
+    failed = sum(1 for r in results if not r['success'])
+    return {'elapsed': elapsed, 'qps': requests / elapsed, 'failed': failed, 'parent_cpu': parent_cpu}
+
+def main():
+    cpu_count = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description='多进程执行模式基准测试')
+    parser.add_argument('--requests', type=int, default=1000, help='每轮请求数')
+    parser.add_argument('--concurrency', type=int, default=64, help='并发请求数')
+    parser.add_argument('--chunks', type=int, default=2000, help='每个响应的token数')
+    parser.add_argument('--latency', type=float, default=0.02, help='模拟上游延迟（秒）')
+    parser.add_argument('--servers', type=int, default=cpu_count, help='模拟服务进程数')
+    parser.add_argument('--processes', type=int, nargs='*',
+                        default=sorted({0, 1, 2, 4, cpu_count}), help='工作进程数列表，0为当前进程执行')
+    args = parser.parse_args()
+
+    print("🚀 多进程执行模式基准测试")
+    print(f"CPU核数: {cpu_count}  请求数: {args.requests}  并发: {args.concurrency}  "
+          f"响应token数: {args.chunks}  上游延迟: {args.latency * 1000:.0f}ms")
+    print("-" * 60)
+
+    base_url, servers = start_servers(args.servers, args.chunks, args.latency)
+    # 工作进程按配置创建客户端
+    os.environ['OPENAI_API_KEY'] = 'test'
+    os.environ['OPENAI_BASE_URL'] = base_url
+
+    baseline = None
+    try:
+        for processes in args.processes:
+            stats = run(processes, args.requests, args.concurrency)
+            baseline = baseline or stats['qps']
+            label = '当前进程' if processes == 0 else f'{processes}个工作进程'
+            print(f"{label:<10} {stats['qps']:>8.1f} 请求/秒  耗时 {stats['elapsed']:.2f}s  "
+                  f"父进程CPU {stats['parent_cpu']:.2f}s  加速比 {stats['qps'] / baseline:.2f}x"
+                  f"{'  失败 ' + str(stats['failed']) if stats['failed'] else ''}")
+    finally:
+        for server in servers:
+            server.terminate()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+查询各平台支持的模型列表
+
+通过模型目录(ModelCatalog)并发查询所有已配置平台，结果缓存到磁盘，
+缓存有效期内再次运行不会发起网络请求。
+"""
+import os
+import sys
+import time
+import argparse
+from dotenv import load_dotenv
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms.catalog import ModelCatalog, PLATFORMS
+from config.config import Config
+
+# 加载环境变量
+load_dotenv()
+
+# 按模型名称关键字分组
+MODEL_GROUPS = [
+    ('GPT模型', ('gpt',)),
+    ('o系列推理模型', ('o1', 'o3', 'o4')),
+    ('Claude模型', ('claude',)),
+    ('Gemini模型', ('gemini',)),
+    ('LLaMA模型', ('llama',)),
+    ('通义千问模型', ('qwen',)),
+    ('GLM模型', ('glm',)),
+    ('文心大模型', ('ernie',)),
+    ('Embedding模型', ('embedding', 'bge', 'ada')),
+    ('多模态/图像/语音模型', ('dall', 'whisper', 'cogview', 'cogvlm', 'vision', 'diffusion')),
+]
+
+def group_models(models):
+    """按模型名称关键字分组"""
+    groups = {}
+    for model in models:
+        name = model.lower()
+        category = '其他模型'
+        for group_name, keywords in MODEL_GROUPS:
+            if any(name.startswith(k) if k.startswith('o') else k in name for k in keywords):
+                category = group_name
+                break
+        groups.setdefault(category, []).append(model)
+    return groups
+
+def print_platform_models(catalog: ModelCatalog, platform: str):
+    """打印单个平台的模型列表"""
+    models = catalog.list_models(platform)
+
+    print(f"\n=== {platform.upper()} ===")
+    if not models:
+        print("❌ 没有模型数据（API密钥未配置或查询失败）")
+        return
+
+    source = "官方常用模型（无模型列表API）" if catalog.source(platform) == 'static' else "API查询"
+    print(f"✅ 共 {len(models)} 个模型，来源: {source}")
+
+    for category, model_list in group_models(models).items():
+        print(f"\n📂 {category} ({len(model_list)} 个):")
+        for i, model in enumerate(model_list, 1):
+            context_window = catalog.context_window(platform, model)
+            suffix = f" (context: {context_window})" if context_window else ""
+            print(f"  {i:2d}. {model}{suffix}")
+
+    print(f"\n🎯 当前默认模型: {Config.DEFAULT_MODELS[platform]}")
+
+def main():
+    parser = argparse.ArgumentParser(description='查询各平台支持的模型列表')
+    parser.add_argument('platforms', nargs='*', metavar='platform',
+                       help=f"要查询的平台 (默认全部): {', '.join(PLATFORMS)}")
+    parser.add_argument('-f', '--force', action='store_true',
+                       help='忽略缓存有效期，强制重新查询')
+
+    args = parser.parse_args()
+    platforms = args.platforms or list(PLATFORMS)
+    unknown = [p for p in platforms if p not in PLATFORMS]
+    if unknown:
+        parser.error(f"不支持的平台: {', '.join(unknown)}")
+
+    print("🔍 查询各平台支持的模型列表")
+    print("=" * 60)
+
+    catalog = ModelCatalog(platforms=platforms)
+
+    start_time = time.time()
+    results = catalog.refresh(force=args.force)
+    end_time = time.time()
+
+    if results:
+        print(f"📡 已刷新 {len(results)} 个平台，用时 {end_time - start_time:.2f}s")
+    else:
+        print(f"💾 使用缓存: {catalog.cache_path}")
+
+    for platform in platforms:
+        print_platform_models(catalog, platform)
+
+    print(f"\n💡 建议测试:")
+    print("python tests/test_single_platform.py <platform> -m \"你好\"")
+
+if __name__ == "__main__":
+    main()
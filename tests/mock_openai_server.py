@@ -0,0 +1,226 @@
+"""
+本地模拟的OpenAI兼容接口
+
+供测试和基准脚本使用，不需要API密钥：
+- POST .../chat/completions：普通响应或SSE流式响应（OpenAI、AIHubMix、Azure、智谱的路径都以此结尾）
+- 流式响应按固定间隔发送数据块，并记录客户端断开连接的时间
+- GET .../models：模型列表，带ETag，If-None-Match匹配时返回304
+
+用法:
+    with MockOpenAIServer(chunks=100, chunk_interval=0.01) as server:
+        client = OpenAIClient(api_key='test', base_url=server.base_url)
+"""
+import json
+import select
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        server: 'MockOpenAIServer' = self.server.mock
+        length = int(self.headers.get('Content-Length') or 0)
+        body = json.loads(self.rfile.read(length) or b'{}')
+        server.requests.append(body)
+
+        if not self.path.split('?')[0].endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': 'not found', 'code': 'not_found'}})
+            return
+        if server.status != 200:
+            self._send_json(server.status, {'error': {'message': 'mock error', 'code': str(server.status)}})
+            return
+
+        time.sleep(server.latency)
+        model = body.get('model', 'mock-model')
+        if body.get('stream'):
+            self._stream(server, model, body)
+        else:
+            content = ''.join(server.token(i) for i in range(server.chunks))
+            self._send_json(200, {
+                'id': 'chatcmpl-mock',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': server.usage(),
+            })
+
+    def do_GET(self):
+        server: 'MockOpenAIServer' = self.server.mock
+        server.model_requests.append(dict(self.headers))
+        time.sleep(server.latency)
+        if not self.path.split('?')[0].endswith('/models'):
+            self._send_json(404, {'error': {'message': 'not found', 'code': 'not_found'}})
+            return
+        if server.status != 200:
+            self._send_json(server.status, {'error': {'message': 'mock error', 'code': str(server.status)}})
+            return
+        if self.headers.get('If-None-Match') == server.models_etag:
+            self.send_response(304)
+            self.send_header('ETag', server.models_etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = json.dumps({'object': 'list', 'data': server.models}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('ETag', server.models_etag)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_json(self, status: int, data: dict):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        try:
+            self.wfile.write(payload)
+        except (BrokenPipeError, ConnectionResetError):
+            # 客户端已超时断开
+            pass
+
+    def _stream(self, server: 'MockOpenAIServer', model: str, body: dict):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+
+        include_usage = (body.get('stream_options') or {}).get('include_usage')
+        try:
+            for i in range(server.chunks):
+                self._event({
+                    'id': 'chatcmpl-mock',
+                    'object': 'chat.completion.chunk',
+                    'model': model,
+                    'choices': [{'index': 0, 'delta': {'content': server.token(i)}, 'finish_reason': None}],
+                })
+                if self._client_closed(server.chunk_interval):
+                    server.record_disconnect(i + 1)
+                    return
+            if include_usage:
+                self._event({'id': 'chatcmpl-mock', 'object': 'chat.completion.chunk', 'model': model,
+                             'choices': [], 'usage': server.usage()})
+            self.wfile.write(b'data: [DONE]\n\n')
+            self.wfile.flush()
+            server.completed += 1
+        except (BrokenPipeError, ConnectionResetError):
+            server.record_disconnect(None)
+
+    def _event(self, data: dict):
+        self.wfile.write(b'data: ' + json.dumps(data).encode('utf-8') + b'\n\n')
+        self.wfile.flush()
+
+    def _client_closed(self, timeout: float) -> bool:
+        """等待下一个数据块的间隔，期间检测客户端是否已断开连接"""
+        readable, _, _ = select.select([self.connection], [], [], timeout)
+        if not readable:
+            return False
+        try:
+            return self.connection.recv(1, 0) == b''
+        except (ConnectionResetError, OSError):
+            return True
+
+
+class MockOpenAIServer:
+    """本地模拟的OpenAI兼容服务"""
+
+    def __init__(self, chunks: int = 20, chunk_interval: float = 0.01, latency: float = 0.0,
+                 status: int = 200, host: str = '127.0.0.1', port: int = 0, reuse_port: bool = False):
+        """
+        Args:
+            chunks: 每个响应的数据块数量
+            chunk_interval: 流式数据块之间的间隔（秒）
+            latency: 响应前的延迟（秒），模拟首字延迟
+            status: 响应状态码，非200时返回错误
+            reuse_port: 允许多个进程监听同一端口（基准测试中用多个进程模拟服务端）
+        """
+        self.chunks = chunks
+        self.chunk_interval = chunk_interval
+        self.latency = latency
+        self.status = status
+        self.requests: List[dict] = []
+        # GET /models 返回的模型列表、ETag和收到的请求头
+        self.models: List[dict] = [{'id': 'gpt-4o', 'object': 'model', 'context_window': 128000},
+                                   {'id': 'gpt-4o-mini', 'object': 'model'}]
+        self.models_etag = '"models-v1"'
+        self.model_requests: List[dict] = []
+        self.completed = 0
+        # (断开时间, 已发送的数据块数)
+        self.disconnects: List[tuple] = []
+        self._disconnected = threading.Condition()
+        self._httpd = ThreadingHTTPServer((host, port), _Handler, bind_and_activate=False)
+        if reuse_port:
+            self._httpd.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        self._httpd.server_bind()
+        self._httpd.server_activate()
+        self._httpd.daemon_threads = True
+        self._httpd.mock = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @staticmethod
+    def token(index: int) -> str:
+        return f"t{index} "
+
+    def usage(self) -> dict:
+        return {'prompt_tokens': 10, 'completion_tokens': self.chunks, 'total_tokens': 10 + self.chunks}
+
+    def record_disconnect(self, sent: Optional[int]) -> None:
+        with self._disconnected:
+            self.disconnects.append((time.monotonic(), sent))
+            self._disconnected.notify_all()
+
+    def wait_disconnect(self, count: int = 1, timeout: float = 5) -> bool:
+        """等待服务端检测到count次客户端断开"""
+        with self._disconnected:
+            return self._disconnected.wait_for(lambda: len(self.disconnects) >= count, timeout)
+
+    def start(self) -> 'MockOpenAIServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-openai', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> 'MockOpenAIServer':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地模拟的OpenAI兼容接口')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--chunks', type=int, default=20)
+    parser.add_argument('--interval', type=float, default=0.01)
+    parser.add_argument('--latency', type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.chunks, args.interval, args.latency, port=args.port).start()
+    print(f"🚀 模拟服务已启动: {server.base_url}")
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
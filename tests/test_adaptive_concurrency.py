@@ -0,0 +1,159 @@
+"""
+自适应并发控制测试脚本
+
+使用模拟的平台客户端测试，不需要API密钥：
+- 延迟平稳且名额被充分使用时上限增加，负载低时不增加
+- 延迟上升、限流时上限降低，同一批错误只降低一次
+- 超过上限的请求排队，到达截止时间时返回deadline_exceeded
+- AIModelManager按平台和模型统计上限，流式请求结束或被关闭时归还名额
+"""
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, ConcurrencyController
+from platforms.concurrency import AdaptiveLimit
+
+def run_round(limit: AdaptiveLimit, concurrency: int, latency: float, rounds: int = 20) -> None:
+    """模拟concurrency个并发请求完成rounds轮"""
+    for _ in range(rounds):
+        for _ in range(concurrency):
+            limit.acquire(0)
+        for _ in range(concurrency):
+            limit.release(latency)
+
+def test_limit():
+    checks = []
+
+    limit = AdaptiveLimit(initial=10)
+    run_round(limit, 10, 0.05)
+    checks.append(("延迟平稳、名额用满时上限增加", limit.limit > 10))
+
+    limit = AdaptiveLimit(initial=10)
+    run_round(limit, 1, 0.05)
+    checks.append(("负载低时上限不增加", limit.limit == 10))
+
+    limit = AdaptiveLimit(initial=20)
+    run_round(limit, 10, 0.05)
+    before = limit.limit
+    run_round(limit, 10, 0.2, rounds=3)
+    checks.append(("延迟上升时上限降低", limit.limit < before))
+
+    limit = AdaptiveLimit(initial=20, backoff=0.5)
+    for _ in range(3):
+        limit.acquire(0)
+    limit.release(overloaded=True)
+    limit.release(overloaded=True)
+    limit.release(overloaded=True)
+    checks.append(("限流时上限乘以backoff，同一批错误只降低一次", limit.limit == 10 and limit.drops == 3))
+
+    limit = AdaptiveLimit(initial=3, min_limit=2, max_limit=4, backoff=0.1)
+    limit.acquire(0)
+    limit.release(overloaded=True)
+    low = limit.limit
+    run_round(limit, 4, 0.05, rounds=50)
+    checks.append(("上限在min_limit和max_limit之间", low == 2 and limit.limit == 4))
+
+    limit = AdaptiveLimit(initial=1)
+    limit.acquire()
+    start = time.monotonic()
+    timed_out = not limit.acquire(0.1)
+    waited = time.monotonic() - start
+    threading.Timer(0.05, limit.release, args=(0.05,)).start()
+    woken = limit.acquire(2)
+    checks.append(("超过上限时等待，超时返回False，归还后被唤醒",
+                   timed_out and 0.09 <= waited < 0.5 and woken))
+    return checks
+
+class MockClient:
+    """模拟平台客户端：返回预设的结果，可以阻塞直到released被设置"""
+
+    def __init__(self):
+        self.error_type = None
+        self.released = threading.Event()
+        self.released.set()
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        self.released.wait(5)
+        if self.error_type:
+            return ChatResult.fail('mock error', self.error_type, self.error_type)
+        return ChatResult.ok(message, model)
+
+    def chat_stream(self, message, model=None, deadline=None, **kwargs):
+        for i in range(5):
+            time.sleep(0.01)
+            yield ChatResult.chunk(f"{i}", model)
+
+def create_manager(**options):
+    manager = AIModelManager(processes=0, adaptive_concurrency=ConcurrencyController(**options))
+    client = manager.clients['mock'] = MockClient()
+    return manager, client
+
+def test_manager():
+    checks = []
+
+    manager, client = create_manager(initial=8)
+    for _ in range(5):
+        manager.chat('mock', '你好', model='model-a')
+    stats = manager.concurrency_report().get('mock:model-a', {})
+    checks.append(("成功请求记录延迟样本，名额已归还", stats.get('samples') == 5 and stats.get('inflight') == 0))
+
+    client.error_type = 'rate_limited'
+    manager.chat('mock', '你好', model='model-a')
+    stats = manager.concurrency_report()['mock:model-a']
+    checks.append(("限流结果降低上限", stats['limit'] == 6 and stats['drops'] == 1))
+
+    manager, client = create_manager(initial=8)
+    client.error_type = 'deadline_exceeded'
+    manager.chat('mock', '你好', model='model-a')
+    stats = manager.concurrency_report()['mock:model-a']
+    checks.append(("截止时间到期不视为上游过载", stats['limit'] == 8 and stats['drops'] == 0))
+
+    manager, client = create_manager(initial=1)
+    client.released.clear()
+    blocker = threading.Thread(target=manager.chat, args=('mock', '你好'), kwargs={'model': 'model-a'})
+    blocker.start()
+    time.sleep(0.05)
+    result = manager.chat('mock', '你好', model='model-a', timeout=0.1)
+    other = manager.chat('mock', '你好', model='model-b', timeout=0.1)
+    client.released.set()
+    blocker.join()
+    checks.append(("名额用完时排队，到达截止时间返回deadline_exceeded",
+                   result['code'] == 'deadline_exceeded' and other['success']))
+
+    manager, client = create_manager(initial=4)
+    chunks = list(manager.chat_stream('mock', '你好', model='model-a'))
+    stats = manager.concurrency_report()['mock:model-a']
+    checks.append(("流式请求以首个数据块等待时间为延迟样本",
+                   len(chunks) == 5 and stats['samples'] == 1 and stats['rtt'] < 0.04))
+
+    stream = manager.chat_stream('mock', '你好', model='model-a')
+    next(stream)
+    inflight = manager.concurrency_report()['mock:model-a']['inflight']
+    stream.close()
+    stats = manager.concurrency_report()['mock:model-a']
+    checks.append(("流被提前关闭时归还名额", inflight == 1 and stats['inflight'] == 0))
+
+    checks.append(("未开启时没有并发统计",
+                   AIModelManager(processes=0, adaptive_concurrency=False).concurrency_report() == {}))
+    return checks
+
+def main():
+    print("🧪 自适应并发控制测试")
+    print("-" * 50)
+
+    checks = test_limit() + test_manager()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,147 @@
+"""
+准入控制与过载保护测试脚本
+
+使用模拟的平台客户端测试，不需要API密钥：
+- 排队已满时立即拒绝，排队数不超过上限
+- 超过最长排队时间时返回overloaded，请求自身到期时仍为deadline_exceeded
+- 预计排队时间超过请求剩余时间时立即拒绝
+- 排队深度与拒绝次数统计
+"""
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, AdmissionController, ChatResult, FairScheduler, Overloaded
+
+class MockClient:
+    """模拟平台客户端：每个请求耗时latency秒"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.calls = 0
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        return ChatResult.ok(message, model)
+
+    def chat_stream(self, message, model=None, deadline=None, **kwargs):
+        self.calls += 1
+        time.sleep(self.latency)
+        yield ChatResult.chunk(message, model)
+
+def create_manager(latency: float, capacity: int = 1, **admission_options):
+    manager = AIModelManager(processes=0, adaptive_concurrency=False,
+                             scheduler=FairScheduler(capacity=capacity),
+                             admission=AdmissionController(**admission_options))
+    client = manager.clients['mock'] = MockClient(latency)
+    return manager, client
+
+def start_background(manager, count: int):
+    threads = [threading.Thread(target=manager.chat, args=('mock', '你好'), kwargs={'model': 'mock-model'})
+               for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+def test_admission():
+    checks = []
+
+    admission = AdmissionController(max_queue=2)
+    admission.enter('key')
+    admission.enter('key')
+    try:
+        admission.enter('key')
+        rejected = None
+    except Overloaded as e:
+        rejected = e
+    checks.append(("排队已满时立即拒绝",
+                   rejected is not None and rejected.reason == 'queue_full'
+                   and admission.report()['key']['shed']['queue_full'] == 1))
+
+    manager, client = create_manager(0.05, capacity=2, max_queue=20, max_queue_time=None)
+    depths = []
+    results = []
+    lock = threading.Lock()
+
+    def worker():
+        result = manager.chat('mock', '你好', model='mock-model')
+        with lock:
+            results.append(result)
+            depths.append(manager.admission_report()['mock:mock-model']['queue_depth'])
+
+    threads = [threading.Thread(target=worker) for _ in range(100)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    report = manager.admission_report()['mock:mock-model']
+    shed = sum(1 for r in results if r.get('error_type') == 'overloaded')
+    checks.append((f"排队数不超过上限（最大{max(depths)}），超出的请求被拒绝（{shed}个）",
+                   max(depths) <= 20 and shed > 0 and report['shed']['queue_full'] == shed
+                   and report['admitted'] == client.calls == 100 - shed))
+
+    manager, _ = create_manager(0.5, max_queue_time=0.1)
+    blockers = start_background(manager, 1)
+    time.sleep(0.05)
+    start = time.monotonic()
+    result = manager.chat('mock', '你好', model='mock-model')
+    waited = time.monotonic() - start
+    checks.append(("超过最长排队时间返回overloaded",
+                   result['error_type'] == 'overloaded' and result['code'] == 'overloaded'
+                   and result.get('retry_after') == 0.1 and 0.09 <= waited < 0.3))
+
+    result = manager.chat('mock', '你好', model='mock-model', timeout=0.05)
+    chunks = list(manager.chat_stream('mock', '你好', model='mock-model', timeout=0.05))
+    checks.append(("请求自身先到期时返回deadline_exceeded",
+                   result['code'] == 'deadline_exceeded' and chunks[-1]['code'] == 'deadline_exceeded'))
+    for thread in blockers:
+        thread.join()
+
+    # 每个请求50ms、名额1个：排队8个请求时预计等待约0.4秒
+    manager, _ = create_manager(0.05, max_queue_time=None)
+    blockers = start_background(manager, 12)
+    time.sleep(0.15)
+    start = time.monotonic()
+    result = manager.chat('mock', '你好', model='mock-model', timeout=0.1)
+    chunks = list(manager.chat_stream('mock', '你好', model='mock-model', timeout=0.1))
+    elapsed = time.monotonic() - start
+    report = manager.admission_report()['mock:mock-model']
+    checks.append(("预计无法在截止时间内开始时立即拒绝",
+                   result['error_type'] == 'overloaded' and chunks[-1]['error_type'] == 'overloaded'
+                   and elapsed < 0.05 and report['shed']['deadline'] == 2 and report['estimated_wait'] > 0.1))
+    for thread in blockers:
+        thread.join()
+
+    result = manager.chat('mock', '你好', model='mock-model', timeout=1)
+    checks.append(("排队清空后正常接受请求", result['success']))
+
+    try:
+        ChatResult.from_exception(Overloaded(retry_after=1.5)).raise_for_error()
+        checks.append(("overloaded结果可转换回Overloaded异常", False))
+    except Overloaded as e:
+        checks.append(("overloaded结果可转换回Overloaded异常", e.retryable and e.retry_after == 1.5))
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=True)
+    checks.append(("只开启准入控制时按固定名额数排队", manager.scheduler is not None))
+    return checks
+
+def main():
+    print("🧪 准入控制与过载保护测试")
+    print("-" * 50)
+
+    checks = test_admission()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
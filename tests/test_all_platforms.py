@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from platforms import AIModelManager
+from platforms import AIModelManager, collect_stream
 
 # 加载环境变量
 load_dotenv()
@@ -83,36 +83,34 @@ def test_platform_stream(platform: str, manager: AIModelManager) -> Dict[str, An
     test_message = "请用一句话介绍Python编程语言。"
     
     try:
-        start_time = time.time()
-        full_content = ""
-        chunk_count = 0
-        
         print("流式输出: ", end="")
-        for chunk in manager.chat_stream(platform, test_message, max_tokens=50):
-            if chunk['success']:
-                content = chunk['content']
-                print(content, end="", flush=True)
-                full_content += content
-                chunk_count += 1
-            else:
-                print(f"\n❌ 流式输出错误: {chunk['error']}")
-                return {
-                    'platform': platform,
-                    'success': False,
-                    'error': chunk['error']
-                }
+        result = collect_stream(
+            manager.chat_stream(platform, test_message, max_tokens=50),
+            on_content=lambda content: print(content, end="", flush=True)
+        )
+        
+        if not result['success']:
+            print(f"\n❌ 流式输出错误: {result['error']}")
+            return {
+                'platform': platform,
+                'success': False,
+                'error': result['error']
+            }
         
-        end_time = time.time()
         print(f"\n✅ {platform} 流式测试成功")
-        print(f"响应时间: {end_time - start_time:.2f}s")
-        print(f"总块数: {chunk_count}")
+        print(f"响应时间: {result['elapsed']:.2f}s")
+        if result['ttft'] is not None:
+            print(f"首字延迟: {result['ttft']:.2f}s")
+        print(f"总块数: {result['chunk_count']}")
+        if result.get('usage'):
+            print(f"Token使用: {result['usage']}")
         
         return {
             'platform': platform,
             'success': True,
-            'response_time': end_time - start_time,
-            'chunk_count': chunk_count,
-            'content_length': len(full_content)
+            'response_time': result['elapsed'],
+            'chunk_count': result['chunk_count'],
+            'content_length': len(result['content'])
         }
     
     except Exception as e:
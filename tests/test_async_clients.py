@@ -0,0 +1,255 @@
+"""
+原生异步接口测试脚本
+
+使用与DashScope (AioGeneration.call) 和千帆 (ChatCompletion.ado) 结构相同的模拟异步SDK测试，
+不需要API密钥：
+- 通义千问、百度千帆的 achat / achat_stream 返回与同步接口相同的结果
+- 截止时间、idle_timeout、CancelToken 和关闭生成器都会关闭上游的异步流
+- 并发的异步流式请求不创建线程
+- AIModelManager.achat / achat_stream 优先使用原生异步接口，其他客户端在线程池中调用
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import dashscope
+from platforms import AIModelManager, BaiduClient, CancelToken, ChatResult, FairScheduler, QwenClient
+
+USAGE = {'input_tokens': 12, 'output_tokens': 5, 'total_tokens': 17}
+
+class FakeUpstream:
+    """模拟的上游：每个数据块间隔interval秒，记录打开和关闭的流"""
+
+    def __init__(self, chunks: int = 5, interval: float = 0.01, first_chunk: float = None):
+        self.chunks = chunks
+        self.interval = interval
+        self.first_chunk = interval if first_chunk is None else first_chunk
+        self.calls = []
+        self.opened = 0
+        self.closed = 0
+
+    async def stream(self, make_chunk):
+        self.opened += 1
+        try:
+            for index in range(self.chunks):
+                await asyncio.sleep(self.first_chunk if index == 0 else self.interval)
+                yield make_chunk(index, index == self.chunks - 1)
+        finally:
+            self.closed += 1
+
+    def sync_stream(self, make_chunk):
+        """同步SDK的流（线程池方式的对照）"""
+        self.opened += 1
+        try:
+            for index in range(self.chunks):
+                time.sleep(self.first_chunk if index == 0 else self.interval)
+                yield make_chunk(index, index == self.chunks - 1)
+        finally:
+            self.closed += 1
+
+def dashscope_chunk(index: int, last: bool):
+    return SimpleNamespace(status_code=200, usage=USAGE,
+                           output=SimpleNamespace(text=f"块{index}", finish_reason='stop' if last else 'null'))
+
+def qianfan_chunk(index: int, last: bool):
+    return {'result': f"块{index}", 'is_end': last, 'usage': {'prompt_tokens': 12, 'completion_tokens': 5}}
+
+def install_fake_dashscope(upstream: FakeUpstream) -> None:
+    """替换AioGeneration.call和Generation.call"""
+
+    async def aio_call(model, prompt, stream=False, **kwargs):
+        upstream.calls.append(dict(kwargs, model=model, prompt=prompt, stream=stream))
+        if stream:
+            return upstream.stream(dashscope_chunk)
+        await asyncio.sleep(upstream.first_chunk)
+        if prompt == 'error':
+            return SimpleNamespace(status_code=400, code='InvalidParameter', message='参数错误')
+        return SimpleNamespace(status_code=200, usage=USAGE, output=SimpleNamespace(text=f"回复: {prompt}"))
+
+    def call(model, prompt, stream=False, **kwargs):
+        upstream.calls.append(dict(kwargs, model=model, prompt=prompt, stream=stream))
+        return upstream.sync_stream(dashscope_chunk)
+
+    dashscope.AioGeneration = SimpleNamespace(call=aio_call)
+    dashscope.Generation.call = staticmethod(call)
+
+def create_baidu(upstream: FakeUpstream) -> BaiduClient:
+    """千帆客户端，chat_comp替换为模拟的ChatCompletion（不获取access_token）"""
+
+    async def ado(model, messages, stream=False, **kwargs):
+        upstream.calls.append(dict(kwargs, model=model, messages=messages, stream=stream))
+        if stream:
+            return upstream.stream(qianfan_chunk)
+        await asyncio.sleep(upstream.first_chunk)
+        if messages[-1]['content'] == 'error':
+            return {'error_code': 336003, 'error_msg': '参数错误'}
+        return {'result': f"回复: {messages[-1]['content']}", 'usage': {'prompt_tokens': 12, 'completion_tokens': 5}}
+
+    def do(model, messages, stream=False, **kwargs):
+        upstream.calls.append(dict(kwargs, model=model, messages=messages, stream=stream))
+        return upstream.sync_stream(qianfan_chunk)
+
+    no_token = SimpleNamespace(start=lambda: None, peek=lambda: None, invalidate=lambda token: None)
+    client = BaiduClient(api_key='test', secret_key='test', token_provider=no_token)
+    client.chat_comp = SimpleNamespace(ado=ado, do=do)
+    return client
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+async def read_then_close(stream, count: int):
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        if len(chunks) == count:
+            break
+    await stream.aclose()
+    return chunks
+
+async def cancel_from_thread(client, upstream: FakeUpstream):
+    """读取一个数据块后在其他线程取消"""
+    cancel = CancelToken()
+    chunks = []
+    async for chunk in client.achat_stream('你好', cancel=cancel):
+        chunks.append(chunk)
+        if len(chunks) == 1:
+            threading.Thread(target=cancel.cancel).start()
+    return chunks
+
+async def test_client(name: str, client, upstream: FakeUpstream):
+    checks = []
+
+    result = await client.achat('你好', model='test-model')
+    checks.append((f"{name}: achat返回结果和usage",
+                   isinstance(result, ChatResult) and result['success'] and result['content'] == '回复: 你好'
+                   and result['usage']['prompt_tokens'] == 12 and upstream.calls[-1]['stream'] is False))
+
+    result = await client.achat('error')
+    checks.append((f"{name}: 平台错误返回失败结果", not result['success'] and result['code'] is not None))
+
+    chunks = await collect(client.achat_stream('你好', model='test-model', timeout=5))
+    checks.append((f"{name}: achat_stream逐块返回，最后一个数据块带usage",
+                   ''.join(c['content'] for c in chunks) == '块0块1块2块3块4'
+                   and chunks[-1]['usage'] is not None and all(c['success'] for c in chunks)
+                   and upstream.calls[-1]['stream'] is True and 'request_timeout' in upstream.calls[-1]))
+
+    upstream.first_chunk = 1.0
+    start = time.monotonic()
+    result = await client.achat('你好', timeout=0.1)
+    chunks = await collect(client.achat_stream('你好', timeout=0.1))
+    elapsed = time.monotonic() - start
+    upstream.first_chunk = upstream.interval
+    checks.append((f"{name}: 到达截止时间时返回deadline_exceeded（{elapsed * 1000:.0f}ms）",
+                   result['code'] == 'deadline_exceeded' and chunks[-1]['code'] == 'deadline_exceeded'
+                   and elapsed < 0.4 and upstream.opened == upstream.closed))
+
+    upstream.interval = 0.5
+    chunks = await collect(client.achat_stream('你好', idle_timeout=0.1))
+    upstream.interval = 0.01
+    checks.append((f"{name}: 数据块间隔超过idle_timeout时返回timeout",
+                   len(chunks) == 2 and chunks[-1]['error_type'] == 'timeout'
+                   and upstream.opened == upstream.closed))
+
+    chunks = await read_then_close(client.achat_stream('你好'), 2)
+    checks.append((f"{name}: 关闭生成器时关闭上游流", len(chunks) == 2 and upstream.opened == upstream.closed))
+
+    upstream.interval = 0.2
+    chunks = await cancel_from_thread(client, upstream)
+    upstream.interval = 0.01
+    checks.append((f"{name}: 在其他线程取消时关闭上游流",
+                   chunks[-1]['code'] == 'cancelled' and upstream.opened == upstream.closed))
+    return checks
+
+async def test_no_threads():
+    upstream = FakeUpstream(chunks=10, interval=0.01)
+    install_fake_dashscope(upstream)
+    client = QwenClient(api_key='test')
+    before = threading.active_count()
+    peak = before
+
+    async def sample():
+        nonlocal peak
+        while upstream.closed < 200:
+            peak = max(peak, threading.active_count())
+            await asyncio.sleep(0.01)
+
+    sampler = asyncio.ensure_future(sample())
+    results = await asyncio.gather(*[collect(client.achat_stream('你好')) for _ in range(200)])
+    await sampler
+    return [("200个并发的异步流式请求不创建线程",
+             peak == before and all(len(chunks) == 10 and chunks[-1]['usage'] for chunks in results))]
+
+class SyncOnlyClient:
+    """只有同步接口的客户端"""
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        return ChatResult.ok(f"同步: {message}", model)
+
+    def chat_stream(self, message, model=None, deadline=None, **kwargs):
+        for index in range(3):
+            yield ChatResult.chunk(f"块{index}", model)
+
+async def test_manager():
+    checks = []
+    upstream = FakeUpstream(chunks=5, interval=0.01)
+    install_fake_dashscope(upstream)
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+    manager.clients['qwen'] = QwenClient(api_key='test')
+    manager.clients['sync'] = SyncOnlyClient()
+    before = threading.active_count()
+    result = await manager.achat('qwen', '你好')
+    chunks = await collect(manager.achat_stream('qwen', '你好'))
+    checks.append(("管理器的异步接口使用原生异步客户端",
+                   result['success'] and len(chunks) == 5 and threading.active_count() == before
+                   and manager.prefix_cache_report()['qwen']['requests'] == 2))
+
+    result = await manager.achat('sync', '你好')
+    chunks = await collect(manager.achat_stream('sync', '你好'))
+    checks.append(("只有同步接口的客户端在线程池中调用",
+                   result['content'] == '同步: 你好' and [c['content'] for c in chunks] == ['块0', '块1', '块2']))
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=True, scheduler=FairScheduler(capacity=2))
+    manager.clients['qwen'] = QwenClient(api_key='test')
+    results = await asyncio.gather(*[manager.achat('qwen', '你好', model='qwen-test') for _ in range(5)],
+                                   *[collect(manager.achat_stream('qwen', '你好', model='qwen-test'))
+                                     for _ in range(5)])
+    scheduler = manager.scheduler_report()['qwen:qwen-test']
+    concurrency = manager.concurrency_report()['qwen:qwen-test']
+    checks.append(("开启排队和自适应并发时按名额执行，名额均已归还",
+                   all(r['success'] for r in results[:5]) and all(c[-1]['success'] for c in results[5:])
+                   and sum(scheduler['granted'].values()) == 10 and scheduler['inflight'] == 0
+                   and concurrency['inflight'] == 0 and concurrency['samples'] == 10))
+    return checks
+
+async def run_tests():
+    upstream = FakeUpstream()
+    install_fake_dashscope(upstream)
+    checks = await test_client('通义千问', QwenClient(api_key='test'), upstream)
+    upstream = FakeUpstream()
+    checks += await test_client('百度千帆', create_baidu(upstream), upstream)
+    checks += await test_no_threads()
+    checks += await test_manager()
+    return checks
+
+def main():
+    print("🧪 原生异步接口测试")
+    print("-" * 50)
+
+    checks = asyncio.run(run_tests())
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
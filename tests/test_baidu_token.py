@@ -0,0 +1,179 @@
+"""
+百度千帆 access_token 缓存测试脚本
+
+使用本地模拟的OAuth接口测试，不需要API密钥：
+- 多个进程共享同一个缓存文件时只获取一次token
+- 后台线程在过期前刷新，请求路径上读取token不等待网络请求
+- token失效后重新获取
+"""
+import os
+import sys
+import json
+import stat
+import time
+import tempfile
+import threading
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AuthFailed
+from platforms.baidu import AccessTokenProvider
+
+class MockTokenServer:
+    """模拟千帆OAuth接口，记录获取次数，每次返回新的token"""
+
+    def __init__(self, expires_in: int = 2592000, latency: float = 0.1):
+        self.expires_in = expires_in
+        self.latency = latency
+        self.fetches = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                query = parse_qs(urlparse(self.path).query)
+                time.sleep(server.latency)
+                if query.get('client_secret') != ['secret']:
+                    body = {'error': 'invalid_client', 'error_description': 'unknown client id'}
+                else:
+                    with server._lock:
+                        server.fetches += 1
+                        number = server.fetches
+                    body = {'access_token': f'token-{number}', 'expires_in': server.expires_in}
+                data = json.dumps(body).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/oauth/2.0/token"
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+def worker_get_token(token_url: str, cache_path: str, queue) -> None:
+    """子进程：获取token并返回"""
+    provider = AccessTokenProvider('key', 'secret', cache_path=cache_path, token_url=token_url)
+    queue.put(provider.get_token())
+
+def test_processes_share_cache(server: MockTokenServer, cache_dir: str):
+    """多个进程同时获取，只调用一次OAuth接口"""
+    cache_path = os.path.join(cache_dir, 'shared.json')
+    before = server.fetches
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    processes = [ctx.Process(target=worker_get_token, args=(server.url, cache_path, queue)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    tokens = {queue.get(timeout=30) for _ in processes}
+    for process in processes:
+        process.join()
+
+    mode = stat.S_IMODE(os.stat(cache_path).st_mode)
+    with open(cache_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    return [
+        ("4个进程只获取一次token", server.fetches - before == 1 and len(tokens) == 1),
+        ("缓存文件权限为600", mode == 0o600),
+        ("缓存文件不包含密钥", 'secret' not in content and 'key' not in json.loads(content)),
+    ]
+
+def test_peek_is_fast(server: MockTokenServer):
+    """获取后读取token只访问内存"""
+    provider = AccessTokenProvider('key', 'secret', cache_path='', token_url=server.url)
+    provider.get_token()
+    start = time.perf_counter()
+    for _ in range(10000):
+        provider.peek()
+    per_call = (time.perf_counter() - start) / 10000
+    print(f"   peek平均耗时: {per_call * 1e6:.2f}μs")
+    return [("读取token不等待网络请求 (<50μs)", per_call < 50e-6)]
+
+def test_background_refresh(cache_dir: str):
+    """过期前后台刷新，期间peek始终有可用token"""
+    server = MockTokenServer(expires_in=2, latency=0.2)
+    try:
+        provider = AccessTokenProvider('key', 'secret', cache_path=os.path.join(cache_dir, 'refresh.json'),
+                                       refresh_before=1, token_url=server.url)
+        first = provider.get_token()
+        provider.start()
+        misses = 0
+        slowest = 0.0
+        deadline = time.time() + 1.8
+        while time.time() < deadline:
+            start = time.perf_counter()
+            if provider.peek() is None:
+                misses += 1
+            slowest = max(slowest, time.perf_counter() - start)
+            time.sleep(0.01)
+        current = provider.peek()
+        provider.stop()
+        print(f"   最慢一次peek: {slowest * 1000:.2f}ms")
+        return [
+            ("过期前已刷新token", current is not None and current != first and server.fetches == 2),
+            ("刷新期间始终有可用token", misses == 0),
+            ("刷新期间读取token不等待 (<5ms)", slowest < 0.005),
+        ]
+    finally:
+        server.stop()
+
+def test_invalidate(server: MockTokenServer):
+    """token失效后后台重新获取"""
+    provider = AccessTokenProvider('key', 'secret', cache_path='', token_url=server.url)
+    old = provider.get_token()
+    provider.invalidate(old)
+    missing = provider.peek() is None
+    deadline = time.time() + 3
+    while provider.peek() in (None, old) and time.time() < deadline:
+        time.sleep(0.01)
+    new = provider.peek()
+    provider.stop()
+    return [
+        ("失效后不再返回旧token", missing),
+        ("后台重新获取新token", new is not None and new != old),
+    ]
+
+def test_auth_failed(server: MockTokenServer):
+    provider = AccessTokenProvider('key', 'wrong', cache_path='', token_url=server.url)
+    try:
+        provider.get_token()
+        return [("密钥错误时抛出AuthFailed", False)]
+    except AuthFailed as e:
+        return [("密钥错误时抛出AuthFailed", e.code == 'invalid_client')]
+
+def main():
+    print("🧪 百度千帆access_token缓存测试")
+    print("-" * 50)
+
+    server = MockTokenServer()
+    checks = []
+    try:
+        with tempfile.TemporaryDirectory() as cache_dir:
+            checks += test_processes_share_cache(server, cache_dir)
+            checks += test_peek_is_fast(server)
+            checks += test_invalidate(server)
+            checks += test_auth_failed(server)
+            checks += test_background_refresh(cache_dir)
+    finally:
+        server.stop()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,203 @@
+"""
+离线批量任务执行器测试脚本
+
+使用模拟的管理器测试，不需要API密钥：
+- 正常运行：每行输入对应一行结果
+- 中断后重新运行：从检查点继续，检查点之后已写入的结果不重复调用，写了一半的行被截掉，
+  每行输入的结果只出现一次（包括在子进程中运行并强制结束的情况）
+- 检查点属于另一个输入文件时拒绝继续，不修改输出文件
+- 结果写入失败时归还在途名额，不会阻塞后续的行，重新运行时再处理
+"""
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import tempfile
+import threading
+import subprocess
+
+# 添加项目根目录到Python路径
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from platforms import ChatResult
+from platforms.batch_runner import BatchRunner
+
+LINES = 40
+
+class MockManager:
+    """模拟的AIModelManager：记录调用的消息，每次调用等待delay秒"""
+
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def chat(self, platform, message, **kwargs):
+        time.sleep(self.delay)
+        with self._lock:
+            self.messages.append(message)
+        return ChatResult.ok(f"echo: {message}", 'mock-model')
+
+class UnwritableManager(MockManager):
+    """返回无法序列化为JSON的结果（循环引用），使结果写入失败"""
+
+    def chat(self, platform, message, **kwargs):
+        super().chat(platform, message, **kwargs)
+        response = {'success': True, 'content': f"echo: {message}"}
+        response['self'] = response
+        return response
+
+def write_input(path, lines=LINES):
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            f.write(json.dumps({'id': i, 'message': f"问题{i}"}, ensure_ascii=False) + '\n')
+
+def read_output(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def run(input_path, output_path, manager):
+    runner = BatchRunner(manager=manager, platform='mock', concurrency=4, progress_interval=0)
+    return runner.run(input_path, output_path)
+
+def exactly_once(records, lines=LINES):
+    indexes = sorted(record['line'] for record in records)
+    return indexes == list(range(lines)) and all(record['content'] == f"echo: 问题{record['line']}"
+                                                 for record in records)
+
+# 在子进程中运行的批量任务：每次调用较慢，频繁写入检查点，运行中被强制结束
+CHILD = '''
+import sys, time
+sys.path.insert(0, {root!r})
+from platforms import ChatResult
+from platforms.batch_runner import BatchRunner
+
+class SlowManager:
+    def chat(self, platform, message, **kwargs):
+        time.sleep(0.02)
+        return ChatResult.ok("echo: " + message, 'mock-model')
+
+BatchRunner(manager=SlowManager(), platform='mock', concurrency=4, checkpoint_interval=0.05,
+            progress_interval=0).run({input!r}, {output!r})
+'''
+
+def test_resume(tmp):
+    checks = []
+    input_path = os.path.join(tmp, 'prompts.jsonl')
+    write_input(input_path)
+
+    output_path = os.path.join(tmp, 'results.jsonl')
+    manager = MockManager()
+    stats = run(input_path, output_path, manager)
+    checks.append(("正常运行：每行输入对应一行结果",
+                   exactly_once(read_output(output_path)) and stats['succeeded'] == LINES
+                   and os.path.exists(output_path + '.ckpt')))
+
+    stats = run(input_path, output_path, manager)
+    checks.append(("已完成的任务重新运行时不再调用", stats['skipped'] == LINES and len(manager.messages) == LINES))
+
+    # 构造中断时的状态：检查点记录到第4行，之后又写入了第6、4、5行的结果和写了一半的一行
+    output_path = os.path.join(tmp, 'crashed.jsonl')
+    records = [{'line': i, 'success': True, 'content': f"echo: 问题{i}"} for i in (0, 1, 3, 2, 6, 4, 5)]
+    with open(output_path, 'w', encoding='utf-8') as f:
+        for record in records[:4]:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        offset = f.tell()
+        for record in records[4:]:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        f.write('{"line": 7, "success": tr')
+    with open(output_path + '.ckpt', 'w', encoding='utf-8') as f:
+        json.dump({'input': os.path.abspath(input_path), 'watermark': 4, 'done_above': [],
+                   'output_offset': offset}, f)
+
+    manager = MockManager()
+    stats = run(input_path, output_path, manager)
+    called = sorted(int(message[2:]) for message in manager.messages)
+    checks.append(("从检查点继续，检查点之后已写入的结果不重复调用",
+                   called == list(range(7, LINES)) and stats['skipped'] == 7))
+    checks.append(("写了一半的行被截掉，每行输入的结果只出现一次", exactly_once(read_output(output_path))))
+
+    output_path = os.path.join(tmp, 'killed.jsonl')
+    script = CHILD.format(root=ROOT, input=input_path, output=output_path)
+    child = subprocess.Popen([sys.executable, '-c', script])
+    deadline = time.time() + 10
+    while time.time() < deadline and (not os.path.exists(output_path) or os.path.getsize(output_path) < 500):
+        time.sleep(0.01)
+    os.kill(child.pid, signal.SIGKILL)
+    child.wait()
+    with open(output_path, 'rb') as f:
+        partial = f.read().count(b'\n')
+
+    manager = MockManager()
+    stats = run(input_path, output_path, manager)
+    checks.append((f"强制结束后重新运行（已完成{partial}行）：每行输入的结果只出现一次",
+                   0 < partial < LINES and exactly_once(read_output(output_path))
+                   and len(manager.messages) + stats['skipped'] == LINES))
+    return checks
+
+def test_other_input(tmp):
+    checks = []
+    input_path = os.path.join(tmp, 'prompts.jsonl')
+    other_path = os.path.join(tmp, 'other.jsonl')
+    write_input(other_path, lines=5)
+    output_path = os.path.join(tmp, 'results.jsonl')
+    with open(output_path, 'rb') as f:
+        before = f.read()
+
+    manager = MockManager()
+    try:
+        run(other_path, output_path, manager)
+        refused = False
+    except ValueError:
+        refused = True
+    with open(output_path, 'rb') as f:
+        after = f.read()
+    checks.append(("检查点属于另一个输入文件时拒绝继续，不修改输出文件",
+                   refused and before == after and not manager.messages))
+    return checks
+
+def test_write_failure(tmp):
+    checks = []
+    input_path = os.path.join(tmp, 'prompts.jsonl')
+    output_path = os.path.join(tmp, 'unwritable.jsonl')
+    manager = UnwritableManager()
+    stats = {}
+
+    # 写入失败的异常由ThreadPoolExecutor记录日志，测试中不输出
+    logger = logging.getLogger('concurrent.futures')
+    level = logger.level
+    logger.setLevel(logging.CRITICAL)
+    try:
+        thread = threading.Thread(target=lambda: stats.update(run(input_path, output_path, manager)), daemon=True)
+        thread.start()
+        thread.join(10)
+    finally:
+        logger.setLevel(level)
+    checks.append(("结果写入失败时归还在途名额，不会阻塞后续的行",
+                   not thread.is_alive() and len(manager.messages) == LINES and stats.get('succeeded') == 0))
+
+    manager = MockManager()
+    stats = run(input_path, output_path, manager)
+    checks.append(("写入失败的行重新运行时再处理",
+                   stats['skipped'] == 0 and len(manager.messages) == LINES and exactly_once(read_output(output_path))))
+    return checks
+
+def main():
+    print("🧪 离线批量任务执行器测试")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        checks = test_resume(tmp) + test_other_input(tmp) + test_write_failure(tmp)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,144 @@
+"""
+流式请求取消测试脚本
+
+使用本地模拟的OpenAI兼容接口测试六个客户端（以及HTTP传输）的流式请求取消，不需要API密钥：
+- 关闭 chat_stream 生成器 (generator.close())
+- 在其他线程调用 CancelToken.cancel()
+两种方式都应在几毫秒内关闭上游HTTP连接（以模拟服务检测到客户端断开的时间为准）。
+
+通义千问和百度千帆的SDK不支持自定义OpenAI格式的端点，使用与SDK相同结构的
+"基于流式HTTP响应的生成器"代替SDK调用。
+"""
+import os
+import sys
+import json
+import time
+import threading
+import http.client
+from types import SimpleNamespace
+from urllib.parse import urlparse
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import (OpenAIClient, AIHubMixClient, AzureClient, ZhipuClient, QwenClient,
+                       BaiduClient, CancelToken)
+import platforms.qwen.client as qwen_module
+
+# 取消后上游连接关闭的时间上限（秒）
+MAX_RELEASE_TIME = 0.05
+
+def sse_generator(base_url: str, body: dict, parse):
+    """与DashScope/千帆SDK结构相同的流：生成器内读取流式HTTP响应，生成器关闭时关闭连接"""
+    url = urlparse(base_url)
+    conn = http.client.HTTPConnection(url.hostname, url.port)
+    try:
+        conn.request('POST', url.path + '/chat/completions', json.dumps(body),
+                     {'Content-Type': 'application/json'})
+        response = conn.getresponse()
+        for line in response:
+            if line.startswith(b'data: ') and not line.startswith(b'data: [DONE]'):
+                yield parse(json.loads(line[6:]))
+    finally:
+        conn.close()
+
+def create_clients(server: MockOpenAIServer):
+    """创建指向模拟服务的六个客户端"""
+    base_url = server.base_url
+    os.environ['ZHIPUAI_BASE_URL'] = base_url
+
+    def delta(data):
+        return data['choices'][0]['delta']['content']
+
+    def fake_dashscope_call(model, prompt, stream=False, **kwargs):
+        body = {'model': model, 'messages': [{'role': 'user', 'content': prompt}], 'stream': True}
+        return sse_generator(base_url, body, lambda data: SimpleNamespace(
+            status_code=200, output=SimpleNamespace(text=delta(data))
+        ))
+
+    def fake_qianfan_do(model, messages, stream=False, **kwargs):
+        body = {'model': model, 'messages': messages, 'stream': True}
+        return sse_generator(base_url, body, lambda data: {'result': delta(data)})
+
+    qwen_module.Generation.call = staticmethod(fake_dashscope_call)
+    # 不获取access_token，使用下面替换的chat_comp
+    no_token = SimpleNamespace(start=lambda: None, peek=lambda: None, invalidate=lambda token: None)
+    baidu = BaiduClient(api_key='test', secret_key='test', token_provider=no_token)
+    baidu.chat_comp = SimpleNamespace(do=fake_qianfan_do)
+
+    return {
+        'openai': OpenAIClient(api_key='test', base_url=base_url),
+        'aihubmix': AIHubMixClient(api_key='test', base_url=base_url),
+        'azure': AzureClient(api_key='test', endpoint=base_url[:-3], api_version='2024-02-15-preview'),
+        'zhipu': ZhipuClient(api_key='test.test'),
+        'qwen': QwenClient(api_key='test'),
+        'baidu': baidu,
+        # 轻量HTTP传输
+        'openai (http)': OpenAIClient(api_key='test', base_url=base_url, transport='http'),
+        'azure (http)': AzureClient(api_key='test', endpoint=base_url[:-3], api_version='2024-02-15-preview',
+                                    transport='http'),
+    }
+
+def close_after_chunks(client, server: MockOpenAIServer, chunks: int = 3) -> float:
+    """读取几个数据块后关闭生成器，返回连接关闭所用时间"""
+    count = len(server.disconnects)
+    stream = client.chat_stream('你好', model='mock-model')
+    for _ in range(chunks):
+        next(stream)
+    start = time.monotonic()
+    stream.close()
+    if not server.wait_disconnect(count + 1, timeout=2):
+        return float('inf')
+    return server.disconnects[-1][0] - start
+
+def cancel_from_thread(client, server: MockOpenAIServer, chunks: int = 3):
+    """读取几个数据块后在其他线程取消，返回(连接关闭所用时间, 最后一个数据块)"""
+    count = len(server.disconnects)
+    cancel = CancelToken()
+    stream = client.chat_stream('你好', model='mock-model', cancel=cancel)
+    received = 0
+    last = None
+    start = None
+    for chunk in stream:
+        last = chunk
+        received += 1
+        if received == chunks:
+            start = time.monotonic()
+            threading.Thread(target=cancel.cancel).start()
+    if start is None or not server.wait_disconnect(count + 1, timeout=2):
+        return float('inf'), last
+    return server.disconnects[-1][0] - start, last
+
+def main():
+    print("🧪 流式请求取消测试 (本地模拟接口)")
+    print("-" * 50)
+
+    checks = []
+    with MockOpenAIServer(chunks=200, chunk_interval=0.01) as server:
+        clients = create_clients(server)
+
+        for platform, client in clients.items():
+            try:
+                elapsed = close_after_chunks(client, server)
+                checks.append((f"{platform}: 关闭生成器后 {elapsed * 1000:.1f}ms 释放连接",
+                               elapsed < MAX_RELEASE_TIME))
+
+                elapsed, last = cancel_from_thread(client, server)
+                checks.append((f"{platform}: 取消句柄 {elapsed * 1000:.1f}ms 释放连接",
+                               elapsed < MAX_RELEASE_TIME and last is not None
+                               and last.get('code') == 'cancelled'))
+            except Exception as e:
+                checks.append((f"{platform}: {e}", False))
+
+        checks.append(("上游流均未读完", server.completed == 0))
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
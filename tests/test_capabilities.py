@@ -0,0 +1,126 @@
+"""
+模型能力表测试脚本
+
+使用本地的模型目录缓存测试，不需要API密钥：
+- 按模型系列识别推理模型（包括 "vendor/" 前缀），gpt-4o1 这类名称不算o系列
+- token_kwargs / sampling_kwargs / stream_kwargs 按模型能力生成请求参数
+- 模型目录和配置覆盖的优先级，模型目录刷新后重新解析
+- register() 只影响当前索引，不修改全局配置
+"""
+import os
+import sys
+import json
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.config import Config
+from platforms.catalog import ModelCatalog
+from platforms.capabilities import CapabilityIndex
+
+def make_catalog(tmp: str) -> ModelCatalog:
+    """从磁盘缓存构造模型目录（不发起网络请求）"""
+    cache_path = os.path.join(tmp, 'catalog.json')
+    with open(cache_path, 'w', encoding='utf-8') as f:
+        json.dump({'aihubmix': {'models': {'my-reasoner': {'token_param': 'max_completion_tokens'},
+                                           'gpt-4o': {'context_window': 64000}},
+                                'fetched_at': 0, 'source': 'api'}}, f)
+    return ModelCatalog(cache_path=cache_path, ttl=3600, platforms=('aihubmix',))
+
+def test_family_rules(index: CapabilityIndex):
+    checks = []
+    names = ['o1', 'o1-mini', 'o3-mini-2025-01-31', 'o4-mini', 'gpt-5', 'gpt-5-mini', 'gpt-5.1']
+    checks.append(("o系列和GPT-5使用max_completion_tokens",
+                   all(index.lookup('openai', name).token_param == 'max_completion_tokens' for name in names)))
+
+    caps = index.lookup('openai', 'openai/o1-mini')
+    checks.append(("去掉vendor前缀后识别模型系列",
+                   caps.token_param == 'max_completion_tokens' and not caps.supports_temperature
+                   and index.lookup('aihubmix', 'OpenAI/GPT-5').token_param == 'max_completion_tokens'))
+
+    caps = index.lookup('openai', 'gpt-4o1')
+    checks.append(("gpt-4o1不算o系列",
+                   caps.token_param == 'max_tokens' and caps.supports_temperature and caps.context_window == 128000
+                   and index.lookup('openai', 'o10').token_param == 'max_tokens'))
+
+    checks.append(("上下文窗口",
+                   index.lookup('openai', 'gpt-4').context_window == 8192
+                   and index.lookup('openai', 'gpt-4-32k').context_window == 32768
+                   and index.lookup('openai', 'gpt-4.1-mini').context_window == 1047576
+                   and index.lookup('openai', 'unknown-model').context_window is None))
+    return checks
+
+def test_kwargs(index: CapabilityIndex):
+    checks = []
+    checks.append(("token_kwargs: o1和GPT-5使用max_completion_tokens，gpt-4o使用max_tokens",
+                   index.lookup('openai', 'o1').token_kwargs(100) == {'max_completion_tokens': 100}
+                   and index.lookup('openai', 'gpt-5').token_kwargs(100) == {'max_completion_tokens': 100}
+                   and index.lookup('openai', 'gpt-4o').token_kwargs(100) == {'max_tokens': 100}))
+    checks.append(("显式指定的max_completion_tokens优先",
+                   index.lookup('openai', 'gpt-4o').token_kwargs(100, 50) == {'max_completion_tokens': 50}))
+    checks.append(("sampling_kwargs: 推理模型不传递temperature",
+                   index.lookup('openai', 'o1-mini').sampling_kwargs(0.7) == {}
+                   and index.lookup('openai', 'gpt-5').sampling_kwargs(0.7) == {}
+                   and index.lookup('openai', 'gpt-4o').sampling_kwargs(0.7) == {'temperature': 0.7}
+                   and index.lookup('openai', 'gpt-4o').sampling_kwargs(None) == {}))
+    checks.append(("stream_kwargs: 按平台默认值返回usage",
+                   index.lookup('openai', 'gpt-4o').stream_kwargs() == {'stream_options': {'include_usage': True}}
+                   and index.lookup('azure', 'gpt-4o').stream_kwargs() == {}))
+    return checks
+
+def test_sources(tmp: str):
+    checks = []
+    catalog = make_catalog(tmp)
+    index = CapabilityIndex(catalog=catalog, overrides={
+        'gpt-4o-mini': {'context_window': 1000},
+        'azure:gpt-4o-mini': {'context_window': 2000},
+        'azure:my-deployment': {'token_param': 'max_completion_tokens', 'supports_temperature': False},
+    })
+    checks.append(("模型目录中的token参数名和上下文窗口",
+                   index.lookup('aihubmix', 'my-reasoner').token_param == 'max_completion_tokens'
+                   and index.lookup('aihubmix', 'gpt-4o').context_window == 64000
+                   and index.lookup('openai', 'gpt-4o').context_window == 128000))
+    checks.append(("配置覆盖：platform:model优先于model",
+                   index.lookup('openai', 'gpt-4o-mini').context_window == 1000
+                   and index.lookup('azure', 'gpt-4o-mini').context_window == 2000
+                   and index.lookup('azure', 'my-deployment').sampling_kwargs(0.5) == {}))
+
+    catalog._entries['aihubmix']['models']['gpt-4o'] = {'context_window': 32000}
+    catalog.version += 1
+    checks.append(("模型目录刷新后重新解析", index.lookup('aihubmix', 'gpt-4o').context_window == 32000))
+
+    original = dict(Config.MODEL_CAPABILITIES)
+    Config.MODEL_CAPABILITIES['openai:gpt-4o'] = {'context_window': 5000}
+    try:
+        first = CapabilityIndex(catalog=catalog)
+        second = CapabilityIndex(catalog=catalog)
+        before = second.lookup('openai', 'gpt-4o').context_window
+        first.register('openai', 'gpt-4o', token_param='max_completion_tokens')
+        checks.append(("register()只影响当前索引，不修改全局配置",
+                       first.lookup('openai', 'gpt-4o').token_kwargs(10) == {'max_completion_tokens': 10}
+                       and first.lookup('openai', 'gpt-4o').context_window == 5000
+                       and second.lookup('openai', 'gpt-4o').token_param == 'max_tokens' and before == 5000
+                       and Config.MODEL_CAPABILITIES == {**original, 'openai:gpt-4o': {'context_window': 5000}}))
+    finally:
+        Config.MODEL_CAPABILITIES.clear()
+        Config.MODEL_CAPABILITIES.update(original)
+    return checks
+
+def main():
+    print("🧪 模型能力表测试")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = CapabilityIndex(catalog=ModelCatalog(cache_path=os.path.join(tmp, 'empty.json')), overrides={})
+        checks = test_family_rules(index) + test_kwargs(index) + test_sources(tmp)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
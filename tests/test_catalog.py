@@ -0,0 +1,120 @@
+"""
+模型目录测试脚本
+
+使用本地模拟的 /models 接口测试，不需要API密钥：
+- 首次查询写入磁盘缓存，TTL内不再请求
+- 过期后使用ETag做条件请求，服务端返回304时保留原数据
+- 查询失败时继续使用过期的数据
+- 离线时从磁盘缓存查询 has_model / context_window
+- 没有模型列表API的平台使用官方常用模型，后台刷新不阻塞调用方
+"""
+import os
+import sys
+import time
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from config.config import Config
+from platforms.catalog import ModelCatalog
+
+def test_refresh(server: MockOpenAIServer, cache_path: str):
+    checks = []
+    catalog = ModelCatalog(cache_path=cache_path, ttl=3600, platforms=('openai', 'baidu'))
+    checks.append(("未加载时返回None", catalog.has_model('openai', 'gpt-4o') is None and catalog.is_stale('openai')))
+
+    results = catalog.refresh()
+    checks.append(("首次查询写入磁盘缓存",
+                   results == {'openai': True, 'baidu': True} and len(server.model_requests) == 1
+                   and os.path.exists(cache_path) and catalog.source('openai') == 'api'))
+    checks.append(("模型列表和上下文窗口",
+                   catalog.list_models('openai') == ['gpt-4o', 'gpt-4o-mini']
+                   and catalog.context_window('openai', 'gpt-4o') == 128000
+                   and catalog.context_window('openai', 'gpt-4o-mini') is None))
+    checks.append(("没有模型列表API的平台使用官方常用模型",
+                   catalog.source('baidu') == 'static' and catalog.has_model('baidu', 'ernie-4.0-8k')))
+
+    checks.append(("TTL内不再请求", catalog.refresh() == {} and len(server.model_requests) == 1))
+
+    fetched_at = catalog._entries['openai']['fetched_at']
+    time.sleep(0.01)
+    results = catalog.refresh(['openai'], force=True)
+    checks.append(("ETag未变化时服务端返回304，保留原数据并更新时间",
+                   results == {'openai': True} and server.model_requests[-1].get('If-None-Match') == '"models-v1"'
+                   and catalog.list_models('openai') == ['gpt-4o', 'gpt-4o-mini']
+                   and catalog._entries['openai']['fetched_at'] > fetched_at))
+
+    server.models = server.models + [{'id': 'o1-mini', 'object': 'model'}]
+    server.models_etag = '"models-v2"'
+    catalog.refresh(['openai'], force=True)
+    checks.append(("ETag变化时更新模型列表", catalog.has_model('openai', 'o1-mini')
+                   and catalog._entries['openai']['etag'] == '"models-v2"'))
+
+    server.status = 500
+    catalog.ttl = 0
+    results = catalog.refresh(['openai'])
+    server.status = 200
+    checks.append(("查询失败时继续使用过期的数据",
+                   results == {'openai': False} and catalog.has_model('openai', 'o1-mini')
+                   and catalog.source('openai') == 'api'))
+
+    count = len(server.model_requests)
+    server.latency = 0.2
+    start = time.monotonic()
+    catalog.refresh_in_background()
+    returned = time.monotonic() - start
+    deadline = time.monotonic() + 2
+    while len(server.model_requests) == count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    server.latency = 0
+    checks.append(("缓存过期时在后台刷新，不阻塞调用方", returned < 0.05 and len(server.model_requests) > count))
+
+    catalog.ttl = 3600
+    time.sleep(0.3)
+    count = len(server.model_requests)
+    catalog.start_background_refresh(interval=0.05)
+    time.sleep(0.3)
+    catalog.stop()
+    checks.append(("定时刷新遵守TTL（缓存未过期时不请求）", len(server.model_requests) == count))
+
+    catalog.ttl = 0
+    catalog.start_background_refresh(interval=0.05)
+    deadline = time.monotonic() + 2
+    while len(server.model_requests) < count + 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    catalog.stop()
+    checks.append(("后台定时刷新", len(server.model_requests) >= count + 2))
+    return checks
+
+def test_offline(cache_path: str):
+    checks = []
+    Config.OPENAI_BASE_URL = 'http://127.0.0.1:9/v1'
+    catalog = ModelCatalog(cache_path=cache_path, ttl=3600, platforms=('openai',))
+    checks.append(("离线时从磁盘缓存查询",
+                   catalog.has_model('openai', 'o1-mini') and not catalog.has_model('openai', 'gpt-3')
+                   and catalog.context_window('openai', 'gpt-4o') == 128000))
+    return checks
+
+def main():
+    print("🧪 模型目录测试 (本地模拟接口)")
+    print("-" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'catalog.json')
+        with MockOpenAIServer() as server:
+            Config.OPENAI_API_KEY = 'test'
+            Config.OPENAI_BASE_URL = server.base_url
+            checks = test_refresh(server, cache_path)
+        checks += test_offline(cache_path)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -29,8 +29,8 @@ def test_code_generation():
     print()
     
     try:
-        # 初始化客户端
-        client = AIHubMixClient()
+        # 初始化客户端 (开启调试模式，响应为空时可以查看原始响应)
+        client = AIHubMixClient(debug=True)
         print("✅ AIHubMix客户端初始化成功")
         print()
         
@@ -115,7 +115,8 @@ def test_code_generation():
                         usage = response['usage']
                         print(f"📊 Token使用: 输入={usage.get('prompt_tokens', 'N/A')}, "
                               f"输出={usage.get('completion_tokens', 'N/A')}, "
-                              f"总计={usage.get('total_tokens', 'N/A')}")
+                              f"总计={usage.get('total_tokens', 'N/A')}, "
+                              f"前缀缓存命中={usage.get('cached_tokens', 0)}")
                     
                     results.append({
                         'name': test_case['name'],
@@ -0,0 +1,155 @@
+"""
+截止时间 (deadline) 测试脚本
+
+使用本地模拟的上游测试超时传递，不需要API密钥：
+- SDK调用只拿到剩余时间作为超时参数
+- 可重试的错误只在剩余时间内重试
+- 流式读取到达截止时间时关闭上游流，工作线程及时释放
+"""
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult
+from platforms.deadline import Deadline, DeadlineExceeded, call_with_deadline, guard_stream, timeout_kwargs
+
+class SlowStream:
+    """模拟SDK的流：每个数据块间隔interval秒，close()会中断阻塞中的读取"""
+
+    def __init__(self, chunks: int, interval: float):
+        self.remaining = chunks
+        self.interval = interval
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.remaining == 0 or self.closed.wait(self.interval):
+            raise StopIteration
+        self.remaining -= 1
+        return 'x'
+
+    def close(self):
+        self.closed.set()
+
+class MockClient:
+    """模拟平台客户端，记录收到的截止时间"""
+
+    def __init__(self):
+        self.deadlines = []
+        self.streams = []
+
+    def chat(self, message, deadline=None, **kwargs):
+        self.deadlines.append(deadline)
+        try:
+            # 没有截止时间时0.5秒后返回
+            call_with_deadline(lambda: time.sleep(min(timeout_kwargs(deadline).get('timeout', 0.5), 1)), deadline)
+            if deadline is not None:
+                deadline.check()
+        except DeadlineExceeded as e:
+            return ChatResult.fail(str(e), 'deadline_exceeded')
+        return ChatResult.ok(message, 'mock')
+
+    def chat_stream(self, message, deadline=None, chunks=100, **kwargs):
+        stream = SlowStream(chunks, 0.05)
+        self.streams.append(stream)
+        try:
+            for chunk in guard_stream(stream, deadline):
+                yield ChatResult.chunk(chunk, 'mock')
+        except DeadlineExceeded as e:
+            yield ChatResult.fail(str(e), 'deadline_exceeded')
+
+def main():
+    print("🧪 截止时间测试 (本地模拟上游)")
+    print("-" * 50)
+    checks = []
+
+    # 超时参数只使用剩余时间
+    deadline = Deadline.after(0.5)
+    checks.append(("超时参数不超过剩余时间", timeout_kwargs(deadline)['timeout'] <= 0.5))
+    checks.append(("idle_timeout作为读取超时上限", timeout_kwargs(deadline, 0.1)['timeout'] == 0.1))
+    checks.append(("未设置时使用SDK默认值", timeout_kwargs(None) == {}))
+    checks.append(("绝对时间戳", 0.9 < Deadline.resolve(time.time() + 1).remaining() <= 1))
+
+    # 重试在剩余时间内进行
+    attempts = []
+    def flaky():
+        attempts.append(time.monotonic())
+        raise ConnectionError("connection reset")
+    start = time.monotonic()
+    try:
+        call_with_deadline(flaky, Deadline.after(0.3), retries=5, backoff=0.1)
+    except (ConnectionError, DeadlineExceeded):
+        pass
+    checks.append(("重试不超过截止时间", time.monotonic() - start < 0.35 and len(attempts) >= 2))
+
+    # 管理器把截止时间传递给客户端
+    manager = AIModelManager()
+    client = manager.clients['mock'] = MockClient()
+    start = time.monotonic()
+    response = manager.chat('mock', 'hello', timeout=0.2)
+    elapsed = time.monotonic() - start
+    checks.append(("chat超时返回deadline_exceeded",
+                   response.get('code') == 'deadline_exceeded' and elapsed < 0.3))
+    checks.append(("截止时间传递到客户端", isinstance(client.deadlines[-1], Deadline)))
+
+    # 流式请求到期时关闭上游流
+    start = time.monotonic()
+    chunks = list(manager.chat_stream('mock', 'hello', timeout=0.3))
+    elapsed = time.monotonic() - start
+    checks.append(("流式请求按时结束", elapsed < 0.4 and chunks[-1].get('code') == 'deadline_exceeded'))
+    checks.append(("上游流已关闭", client.streams[-1].closed.is_set()))
+
+    # 合并的流式请求：跟随者按自己的截止时间离开，不影响leader
+    leader = manager.chat_stream('mock', 'same', temperature=0, timeout=1)
+    first = next(leader)
+    start = time.monotonic()
+    follower = list(manager.chat_stream('mock', 'same', temperature=0, timeout=0.2))
+    checks.append(("合并请求的跟随者按自己的截止时间结束",
+                   time.monotonic() - start < 0.3 and follower[-1].get('code') == 'deadline_exceeded'))
+    checks.append(("leader继续接收数据", first['success'] and next(leader)['success']))
+    leader.close()
+
+    # 合并的请求：leader的截止时间不传给共享的上游调用，没有截止时间的跟随者收到完整结果
+    leader = manager.chat_stream('mock', 'short', temperature=0, timeout=0.15, chunks=10)
+    first = next(leader)
+    follower = manager.chat_stream('mock', 'short', temperature=0, chunks=10)
+    leader_chunks = [first] + list(leader)
+    follower_chunks = list(follower)
+    checks.append(("合并流式请求的leader到期后跟随者继续接收完整的流",
+                   leader_chunks[-1].get('code') == 'deadline_exceeded'
+                   and len(follower_chunks) == 10 and all(chunk['success'] for chunk in follower_chunks)))
+
+    results = {}
+    timings = {}
+
+    def call(name, **options):
+        start = time.monotonic()
+        results[name] = manager.chat('mock', 'coalesced', temperature=0, **options)
+        timings[name] = time.monotonic() - start
+
+    threads = [threading.Thread(target=call, args=('leader',), kwargs={'timeout': 0.2}),
+               threading.Thread(target=call, args=('follower',))]
+    threads[0].start()
+    time.sleep(0.05)
+    threads[1].start()
+    for thread in threads:
+        thread.join(2)
+    checks.append(("合并请求的leader按自己的截止时间返回，跟随者收到上游结果",
+                   results['leader'].get('code') == 'deadline_exceeded' and timings['leader'] < 0.3
+                   and results['follower']['success'] and client.deadlines[-1] is None))
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
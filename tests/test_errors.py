@@ -0,0 +1,94 @@
+"""
+错误分类测试脚本
+
+检查各平台的异常和错误码映射到统一的错误类型，不需要API密钥
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import ChatResult, RateLimited, ContextTooLong
+from platforms.deadline import DeadlineExceeded
+from platforms.cancellation import StreamCancelled
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+def sdk_error(name, message, status=None, code=None, body=None, headers=None):
+    """构造与SDK异常同名、属性相同的异常"""
+    error = type(name, (Exception,), {})(message)
+    if status is not None:
+        error.status_code = status
+        error.response = FakeResponse(status, headers)
+    error.code = code
+    error.body = body
+    return error
+
+CASES = [
+    # (说明, 失败结果, 期望的错误类型)
+    ("OpenAI限流", ChatResult.from_exception(sdk_error(
+        'RateLimitError', 'Rate limit reached', 429, 'rate_limit_exceeded', headers={'retry-after': '2'})),
+     'rate_limited'),
+    ("OpenAI上下文超长", ChatResult.from_exception(sdk_error(
+        'BadRequestError', "This model's maximum context length is 8192 tokens", 400,
+        'context_length_exceeded')), 'context_too_long'),
+    ("Azure内容过滤", ChatResult.from_exception(sdk_error(
+        'BadRequestError', 'The response was filtered', 400, 'content_filter')), 'content_filtered'),
+    ("OpenAI认证失败", ChatResult.from_exception(sdk_error(
+        'AuthenticationError', 'Incorrect API key provided', 401, 'invalid_api_key')), 'auth_failed'),
+    ("OpenAI连接失败", ChatResult.from_exception(sdk_error('APIConnectionError', 'Connection error.')),
+     'upstream_unavailable'),
+    ("OpenAI超时", ChatResult.from_exception(sdk_error('APITimeoutError', 'Request timed out.')), 'timeout'),
+    ("智谱并发超额", ChatResult.from_exception(sdk_error(
+        'APIReachLimitError', 'Error code: 429', 429, body={'error': {'code': '1302', 'message': '并发数过高'}})),
+     'rate_limited'),
+    ("智谱Prompt超长", ChatResult.from_exception(sdk_error(
+        'APIRequestFailedError', 'Error code: 400', 400, body={'error': {'code': '1261', 'message': 'Prompt 超长'}})),
+     'context_too_long'),
+    ("通义千问限流", ChatResult.fail('Requests rate limit exceeded', 'Throttling.RateQuota'), 'rate_limited'),
+    ("通义千问内容安全", ChatResult.fail('Input data may contain inappropriate content.', 'DataInspectionFailed'),
+     'content_filtered'),
+    ("通义千问API Key无效", ChatResult.fail('Invalid API-key provided.', 'InvalidApiKey'), 'auth_failed'),
+    ("千帆QPS超限", ChatResult.fail('Open api qps request limit reached', 18), 'rate_limited'),
+    ("千帆服务错误", ChatResult.fail('Unknown error', 1), 'upstream_unavailable'),
+    ("截止时间", ChatResult.from_exception(DeadlineExceeded()), 'timeout'),
+    ("取消", ChatResult.from_exception(StreamCancelled()), 'cancelled'),
+    ("未知错误", ChatResult.fail('something odd'), 'error'),
+]
+
+def main():
+    print("🧪 错误分类测试")
+    print("-" * 50)
+
+    checks = []
+    for name, result, expected in CASES:
+        checks.append((f"{name} -> {result['error_type']}", result['error_type'] == expected))
+
+    limited = CASES[0][1]
+    checks.append(("限流结果携带retry_after", limited.get('retry_after') == 2.0))
+    checks.append(("截止时间保留原错误码", CASES[13][1]['code'] == 'deadline_exceeded'))
+
+    try:
+        limited.raise_for_error()
+        checks.append(("raise_for_error抛出RateLimited", False))
+    except RateLimited as e:
+        checks.append(("raise_for_error抛出RateLimited", e.retryable and e.retry_after == 2.0))
+
+    try:
+        CASES[1][1].raise_for_error()
+    except ContextTooLong as e:
+        checks.append(("ContextTooLong不可重试", not e.retryable))
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,216 @@
+"""
+降级链测试脚本
+
+使用模拟的平台客户端测试，不需要API密钥：
+- 限流、上游不可用等错误时依次尝试降级步骤，结果中记录实际使用的平台和模型
+- 不在触发条件内的错误（如认证失败）不降级
+- 超过max_latency / max_ttft时放弃当前一步，请求自身的截止时间到期时不再降级
+- 流式请求只在首个数据块之前降级
+- 降级统计
+- 合并的请求中降级信息不写入其他调用方共享的结果
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import (AIModelManager, ChatResult, DeadlineExceeded, FallbackChain, RateLimited, AuthFailed,
+                       StreamCancelled, UpstreamUnavailable, collect_stream)
+
+class MockClient:
+    """
+    模拟平台客户端
+
+    errors为 {模型: 异常}，对应模型的请求失败；delays为 {模型: 秒}，对应模型的首个数据块（普通请求为响应）
+    等待时间，等待时遵守截止时间和取消句柄
+    """
+
+    def __init__(self, name: str, errors=None, delays=None):
+        self.name = name
+        self.errors = errors or {}
+        self.delays = delays or {}
+        self.calls = []
+
+    def _wait(self, model, deadline=None, cancel=None):
+        delay = self.delays.get(model, 0)
+        if deadline is not None:
+            delay = min(delay, max(deadline.remaining(), 0))
+        if cancel is not None:
+            if cancel.wait(delay):
+                raise StreamCancelled()
+        else:
+            time.sleep(delay)
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded()
+        if model in self.errors:
+            raise self.errors[model]
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        self.calls.append(model)
+        try:
+            self._wait(model, deadline)
+        except Exception as e:
+            return ChatResult.from_exception(e)
+        return ChatResult.ok(f"{self.name}/{model}: {message}", model)
+
+    def chat_stream(self, message, model=None, deadline=None, cancel=None, **kwargs):
+        self.calls.append(model)
+        try:
+            self._wait(model, deadline, cancel)
+        except Exception as e:
+            yield ChatResult.from_exception(e)
+            return
+        yield ChatResult.chunk(f"{self.name}/{model}", model)
+        yield ChatResult.chunk(f": {message}", model)
+
+def create_manager(**clients):
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+    manager.clients.update(clients)
+    return manager
+
+def test_errors():
+    checks = []
+    aihubmix = MockClient('aihubmix', errors={'gpt-4o': RateLimited('rate limited', 429),
+                                              'gpt-4o-mini': UpstreamUnavailable('overloaded', 503)})
+    openai = MockClient('openai')
+    manager = create_manager(aihubmix=aihubmix, openai=openai)
+    chain = [('aihubmix', 'gpt-4o-mini'), ('openai', 'gpt-4o-mini')]
+
+    result = manager.chat('aihubmix', '你好', model='gpt-4o', fallback=chain)
+    checks.append(("依次降级，结果记录实际使用的平台和模型",
+                   result['success'] and result['content'] == 'openai/gpt-4o-mini: 你好'
+                   and result['platform'] == 'openai' and result['model'] == 'gpt-4o-mini'
+                   and aihubmix.calls == ['gpt-4o', 'gpt-4o-mini'] and openai.calls == ['gpt-4o-mini']))
+    checks.append(("被跳过的步骤记录在fallbacks中",
+                   [(a['route'], a['reason']) for a in result['fallbacks']]
+                   == [('aihubmix:gpt-4o', 'rate_limited'), ('aihubmix:gpt-4o-mini', 'upstream_unavailable')]))
+
+    result = manager.chat('openai', '你好', model='gpt-4o', fallback=chain)
+    checks.append(("第一步成功时不降级", result['platform'] == 'openai' and 'fallbacks' not in result))
+
+    aihubmix.errors['gpt-4o'] = AuthFailed('invalid api key', 401)
+    result = manager.chat('aihubmix', '你好', model='gpt-4o', fallback=chain)
+    checks.append(("不在触发条件内的错误不降级",
+                   not result['success'] and result['error_type'] == 'auth_failed' and 'fallbacks' not in result))
+
+    result = manager.chat('aihubmix', '你好', model='gpt-4o',
+                          fallback=FallbackChain(chain, on=('auth_failed', 'upstream_unavailable')))
+    checks.append(("触发条件可以按调用指定", result['platform'] == 'openai'))
+
+    openai.errors['gpt-4o-mini'] = RateLimited('rate limited', 429)
+    result = manager.chat('aihubmix', '你好', model='gpt-4o-mini', fallback=[('openai', 'gpt-4o-mini')])
+    openai.errors.clear()
+    checks.append(("所有步骤都失败时返回最后一步的错误",
+                   not result['success'] and result['error_type'] == 'rate_limited'
+                   and result['fallbacks'][0]['route'] == 'aihubmix:gpt-4o-mini' and 'platform' not in result))
+
+    report = manager.fallback_report()
+    checks.append(("降级统计",
+                   report['openai:gpt-4o-mini']['served'] == 2 and report['openai:gpt-4o']['served'] == 1
+                   and report['aihubmix:gpt-4o']['fell_back'] == {'rate_limited': 1, 'auth_failed': 1}
+                   and report['aihubmix:gpt-4o-mini']['fell_back']['upstream_unavailable'] == 3))
+
+    qwen = MockClient('qwen')
+    manager.clients['qwen'] = qwen
+    result = manager.chat('aihubmix', '你好', model='gpt-4o-mini', fallback=[('qwen', None)])
+    checks.append(("降级步骤未指定模型时使用平台默认模型",
+                   result['platform'] == 'qwen' and result['model'] == 'qwen-turbo' and qwen.calls == ['qwen-turbo']))
+    return checks
+
+def test_latency():
+    checks = []
+    slow = MockClient('aihubmix', delays={'gpt-4o': 1.0})
+    fast = MockClient('openai', delays={'gpt-4o-mini': 0.02})
+    manager = create_manager(aihubmix=slow, openai=fast)
+    chain = FallbackChain([('openai', 'gpt-4o-mini')], max_latency=0.1, max_ttft=0.1)
+
+    start = time.monotonic()
+    result = manager.chat('aihubmix', '你好', model='gpt-4o', fallback=chain)
+    elapsed = time.monotonic() - start
+    checks.append((f"超过max_latency时降级（{elapsed * 1000:.0f}ms）",
+                   result['platform'] == 'openai' and result['fallbacks'][0]['reason'] == 'latency' and elapsed < 0.5))
+
+    start = time.monotonic()
+    stream = manager.chat_stream('aihubmix', '你好', model='gpt-4o', fallback=chain)
+    chunks = list(stream)
+    elapsed = time.monotonic() - start
+    checks.append((f"流式请求超过max_ttft时降级（{elapsed * 1000:.0f}ms）",
+                   ''.join(c['content'] for c in chunks) == 'openai/gpt-4o-mini: 你好'
+                   and chunks[0]['platform'] == 'openai' and chunks[0]['fallbacks'][0]['reason'] == 'ttft'
+                   and elapsed < 0.5))
+
+    slow.delays['gpt-4o'] = 0.05
+    chunks = list(manager.chat_stream('aihubmix', '你好', model='gpt-4o', fallback=chain))
+    checks.append(("首个数据块在时限内到达时不降级",
+                   chunks[0]['platform'] == 'aihubmix' and 'fallbacks' not in chunks[0] and len(chunks) == 2))
+
+    slow.delays['gpt-4o'] = 1.0
+    start = time.monotonic()
+    result = manager.chat('aihubmix', '你好', model='gpt-4o', timeout=0.1,
+                          fallback=FallbackChain([('openai', 'gpt-4o-mini')], max_latency=0.5))
+    elapsed = time.monotonic() - start
+    checks.append(("请求自身的截止时间到期时不再降级",
+                   result['code'] == 'deadline_exceeded' and 'fallbacks' not in result and elapsed < 0.3
+                   and fast.calls.count('gpt-4o-mini') == 2))
+
+    failing = MockClient('aihubmix', errors={'gpt-4o': UpstreamUnavailable('overloaded', 503)})
+    manager.clients['aihubmix'] = failing
+    result = collect_stream(manager.chat_stream('aihubmix', '你好', model='gpt-4o', fallback=chain))
+    checks.append(("流式请求首个数据块为可降级的错误时降级", result['content'] == 'openai/gpt-4o-mini: 你好'))
+
+    async def run_async():
+        return await manager.achat('aihubmix', '你好', model='gpt-4o', fallback=chain)
+
+    result = asyncio.run(run_async())
+    checks.append(("异步接口同样支持降级链", result['platform'] == 'openai'))
+    return checks
+
+def test_coalesced():
+    checks = []
+    aihubmix = MockClient('aihubmix', delays={'gpt-4o': 0.1})
+    manager = create_manager(aihubmix=aihubmix, openai=MockClient('openai'))
+    chain = [('openai', 'gpt-4o-mini')]
+
+    plain = manager.chat_stream('aihubmix', '你好', model='gpt-4o', temperature=0)
+    with_fallback = list(manager.chat_stream('aihubmix', '你好', model='gpt-4o', temperature=0, fallback=chain))
+    plain = list(plain)
+    checks.append(("合并的流式请求：降级信息不写入其他调用方共享的数据块",
+                   aihubmix.calls == ['gpt-4o'] and with_fallback[0]['platform'] == 'aihubmix'
+                   and 'platform' not in plain[0] and with_fallback[0]['content'] == plain[0]['content']))
+
+    results = {}
+
+    def call(name, **options):
+        results[name] = manager.chat('aihubmix', '你好', model='gpt-4o', temperature=0, **options)
+
+    threads = [threading.Thread(target=call, args=('fallback',), kwargs={'fallback': chain}),
+               threading.Thread(target=call, args=('plain',))]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(2)
+    checks.append(("合并的请求：降级信息不写入其他调用方共享的结果",
+                   aihubmix.calls == ['gpt-4o', 'gpt-4o'] and results['fallback']['platform'] == 'aihubmix'
+                   and 'platform' not in results['plain']))
+    return checks
+
+def main():
+    print("🧪 降级链测试")
+    print("-" * 50)
+
+    checks = test_errors() + test_latency() + test_coalesced()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
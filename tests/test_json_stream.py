@@ -0,0 +1,214 @@
+"""
+流式JSON解析测试脚本
+
+使用构造的数据块和模拟的平台客户端测试，不需要API密钥：
+- 数据块在任意位置切分（字符串、转义字符、数字中间）时结果与json.loads一致
+- 数组元素一结束就返回，不等待完整响应
+- 跳过JSON前后的文字和代码块标记（百度等平台），通义千问的累计文本
+- 文字中的 [ 或 { 不是JSON的开始时（如"[注意]"），从下一个 [ 或 { 重新查找
+- path指定要返回的值，无效或不完整的JSON返回失败结果
+"""
+import os
+import sys
+import json
+import time
+import random
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, JsonStreamParser, Usage
+from platforms.json_stream import iter_json
+
+DOCUMENT = {
+    "items": [
+        {"name": "北京", "tags": ["首都", "a\"b\\c"], "score": -1.5e3, "ok": True},
+        {"name": "{不是对象}", "note": "[也不是数组]\n中😀", "empty": {}, "none": None},
+        {"name": "上海", "values": [0, 12, 3.25, False, [], [[1], {"x": "y"}]]},
+    ],
+    "total": 3,
+}
+
+class MockClient:
+    """模拟平台客户端：按给定的数据块返回，每个数据块之间等待interval秒"""
+
+    def __init__(self, chunks, interval=0):
+        self.chunks = chunks
+        self.interval = interval
+        self.closed = False
+        self.kwargs = None
+
+    def chat_stream(self, message, model=None, **kwargs):
+        self.kwargs = kwargs
+        try:
+            for content in self.chunks:
+                time.sleep(self.interval)
+                yield ChatResult.chunk(content, 'mock-model')
+            yield ChatResult.chunk('', 'mock-model', Usage(10, 20))
+        finally:
+            self.closed = True
+
+def parse(chunks, path=None, cumulative=False):
+    parser = JsonStreamParser(path, cumulative)
+    events = []
+    for chunk in chunks:
+        events += parser.feed(chunk)
+    return events, parser
+
+def split(text, rng):
+    """在随机位置切分文本"""
+    chunks, start = [], 0
+    while start < len(text):
+        size = rng.randint(1, 7)
+        chunks.append(text[start:start + size])
+        start += size
+    return chunks
+
+def test_parser():
+    checks = []
+    text = json.dumps(DOCUMENT, ensure_ascii=False, indent=2)
+    expected = [(('items', i), item) for i, item in enumerate(DOCUMENT['items'])]
+
+    events, parser = parse(list(text))
+    checks.append(("逐字符输入：返回第一个数组字段的每个元素，完整文档与json.loads一致",
+                   events == expected and parser.documents == [DOCUMENT]))
+
+    rng = random.Random(7)
+    consistent = all(parse(split(text, rng))[0] == expected for _ in range(50))
+    compact = json.dumps(DOCUMENT, separators=(',', ':'))
+    consistent = consistent and all(parse(split(compact, rng))[0] == expected for _ in range(50))
+    checks.append(("随机切分（含转义字符、\\u转义、数字中间切分）结果一致", consistent))
+
+    parser = JsonStreamParser()
+    first = None
+    for index, char in enumerate('[{"id": 1}, {"id": 2}, {"id": 3}]'):
+        if parser.feed(char) and first is None:
+            first = index
+    checks.append(("数组元素一结束就返回", first == len('[{"id": 1}') - 1))
+
+    events, _ = parse(['[1, 2', '3, -4', '.5e1, "x"', ']'])
+    checks.append(("顶层数组的元素，数字跨数据块", [value for _, value in events] == [1, 23, -45.0, 'x']))
+
+    chunks = ["好的，以下是结果：\n```", "json\n{\"items\": [{\"城", "市\": \"北京\"},", " {\"城市\": \"上海\"}]}\n```",
+              "\n如需更多信息[请告诉我]。"]
+    events, parser = parse(chunks)
+    checks.append(("跳过JSON前后的文字和代码块标记",
+                   [value['城市'] for _, value in events] == ['北京', '上海'] and len(parser.documents) == 1))
+
+    events, _ = parse(['{"data": {"users": [{"id": 1}, {"id"', ': 2}], "items": [9]}}'], path='data.users.*')
+    checks.append(("path指定要返回的值", [path for path, _ in events] == [('data', 'users', 0), ('data', 'users', 1)]))
+
+    events, _ = parse(['{"a": 1, "b": [2]}'], path='')
+    checks.append(("path为空时只返回完整文档", events == [((), {'a': 1, 'b': [2]})]))
+
+    prefix = ''
+    cumulative = []
+    for chunk in split(text, rng):
+        prefix += chunk
+        cumulative.append(prefix)
+    checks.append(("通义千问的累计文本（cumulative=True）", parse(cumulative, cumulative=True)[0] == expected))
+
+    parser = JsonStreamParser(multiple=True)
+    events = parser.feed('{"a": [1]}\n{"a": [2]}\n')
+    checks.append(("multiple=True时解析多个顶层JSON",
+                   parser.documents == [{'a': [1]}, {'a': [2]}] and [v for _, v in events] == [1, 2]))
+
+    events, parser = parse(['结果 [注意] 如下: [1,2]'])
+    checks.append(("文字中的[不是JSON的开始时从下一个[重新查找",
+                   [value for _, value in events] == [1, 2] and parser.documents == [[1, 2]]))
+
+    events, parser = parse(['说明 {', '见下文} 与 [备注 1]：\n{"items": [{"a": 1}]}'])
+    checks.append(("跨数据块的误判同样重新查找",
+                   [value for _, value in events] == [{'a': 1}] and parser.documents == [{'items': [{'a': 1}]}]
+                   and parser.false_start is not None))
+
+    errors = 0
+    for bad in ['[1, 2 3]', '[{"a": 1}, {"a" 1}]', '[1, tru]', '{"a": [1], 2: 3}', '[4, 1.2.3]']:
+        try:
+            parse([bad])
+        except ValueError:
+            errors += 1
+    checks.append(("已输出值之后的无效JSON抛出ValueError", errors == 5))
+
+    events, parser = parse(['{"a" 1}'])
+    checks.append(("输出值之前的无效JSON当作文字跳过，记录错误",
+                   not events and not parser.documents and not parser.in_document
+                   and isinstance(parser.false_start, ValueError)))
+    return checks
+
+def test_manager():
+    checks = []
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+
+    # 百度按句子返回数据块
+    baidu = MockClient(['```json\n[\n  {"问题": "1+1", "答案": 2},', '\n  {"问题": "2+2", "答案": 4}', '\n]\n```'],
+                       interval=0.05)
+    manager.clients['baidu'] = baidu
+    start = time.monotonic()
+    times, chunks = [], []
+    for chunk in manager.chat_stream_json('baidu', '以JSON数组回答'):
+        times.append(time.monotonic() - start)
+        chunks.append(chunk)
+    checks.append((f"第一个元素在流结束之前返回（{times[0] * 1000:.0f}ms / {times[-1] * 1000:.0f}ms）",
+                   [c['value']['答案'] for c in chunks[:2]] == [2, 4] and times[0] < times[-1] - 0.08))
+    last = chunks[-1]
+    checks.append(("最后一个数据块为完整文档，带usage",
+                   last['path'] == () and len(last['value']) == 2 and last['usage'].total_tokens == 30
+                   and last['model'] == 'mock-model'))
+
+    qwen = MockClient(['{"items": [', '{"items": [{"n": 1}', '{"items": [{"n": 1}, {"n": 2}]}'])
+    manager.clients['qwen'] = qwen
+    chunks = list(manager.chat_stream_json('qwen', '你好', incremental_output=False))
+    checks.append(("通义千问关闭incremental_output时按累计文本解析",
+                   [c['value'] for c in chunks[:-1]] == [{'n': 1}, {'n': 2}] and qwen.kwargs['incremental_output'] is False))
+
+    manager.clients['openai'] = MockClient(['[{"a": 1}, {"a": ', '2}'])
+    chunks = list(manager.chat_stream_json('openai', '你好'))
+    checks.append(("JSON不完整时最后一个数据块为失败结果",
+                   chunks[0]['value'] == {'a': 1} and not chunks[-1]['success'] and chunks[-1]['code'] == 'invalid_json'))
+
+    manager.clients['openai'] = MockClient(['抱歉，我无法回答'])
+    chunks = list(manager.chat_stream_json('openai', '你好'))
+    checks.append(("响应中没有JSON时返回失败结果", len(chunks) == 1 and chunks[0]['code'] == 'invalid_json'))
+
+    manager.clients['openai'] = MockClient(['{"a" 1}'])
+    chunks = list(manager.chat_stream_json('openai', '你好'))
+    checks.append(("只有无效的JSON时失败结果带语法错误",
+                   len(chunks) == 1 and chunks[0]['code'] == 'invalid_json' and '无效的JSON' in chunks[0]['error']))
+
+    broken = MockClient(['[{"a": 1}, {"a": }]', '[后面的内容]'])
+    manager.clients['openai'] = broken
+    chunks = list(manager.chat_stream_json('openai', '你好'))
+    checks.append(("JSON无效时返回失败结果并关闭上游流",
+                   chunks[-1]['code'] == 'invalid_json' and 'JSON' in chunks[-1]['error'] and broken.closed))
+
+    closing = MockClient(['[1, ', '2, ', '3]'])
+    manager.clients['openai'] = closing
+    stream = manager.chat_stream_json('openai', '你好')
+    next(stream)
+    stream.close()
+    checks.append(("关闭生成器时关闭上游流", closing.closed))
+
+    def failing():
+        yield ChatResult.chunk('[1, ', 'mock-model')
+        yield ChatResult.fail('upstream error', 503)
+
+    chunks = list(iter_json(failing()))
+    checks.append(("上游失败的数据块原样返回", len(chunks) == 2 and chunks[1]['code'] == 503))
+    return checks
+
+def main():
+    print("🧪 流式JSON解析测试")
+    print("-" * 50)
+
+    checks = test_parser() + test_manager()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
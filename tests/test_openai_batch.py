@@ -0,0 +1,135 @@
+"""
+OpenAI Batch API测试脚本
+
+使用本地模拟的files/batches接口测试批处理流程，不需要API密钥：
+生成上传文件 -> 创建任务 -> 退避轮询 -> 流式读取结果并按custom_id对应
+"""
+import os
+import sys
+import json
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms.openai.batch import OpenAIBatch
+
+class MockFiles:
+    """模拟 /files 接口"""
+
+    def __init__(self):
+        self.files = {}
+
+    def create(self, file, purpose):
+        file_id = f"file-{len(self.files) + 1}"
+        self.files[file_id] = file.read()
+        return SimpleNamespace(id=file_id, purpose=purpose)
+
+    @property
+    def with_streaming_response(self):
+        return self
+
+    @contextmanager
+    def content(self, file_id):
+        lines = self.files[file_id].decode('utf-8').splitlines()
+        yield SimpleNamespace(iter_lines=lambda: iter(lines))
+
+class MockBatches:
+    """模拟 /batches 接口：创建后经过几次轮询才完成"""
+
+    def __init__(self, files: MockFiles, polls_until_done: int = 3, final_status: str = 'completed'):
+        self.files = files
+        self.polls_until_done = polls_until_done
+        self.final_status = final_status
+        self.batches = {}
+        self.retrieve_times = []
+
+    def create(self, input_file_id, endpoint, completion_window, metadata=None):
+        batch_id = f"batch-{len(self.batches) + 1}"
+        self.batches[batch_id] = {'input_file_id': input_file_id, 'endpoint': endpoint, 'polls': 0}
+        return SimpleNamespace(id=batch_id, status='validating')
+
+    def retrieve(self, batch_id):
+        self.retrieve_times.append(time.monotonic())
+        batch = self.batches[batch_id]
+        batch['polls'] += 1
+        if batch['polls'] < self.polls_until_done:
+            return SimpleNamespace(id=batch_id, status='in_progress', output_file_id=None, error_file_id=None)
+
+        # 生成结果文件：回显用户消息；消息为"fail"时放入错误文件
+        output, errors = [], []
+        for line in self.files.files[batch['input_file_id']].decode('utf-8').splitlines():
+            request = json.loads(line)
+            message = request['body']['messages'][-1]['content']
+            if message == 'fail':
+                errors.append(json.dumps({
+                    'custom_id': request['custom_id'],
+                    'response': {'status_code': 400, 'body': {'error': {'message': 'bad request', 'code': 'invalid'}}},
+                    'error': None,
+                }))
+                continue
+            output.append(json.dumps({
+                'custom_id': request['custom_id'],
+                'response': {'status_code': 200, 'body': {
+                    'model': request['body']['model'],
+                    'choices': [{'message': {'role': 'assistant', 'content': f"echo: {message}"}}],
+                    'usage': {'prompt_tokens': 5, 'completion_tokens': 3, 'total_tokens': 8},
+                }},
+                'error': None,
+            }))
+
+        # 与平台一致：没有成功（失败）的请求时不生成结果（错误）文件
+        output_id = error_id = None
+        if output:
+            output_id = self.files.create(SimpleNamespace(read=lambda: '\n'.join(output).encode()), 'batch_output').id
+        if errors:
+            error_id = self.files.create(SimpleNamespace(read=lambda: '\n'.join(errors).encode()), 'batch_output').id
+        return SimpleNamespace(id=batch_id, status=self.final_status, output_file_id=output_id, error_file_id=error_id,
+                               errors=None)
+
+def main():
+    print("🧪 OpenAI Batch API测试 (本地模拟接口)")
+    print("-" * 50)
+
+    files = MockFiles()
+    batches = MockBatches(files)
+    client = SimpleNamespace(files=files, batches=batches)
+
+    batch = OpenAIBatch(client, platform='openai')
+    prompts = (f"问题{i}" for i in range(100))
+    prompts = list(prompts) + [('custom-x', '自定义ID'), {'id': 'bad', 'message': 'fail'}]
+
+    results = dict(batch.run(prompts, 'gpt-4o-mini', max_tokens=50, poll_interval=0.01, max_interval=0.05))
+
+    checks = []
+    checks.append(("结果数量与输入一致", len(results) == 102))
+    checks.append(("按custom_id对应结果", results['7']['content'] == "echo: 问题7"))
+    checks.append(("自定义custom_id", results['custom-x']['content'] == "echo: 自定义ID"))
+    checks.append(("失败请求来自错误文件", not results['bad']['success'] and results['bad']['error'] == 'bad request'))
+    checks.append(("usage解析", results['0']['usage']['total_tokens'] == 8))
+
+    intervals = [b - a for a, b in zip(batches.retrieve_times, batches.retrieve_times[1:])]
+    checks.append(("轮询间隔递增 (退避)", len(intervals) >= 2 and intervals[-1] > intervals[0]))
+
+    uploaded = json.loads(files.files['file-1'].decode('utf-8').splitlines()[0])
+    checks.append(("请求体使用正确的token参数", uploaded['body'].get('max_tokens') == 50))
+
+    for status in ('completed', 'expired'):
+        batches = MockBatches(files, polls_until_done=1, final_status=status)
+        client = SimpleNamespace(files=files, batches=batches)
+        failed = dict(OpenAIBatch(client).run([{'id': 'a', 'message': 'fail'}, {'id': 'b', 'message': 'fail'}],
+                                              'gpt-4o-mini', poll_interval=0.01))
+        checks.append((f"所有请求都失败（{status}）时返回错误文件中的失败结果",
+                       sorted(failed) == ['a', 'b'] and all(r['error'] == 'bad request' for r in failed.values())))
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,101 @@
+"""
+提示词前缀缓存测试脚本
+
+直接测试消息构建和命中统计，不需要API密钥：
+- 消息顺序固定：system -> 历史消息 -> 当前用户消息
+- 系统提示词只统一换行符，行尾空白等其他内容不变
+- 每次调用返回新的字典，调用方修改不影响后续请求
+- 按平台统计缓存命中率（prefix_cache_report）
+"""
+import os
+import sys
+import json
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, Usage
+from platforms.prompt_cache import PrefixCacheStats, build_messages, normalize_prompt, system_message
+
+class MockClient:
+    """模拟平台客户端：按顺序返回给定的usage"""
+
+    def __init__(self, usages):
+        self.usages = list(usages)
+
+    def chat(self, message, model=None, **kwargs):
+        return ChatResult.ok(f"echo: {message}", 'mock-model', self.usages.pop(0))
+
+def test_messages():
+    checks = []
+    history = [{"role": "user", "content": "你好"}, {"role": "assistant", "content": "你好！"}]
+    messages = build_messages("继续", system_prompt="你是助手", history=history)
+    checks.append(("消息顺序：system -> 历史消息 -> 当前用户消息",
+                   [m['role'] for m in messages] == ['system', 'user', 'assistant', 'user']
+                   and messages[1:3] == history and messages[-1] == {"role": "user", "content": "继续"}))
+    checks.append(("没有系统提示词和历史消息时只有用户消息",
+                   build_messages("你好") == [{"role": "user", "content": "你好"}]))
+
+    prompt = "规则一：  \r\n规则二：\t\r\n\r\n  缩进的规则三\r结尾  "
+    checks.append(("换行符统一为\\n，行尾空白和缩进不变",
+                   normalize_prompt(prompt) == "规则一：  \n规则二：\t\n\n  缩进的规则三\n结尾  "))
+    checks.append(("不同换行符的相同提示词序列化后逐字节相同",
+                   json.dumps(build_messages("问题", prompt)) == json.dumps(build_messages("问题", prompt.replace('\r\n', '\n')))))
+    checks.append(("没有\\r的提示词原样返回", normalize_prompt("a  \n b ") == "a  \n b "))
+
+    first = system_message("你是助手")
+    first['content'] = "被修改"
+    second = build_messages("你好", "你是助手")
+    checks.append(("每次调用返回新的字典，调用方修改不影响后续请求",
+                   second[0] == {"role": "system", "content": "你是助手"} and second[0] is not first
+                   and system_message("你是助手", role='developer') == {"role": "developer", "content": "你是助手"}))
+    return checks
+
+def test_stats():
+    checks = []
+    stats = PrefixCacheStats()
+    stats.record('openai', Usage(1000, 10, 1010, 0))
+    stats.record('openai', Usage(1000, 10, 1010, 768))
+    stats.record('openai', {'prompt_tokens': 2000, 'cached_tokens': 1792})
+    stats.record('zhipu', Usage(500, 10, 510))
+    stats.record('zhipu', None)
+    report = stats.report()
+    checks.append(("按平台累计请求数、提示词token和缓存命中token",
+                   {k: report['openai'][k] for k in ('requests', 'hit_requests', 'prompt_tokens', 'cached_tokens')}
+                   == {'requests': 3, 'hit_requests': 2, 'prompt_tokens': 4000, 'cached_tokens': 2560}))
+    checks.append(("命中率：cached_tokens / prompt_tokens，按请求数的命中率",
+                   abs(report['openai']['hit_ratio'] - 0.64) < 1e-9
+                   and abs(report['openai']['request_hit_ratio'] - 2 / 3) < 1e-9))
+    checks.append(("平台未返回cached_tokens时命中率为0，没有usage时不计数",
+                   report['zhipu']['requests'] == 1 and report['zhipu']['hit_ratio'] == 0.0
+                   and stats.hit_ratio('qwen') == 0.0))
+    stats.reset()
+    checks.append(("reset清空统计", stats.report() == {}))
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False, traffic=False)
+    manager.clients['openai'] = MockClient([Usage(1200, 5, 1205, 0), Usage(1200, 5, 1205, 1024)])
+    manager.clients['azure'] = MockClient([Usage(300, 5, 305, 256)])
+    for platform, message in (('openai', '问题1'), ('openai', '问题2'), ('azure', '问题1')):
+        manager.chat(platform, message)
+    report = manager.prefix_cache_report()
+    checks.append(("manager.prefix_cache_report()按平台返回命中率",
+                   abs(report['openai']['hit_ratio'] - 1024 / 2400) < 1e-9
+                   and report['openai']['request_hit_ratio'] == 0.5
+                   and abs(report['azure']['hit_ratio'] - 256 / 300) < 1e-9))
+    return checks
+
+def main():
+    print("🧪 提示词前缀缓存测试")
+    print("-" * 50)
+
+    checks = test_messages() + test_stats()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
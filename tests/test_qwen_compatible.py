@@ -0,0 +1,175 @@
+"""
+通义千问OpenAI兼容模式测试脚本
+
+使用本地模拟的OpenAI兼容接口代替DashScope的兼容接口，不需要API密钥：
+- api='openai' 时发送messages格式的请求（包含系统提示词），结果与OpenAI客户端相同
+- 流式请求带 stream_options，最后一个数据块返回usage
+- SDK与HTTP传输结果一致，HTTP传输复用连接池
+- 调用方式可以在初始化时指定，也可以按请求选择；默认仍使用DashScope SDK
+- 异步接口使用AsyncOpenAI
+"""
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import AIModelManager, QwenClient, collect_stream
+import platforms.qwen.client as qwen_module
+
+def fake_generation(calls: list):
+    """替换Generation.call，记录调用参数"""
+
+    def call(model, stream=False, **kwargs):
+        calls.append(dict(kwargs, model=model, stream=stream))
+        response = SimpleNamespace(status_code=200, usage={'input_tokens': 3, 'output_tokens': 2},
+                                   output=SimpleNamespace(text='generation', finish_reason='stop'))
+        return iter([response]) if stream else response
+
+    return staticmethod(call)
+
+def same_result(a, b) -> bool:
+    return all(a.get(key) == b.get(key) for key in ('success', 'content', 'model')) and a['usage'] == b['usage']
+
+def test_compatible(server: MockOpenAIServer):
+    checks = []
+    expected = ''.join(server.token(i) for i in range(server.chunks))
+    client = QwenClient(api_key='test', base_url=server.base_url)
+
+    result = client.chat('你好', model='qwen-plus', system_prompt='你是助手', api='openai')
+    request = server.requests[-1]
+    checks.append(("api='openai'时发送messages格式的请求",
+                   result['success'] and result['content'] == expected and result['usage']['prompt_tokens'] == 10
+                   and request['messages'] == [{'role': 'system', 'content': '你是助手'},
+                                               {'role': 'user', 'content': '你好'}]
+                   and request['model'] == 'qwen-plus' and request['max_tokens'] == 1000))
+
+    stream_result = collect_stream(client.chat_stream('你好', model='qwen-plus', api='openai'))
+    request = server.requests[-1]
+    checks.append(("流式请求带stream_options并返回usage",
+                   stream_result['success'] and stream_result['content'] == expected
+                   and request['stream_options'] == {'include_usage': True}
+                   and stream_result['usage']['completion_tokens'] == server.chunks))
+
+    http_client = QwenClient(api_key='test', base_url=server.base_url, api='openai', transport='http')
+    http_result = http_client.chat('你好', model='qwen-plus')
+    http_stream = collect_stream(http_client.chat_stream('你好', model='qwen-plus'))
+    transport = http_client.http
+    for _ in range(5):
+        http_client.chat('你好', model='qwen-plus')
+    pool = transport.pool.connection_from_url(server.base_url)
+    checks.append(("HTTP传输结果与SDK一致，复用连接池",
+                   same_result(http_result, result) and same_result(http_stream, stream_result)
+                   and http_client.http is transport and pool.num_connections == 1))
+
+    server.latency = 0.5
+    result = http_client.chat('你好', model='qwen-plus', timeout=0.1)
+    server.latency = 0.0
+    checks.append(("兼容模式同样遵守截止时间", result['code'] == 'deadline_exceeded'))
+    return checks
+
+def test_selection(server: MockOpenAIServer):
+    checks = []
+    calls = []
+    original = qwen_module.Generation.call
+    qwen_module.Generation.call = fake_generation(calls)
+    try:
+        client = QwenClient(api_key='test', base_url=server.base_url)
+        count = len(server.requests)
+        result = client.chat('你好')
+        chunks = list(client.chat_stream('你好'))
+        checks.append(("默认使用DashScope SDK (Generation.call)",
+                       result['content'] == 'generation' and chunks[-1]['usage'] is not None
+                       and calls[0]['prompt'] == '你好' and len(server.requests) == count))
+
+        client.chat('你好', system_prompt='你是助手')
+        checks.append(("Generation模式有系统提示词时使用messages",
+                       calls[-1]['messages'][0] == {'role': 'system', 'content': '你是助手'}
+                       and 'prompt' not in calls[-1]))
+
+        client = QwenClient(api_key='test', base_url=server.base_url, api='openai')
+        result = client.chat('你好', api='generation')
+        compatible = client.chat('你好')
+        checks.append(("初始化时指定调用方式，单次请求可以覆盖",
+                       result['content'] == 'generation' and compatible['content'].startswith('t0')
+                       and len(server.requests) == count + 1))
+
+        manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+        manager.clients['qwen'] = QwenClient(api_key='test', base_url=server.base_url)
+        result = manager.chat('qwen', '你好', api='openai')
+        checks.append(("管理器按请求传递调用方式",
+                       result['content'].startswith('t0') and manager.prefix_cache_report()['qwen']['requests'] == 1))
+    finally:
+        qwen_module.Generation.call = original
+
+    try:
+        QwenClient(api_key='test').chat('你好', api='legacy')
+        checks.append(("未知的调用方式抛出ValueError", False))
+    except ValueError:
+        checks.append(("未知的调用方式抛出ValueError", True))
+    return checks
+
+class FakeAsyncStream:
+    """与AsyncOpenAI的AsyncStream结构相同：可异步迭代，close()为协程"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.closed = False
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            await asyncio.sleep(0)
+            yield chunk
+
+    async def close(self):
+        self.closed = True
+
+def test_async():
+    calls = []
+    streams = []
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=2, total_tokens=12, prompt_tokens_details=None)
+
+    def delta(content):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))], usage=None)
+
+    async def create(timeout=None, **params):
+        calls.append(params)
+        if params.get('stream'):
+            streams.append(FakeAsyncStream([delta('异步'), delta('回复'), SimpleNamespace(choices=[], usage=usage)]))
+            return streams[-1]
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='异步回复'))], usage=usage)
+
+    client = QwenClient(api_key='test', api='openai')
+    client._async_client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+
+    async def run():
+        result = await client.achat('你好', system_prompt='你是助手')
+        chunks = [chunk async for chunk in client.achat_stream('你好')]
+        return result, chunks
+
+    result, chunks = asyncio.run(run())
+    return [("异步接口使用AsyncOpenAI，流结束时关闭",
+             result['content'] == '异步回复' and calls[0]['messages'][0]['role'] == 'system'
+             and ''.join(c['content'] for c in chunks) == '异步回复' and chunks[-1]['usage']['total_tokens'] == 12
+             and calls[1]['stream_options'] == {'include_usage': True} and streams[0].closed)]
+
+def main():
+    print("🧪 通义千问OpenAI兼容模式测试")
+    print("-" * 50)
+
+    with MockOpenAIServer(chunks=10) as server:
+        checks = test_compatible(server) + test_selection(server)
+    checks += test_async()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
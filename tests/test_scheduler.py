@@ -0,0 +1,183 @@
+"""
+优先级与租户公平排队测试脚本
+
+使用模拟的平台客户端测试，不需要API密钥：
+- 名额紧张时交互式请求先于排队中的批量请求
+- 同一优先级内各租户获得的名额与权重成正比，空闲租户不积累额度
+- 排队超时返回None / deadline_exceeded
+- 名额数可以跟随自适应并发上限
+"""
+import os
+import sys
+import time
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, ConcurrencyController, FairScheduler
+from platforms.batch_runner import BatchRunner
+
+KEY = ('mock', 'mock-model')
+
+def wait_until(condition, timeout: float = 2.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.001)
+    return False
+
+def waiting(scheduler: FairScheduler) -> int:
+    return sum(scheduler.report()['mock:mock-model']['waiting'].values())
+
+def grant_order(scheduler: FairScheduler, requests):
+    """
+    占满名额后按顺序加入排队的请求，再释放名额，返回获得名额的顺序
+
+    Args:
+        requests: [(标签, 租户, 优先级)]，名额数需为1
+    """
+    holder = scheduler.acquire(KEY)
+    order = []
+
+    def run(label, tenant, priority):
+        ticket = scheduler.acquire(KEY, tenant, priority, timeout=5)
+        order.append(label)
+        ticket.release()
+
+    threads = []
+    for count, (label, tenant, priority) in enumerate(requests, 1):
+        thread = threading.Thread(target=run, args=(label, tenant, priority))
+        thread.start()
+        threads.append(thread)
+        wait_until(lambda: waiting(scheduler) == count)
+    holder.release()
+    for thread in threads:
+        thread.join()
+    return order
+
+def test_scheduler():
+    checks = []
+
+    order = grant_order(FairScheduler(capacity=1),
+                        [('b1', 'a', 'batch'), ('b2', 'a', 'batch'), ('i1', 'a', 'interactive'),
+                         ('b3', 'b', 'batch'), ('i2', 'b', None)])
+    checks.append(("交互式请求先于排队中的批量请求", sorted(order[:2]) == ['i1', 'i2']))
+
+    scheduler = FairScheduler(capacity=1, weights={'gold': 3})
+    order = grant_order(scheduler, [(tenant, tenant, None) for tenant in ['gold'] * 30 + ['free'] * 30])
+    first = order[:20]
+    checks.append(("名额按租户权重分配（3:1）", first.count('gold') == 15 and first.count('free') == 5))
+
+    # gold单独使用了大量名额后free才开始发送，双方的份额仍按权重分配，gold不因之前的使用被惩罚
+    scheduler = FairScheduler(capacity=1)
+    for _ in range(100):
+        scheduler.acquire(KEY, 'gold').release()
+    order = grant_order(scheduler, [(tenant, tenant, None) for tenant in ['gold'] * 10 + ['free'] * 10])
+    checks.append(("空闲租户不积累额度", order[:10].count('gold') == 5))
+
+    scheduler = FairScheduler(capacity=1)
+    holder = scheduler.acquire(KEY)
+    start = time.monotonic()
+    ticket = scheduler.acquire(KEY, timeout=0.1)
+    waited = time.monotonic() - start
+    holder.release()
+    report = scheduler.report()['mock:mock-model']
+    checks.append(("排队超时返回None，不占用名额",
+                   ticket is None and 0.09 <= waited < 0.5 and report['inflight'] == 0
+                   and waiting(scheduler) == 0 and scheduler.acquire(KEY, timeout=0) is not None))
+
+    limits = {'value': 1}
+    scheduler = FairScheduler(capacity=lambda key: limits['value'])
+    first = scheduler.acquire(KEY)
+    blocked = scheduler.acquire(KEY, timeout=0.01) is None
+    limits['value'] = 2
+    checks.append(("名额数跟随上限函数", first is not None and blocked and scheduler.acquire(KEY, timeout=0.01)))
+
+    try:
+        FairScheduler().acquire(KEY, priority='urgent')
+        checks.append(("未知的优先级抛出ValueError", False))
+    except ValueError:
+        checks.append(("未知的优先级抛出ValueError", True))
+    return checks
+
+class MockClient:
+    """模拟平台客户端：每个请求耗时latency秒"""
+
+    def __init__(self, latency: float = 0.01):
+        self.latency = latency
+
+    def chat(self, message, model=None, deadline=None, **kwargs):
+        time.sleep(self.latency)
+        return ChatResult.ok(message, model)
+
+    def chat_stream(self, message, model=None, deadline=None, **kwargs):
+        time.sleep(self.latency)
+        yield ChatResult.chunk(message, model)
+
+def test_manager():
+    checks = []
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=False,
+                             scheduler=FairScheduler(capacity=2, weights={'web': 3}))
+    manager.clients['mock'] = MockClient()
+    counts = {'web': 0, 'internal': 0}
+    stop = threading.Event()
+
+    def worker(tenant):
+        while not stop.is_set():
+            if manager.chat('mock', '你好', model='mock-model', tenant=tenant)['success']:
+                counts[tenant] += 1
+
+    threads = [threading.Thread(target=worker, args=(tenant,)) for tenant in ('web', 'internal') for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    time.sleep(1.0)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    ratio = counts['web'] / max(counts['internal'], 1)
+    checks.append((f"管理器按租户权重分配名额（web:internal = {ratio:.1f}，配置为3）", 2.0 <= ratio <= 4.0))
+
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=FairScheduler(capacity=1))
+    manager.clients['mock'] = MockClient(latency=0.3)
+    blocker = threading.Thread(target=manager.chat, args=('mock', '你好'), kwargs={'model': 'mock-model'})
+    blocker.start()
+    time.sleep(0.05)
+    result = manager.chat('mock', '你好', model='mock-model', timeout=0.1)
+    chunks = list(manager.chat_stream('mock', '你好', model='mock-model', timeout=0.1))
+    blocker.join()
+    checks.append(("排队超过截止时间返回deadline_exceeded",
+                   result['code'] == 'deadline_exceeded' and chunks[-1]['code'] == 'deadline_exceeded'))
+
+    controller = ConcurrencyController(initial=3)
+    manager = AIModelManager(processes=0, adaptive_concurrency=controller, scheduler=True)
+    manager.clients['mock'] = MockClient()
+    manager.chat('mock', '你好', model='mock-model', tenant='web')
+    list(manager.chat_stream('mock', '你好', model='mock-model', priority='batch'))
+    scheduler = manager.scheduler_report()['mock:mock-model']
+    concurrency = manager.concurrency_report()['mock:mock-model']
+    checks.append(("同时开启自适应并发时名额数跟随其上限，名额均已归还",
+                   scheduler['capacity'] == 3 and scheduler['inflight'] == 0 and concurrency['inflight'] == 0
+                   and concurrency['samples'] == 2))
+
+    runner = BatchRunner(manager=manager, platform='mock')
+    checks.append(("批量任务默认以batch优先级发送", runner.defaults.get('priority') == 'batch'))
+    return checks
+
+def main():
+    print("🧪 优先级与租户公平排队测试")
+    print("-" * 50)
+
+    checks = test_scheduler() + test_manager()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
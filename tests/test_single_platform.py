@@ -10,7 +10,7 @@ from dotenv import load_dotenv
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from platforms import AIModelManager
+from platforms import AIModelManager, collect_stream
 
 # 加载环境变量
 load_dotenv()
@@ -52,12 +52,12 @@ def interactive_chat(platform: str):
             
             if use_stream:
                 print("AI: ", end="", flush=True)
-                for chunk in manager.chat_stream(platform, user_input):
-                    if chunk['success']:
-                        print(chunk['content'], end="", flush=True)
-                    else:
-                        print(f"\n❌ 错误: {chunk['error']}")
-                        break
+                result = collect_stream(
+                    manager.chat_stream(platform, user_input),
+                    on_content=lambda content: print(content, end="", flush=True)
+                )
+                if not result['success']:
+                    print(f"\n❌ 错误: {result['error']}")
                 print()  # 换行
             else:
                 start_time = time.time()
@@ -97,15 +97,18 @@ def single_test(platform: str, message: str, stream: bool = False):
     try:
         if stream:
             print("回复: ", end="", flush=True)
-            start_time = time.time()
-            for chunk in manager.chat_stream(platform, message):
-                if chunk['success']:
-                    print(chunk['content'], end="", flush=True)
-                else:
-                    print(f"\n❌ 错误: {chunk['error']}")
-                    return
-            end_time = time.time()
-            print(f"\n⏱️  响应时间: {end_time - start_time:.2f}s")
+            result = collect_stream(
+                manager.chat_stream(platform, message),
+                on_content=lambda content: print(content, end="", flush=True)
+            )
+            if not result['success']:
+                print(f"\n❌ 错误: {result['error']}")
+                return
+            print(f"\n⏱️  响应时间: {result['elapsed']:.2f}s")
+            if result['ttft'] is not None:
+                print(f"⚡ 首字延迟: {result['ttft']:.2f}s")
+            if result.get('usage'):
+                print(f"📊 Token使用: {result['usage']}")
         else:
             start_time = time.time()
             response = manager.chat(platform, message)
@@ -0,0 +1,253 @@
+"""
+请求合并测试脚本
+
+直接测试 SingleFlight / StreamFlight，不需要API密钥：
+- 并发的相同请求只调用一次上游，共享结果和异常
+- 后加入的流式请求先收到已经产生的数据块，再接收新的数据块
+- 所有订阅者都离开后关闭上游流，上游在等待下一个数据块时也立即关闭
+- 合并计数
+"""
+import os
+import sys
+import time
+import queue
+import threading
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms.cancellation import CancelToken
+from platforms.singleflight import SingleFlight, StreamFlight, request_key, is_deterministic
+
+class Source:
+    """受控的上游流：put() 放入一个数据块，finish() 结束；interval不为None时每隔interval秒自动产生数据块"""
+
+    def __init__(self, interval=None):
+        self.queue = queue.Queue()
+        self.interval = interval
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def put(self, chunk):
+        self.queue.put(chunk)
+
+    def finish(self, error=None):
+        self.queue.put(error or StopIteration)
+
+    def __call__(self):
+        try:
+            while True:
+                if self.interval is not None:
+                    time.sleep(self.interval)
+                    item = self.produced
+                else:
+                    item = self.queue.get(timeout=5)
+                if item is StopIteration:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                self.produced += 1
+                yield item
+        finally:
+            self.closed.set()
+
+class SlowStream:
+    """模拟SDK的流：第一个数据块之后等待pause秒，close()会中断阻塞中的读取"""
+
+    def __init__(self, pause: float):
+        self.pause = pause
+        self.produced = 0
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.produced and self.closed.wait(self.pause):
+            raise StopIteration
+        self.produced += 1
+        return self.produced
+
+    def close(self):
+        self.closed.set()
+
+def slow_generator(pause: float, cancel: CancelToken, closed: threading.Event):
+    """生成器形式的上游流：正在读取时无法从其他线程关闭，由取消句柄中断等待"""
+    try:
+        yield 1
+        if not cancel.wait(pause):
+            yield 2
+    finally:
+        closed.set()
+
+def collect(stream, output):
+    """在后台线程读取订阅，返回线程"""
+    def run():
+        try:
+            for chunk in stream:
+                output.append(chunk)
+        except Exception as e:
+            output.append(e)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
+
+def test_single_flight():
+    checks = []
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def upstream():
+        calls.append(1)
+        release.wait(2)
+        return 'result'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('k', upstream))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    checks.append(("并发的相同请求只调用一次上游，共享结果",
+                   len(calls) == 1 and sorted(results) == [('result', False)] + [('result', True)] * 4))
+    checks.append(("合并计数", flight.leaders == 1 and flight.coalesced == 4))
+
+    def failing():
+        release.wait(2)
+        raise ValueError('upstream error')
+
+    release.clear()
+    errors = []
+
+    def call():
+        try:
+            flight.do('e', failing)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    checks.append(("异常共享给所有等待的请求", len(errors) == 3 and len({id(e) for e in errors}) == 1))
+
+    release.clear()
+    leader = threading.Thread(target=lambda: flight.do('t', upstream))
+    leader.start()
+    time.sleep(0.05)
+    try:
+        flight.do('t', upstream, timeout=0.05)
+        timed_out = False
+    except TimeoutError:
+        timed_out = True
+    release.set()
+    leader.join(2)
+    result, shared = flight.do('t', lambda: 'again')
+    checks.append(("follower等待超时，完成的请求不再合并", timed_out and result == 'again' and not shared))
+
+    checks.append(("合并键与参数顺序无关",
+                   request_key('qwen', 'hi', {'a': 1, 'b': 2}) == request_key('qwen', 'hi', {'b': 2, 'a': 1})
+                   and is_deterministic({'temperature': 0}) and not is_deterministic({'temperature': 0.7})
+                   and is_deterministic({}, coalesce=True)))
+    return checks
+
+def test_stream_flight():
+    checks = []
+    flight = StreamFlight()
+    source = Source()
+    first, second = [], []
+
+    leader = flight.stream('k', source)
+    source.put('a')
+    source.put('b')
+    first_thread = collect(leader, first)
+    time.sleep(0.1)
+    follower = flight.stream('k', lambda: (_ for _ in ()).throw(AssertionError('不应创建第二个上游流')))
+    second_thread = collect(follower, second)
+    time.sleep(0.1)
+    replayed = list(second)
+    source.put('c')
+    source.finish()
+    first_thread.join(2)
+    second_thread.join(2)
+    checks.append(("后加入的请求先收到已经产生的数据块，再接收新的数据块",
+                   replayed == ['a', 'b'] and first == second == ['a', 'b', 'c']))
+    checks.append(("流式合并计数", flight.leaders == 1 and flight.coalesced == 1))
+
+    fresh = flight.stream('k', lambda: iter(['new']))
+    checks.append(("流结束后相同的请求重新调用上游", list(fresh) == ['new'] and flight.leaders == 2))
+
+    source = Source()
+    outputs = [[], []]
+    streams = [flight.stream('e', source), flight.stream('e', source)]
+    threads = [collect(stream, output) for stream, output in zip(streams, outputs)]
+    source.put('x')
+    source.finish(RuntimeError('upstream error'))
+    for thread in threads:
+        thread.join(2)
+    checks.append(("上游异常共享给所有订阅者",
+                   all(output[0] == 'x' and isinstance(output[1], RuntimeError) for output in outputs)))
+
+    source = Source(interval=0.01)
+    streams = [flight.stream('c', source), flight.stream('c', source)]
+    next(streams[0])
+    next(streams[1])
+    streams[0].close()
+    time.sleep(0.05)
+    still_open = not source.closed.is_set()
+    streams[1].close()
+    closed = source.closed.wait(1)
+    produced = source.produced
+    time.sleep(0.05)
+    checks.append(("最后一个订阅者离开后关闭上游流",
+                   still_open and closed and source.produced == produced))
+
+    # 上游在第一个数据块之后3秒才产生下一个数据块，订阅者离开时不等待下一个数据块
+    slow = SlowStream(pause=3)
+    streams = [flight.stream('s', lambda: slow), flight.stream('s', lambda: slow)]
+    next(streams[0])
+    next(streams[1])
+    streams[0].close()
+    still_open = not slow.closed.wait(0.1)
+    start = time.monotonic()
+    streams[1].close()
+    closed = slow.closed.wait(1)
+    elapsed = time.monotonic() - start
+    replaced = flight.stream('s', lambda: iter(['new']))
+    checks.append((f"上游等待下一个数据块时，最后一个订阅者离开后立即关闭（{elapsed * 1000:.0f}ms）",
+                   still_open and closed and elapsed < 0.5 and list(replaced) == ['new']))
+
+    cancel, generator_closed = CancelToken(), threading.Event()
+    stream = flight.stream('g', lambda: slow_generator(3, cancel, generator_closed), cancel)
+    next(stream)
+    time.sleep(0.05)
+    start = time.monotonic()
+    stream.close()
+    closed = generator_closed.wait(1)
+    elapsed = time.monotonic() - start
+    checks.append((f"生成器形式的上游流通过取消句柄立即关闭（{elapsed * 1000:.0f}ms）",
+                   closed and cancel.cancelled and elapsed < 0.5))
+    return checks
+
+def main():
+    print("🧪 请求合并测试")
+    print("-" * 50)
+
+    checks = test_single_flight() + test_stream_flight()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,159 @@
+"""
+客户端停止条件测试脚本
+
+停止条件的增量检查使用构造的数据块测试；关闭上游流使用本地模拟的OpenAI兼容接口测试，不需要API密钥：
+- 字符串（跨数据块）、正则表达式、回调函数、字节数和行数上限
+- 满足条件时截断输出、关闭上游流，最后一个数据块带停止原因和节省的token数
+- chat 指定stop_when时以流式方式请求并返回截断后的结果
+- OpenAI兼容平台的客户端都在停止后断开与上游的连接
+- 按实际提供结果的平台统计，未指定max_tokens时按客户端的默认值计算节省的token数
+"""
+import os
+import re
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import (AIModelManager, AIHubMixClient, AzureClient, ChatResult, OpenAIClient, StopCondition,
+                       collect_stream)
+from platforms.stop import apply_stop
+
+def run(chunks, stop_when, max_tokens=None):
+    """返回(输出文本, 最后一个数据块)"""
+    stream = (ChatResult.chunk(content, 'mock') for content in chunks)
+    output = list(apply_stop(stream, StopCondition.of(stop_when), max_tokens))
+    return ''.join(chunk['content'] for chunk in output), output[-1]
+
+def test_conditions():
+    checks = []
+
+    text, last = run(["前言\n```py", "thon\nprint(1)\n`", "``\n后记", "更多内容"],
+                     re.compile(r"```.*?\n.*?```", re.S), max_tokens=100)
+    checks.append(("正则表达式：只返回到第一个代码块结束",
+                   text == "前言\n```python\nprint(1)\n```" and last['stop_reason'] == 'pattern'
+                   and last['content'] == '' and 0 < last['tokens_saved'] < 100))
+
+    text, _ = run(["结果: 42 E", "ND 后面的内容"], "END")
+    checks.append(("字符串跨数据块匹配", text == "结果: 42 END"))
+
+    text, _ = run(["abc", "def"], ["zzz", "cd", "bcdef"])
+    checks.append(("多个字符串取最早结束的匹配", text == "abcd"))
+
+    text, last = run(["你好", "世界", "！"], StopCondition(max_bytes=7))
+    checks.append(("字节数上限按UTF-8计算，不截断多字节字符", text == "你好" and last['stop_reason'] == 'max_bytes'))
+
+    text, last = run(["第一行\n第二", "行\n第三行\n", "第四行"], StopCondition(max_lines=2))
+    checks.append(("行数上限", text == "第一行\n第二行\n" and last['stop_reason'] == 'max_lines'))
+
+    def first_json(text):
+        return '{' in text and text.count('{') == text.count('}')
+
+    text, last = run(['答案：{"a": {', '"b": 1}', '}\n其他', '内容'], first_json)
+    checks.append(("回调函数在满足条件的数据块末尾停止",
+                   text == '答案：{"a": {"b": 1}}\n其他' and last['stop_reason'] == 'predicate'))
+
+    text, last = run(["没有", "匹配"], "END")
+    checks.append(("未满足条件时输出完整内容，没有停止数据块", text == "没有匹配" and 'stop_reason' not in last))
+
+    stream = iter([ChatResult.chunk('部分', 'mock'), ChatResult.fail('upstream error', 503)])
+    output = list(apply_stop(stream, StopCondition.of("END")))
+    checks.append(("失败的数据块原样返回", not output[-1]['success'] and len(output) == 2))
+
+    shared = ChatResult.chunk('abcEND xyz', 'mock')
+    output = list(apply_stop(iter([shared]), StopCondition.of("END")))
+    checks.append(("截断时不修改原数据块（合并的流中数据块是共享的）",
+                   output[0]['content'] == 'abcEND' and shared['content'] == 'abcEND xyz'))
+    return checks
+
+def test_upstream(server: MockOpenAIServer):
+    checks = []
+    base_url = server.base_url
+    clients = {
+        'openai': OpenAIClient(api_key='test', base_url=base_url),
+        'aihubmix': AIHubMixClient(api_key='test', base_url=base_url),
+        'azure': AzureClient(api_key='test', endpoint=base_url[:-3], api_version='2024-02-15-preview'),
+        'openai (http)': OpenAIClient(api_key='test', base_url=base_url, transport='http'),
+    }
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+    manager.clients.update(clients)
+
+    closed = []
+    for name in clients:
+        count = len(server.disconnects)
+        chunks = list(manager.chat_stream(name, '你好', model='gpt-4o', max_tokens=200, stop_when='t5 '))
+        disconnected = server.wait_disconnect(count + 1, timeout=2)
+        sent = server.disconnects[-1][1] if disconnected else None
+        text = ''.join(chunk['content'] for chunk in chunks)
+        if text == ''.join(server.token(i) for i in range(6)) and sent is not None and sent < 20:
+            closed.append(name)
+    checks.append((f"停止后关闭上游流（{', '.join(closed)}）", len(closed) == len(clients)))
+
+    last = chunks[-1]
+    checks.append(("最后一个数据块带停止原因和节省的token数",
+                   last['stop_reason'] == 'pattern' and last['generated_tokens'] == 5
+                   and last['tokens_saved'] == 195))
+
+    result = manager.chat('openai', '你好', max_tokens=200, stop_when=StopCondition(max_lines=1, max_bytes=9))
+    checks.append(("chat指定stop_when时以流式方式请求，返回截断后的结果",
+                   result['success'] and result['content'] == 't0 t1 t2 ' and result['stop_reason'] == 'max_bytes'
+                   and server.requests[-1].get('stream') is True))
+
+    result = collect_stream(manager.chat_stream('openai', '你好', stop_when='不会出现'))
+    checks.append(("未满足条件时读取完整的流", result['content'] == ''.join(server.token(i) for i in range(server.chunks))))
+
+    report = manager.stop_report()
+    checks.append(("按平台统计停止次数和节省的token数",
+                   report['openai']['stopped'] == 2 and report['openai']['reasons'] == {'pattern': 1, 'max_bytes': 1}
+                   and report['aihubmix']['tokens_saved'] == 195))
+    return checks
+
+class MockClient:
+    """模拟平台客户端：默认最大输出token数为300，rate_limited为True时请求失败"""
+
+    def __init__(self, rate_limited=False):
+        self.rate_limited = rate_limited
+
+    def chat_stream(self, message, model=None, max_tokens: int = 300, **kwargs):
+        if self.rate_limited:
+            yield ChatResult.fail('rate limited', 429, error_type='rate_limited')
+            return
+        for i in range(100):
+            yield ChatResult.chunk(f"t{i} ", model)
+
+def test_manager_stats():
+    checks = []
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False)
+    manager.clients.update(limited=MockClient(rate_limited=True), backup=MockClient())
+
+    chunks = list(manager.chat_stream('backup', '你好', stop_when='t5 '))
+    checks.append(("未指定max_tokens时按客户端的默认值计算节省的token数",
+                   chunks[-1]['tokens_saved'] == 300 - chunks[-1]['generated_tokens']))
+
+    chunks = list(manager.chat_stream('limited', '你好', model='m', stop_when='t5 ', max_completion_tokens=200,
+                                      fallback=[('backup', 'm')]))
+    report = manager.stop_report()
+    checks.append(("降级时按实际提供结果的平台统计，max_completion_tokens优先",
+                   chunks[0]['platform'] == 'backup' and 'limited' not in report
+                   and report['backup']['stopped'] == 2
+                   and chunks[-1]['tokens_saved'] == 200 - chunks[-1]['generated_tokens']))
+    return checks
+
+def main():
+    print("🧪 客户端停止条件测试")
+    print("-" * 50)
+
+    checks = test_conditions() + test_manager_stats()
+    with MockOpenAIServer(chunks=200, chunk_interval=0.005) as server:
+        checks += test_upstream(server)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
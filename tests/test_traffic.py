@@ -0,0 +1,195 @@
+"""
+流量分配与影子流量测试脚本
+
+使用模拟的平台客户端测试，不需要API密钥：
+- 请求按权重分配到各路由，相同route_key总是分配到同一个路由
+- 影子请求按比例发送到候选平台，在后台执行，不阻塞主请求
+- 主请求和影子请求的延迟、TTFT、token数成对记录，统计差值
+- 同时进行的影子请求数超过上限时丢弃
+- 配置字符串解析
+"""
+import os
+import sys
+import time
+import threading
+from collections import Counter
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import AIModelManager, ChatResult, TrafficRouter, Usage
+from platforms.traffic import create_router, parse_routes
+
+class MockClient:
+    """模拟平台客户端：首个数据块等待ttft秒，之后每个数据块latency秒"""
+
+    def __init__(self, name: str, ttft: float = 0.0, latency: float = 0.0, completion_tokens: int = 3):
+        self.name = name
+        self.ttft = ttft
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def usage(self):
+        return Usage(10, self.completion_tokens)
+
+    def chat(self, message, model=None, **kwargs):
+        with self._lock:
+            self.calls.append(dict(kwargs, model=model, stream=False))
+        time.sleep(self.ttft + self.latency)
+        return ChatResult.ok(f"{self.name}: {message}", model, self.usage())
+
+    def chat_stream(self, message, model=None, **kwargs):
+        with self._lock:
+            self.calls.append(dict(kwargs, model=model, stream=True))
+        time.sleep(self.ttft)
+        yield ChatResult.chunk(self.name, model)
+        time.sleep(self.latency)
+        yield ChatResult.chunk(f": {message}", model, self.usage())
+
+def create_manager(router: TrafficRouter, **clients):
+    manager = AIModelManager(processes=0, adaptive_concurrency=False, scheduler=False, admission=False,
+                             traffic=router)
+    manager.clients.update(clients)
+    return manager
+
+def wait_for(condition, timeout: float = 2.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return condition()
+
+def test_split():
+    checks = []
+    router = TrafficRouter(seed=1)
+    router.add('gpt-4o', [('openai', 'gpt-4o', 80), ('azure', 'gpt-4o-deployment', 20)])
+    openai, azure = MockClient('openai'), MockClient('azure')
+    manager = create_manager(router, openai=openai, azure=azure)
+
+    platforms = Counter(manager.routed_chat('gpt-4o', '你好')['platform'] for _ in range(1000))
+    checks.append((f"按权重分配（openai {platforms['openai']}，azure {platforms['azure']}）",
+                   750 <= platforms['openai'] <= 850 and platforms['openai'] + platforms['azure'] == 1000
+                   and azure.calls[0]['model'] == 'gpt-4o-deployment'))
+
+    sticky = {manager.routed_chat('gpt-4o', '你好', route_key='user-42')['platform'] for _ in range(20)}
+    spread = Counter(router.pick('gpt-4o', route_key=f'user-{i}').platform for i in range(1000))
+    checks.append(("相同route_key总是分配到同一个路由，不同key按权重分布",
+                   len(sticky) == 1 and 700 <= spread['openai'] <= 900))
+
+    report = manager.traffic_report()['gpt-4o']
+    checks.append(("按路由统计请求数和延迟",
+                   report['routes']['openai:gpt-4o']['requests'] == platforms['openai'] + ('openai' in sticky) * 20
+                   and report['routes']['azure:gpt-4o-deployment']['weight'] == 0.2
+                   and report['routes']['openai:gpt-4o']['latency_p50'] is not None
+                   and report['shadow'] is None))
+
+    try:
+        manager.routed_chat('unknown', '你好')
+        checks.append(("未配置的逻辑模型抛出ValueError", False))
+    except ValueError:
+        checks.append(("未配置的逻辑模型抛出ValueError", True))
+    return checks
+
+def test_shadow():
+    checks = []
+    router = TrafficRouter(seed=2)
+    router.add('gpt-4o', [('openai', 'gpt-4o')], shadow=('aihubmix', 'gpt-4o-mini'), shadow_rate=1.0)
+    openai = MockClient('openai', ttft=0.01, latency=0.01)
+    candidate = MockClient('aihubmix', ttft=0.2, latency=0.05, completion_tokens=5)
+    manager = create_manager(router, openai=openai, aihubmix=candidate)
+
+    start = time.perf_counter()
+    result = manager.routed_chat('gpt-4o', '你好', max_tokens=50, timeout=5)
+    elapsed = time.perf_counter() - start
+    checks.append(("影子请求不阻塞主请求，结果来自主路由",
+                   result['content'] == 'openai: 你好' and result['platform'] == 'openai' and elapsed < 0.15))
+    wait_for(lambda: router.samples('gpt-4o'))
+    shadow_call = candidate.calls[0]
+    checks.append(("影子请求使用候选模型，不继承截止时间",
+                   shadow_call['model'] == 'gpt-4o-mini' and shadow_call['max_tokens'] == 50
+                   and shadow_call['deadline'].remaining() > 30))
+
+    chunks = list(manager.routed_chat_stream('gpt-4o', '你好'))
+    checks.append(("流式请求同样分配路由", ''.join(c['content'] for c in chunks) == 'openai: 你好'))
+    wait_for(lambda: len(router.samples('gpt-4o')) == 2)
+
+    samples = router.samples('gpt-4o')
+    stream_pair = samples[-1]
+    checks.append(("主请求和影子请求成对记录延迟、TTFT和token数",
+                   len(samples) == 2 and samples[0]['primary']['ttft'] is None
+                   and stream_pair['primary']['route'] == 'openai:gpt-4o'
+                   and stream_pair['shadow']['route'] == 'aihubmix:gpt-4o-mini'
+                   and stream_pair['shadow']['ttft'] > stream_pair['primary']['ttft'] + 0.1
+                   and stream_pair['shadow']['completion_tokens'] == 5))
+
+    shadow = manager.traffic_report()['gpt-4o']['shadow']
+    checks.append(("统计影子请求与主请求的差值",
+                   shadow['mirrored'] == 2 and shadow['pairs'] == 2 and shadow['dropped'] == 0
+                   and 0.15 < shadow['latency_delta_p50'] < 0.5 and shadow['ttft_delta_p50'] > 0.1
+                   and shadow['completion_tokens_delta'] == 2 and shadow['prompt_tokens_delta'] == 0))
+
+    stream = manager.routed_chat_stream('gpt-4o', '你好')
+    next(stream)
+    stream.close()
+    wait_for(lambda: len(router.samples('gpt-4o')) == 3)
+    samples = router.samples('gpt-4o')
+    report = manager.traffic_report()['gpt-4o']
+    route = report['routes']['openai:gpt-4o']
+    checks.append(("调用方提前关闭的流同样计数并完成配对，不算错误、不计入差值",
+                   len(samples) == 3 and samples[-1]['primary']['complete'] is False
+                   and samples[-1]['shadow']['complete'] is True
+                   and route['requests'] == 3 and route['cancelled'] == 1 and route['errors'] == 0
+                   and report['shadow']['pairs'] == 3 and report['shadow']['completion_tokens_delta'] == 2))
+    manager.close()
+
+    router = TrafficRouter(shadow_workers=2, max_shadow_inflight=2)
+    router.add('glm', [('zhipu', 'glm-4')], shadow=('qwen', 'qwen-plus'), shadow_rate=1.0)
+    manager = create_manager(router, zhipu=MockClient('zhipu'), qwen=MockClient('qwen', ttft=0.2))
+    start = time.perf_counter()
+    results = [manager.routed_chat('glm', '你好') for _ in range(10)]
+    elapsed = time.perf_counter() - start
+    manager.close()
+    shadow = manager.traffic_report()['glm']['shadow']
+    checks.append((f"影子请求数超过上限时丢弃（复制{shadow['mirrored']}，丢弃{shadow['dropped']}）",
+                   all(r['success'] for r in results) and elapsed < 0.1
+                   and shadow['mirrored'] == 2 and shadow['dropped'] == 8 and shadow['pairs'] == 2))
+
+    router = TrafficRouter()
+    router.add('gpt-4o', [('openai', 'gpt-4o')], shadow=('missing', 'x'), shadow_rate=1.0)
+    manager = create_manager(router, openai=MockClient('openai'))
+    result = manager.routed_chat('gpt-4o', '你好')
+    manager.close()
+    routes = manager.traffic_report()['gpt-4o']['routes']
+    checks.append(("影子请求失败不影响主请求，计入候选平台的错误数",
+                   result['success'] and routes['missing:x']['errors'] == 1))
+    return checks
+
+def test_config():
+    routes = parse_routes("gpt-4o=openai:gpt-4o:90|azure:gpt-4o-deployment:10; glm=zhipu:glm-4")
+    router = create_router("gpt-4o=openai:gpt-4o:90|azure:gpt-4o-deployment:10",
+                           "gpt-4o=aihubmix:gpt-4o:0.05")
+    policy = router.policy('gpt-4o')
+    return [("解析流量分配和影子流量配置",
+             [(r.platform, r.model, r.weight) for r in routes['gpt-4o']]
+             == [('openai', 'gpt-4o', 90.0), ('azure', 'gpt-4o-deployment', 10.0)]
+             and routes['glm'][0].weight == 1.0 and policy.shadow.name == 'aihubmix:gpt-4o'
+             and policy.shadow_rate == 0.05 and create_router('') is None)]
+
+def main():
+    print("🧪 流量分配与影子流量测试")
+    print("-" * 50)
+
+    checks = test_split() + test_shadow() + test_config()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,119 @@
+"""
+轻量HTTP传输测试脚本
+
+使用本地模拟的OpenAI兼容接口对比 transport='http' 与SDK路径的结果，不需要API密钥：
+- 普通请求和流式请求的内容、usage一致（OpenAI、AIHubMix、Azure）
+- HTTP错误转换为相同的错误分类
+- 连接池中的连接被复用
+"""
+import os
+import sys
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import OpenAIClient, AIHubMixClient, AzureClient, collect_stream
+from platforms.transport import SSEStream
+
+def create_clients(base_url: str, transport: str):
+    return {
+        'openai': OpenAIClient(api_key='test', base_url=base_url, transport=transport),
+        'aihubmix': AIHubMixClient(api_key='test', base_url=base_url, transport=transport),
+        'azure': AzureClient(api_key='test', endpoint=base_url[:-3], api_version='2024-02-15-preview',
+                             transport=transport),
+    }
+
+def same_result(a, b) -> bool:
+    keys = ('success', 'content', 'model', 'deployment_name')
+    return all(a.get(key) == b.get(key) for key in keys) and a.get('usage') == b.get('usage')
+
+def test_parity(server: MockOpenAIServer):
+    checks = []
+    sdk_clients = create_clients(server.base_url, 'sdk')
+    http_clients = create_clients(server.base_url, 'http')
+    for platform, http_client in http_clients.items():
+        sdk_client = sdk_clients[platform]
+        checks.append((f"{platform}: 普通请求结果一致",
+                       same_result(http_client.chat('你好', model='mock-model'),
+                                   sdk_client.chat('你好', model='mock-model'))))
+
+        http_result = collect_stream(http_client.chat_stream('你好', model='mock-model'))
+        sdk_result = collect_stream(sdk_client.chat_stream('你好', model='mock-model'))
+        checks.append((f"{platform}: 流式请求结果一致",
+                       same_result(http_result, sdk_result) and http_result['chunk_count'] == server.chunks))
+    return checks
+
+def test_errors(server: MockOpenAIServer):
+    client = OpenAIClient(api_key='test', base_url=server.base_url, transport='http')
+    checks = []
+    for status, expected in ((429, 'rate_limited'), (401, 'auth_failed'), (503, 'upstream_unavailable')):
+        server.status = status
+        try:
+            result = client.chat('你好', model='mock-model')
+            stream_result = collect_stream(client.chat_stream('你好', model='mock-model'))
+        finally:
+            server.status = 200
+        checks.append((f"HTTP {status} -> {expected}",
+                       result['error_type'] == expected and stream_result['error_type'] == expected))
+
+    server.latency = 0.5
+    try:
+        result = client.chat('你好', model='mock-model', timeout=0.1)
+    finally:
+        server.latency = 0.0
+    checks.append(("超时 -> timeout", result['error_type'] == 'timeout'))
+    return checks
+
+def test_connection_reuse(server: MockOpenAIServer):
+    """连续的普通请求复用连接池中的连接，不新建连接"""
+    client = OpenAIClient(api_key='test', base_url=server.base_url, transport='http')
+    client.chat('你好', model='mock-model')
+    pools = client.http.pool.pools
+    connections_before = sum(p.num_connections for p in pools._container.values())
+    for _ in range(5):
+        client.chat('你好', model='mock-model')
+    connections_after = sum(p.num_connections for p in pools._container.values())
+    return [("普通请求复用连接", connections_after == connections_before)]
+
+def test_sse_parsing():
+    """SSE解析：注释、多行data、CRLF、跨读取边界的事件"""
+    class FakeResponse:
+        def __init__(self, parts):
+            self.parts = list(parts)
+
+        def read1(self, size):
+            return self.parts.pop(0) if self.parts else b''
+
+        def release_conn(self):
+            pass
+
+    body = (b': keep-alive\r\n\r\n'
+            b'data: {"choices": [{"delta": {"content": "a"}}]}\r\n\r\n'
+            b'data: {"choices": [{"delta":\ndata: {"content": "b"}}]}\n\n'
+            b'event: ping\nid: 3\n\n'
+            b'data: [DONE]\n\n')
+    parts = [body[i:i + 7] for i in range(0, len(body), 7)]
+    events = list(SSEStream(FakeResponse(parts)))
+    contents = [event['choices'][0]['delta']['content'] for event in events]
+    return [("SSE解析（注释、多行data、CRLF、分段到达）", contents == ['a', 'b'])]
+
+def main():
+    print("🧪 轻量HTTP传输测试")
+    print("-" * 50)
+
+    checks = test_sse_parsing()
+    with MockOpenAIServer(chunks=20, chunk_interval=0) as server:
+        checks += test_parity(server)
+        checks += test_errors(server)
+        checks += test_connection_reuse(server)
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,127 @@
+"""
+多进程执行模式测试脚本
+
+使用本地模拟的OpenAI兼容接口测试 AIModelManager(processes=2)，不需要API密钥：
+- 普通请求和流式请求的结果与当前进程执行时一致
+- 关闭流或取消时工作进程关闭上游连接
+- 截止时间传递到工作进程
+- 请求合并和usage统计仍在父进程完成
+"""
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mock_openai_server import MockOpenAIServer
+from platforms import AIModelManager, CancelToken, ChatResult, collect_stream
+from platforms.worker_pool import pack_result, unpack_result
+
+def test_pack_result():
+    """结果通过管道传递前后一致"""
+    from platforms import Usage
+    results = [
+        ChatResult.ok('你好', 'gpt-4o', Usage(10, 5, cached_tokens=3), deployment_name='dep'),
+        ChatResult.ok('', 'gpt-4o'),
+        ChatResult.fail('Rate limit reached', 'rate_limit_exceeded', retry_after=2.0),
+    ]
+    checks = [(f"结果编解码一致: {r.get('content', r.get('error'))!r}", unpack_result(pack_result(r)) == r)
+              for r in results]
+    chunk = ChatResult.chunk('x', 'gpt-4o')
+    checks.append(("数据块编解码一致", unpack_result(pack_result(chunk), chunk=True) == chunk))
+    return checks
+
+def test_chat(manager: AIModelManager, server: MockOpenAIServer):
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(lambda i: manager.chat('openai', f'你好{i}', model='mock-model'),
+                                    range(32)))
+    expected = ''.join(server.token(i) for i in range(server.chunks))
+    return [
+        ("32个并发请求全部成功", all(r['success'] and r['content'] == expected for r in results)),
+        ("usage从工作进程返回", results[0]['usage']['completion_tokens'] == server.chunks),
+        ("usage统计在父进程完成", manager.prefix_cache_report()['openai']['requests'] == 32),
+    ]
+
+def test_stream(manager: AIModelManager, server: MockOpenAIServer):
+    result = collect_stream(manager.chat_stream('openai', '你好', model='mock-model'))
+    expected = ''.join(server.token(i) for i in range(server.chunks))
+    return [("流式请求内容完整", result['success'] and result['content'] == expected
+             and result['usage']['completion_tokens'] == server.chunks)]
+
+def test_close_and_cancel(manager: AIModelManager, server: MockOpenAIServer):
+    checks = []
+
+    count = len(server.disconnects)
+    stream = manager.chat_stream('openai', '写一篇长文', model='mock-model')
+    for i, _ in enumerate(stream):
+        if i == 2:
+            break
+    start = time.monotonic()
+    stream.close()
+    released = server.wait_disconnect(count + 1, timeout=2)
+    checks.append((f"关闭流后工作进程关闭上游连接 ({(time.monotonic() - start) * 1000:.0f}ms)", released))
+
+    count = len(server.disconnects)
+    cancel = CancelToken()
+    stream = manager.chat_stream('openai', '写一篇长文', model='mock-model', cancel=cancel)
+    next(stream)
+    threading.Timer(0.05, cancel.cancel).start()
+    chunks = list(stream)
+    released = server.wait_disconnect(count + 1, timeout=2)
+    checks.append(("取消后上游连接关闭", released))
+    checks.append(("取消的流以cancelled结束", chunks and chunks[-1].get('code') == 'cancelled'))
+    return checks
+
+def test_deadline(manager: AIModelManager, server: MockOpenAIServer):
+    server.latency = 0.5
+    try:
+        start = time.monotonic()
+        result = manager.chat('openai', '你好', model='mock-model', timeout=0.2)
+        elapsed = time.monotonic() - start
+    finally:
+        server.latency = 0.0
+    return [(f"截止时间传递到工作进程 ({elapsed * 1000:.0f}ms, {result.get('error_type')})",
+             not result['success'] and result['error_type'] == 'timeout' and elapsed < 0.45)]
+
+def test_coalescing(manager: AIModelManager, server: MockOpenAIServer):
+    server.latency = 0.2
+    try:
+        before = len(server.requests)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(
+                lambda _: manager.chat('openai', '相同的问题', model='mock-model', temperature=0), range(8)))
+    finally:
+        server.latency = 0.0
+    return [("相同请求在父进程合并", all(r['success'] for r in results) and len(server.requests) - before == 1)]
+
+def main():
+    print("🧪 多进程执行模式测试")
+    print("-" * 50)
+
+    checks = test_pack_result()
+    with MockOpenAIServer(chunks=20, chunk_interval=0.01) as server:
+        # 工作进程按配置创建客户端
+        os.environ['OPENAI_API_KEY'] = 'test'
+        os.environ['OPENAI_BASE_URL'] = server.base_url
+        manager = AIModelManager(processes=2, platforms=['openai'])
+        try:
+            checks += test_chat(manager, server)
+            checks += test_stream(manager, server)
+            checks += test_close_and_cancel(manager, server)
+            checks += test_deadline(manager, server)
+            checks += test_coalescing(manager, server)
+        finally:
+            manager.close()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,164 @@
+"""
+智谱AI异步任务测试脚本
+
+使用本地模拟的异步任务接口 (chat.asyncCompletions.create / retrieve_completion_result) 测试，
+不需要API密钥：
+- 结果按完成顺序返回，按custom_id对应，带task_id和usage
+- 提交失败、任务失败作为失败结果返回；查询时的临时错误会重试
+- 进行中的任务数不超过max_pending
+- 已到查询时间的任务合并为一批查询，仍在处理的任务退避；查询次数远少于固定间隔轮询
+- 超过最长等待时间时未完成的任务返回deadline_exceeded
+"""
+import os
+import sys
+import time
+import threading
+from types import SimpleNamespace
+
+# 添加项目根目录到Python路径
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from platforms import ZhipuClient
+from platforms.zhipu import ZhipuAsyncTasks
+
+class UpstreamError(Exception):
+    def __init__(self, message: str, status_code: int):
+        super().__init__(message)
+        self.status_code = status_code
+
+class MockAsyncCompletions:
+    """
+    模拟的异步任务接口
+
+    任务在提交duration秒后完成（消息以"slow"开头时为slow_duration秒）；
+    消息为"fail"的任务执行失败，"reject"的提交被拒绝，"flaky"的任务首次查询返回503
+    """
+
+    def __init__(self, duration: float = 0.1, slow_duration: float = 0.4):
+        self.duration = duration
+        self.slow_duration = slow_duration
+        self.tasks = {}
+        self.retrieve_times = []
+        self.retrieves = {}
+        self.outstanding = 0
+        self.max_outstanding = 0
+        self._lock = threading.Lock()
+
+    def create(self, model, messages, **kwargs):
+        message = messages[-1]['content']
+        if message == 'reject':
+            raise UpstreamError('invalid request', 400)
+        with self._lock:
+            task_id = f"task-{len(self.tasks) + 1}"
+            duration = self.slow_duration if message.startswith('slow') else self.duration
+            self.tasks[task_id] = {'model': model, 'message': message, 'done_at': time.monotonic() + duration,
+                                   'collected': False, 'kwargs': kwargs}
+            self.outstanding += 1
+            self.max_outstanding = max(self.max_outstanding, self.outstanding)
+        return SimpleNamespace(id=task_id, task_status='PROCESSING')
+
+    def retrieve_completion_result(self, id):
+        with self._lock:
+            self.retrieve_times.append(time.monotonic())
+            self.retrieves[id] = self.retrieves.get(id, 0) + 1
+            task = self.tasks[id]
+            if task['message'] == 'flaky' and self.retrieves[id] == 1:
+                raise UpstreamError('service unavailable', 503)
+            if time.monotonic() < task['done_at']:
+                return SimpleNamespace(id=id, task_status='PROCESSING', model=task['model'], choices=[], usage=None)
+            if not task['collected']:
+                task['collected'] = True
+                self.outstanding -= 1
+        if task['message'] == 'fail':
+            return SimpleNamespace(id=id, task_status='FAIL', model=task['model'], choices=[], usage=None)
+        return SimpleNamespace(
+            id=id, task_status='SUCCESS', model=task['model'],
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"echo: {task['message']}"))],
+            usage=SimpleNamespace(prompt_tokens=5, completion_tokens=3, total_tokens=8, prompt_tokens_details=None),
+        )
+
+def create_tasks(mock: MockAsyncCompletions, **options) -> ZhipuAsyncTasks:
+    client = SimpleNamespace(chat=SimpleNamespace(asyncCompletions=mock))
+    return ZhipuAsyncTasks(client, **options)
+
+def polling_rounds(times, gap: float) -> int:
+    """按时间间隔把查询分组，返回查询轮数"""
+    times = sorted(times)
+    return 1 + sum(1 for a, b in zip(times, times[1:]) if b - a > gap)
+
+def test_async_tasks():
+    checks = []
+
+    mock = MockAsyncCompletions()
+    tasks = create_tasks(mock, poll_interval=0.05, max_interval=0.2)
+    prompts = ([f"slow问题{i}" for i in range(5)] + [f"问题{i}" for i in range(95)]
+               + [('custom-x', '自定义ID'), {'id': 'bad', 'message': 'fail'}, {'id': 'rejected', 'message': 'reject'},
+                  {'id': 'flaky', 'message': 'flaky'}])
+    order = []
+    results = {}
+    for custom_id, result in tasks.run(prompts, 'glm-4-flash', max_tokens=50, system_prompt='简短回答'):
+        order.append(custom_id)
+        results[custom_id] = result
+
+    checks.append(("结果数量与输入一致", len(results) == 104 and len(order) == 104))
+    checks.append(("按custom_id对应结果，带task_id和usage",
+                   results['7']['content'] == "echo: 问题2" and results['custom-x']['content'] == "echo: 自定义ID"
+                   and results['7']['task_id'].startswith('task-') and results['7']['usage']['total_tokens'] == 8))
+    submitted = mock.tasks['task-1']
+    checks.append(("请求参数和系统提示词传递到提交接口",
+                   submitted['kwargs']['max_tokens'] == 50 and submitted['model'] == 'glm-4-flash'))
+    checks.append(("结果按完成顺序返回（先提交的慢任务最后完成）",
+                   all(order.index(str(i)) > order.index('50') for i in range(5))))
+    checks.append(("任务失败、提交被拒绝作为失败结果返回",
+                   not results['bad']['success'] and results['bad']['code'] == 'FAIL'
+                   and not results['rejected']['success'] and results['rejected']['code'] == 400
+                   and 'task_id' not in results['rejected']))
+    checks.append(("查询时的临时错误会重试", results['flaky']['success'] and mock.retrieves['task-103'] >= 2))
+
+    # 固定间隔(poll_interval)轮询需要的查询次数约为 sum(耗时/间隔)
+    naive = sum(int((mock.slow_duration if t['message'].startswith('slow') else mock.duration) / 0.05) + 1
+                for t in mock.tasks.values())
+    rounds = polling_rounds(mock.retrieve_times, 0.01)
+    checks.append((f"合并查询并退避（{tasks.polls}次查询、{rounds}轮，固定间隔轮询约{naive}次）",
+                   tasks.polls < naive * 0.7 and rounds * 10 < tasks.polls))
+    slow_polls = [mock.retrieves[f'task-{i}'] for i in range(1, 6)]
+    checks.append(("慢任务的查询间隔递增", max(slow_polls) <= 6))
+
+    mock = MockAsyncCompletions(duration=0.05)
+    tasks = create_tasks(mock, max_pending=10, poll_interval=0.02)
+    results = dict(tasks.run((f"问题{i}" for i in range(60)), 'glm-4-flash'))
+    checks.append((f"进行中的任务数不超过max_pending（最大{mock.max_outstanding}）",
+                   len(results) == 60 and mock.max_outstanding <= 10
+                   and all(r['success'] for r in results.values())))
+
+    mock = MockAsyncCompletions(duration=0.05, slow_duration=5)
+    tasks = create_tasks(mock, poll_interval=0.02)
+    start = time.monotonic()
+    results = dict(tasks.run(['问题', 'slow问题'], 'glm-4-flash', timeout=0.3))
+    elapsed = time.monotonic() - start
+    checks.append(("超过最长等待时间时未完成的任务返回deadline_exceeded",
+                   results['0']['success'] and results['1']['code'] == 'deadline_exceeded'
+                   and results['1']['task_id'] == 'task-2' and elapsed < 0.5))
+
+    client = ZhipuClient(api_key='test.test')
+    mock = MockAsyncCompletions(duration=0.02)
+    client.async_tasks = create_tasks(mock, poll_interval=0.02)
+    results = dict(client.chat_async_tasks(['你好'], model='glm-4-flash'))
+    checks.append(("ZhipuClient.chat_async_tasks", results['0']['content'] == 'echo: 你好'))
+    return checks
+
+def main():
+    print("🧪 智谱AI异步任务测试 (本地模拟接口)")
+    print("-" * 50)
+
+    checks = test_async_tasks()
+
+    for name, passed in checks:
+        print(f"{'✅' if passed else '❌'} {name}")
+
+    passed = sum(1 for _, ok in checks if ok)
+    print(f"\n📊 测试完成: {passed}/{len(checks)} 通过")
+    return passed == len(checks)
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)